@@ -58,6 +58,12 @@ nonversion_urlpatterns = [
     # Маршруты для чатов
     path('chats/', include('chats.urls')),    
 
+    # Порционная загрузка файлов
+    path('', include('core.urls')),
+
+    # Маршруты для системы логирования
+    path('logs/', include('logging_system.urls')),
+
 ]
 
 # Добавляем маршруты для Swagger UI и ReDoc
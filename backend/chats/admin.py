@@ -14,7 +14,8 @@ class ChatAdmin(admin.ModelAdmin):
     """
     Административный интерфейс для модели Chat.
     """
-    list_display = ('id', 'client', 'creator', 'created_at', 'updated_at')
+    list_display = ('id', 'client', 'creator', 'client_unread_count', 'creator_unread_count',
+                    'client_last_read_id', 'creator_last_read_id', 'created_at', 'updated_at')
     list_filter = ('created_at',)
     search_fields = ('client__username', 'creator__username')
     raw_id_fields = ('client', 'creator')
@@ -28,7 +29,9 @@ class MessageAdmin(admin.ModelAdmin):
     """
     list_display = ('id', 'chat', 'sender', 'content_preview', 'is_system_message', 
                    'read_by_client', 'read_by_creator', 'created_at')
-    list_filter = ('is_system_message', 'read_by_client', 'read_by_creator', 'created_at')
+    list_filter = ('is_system_message', 'created_at')
+    # Статусы прочтения вычисляются по отметкам прочтения чата
+    list_select_related = ('chat', 'sender')
     search_fields = ('content', 'sender__username', 'chat__id')
     raw_id_fields = ('chat', 'sender')
     date_hierarchy = 'created_at'
@@ -48,4 +51,12 @@ class MessageAdmin(admin.ModelAdmin):
             return f"{obj.content[:max_length]}..."
         return obj.content
     
-    content_preview.short_description = 'Содержимое'
\ No newline at end of file
+    content_preview.short_description = 'Содержимое'
+    
+    @admin.display(boolean=True, description='Прочитано клиентом')
+    def read_by_client(self, obj):
+        return obj.read_by_client
+    
+    @admin.display(boolean=True, description='Прочитано креатором')
+    def read_by_creator(self, obj):
+        return obj.read_by_creator
\ No newline at end of file
@@ -11,4 +11,8 @@ class ChatsConfig(AppConfig):
     """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chats'
-    verbose_name = 'Чаты'
\ No newline at end of file
+    verbose_name = 'Чаты'
+
+    def ready(self):
+        """Импортируем обработчики сигналов при загрузке приложения."""
+        import chats.signals
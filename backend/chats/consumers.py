@@ -0,0 +1,110 @@
+"""
+WebSocket consumer'ы приложения chats.
+
+Клиент подключается к ws://<host>/ws/chats/<chat_id>/?token=<jwt> и получает
+события чата в формате {"type": <событие>, "chat_id": ..., "data": {...}}:
+
+- message — новое сообщение (те же поля, что у MessageSerializer);
+- read — собеседник прочитал сообщения ({"user_id", "updated"});
+- typing — собеседник набирает текст ({"user_id", "is_typing"}).
+
+От клиента принимаются {"type": "typing", "is_typing": true|false},
+{"type": "read"} и {"type": "ping"}. Сообщения по-прежнему отправляются
+через REST API и приходят в сокет из сигнала post_save (chats.signals).
+"""
+
+import time
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.db.models import Q
+
+from .models import Chat
+from .realtime import (
+    EVENT_READ, EVENT_TYPING, chat_event, chat_group_name, read_payload
+)
+
+# Коды закрытия соединения (диапазон 4000-4999 отведен приложениям)
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_FORBIDDEN = 4403
+
+# Повторное «печатает» с тем же состоянием пересылается не чаще раза в N секунд
+TYPING_REPEAT_INTERVAL = 3.0
+
+
+@database_sync_to_async
+def get_chat_for_participant(chat_id, user):
+    """Чат, если пользователь — его участник, иначе None."""
+    return Chat.objects.filter(Q(client=user) | Q(creator=user), pk=chat_id).first()
+
+
+@database_sync_to_async
+def mark_messages_as_read(chat, user):
+    return chat.mark_messages_as_read(user)
+
+
+class ChatConsumer(AsyncJsonWebsocketConsumer):
+    """События одного чата для его участника."""
+
+    chat = None
+    group_name = None
+
+    async def connect(self):
+        self.user = self.scope.get('user')
+        if self.user is None or not self.user.is_authenticated:
+            await self.close(code=CLOSE_UNAUTHORIZED)
+            return
+
+        chat_id = self.scope['url_route']['kwargs']['chat_id']
+        self.chat = await get_chat_for_participant(chat_id, self.user)
+        if self.chat is None:
+            await self.close(code=CLOSE_FORBIDDEN)
+            return
+
+        self.group_name = chat_group_name(self.chat.id)
+        self.last_typing = (None, 0.0)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        event_type = content.get('type') if isinstance(content, dict) else None
+
+        if event_type == EVENT_TYPING:
+            await self.handle_typing(bool(content.get('is_typing', True)))
+        elif event_type == EVENT_READ:
+            await self.handle_read()
+        elif event_type == 'ping':
+            await self.send_json({'type': 'pong'})
+        else:
+            await self.send_json({'type': 'error', 'error': 'Неизвестный тип события'})
+
+    async def handle_typing(self, is_typing):
+        now = time.monotonic()
+        state, sent_at = self.last_typing
+        if state == is_typing and now - sent_at < TYPING_REPEAT_INTERVAL:
+            return
+        self.last_typing = (is_typing, now)
+        await self.channel_layer.group_send(
+            self.group_name,
+            chat_event(EVENT_TYPING, self.chat.id, {'user_id': self.user.id, 'is_typing': is_typing}),
+        )
+
+    async def handle_read(self):
+        updated = await mark_messages_as_read(self.chat, self.user)
+        if updated:
+            await self.channel_layer.group_send(
+                self.group_name,
+                chat_event(EVENT_READ, self.chat.id, read_payload(self.chat, self.user, updated)),
+            )
+
+    async def chat_event(self, event):
+        """Обработчик событий группы (type 'chat.event')."""
+        payload = event['payload']
+        # Свои события «печатает» и «прочитано» отправителю не возвращаем
+        if event['event'] in (EVENT_TYPING, EVENT_READ) and payload.get('user_id') == self.user.id:
+            return
+        await self.send_json({'type': event['event'], 'chat_id': event['chat_id'], 'data': payload})
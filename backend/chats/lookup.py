@@ -0,0 +1,62 @@
+"""
+Поиск чата по паре участников.
+
+У пары участников один чат независимо от ролей: канонический ключ
+(low_id, high_id) — меньший и больший ID участников — хранится в
+вычисляемых колонках Chat и покрыт уникальным индексом
+chat_participant_pair_uniq. Поиск по паре — один запрос по этому индексу
+вместо OR по двум порядкам (creator_id, client_id).
+
+Кэша «пара → ID чата» нет: всем вызывающим нужна сама строка чата, а
+запрос по ID стоит столько же, сколько запрос по уникальному индексу пары.
+"""
+
+from django.db import IntegrityError, transaction
+
+from .models import Chat
+
+
+def participant_pair(user_a_id, user_b_id):
+    """Канонический ключ пары участников: (меньший ID, больший ID)."""
+    user_a_id, user_b_id = int(user_a_id), int(user_b_id)
+    return (user_a_id, user_b_id) if user_a_id <= user_b_id else (user_b_id, user_a_id)
+
+
+def find_chat(user_a_id, user_b_id, queryset=None):
+    """
+    Чат между двумя пользователями (в любой роли) или None.
+
+    Args:
+        user_a_id, user_b_id: ID участников в любом порядке.
+        queryset: Базовый queryset чатов (например, с select_related
+            или ограниченный чатами текущего пользователя).
+    """
+    if queryset is None:
+        queryset = Chat.objects.all()
+    pair = participant_pair(user_a_id, user_b_id)
+    return queryset.filter(low_id=pair[0], high_id=pair[1]).first()
+
+
+def get_or_create_chat(client, creator):
+    """
+    Возвращает чат пары участников, создавая его при отсутствии.
+
+    Безопасно при одновременных запросах: вставка выполняется в точке
+    сохранения, и если параллельный запрос успел создать чат для той же
+    пары (нарушение chat_participant_pair_uniq), возвращается его чат.
+
+    Returns:
+        tuple: (chat, created)
+    """
+    chat = find_chat(client.pk, creator.pk)
+    if chat is not None:
+        return chat, False
+    try:
+        with transaction.atomic():
+            chat = Chat.objects.create(client=client, creator=creator)
+    except IntegrityError:
+        chat = find_chat(client.pk, creator.pk)
+        if chat is None:
+            raise
+        return chat, False
+    return chat, True
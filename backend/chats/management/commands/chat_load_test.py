@@ -0,0 +1,144 @@
+"""Management command to load-test WebSocket fan-out of chat events.
+
+Opens N concurrent WebSocket connections to one chat through the real ASGI
+stack (JWT middleware, URL router, ChatConsumer) and the configured channel
+layer, then broadcasts M events to the chat group and reports delivery
+latency across all sockets. Connections are in-process (channels.testing),
+so network cost is not included — the numbers show the consumer and
+channel layer overhead.
+
+With REDIS_URL set the Redis channel layer is used, otherwise the in-memory
+one. Temporary users and the chat are deleted afterwards unless --chat is given.
+
+Usage:
+  python manage.py chat_load_test --sockets 2000 --messages 20
+  python manage.py chat_load_test --sockets 500 --create-messages
+"""
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from chats.middleware import JWTAuthMiddleware
+from chats.models import Chat, Message
+from chats.realtime import EVENT_MESSAGE, chat_event, chat_group_name
+from chats.routing import websocket_urlpatterns
+
+User = get_user_model()
+
+
+def percentile(samples, fraction):
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+class Command(BaseCommand):
+    help = "Measure fan-out latency of chat events to many concurrent WebSocket connections"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sockets", type=int, default=2000, help="Concurrent connections (default: 2000).")
+        parser.add_argument("--messages", type=int, default=10, help="Events to broadcast (default: 10).")
+        parser.add_argument("--connect-batch", type=int, default=200, help="Connections opened at once (default: 200).")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Per-event receive timeout, seconds.")
+        parser.add_argument("--chat", type=int, default=None, help="Use an existing chat instead of a temporary one.")
+        parser.add_argument(
+            "--create-messages",
+            action="store_true",
+            help="Create Message rows (signal -> serializer -> layer) instead of raw group_send.",
+        )
+
+    def handle(self, *args, **options):
+        if get_channel_layer() is None:
+            raise CommandError("CHANNEL_LAYERS is not configured")
+
+        created = []
+        if options["chat"]:
+            chat = Chat.objects.filter(pk=options["chat"]).select_related("client", "creator").first()
+            if chat is None:
+                raise CommandError(f"Chat {options['chat']} not found")
+        else:
+            suffix = uuid.uuid4().hex[:8]
+            client = User.objects.create(username=f"load_client_{suffix}", email=f"load_client_{suffix}@example.invalid")
+            creator = User.objects.create(username=f"load_creator_{suffix}", email=f"load_creator_{suffix}@example.invalid")
+            created = [client, creator]
+            chat = Chat.objects.create(client=client, creator=creator)
+
+        try:
+            async_to_sync(self.run)(chat, options)
+        finally:
+            for user in created:
+                user.delete()
+
+    async def run(self, chat, options):
+        application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+        tokens = [str(AccessToken.for_user(chat.client)), str(AccessToken.for_user(chat.creator))]
+        sockets = options["sockets"]
+        timeout = options["timeout"]
+
+        self.stdout.write(f"Opening {sockets} connections to chat {chat.id}…")
+        communicators = []
+        started = time.perf_counter()
+        for start in range(0, sockets, options["connect_batch"]):
+            batch = [
+                WebsocketCommunicator(application, f"/ws/chats/{chat.id}/?token={tokens[i % 2]}")
+                for i in range(start, min(start + options["connect_batch"], sockets))
+            ]
+            results = await asyncio.gather(*(communicator.connect(timeout) for communicator in batch))
+            failed = sum(1 for connected, _ in results if not connected)
+            if failed:
+                raise CommandError(f"{failed} connection(s) were rejected")
+            communicators.extend(batch)
+        connect_seconds = time.perf_counter() - started
+        self.stdout.write(f"  connected in {connect_seconds:.2f}s ({sockets / connect_seconds:.0f} conn/s)")
+
+        self.stdout.write(f"{'event':>6} {'p50, ms':>10} {'p95, ms':>10} {'max, ms':>10}")
+        all_latencies = []
+        channel_layer = get_channel_layer()
+        create_message = database_sync_to_async(
+            lambda i: Message.objects.create(chat=chat, sender=chat.client, content=f"load test {i}")
+        )
+
+        async def receive(communicator):
+            await communicator.receive_json_from(timeout)
+            return time.perf_counter()
+
+        try:
+            fanout_started = time.perf_counter()
+            for i in range(options["messages"]):
+                receivers = [asyncio.ensure_future(receive(communicator)) for communicator in communicators]
+                sent_at = time.perf_counter()
+                if options["create_messages"]:
+                    await create_message(i)
+                else:
+                    await channel_layer.group_send(
+                        chat_group_name(chat.id),
+                        chat_event(EVENT_MESSAGE, chat.id, {"seq": i}),
+                    )
+                received_at = await asyncio.gather(*receivers)
+                latencies = sorted((moment - sent_at) * 1000 for moment in received_at)
+                all_latencies.extend(latencies)
+                self.stdout.write(
+                    f"{i + 1:>6} {statistics.median(latencies):>10.2f} "
+                    f"{percentile(latencies, 0.95):>10.2f} {latencies[-1]:>10.2f}"
+                )
+            fanout_seconds = time.perf_counter() - fanout_started
+        finally:
+            await asyncio.gather(*(communicator.disconnect() for communicator in communicators))
+
+        all_latencies.sort()
+        deliveries = len(all_latencies)
+        self.stdout.write(self.style.SUCCESS(
+            f"Delivered {deliveries} events to {sockets} sockets: "
+            f"p50 {statistics.median(all_latencies):.2f} ms, p95 {percentile(all_latencies, 0.95):.2f} ms, "
+            f"max {all_latencies[-1]:.2f} ms, {deliveries / fanout_seconds:.0f} deliveries/s"
+        ))
@@ -0,0 +1,59 @@
+"""
+Аутентификация WebSocket-соединений по JWT.
+
+Браузерный WebSocket не позволяет задать заголовок Authorization, поэтому
+access-токен передается в строке запроса: ws://.../ws/chats/1/?token=<jwt>.
+Заголовок Authorization: Bearer <jwt> тоже поддерживается (для не-браузерных
+клиентов). Проверка та же, что у REST API (rest_framework_simplejwt).
+"""
+
+import logging
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+logger = logging.getLogger(__name__)
+
+TOKEN_QUERY_PARAM = 'token'
+
+
+def get_raw_token(scope):
+    """Извлекает JWT из строки запроса или заголовка Authorization."""
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    tokens = query.get(TOKEN_QUERY_PARAM)
+    if tokens:
+        return tokens[0]
+
+    for name, value in scope.get('headers', ()):
+        if name == b'authorization':
+            parts = value.decode('latin-1').split()
+            if len(parts) == 2 and parts[0].lower() == 'bearer':
+                return parts[1]
+    return None
+
+
+@database_sync_to_async
+def get_user_for_token(raw_token):
+    """Пользователь по access-токену или AnonymousUser для недействительного токена."""
+    authentication = JWTAuthentication()
+    try:
+        validated_token = authentication.get_validated_token(raw_token)
+        return authentication.get_user(validated_token)
+    except (InvalidToken, TokenError, AuthenticationFailed) as exc:
+        logger.debug('WebSocket: недействительный токен: %s', exc)
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Заполняет scope['user'] по JWT; без токена — AnonymousUser."""
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        raw_token = get_raw_token(scope)
+        scope['user'] = await get_user_for_token(raw_token) if raw_token else AnonymousUser()
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-16 20:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0004_remove_chat_order'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['chat', 'created_at', 'id'], name='message_chat_created_id_idx'),
+        ),
+    ]
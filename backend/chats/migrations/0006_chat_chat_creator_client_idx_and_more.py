@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-16 20:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0005_message_message_chat_created_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chat',
+            index=models.Index(fields=['creator', 'client'], name='chat_creator_client_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chat',
+            index=models.Index(fields=['client', 'creator'], name='chat_client_creator_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('read_by_client', False)), fields=['chat'], name='message_unread_client_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('read_by_creator', False)), fields=['chat'], name='message_unread_creator_idx'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.3 on 2026-10-16 20:27
+
+import django.db.models.deletion
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_unread_counters(apps, schema_editor):
+    """Заполняет последнее сообщение и счетчики непрочитанных по флагам сообщений."""
+    Chat = apps.get_model('chats', 'Chat')
+    Message = apps.get_model('chats', 'Message')
+    UserUnreadCounter = apps.get_model('chats', 'UserUnreadCounter')
+
+    def unread(flag, participant):
+        # Как в прежнем Chat.get_unread_count_for_user: не прочитано и отправлено не участником
+        return Coalesce(Subquery(
+            Message.objects.filter(chat=OuterRef('pk'), **{flag: False})
+            .exclude(sender=OuterRef(participant))
+            .order_by()
+            .values('chat')
+            .annotate(total=Count('id'))
+            .values('total')
+        ), Value(0))
+
+    last_message = Message.objects.filter(chat=OuterRef('pk')).order_by('-created_at', '-id').values('id')[:1]
+    Chat.objects.update(
+        last_message=Subquery(last_message),
+        client_unread_count=unread('read_by_client', 'client'),
+        creator_unread_count=unread('read_by_creator', 'creator'),
+    )
+
+    totals = Counter()
+    chats = Chat.objects.filter(Q(client_unread_count__gt=0) | Q(creator_unread_count__gt=0))
+    for client_id, creator_id, client_unread, creator_unread in chats.values_list(
+        'client_id', 'creator_id', 'client_unread_count', 'creator_unread_count'
+    ).iterator():
+        totals[client_id] += client_unread
+        totals[creator_id] += creator_unread
+    UserUnreadCounter.objects.bulk_create(
+        [UserUnreadCounter(user_id=user_id, unread_count=count) for user_id, count in totals.items() if count],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0006_chat_chat_creator_client_idx_and_more'),
+        ('users', '0009_favoritecreator'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserUnreadCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='chat_unread_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='пользователь')),
+                ('unread_count', models.PositiveIntegerField(default=0, verbose_name='непрочитанные сообщения')),
+            ],
+            options={
+                'verbose_name': 'счетчик непрочитанных сообщений',
+                'verbose_name_plural': 'счетчики непрочитанных сообщений',
+            },
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='client_unread_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='непрочитано клиентом'),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='creator_unread_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='непрочитано креатором'),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='last_message',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chats.message', verbose_name='последнее сообщение'),
+        ),
+        migrations.RunPython(backfill_unread_counters, migrations.RunPython.noop),
+    ]
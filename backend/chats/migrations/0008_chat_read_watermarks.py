@@ -0,0 +1,108 @@
+# Generated by Django 5.2.3 on 2026-10-16 20:30
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Min, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_read_watermarks(apps, schema_editor):
+    """
+    Переносит флаги прочтения сообщений в отметки прочтения чатов.
+    
+    Отметка участника ставится перед первым непрочитанным им сообщением
+    собеседника (или на последнее сообщение чата, если непрочитанных нет),
+    поэтому ни одно непрочитанное сообщение не становится прочитанным.
+    Счетчики непрочитанных пересчитываются по новым отметкам.
+    """
+    Chat = apps.get_model('chats', 'Chat')
+    Message = apps.get_model('chats', 'Message')
+    UserUnreadCounter = apps.get_model('chats', 'UserUnreadCounter')
+
+    def chat_messages():
+        return Message.objects.filter(chat=OuterRef('pk')).order_by().values('chat')
+
+    def last_read(flag, participant):
+        first_unread = chat_messages().filter(**{flag: False}).exclude(sender=OuterRef(participant))
+        return Coalesce(
+            Subquery(first_unread.annotate(first=Min('id')).values('first')) - 1,
+            Subquery(chat_messages().annotate(last=Max('id')).values('last')),
+            Value(0),
+        )
+
+    def unread(last_read_field, participant):
+        after_mark = chat_messages().filter(id__gt=OuterRef(last_read_field)).exclude(sender=OuterRef(participant))
+        return Coalesce(Subquery(after_mark.annotate(total=Count('id')).values('total')), Value(0))
+
+    Chat.objects.update(
+        client_last_read_id=last_read('read_by_client', 'client'),
+        creator_last_read_id=last_read('read_by_creator', 'creator'),
+    )
+    Chat.objects.update(
+        client_unread_count=unread('client_last_read_id', 'client'),
+        creator_unread_count=unread('creator_last_read_id', 'creator'),
+    )
+
+    totals = Counter()
+    chats = Chat.objects.filter(Q(client_unread_count__gt=0) | Q(creator_unread_count__gt=0))
+    for client_id, creator_id, client_unread, creator_unread in chats.values_list(
+        'client_id', 'creator_id', 'client_unread_count', 'creator_unread_count'
+    ).iterator():
+        totals[client_id] += client_unread
+        totals[creator_id] += creator_unread
+    UserUnreadCounter.objects.all().delete()
+    UserUnreadCounter.objects.bulk_create(
+        [UserUnreadCounter(user_id=user_id, unread_count=count) for user_id, count in totals.items() if count],
+        batch_size=1000,
+    )
+
+
+def restore_read_flags(apps, schema_editor):
+    """Восстанавливает флаги прочтения сообщений по отметкам прочтения."""
+    Message = apps.get_model('chats', 'Message')
+    Message.objects.filter(Q(id__lte=F('chat__client_last_read_id')) | Q(sender=F('chat__client'))).update(read_by_client=True)
+    Message.objects.filter(Q(id__lte=F('chat__creator_last_read_id')) | Q(sender=F('chat__creator'))).update(read_by_creator=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0007_chat_unread_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='client_last_read_id',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='прочитано клиентом до сообщения'),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='creator_last_read_id',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='прочитано креатором до сообщения'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['chat', 'id'], name='message_chat_id_idx'),
+        ),
+        migrations.RunPython(backfill_read_watermarks, restore_read_flags),
+        migrations.RemoveIndex(
+            model_name='message',
+            name='message_unread_client_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='message',
+            name='message_unread_creator_idx',
+        ),
+        migrations.RemoveField(
+            model_name='message',
+            name='read_by_client',
+        ),
+        migrations.RemoveField(
+            model_name='message',
+            name='read_by_creator',
+        ),
+    ]
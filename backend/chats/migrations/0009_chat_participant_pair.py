@@ -0,0 +1,90 @@
+# Generated by Django 5.2.3 on 2026-10-16 20:32
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q, Sum
+
+
+def merge_duplicate_chats(apps, schema_editor):
+    """
+    Объединяет чаты одной пары участников перед созданием уникального индекса.
+    
+    Остается самый ранний чат пары: в него переносятся сообщения и заказы
+    остальных чатов, после чего они удаляются. Отметка прочтения участника
+    ставится перед первым непрочитанным им сообщением объединенных чатов,
+    последнее сообщение и счетчики непрочитанных пересчитываются.
+    """
+    Chat = apps.get_model('chats', 'Chat')
+    Message = apps.get_model('chats', 'Message')
+    UserUnreadCounter = apps.get_model('chats', 'UserUnreadCounter')
+    Order = apps.get_model('orders', 'Order')
+
+    def last_read_of(chat, user_id):
+        return chat.client_last_read_id if chat.client_id == user_id else chat.creator_last_read_id
+
+    affected_users = set()
+    duplicates = Chat.objects.values('low_id', 'high_id').annotate(total=Count('id')).filter(total__gt=1).order_by()
+    for pair in list(duplicates):
+        chats = list(Chat.objects.filter(low_id=pair['low_id'], high_id=pair['high_id']).order_by('id'))
+        keep, extra_ids = chats[0], [chat.id for chat in chats[1:]]
+
+        first_unread = {}
+        for user_id in (keep.client_id, keep.creator_id):
+            unread = Q()
+            for chat in chats:
+                unread |= Q(chat_id=chat.id, id__gt=last_read_of(chat, user_id))
+            first_unread[user_id] = Message.objects.filter(unread).exclude(sender_id=user_id).aggregate(
+                first=Min('id')
+            )['first']
+
+        Message.objects.filter(chat_id__in=extra_ids).update(chat_id=keep.id)
+        Order.objects.filter(chat_id__in=extra_ids).update(chat_id=keep.id)
+        Chat.objects.filter(pk__in=extra_ids).delete()
+
+        messages = Message.objects.filter(chat_id=keep.id)
+        keep.last_message_id = messages.order_by('-created_at', '-id').values_list('id', flat=True).first()
+        last_id = messages.aggregate(last=Max('id'))['last'] or 0
+        for user_id, last_read_field, unread_field in (
+            (keep.client_id, 'client_last_read_id', 'client_unread_count'),
+            (keep.creator_id, 'creator_last_read_id', 'creator_unread_count'),
+        ):
+            last_read = first_unread[user_id] - 1 if first_unread[user_id] else last_id
+            setattr(keep, last_read_field, last_read)
+            setattr(keep, unread_field, messages.filter(id__gt=last_read).exclude(sender_id=user_id).count())
+        keep.save(update_fields=[
+            'last_message', 'client_last_read_id', 'creator_last_read_id',
+            'client_unread_count', 'creator_unread_count',
+        ])
+        affected_users.update((keep.client_id, keep.creator_id))
+
+    # Общие счетчики непрочитанных затронутых пользователей — заново по их чатам
+    for user_id in affected_users:
+        total = (
+            (Chat.objects.filter(client_id=user_id).aggregate(total=Sum('client_unread_count'))['total'] or 0)
+            + (Chat.objects.filter(creator_id=user_id).aggregate(total=Sum('creator_unread_count'))['total'] or 0)
+        )
+        UserUnreadCounter.objects.update_or_create(user_id=user_id, defaults={'unread_count': total})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0008_chat_read_watermarks'),
+        ('orders', '0014_order_order_creator_created_id_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='high_id',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Greatest('client_id', 'creator_id'), output_field=models.BigIntegerField(), verbose_name='больший ID участника'),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='low_id',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Least('client_id', 'creator_id'), output_field=models.BigIntegerField(), verbose_name='меньший ID участника'),
+        ),
+        migrations.RunPython(merge_duplicate_chats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-16 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Отдельная миграция: на PostgreSQL ALTER TABLE нельзя выполнить в одной
+    # транзакции с изменением строк chats_chat (отложенные проверки FK)
+
+    dependencies = [
+        ('chats', '0009_chat_participant_pair'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='chat',
+            constraint=models.UniqueConstraint(fields=('low_id', 'high_id'), name='chat_participant_pair_uniq'),
+        ),
+    ]
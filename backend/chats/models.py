@@ -4,13 +4,24 @@
 Этот модуль содержит определения моделей для функционала чатов:
 - Chat: Модель чата между клиентом и креатором
 - Message: Модель сообщения в чате
+- UserUnreadCounter: Общее количество непрочитанных сообщений пользователя
 - SystemMessageTemplate: Шаблоны системных сообщений
 """
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest, Least
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
+# Участник чата, его отметка прочтения и счетчик непрочитанных в Chat
+UNREAD_FIELDS = (
+    ('client_id', 'client_last_read_id', 'client_unread_count'),
+    ('creator_id', 'creator_last_read_id', 'creator_unread_count'),
+)
+
+
 class Chat(models.Model):
     """
     Модель чата между клиентом и креатором.
@@ -30,6 +41,20 @@ class Chat(models.Model):
         related_name='creator_chats',
         verbose_name=_('креатор')
     )
+    # Канонический ключ пары участников независимо от ролей (см. chats.lookup):
+    # уникальный индекс по нему не дает создать второй чат для той же пары
+    low_id = models.GeneratedField(
+        expression=Least('client_id', 'creator_id'),
+        output_field=models.BigIntegerField(),
+        db_persist=True,
+        verbose_name=_('меньший ID участника')
+    )
+    high_id = models.GeneratedField(
+        expression=Greatest('client_id', 'creator_id'),
+        output_field=models.BigIntegerField(),
+        db_persist=True,
+        verbose_name=_('больший ID участника')
+    )
 
     created_at = models.DateTimeField(
         _('дата создания'),
@@ -44,11 +69,53 @@ class Chat(models.Model):
         default=True,
         help_text=_('Указывает, активен ли чат')
     )
+    # Денормализованные данные для списка чатов: обновляются при создании
+    # сообщения и отметке о прочтении (см. register_message, reset_unread_for)
+    last_message = models.ForeignKey(
+        'Message',
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_('последнее сообщение')
+    )
+    client_unread_count = models.PositiveIntegerField(
+        _('непрочитано клиентом'),
+        default=0,
+        editable=False
+    )
+    creator_unread_count = models.PositiveIntegerField(
+        _('непрочитано креатором'),
+        default=0,
+        editable=False
+    )
+    # Отметки прочтения: ID последнего прочитанного участником сообщения.
+    # Сообщение прочитано участником, если его ID не больше отметки
+    # или участник сам его отправил (см. Message.is_read_by)
+    client_last_read_id = models.PositiveBigIntegerField(
+        _('прочитано клиентом до сообщения'),
+        default=0,
+        editable=False
+    )
+    creator_last_read_id = models.PositiveBigIntegerField(
+        _('прочитано креатором до сообщения'),
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = _('чат')
         verbose_name_plural = _('чаты')
         ordering = ['-updated_at']
+        indexes = [
+            # Чаты пользователя (client=user или creator=user)
+            models.Index(fields=['creator', 'client'], name='chat_creator_client_idx'),
+            models.Index(fields=['client', 'creator'], name='chat_client_creator_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['low_id', 'high_id'], name='chat_participant_pair_uniq'),
+        ]
 
     def __str__(self):
         """
@@ -69,7 +136,7 @@ class Chat(models.Model):
         Returns:
             Message: Последнее сообщение в чате или None, если сообщений нет.
         """
-        return self.messages.order_by('-created_at').first()
+        return self.last_message
         
     def get_unread_count_for_user(self, user):
         """
@@ -81,16 +148,137 @@ class Chat(models.Model):
         Returns:
             int: Количество непрочитанных сообщений.
         """
-        if user == self.client:
-            # Для клиента считаем сообщения, которые он не прочитал
-            return self.messages.filter(read_by_client=False).exclude(sender=user).count()
-        elif user == self.creator:
-            # Для креатора считаем сообщения, которые он не прочитал
-            return self.messages.filter(read_by_creator=False).exclude(sender=user).count()
+        if user.id == self.client_id:
+            return self.client_unread_count
+        elif user.id == self.creator_id:
+            return self.creator_unread_count
         else:
             # Для других пользователей (например, администраторов) возвращаем 0
             return 0
 
+    def mark_messages_as_read(self, user):
+        """
+        Отмечает все сообщения чата прочитанными пользователем.
+        
+        Отметка прочтения переносится на последнее сообщение чата, а счетчик
+        непрочитанных обнуляется — это обновление одной строки чата, сами
+        сообщения не изменяются.
+        
+        Args:
+            user (User): Участник чата.
+            
+        Returns:
+            int: Количество сообщений, которые были непрочитаны.
+        """
+        return self.mark_read_up_to(user, None)
+
+    def mark_read_up_to(self, user, message_id):
+        """
+        Переносит отметку прочтения участника на сообщение message_id
+        (None — на последнее сообщение чата) и пересчитывает его счетчик.
+        
+        Отметка только растет. Строка чата блокируется (SELECT FOR UPDATE),
+        поэтому одновременное создание сообщения не теряет приращение счетчика.
+        
+        Returns:
+            int: На сколько уменьшилось количество непрочитанных сообщений.
+        """
+        fields = self.read_fields_for(user)
+        if fields is None:
+            return 0
+        last_read_field, unread_field = fields
+        with transaction.atomic():
+            state = Chat.objects.select_for_update().filter(pk=self.pk).values(
+                'last_message_id', last_read_field, unread_field
+            ).first()
+            if state is None:
+                return 0
+            target = state['last_message_id'] if message_id is None else message_id
+            last_read_id = max(state[last_read_field], target or 0)
+            if message_id is None or last_read_id >= (state['last_message_id'] or 0):
+                unread = 0
+            else:
+                unread = self.count_unread_after(user, last_read_id)
+            updates = {}
+            if last_read_id != state[last_read_field]:
+                updates[last_read_field] = last_read_id
+            if unread != state[unread_field]:
+                updates[unread_field] = unread
+            if updates:
+                Chat.objects.filter(pk=self.pk).update(**updates)
+            UserUnreadCounter.add(user.id, unread - state[unread_field])
+        setattr(self, last_read_field, last_read_id)
+        setattr(self, unread_field, unread)
+        return max(state[unread_field] - unread, 0)
+
+    def count_unread_after(self, user, last_read_id):
+        """
+        Количество сообщений собеседника после отметки прочтения.
+        
+        Диапазонный запрос по индексу message_chat_id_idx (chat, id).
+        """
+        return self.messages.filter(id__gt=last_read_id).exclude(sender_id=user.id).order_by().count()
+
+    def read_fields_for(self, user):
+        """Поля отметки прочтения и счетчика непрочитанных участника (None для постороннего)."""
+        if user.id == self.client_id:
+            return 'client_last_read_id', 'client_unread_count'
+        if user.id == self.creator_id:
+            return 'creator_last_read_id', 'creator_unread_count'
+        return None
+
+    def get_last_read_id_for(self, user):
+        """ID последнего прочитанного пользователем сообщения (0 для постороннего)."""
+        fields = self.read_fields_for(user)
+        return getattr(self, fields[0]) if fields else 0
+
+    @staticmethod
+    def register_message(message):
+        """
+        Учитывает новое сообщение: last_message, updated_at и счетчики непрочитанных.
+        
+        Новое сообщение непрочитано всеми участниками, кроме отправителя.
+        """
+        chat = message.chat
+        recipients = {
+            counter: getattr(chat, participant)
+            for participant, last_read, counter in UNREAD_FIELDS
+            if message.sender_id != getattr(chat, participant)
+        }
+        with transaction.atomic():
+            Chat.objects.filter(pk=chat.pk).update(
+                last_message_id=Greatest(Coalesce(F('last_message_id'), Value(0)), Value(message.pk)),
+                updated_at=timezone.now(),
+                **{counter: F(counter) + 1 for counter in recipients}
+            )
+            for user_id in recipients.values():
+                UserUnreadCounter.add(user_id, 1)
+
+    @staticmethod
+    def unregister_message(message):
+        """Обратное к register_message для удаляемого сообщения."""
+        chat = Chat.objects.filter(pk=message.chat_id).values(
+            'client_id', 'creator_id', 'last_message_id', 'client_last_read_id', 'creator_last_read_id'
+        ).first()
+        if chat is None:
+            return
+        recipients = {
+            counter: chat[participant]
+            for participant, last_read, counter in UNREAD_FIELDS
+            if message.pk > chat[last_read] and message.sender_id != chat[participant]
+        }
+        updates = {counter: Greatest(F(counter) - 1, Value(0)) for counter in recipients}
+        if chat['last_message_id'] is None:
+            # Удаленное сообщение было последним (FK уже обнулен SET_NULL)
+            updates['last_message_id'] = models.Subquery(
+                Message.objects.filter(chat_id=message.chat_id).order_by('-created_at', '-id').values('id')[:1]
+            )
+        with transaction.atomic():
+            if updates:
+                Chat.objects.filter(pk=message.chat_id).update(**updates)
+            for user_id in recipients.values():
+                UserUnreadCounter.add(user_id, -1)
+
 
 class Message(models.Model):
     """
@@ -124,14 +312,6 @@ class Message(models.Model):
         _('системное сообщение'),
         default=False
     )
-    read_by_client = models.BooleanField(
-        _('прочитано клиентом'),
-        default=False
-    )
-    read_by_creator = models.BooleanField(
-        _('прочитано креатором'),
-        default=False
-    )
     created_at = models.DateTimeField(
         _('дата создания'),
         auto_now_add=True
@@ -141,6 +321,12 @@ class Message(models.Model):
         verbose_name = _('сообщение')
         verbose_name_plural = _('сообщения')
         ordering = ['created_at']
+        indexes = [
+            # Сообщения чата по времени (в том числе курсорная пагинация)
+            models.Index(fields=['chat', 'created_at', 'id'], name='message_chat_created_id_idx'),
+            # Непрочитанные сообщения: диапазон ID после отметки прочтения
+            models.Index(fields=['chat', 'id'], name='message_chat_id_idx'),
+        ]
 
     def __str__(self):
         """
@@ -152,20 +338,71 @@ class Message(models.Model):
         sender = self.sender.username if self.sender else 'Система'
         return f"Сообщение от {sender} в чате {self.chat_id}"
 
+    def is_read_by(self, user_id, last_read_id):
+        """Прочитано ли сообщение участником с указанной отметкой прочтения."""
+        return self.sender_id == user_id or self.pk <= last_read_id
+
+    @property
+    def read_by_client(self):
+        """Прочитано ли сообщение клиентом (по отметке прочтения в чате)."""
+        return self.is_read_by(self.chat.client_id, self.chat.client_last_read_id)
+
+    @property
+    def read_by_creator(self):
+        """Прочитано ли сообщение креатором (по отметке прочтения в чате)."""
+        return self.is_read_by(self.chat.creator_id, self.chat.creator_last_read_id)
+
     def mark_as_read_by(self, user):
         """
-        Отмечает сообщение как прочитанное пользователем.
+        Отмечает сообщение (и все предыдущие) как прочитанное пользователем.
         
         Args:
             user (User): Пользователь, прочитавший сообщение.
         """
-        # Определяем, является ли пользователь клиентом или креатором чата
-        if user == self.chat.client:
-            self.read_by_client = True
-            self.save(update_fields=['read_by_client'])
-        elif user == self.chat.creator:
-            self.read_by_creator = True
-            self.save(update_fields=['read_by_creator'])
+        self.chat.mark_read_up_to(user, self.pk)
+
+
+class UserUnreadCounter(models.Model):
+    """
+    Общее количество непрочитанных сообщений пользователя во всех чатах.
+    
+    Сумма client_unread_count/creator_unread_count по чатам пользователя,
+    которая поддерживается вместе с ними — значок непрочитанных читается
+    одной строкой по первичному ключу.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='chat_unread_counter',
+        verbose_name=_('пользователь')
+    )
+    unread_count = models.PositiveIntegerField(_('непрочитанные сообщения'), default=0)
+
+    class Meta:
+        verbose_name = _('счетчик непрочитанных сообщений')
+        verbose_name_plural = _('счетчики непрочитанных сообщений')
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread_count}"
+
+    @classmethod
+    def add(cls, user_id, delta):
+        """Атомарно прибавляет delta (может быть отрицательной, не опускается ниже нуля)."""
+        if not delta:
+            return
+        updated = cls.objects.filter(pk=user_id).update(
+            unread_count=Greatest(F('unread_count') + delta, Value(0))
+        )
+        if not updated and delta > 0:
+            counter, created = cls.objects.get_or_create(pk=user_id, defaults={'unread_count': delta})
+            if not created:
+                cls.objects.filter(pk=user_id).update(unread_count=F('unread_count') + delta)
+
+    @classmethod
+    def get_for_user(cls, user):
+        """Общее количество непрочитанных сообщений пользователя."""
+        return cls.objects.filter(pk=user.pk).values_list('unread_count', flat=True).first() or 0
 
 
 class SystemMessageTemplate(models.Model):
@@ -8,6 +8,7 @@ from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .lookup import get_or_create_chat
 from .models import Chat, Message
 from .permissions import IsParticipantInChat
 from orders.models import Order, OrderResponse
@@ -347,36 +348,22 @@ class CreateOrderResponseByOrderView(APIView):
             
             # Проверяем, существует ли уже чат между этими пользователями для этого заказа
             logger.info("Поиск существующего чата между клиентом %s и креатором %s для заказа %s", client.id, creator.id, order.id)
-            # Сначала ищем чат между этими пользователями
             # Поскольку теперь заказы связаны с чатом через ForeignKey, ищем чат по пользователям
-            chat = Chat.objects.filter(
-                client=client,
-                creator=creator
-            ).first()
+            try:
+                chat, created = get_or_create_chat(client, creator)
+            except Exception as e:
+                logger.error("Ошибка при создании чата: %s", str(e))
+                return Response({"error": f"Не удалось создать чат: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             
-            # Логируем результат поиска
-            if chat:
-                logger.info("Найден существующий чат между пользователями, ID: %s", chat.id)
+            if created:
+                logger.info("Чат успешно создан, ID: %s", chat.id)
+                # Связываем заказ с чатом
+                order.chat = chat
+                order.save()
             else:
-                logger.info("Чат между пользователями не найден")
-            
-            # Если чата нет, создаем его
-            if not chat:
-                logger.info("Создание нового чата между клиентом %s и креатором %s", client.id, creator.id)
-                try:
-                    chat = Chat.objects.create(
-                        client=client,
-                        creator=creator
-                    )
-                    # Связываем заказ с чатом
-                    order.chat = chat
-                    order.save()
-                    logger.info("Чат успешно создан, ID: %s", chat.id)
-                except Exception as e:
-                    logger.error("Ошибка при создании чата: %s", str(e))
-                    return Response({"error": f"Не удалось создать чат: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                logger.info("Найден существующий чат между пользователями, ID: %s", chat.id)
             # Если чат есть, но заказ не связан с чатом, связываем
-            elif not order.chat:
+            if not order.chat:
                 order.chat = chat
                 order.save()
             
@@ -0,0 +1,77 @@
+"""
+Рассылка событий чатов через channel layer (WebSocket, см. chats.consumers).
+
+Каждый чат — группа channel layer, в которую входят WebSocket-соединения
+его участников. События:
+
+- message — новое сообщение (MessageSerializer);
+- read — участник прочитал сообщения чата (last_read_id — его новая отметка прочтения);
+- typing — участник набирает текст.
+
+Сообщения рассылаются сигналом post_save после фиксации транзакции
+(см. chats.signals), отметки о прочтении — из представлений и consumer'а.
+Если channel layer не настроен, рассылка молча пропускается: REST API
+работает как раньше.
+"""
+
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+CHAT_GROUP = 'chat_{chat_id}'
+
+EVENT_MESSAGE = 'message'
+EVENT_READ = 'read'
+EVENT_TYPING = 'typing'
+
+
+def chat_group_name(chat_id):
+    """Имя группы channel layer для чата."""
+    return CHAT_GROUP.format(chat_id=chat_id)
+
+
+def chat_event(event, chat_id, payload):
+    """Событие группы; type — имя обработчика в ChatConsumer (chat_event)."""
+    return {'type': 'chat.event', 'event': event, 'chat_id': chat_id, 'payload': payload}
+
+
+def send_chat_event(chat_id, event, payload):
+    """Отправляет событие всем соединениям чата (из синхронного кода)."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(chat_group_name(chat_id), chat_event(event, chat_id, payload))
+    except Exception:
+        # Недоступный channel layer не должен ломать REST-запрос
+        logger.exception('Не удалось отправить событие %s в чат %s', event, chat_id)
+
+
+def serialize_message(message):
+    from .serializers import MessageSerializer
+    return MessageSerializer(message).data
+
+
+def broadcast_message(message):
+    """Рассылает новое сообщение участникам чата."""
+    send_chat_event(message.chat_id, EVENT_MESSAGE, serialize_message(message))
+
+
+def read_payload(chat, user, updated):
+    return {'user_id': user.id, 'updated': updated, 'last_read_id': chat.get_last_read_id_for(user)}
+
+
+def mark_chat_read(chat, user):
+    """
+    Отмечает сообщения чата прочитанными пользователем и рассылает отметку о прочтении.
+
+    Returns:
+        int: Количество отмеченных сообщений.
+    """
+    updated = chat.mark_messages_as_read(user)
+    if updated:
+        send_chat_event(chat.id, EVENT_READ, read_payload(chat, user, updated))
+    return updated
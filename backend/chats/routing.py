@@ -0,0 +1,11 @@
+"""
+WebSocket-маршруты приложения chats (подключаются в ugc_market/asgi.py).
+"""
+
+from django.urls import path
+
+from .consumers import ChatConsumer
+
+websocket_urlpatterns = [
+    path('ws/chats/<int:chat_id>/', ChatConsumer.as_asgi()),
+]
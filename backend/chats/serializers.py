@@ -9,13 +9,29 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
+from .lookup import find_chat, get_or_create_chat
 from .models import Chat, Message
-from orders.models import Order
+from core.media import signed_download_url
 from users.serializers import UserBriefSerializer
 
 User = get_user_model()
 
 
+def message_attachment_url(message, request=None):
+    """
+    Подписанная ссылка на вложение сообщения (отдача с поддержкой Range).
+    
+    Returns:
+        str | None: URL или None, если вложения нет.
+    """
+    if not message.attachment:
+        return None
+    return signed_download_url(
+        request, 'chat-message-attachment', 'message-attachment', message.pk,
+        chat_pk=message.chat_id
+    )
+
+
 class MessageSerializer(serializers.ModelSerializer):
     """
     Сериализатор для модели сообщений.
@@ -24,146 +40,45 @@ class MessageSerializer(serializers.ModelSerializer):
     Включает вложенный сериализатор для отправителя.
     """
     sender_details = UserBriefSerializer(source='sender', read_only=True)
+    attachment_url = serializers.SerializerMethodField()
     
     class Meta:
         model = Message
         fields = [
             'id', 'chat', 'sender', 'sender_details', 'content', 'attachment',
-            'is_system_message', 'read_by_client', 'read_by_creator', 'created_at'
+            'attachment_url', 'is_system_message', 'read_by_client', 'read_by_creator',
+            'created_at'
         ]
         read_only_fields = [
             'id', 'sender_details', 'is_system_message', 'read_by_client',
             'read_by_creator', 'created_at'
         ]
     
+    def get_attachment_url(self, obj):
+        return message_attachment_url(obj, self.context.get('request'))
+    
+    def to_representation(self, instance):
+        # Вместо пути /media/ (не отдается напрямую) — подписанная ссылка
+        data = super().to_representation(instance)
+        data['attachment'] = data['attachment_url']
+        return data
+    
     def create(self, validated_data):
         """
-        Переопределяем метод create для установки отправителя и
-        статусов прочтения.
+        Переопределяем метод create для установки отправителя.
+        
+        Статусы прочтения не хранятся в сообщении: они вычисляются по
+        отметкам прочтения чата, а отправитель всегда считается прочитавшим.
         """
         request = self.context.get('request')
-        chat = validated_data.get('chat')
         
         # Устанавливаем текущего пользователя как отправителя, если не указано иначе
         if not validated_data.get('sender') and request and hasattr(request, 'user'):
             validated_data['sender'] = request.user
         
-        # Устанавливаем флаги прочтения в зависимости от отправителя
-        if validated_data.get('sender') == chat.client:
-            validated_data['read_by_client'] = True
-        elif validated_data.get('sender') == chat.creator:
-            validated_data['read_by_creator'] = True
-        
         return super().create(validated_data)
 
 
-class ChatOrderSerializer(serializers.ModelSerializer):
-    """
-    Сериализатор для заказа в контексте чата.
-    
-    Представляет минимальную информацию о заказе, связанном с чатом.
-    """
-    class Meta:
-        model = Order
-        fields = ['id', 'title', 'status', 'budget']
-
-
-class LastMessageSerializer(serializers.ModelSerializer):
-    """
-    Сериализатор для последнего сообщения в чате.
-    
-    Используется для отображения превью последнего сообщения в списке чатов.
-    """
-    sender_name = serializers.SerializerMethodField()
-    
-    class Meta:
-        model = Message
-        fields = ['id', 'content', 'sender_name', 'is_system_message', 'created_at']
-    
-    def get_sender_name(self, obj):
-        """
-        Возвращает имя отправителя сообщения.
-        
-        Для системных сообщений возвращает "Система".
-        
-        Args:
-            obj (Message): Объект сообщения.
-            
-        Returns:
-            str: Имя отправителя или "Система".
-        """
-        if obj.is_system_message:
-            return "Система"
-        elif obj.sender:
-            return obj.sender.username
-        return None
-
-
-class ChatListSerializer(serializers.ModelSerializer):
-    """
-    Сериализатор для списка чатов.
-    
-    Используется для отображения чатов в списке с минимальной информацией.
-    """
-    client = UserBriefSerializer(read_only=True)
-    creator = UserBriefSerializer(read_only=True)
-    last_order = serializers.SerializerMethodField()
-    last_message = serializers.SerializerMethodField()
-    unread_count = serializers.SerializerMethodField()
-    
-    class Meta:
-        model = Chat
-        fields = [
-            'id', 'client', 'creator', 'last_order', 'last_message', 
-            'unread_count', 'created_at', 'updated_at'
-        ]
-    
-    def get_last_order(self, obj):
-        """
-        Возвращает последний заказ в чате.
-        
-        Args:
-            obj (Chat): Объект чата.
-            
-        Returns:
-            dict: Сериализованный последний заказ или None, если заказов нет.
-        """
-        last_order = obj.orders.order_by('-created_at').first()
-        if last_order:
-            return ChatOrderSerializer(last_order).data
-        return None
-    
-    def get_last_message(self, obj):
-        """
-        Возвращает последнее сообщение в чате.
-        
-        Args:
-            obj (Chat): Объект чата.
-            
-        Returns:
-            dict: Сериализованное последнее сообщение или None, если сообщений нет.
-        """
-        last_message = obj.get_last_message()
-        if last_message:
-            return LastMessageSerializer(last_message).data
-        return None
-    
-    def get_unread_count(self, obj):
-        """
-        Возвращает количество непрочитанных сообщений для текущего пользователя.
-        
-        Args:
-            obj (Chat): Объект чата.
-            
-        Returns:
-            int: Количество непрочитанных сообщений.
-        """
-        request = self.context.get('request')
-        if request and hasattr(request, 'user'):
-            return obj.get_unread_count_for_user(request.user)
-        return 0
-
-
 class ChatDetailSerializer(serializers.ModelSerializer):
     """
     Сериализатор для детальной информации о чате.
@@ -204,8 +119,8 @@ class ChatCreateSerializer(serializers.ModelSerializer):
         if client == creator:
             raise serializers.ValidationError("Клиент и креатор должны быть разными пользователями")
         
-        # Проверяем, что такой чат еще не существует
-        if Chat.objects.filter(client=client, creator=creator).exists():
+        # Проверяем, что такой чат еще не существует (в любой роли участников)
+        if find_chat(client.id, creator.id) is not None:
             raise serializers.ValidationError("Чат между этими пользователями уже существует")
         
         return data
@@ -214,15 +129,16 @@ class ChatCreateSerializer(serializers.ModelSerializer):
         """
         Создаем новый чат и добавляем системное сообщение о создании чата.
         """
-        chat = super().create(validated_data)
+        chat, created = get_or_create_chat(validated_data['client'], validated_data['creator'])
+        if not created:
+            # Чат этой пары создан параллельным запросом после validate()
+            raise serializers.ValidationError("Чат между этими пользователями уже существует")
         
         # Создаем системное сообщение о создании чата
         Message.objects.create(
             chat=chat,
             content="Чат создан",
-            is_system_message=True,
-            read_by_client=False,
-            read_by_creator=False
+            is_system_message=True
         )
         
         return chat
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""
+Обработчики сигналов приложения chats.
+
+Создание и удаление сообщения обновляет денормализованные данные чата
+(последнее сообщение, счетчики непрочитанных) в той же транзакции.
+Новые сообщения рассылаются участникам чата через channel layer
+после фиксации транзакции (см. chats.realtime).
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Chat, Message
+from .realtime import broadcast_message
+
+
+@receiver(post_save, sender=Message)
+def push_new_message(sender, instance, created, **kwargs):
+    """Обновляет счетчики чата и отправляет созданное сообщение в WebSocket-группу чата."""
+    if created:
+        Chat.register_message(instance)
+        transaction.on_commit(lambda: broadcast_message(instance))
+
+
+@receiver(post_delete, sender=Message)
+def unregister_deleted_message(sender, instance, **kwargs):
+    """Убирает удаленное сообщение из счетчиков чата."""
+    Chat.unregister_message(instance)
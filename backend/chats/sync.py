@@ -0,0 +1,164 @@
+"""
+Инкрементальная синхронизация сообщений чата.
+
+Вместо полной истории клиент запрашивает только нужное окно:
+
+- ?after=<id> — сообщения новее указанного (обновление открытого чата);
+- ?since=<ISO datetime> — сообщения, созданные позже момента времени;
+- ?before=<id> — страница более старых сообщений (прокрутка вверх);
+- без параметров — последние сообщения чата.
+
+Размер окна ограничен параметром ?limit (не больше CHAT_SYNC_MAX_LIMIT).
+Позиция задается парой (created_at, id), поэтому каждый запрос — диапазон
+индекса message_chat_created_id_idx, а обновление стоит пропорционально
+числу новых сообщений. Сообщения в ответе всегда идут от старых к новым.
+Если сообщение after/before уже удалено, граница задается только его ID:
+клиент, последнее увиденное сообщение которого удалили, продолжает
+синхронизацию.
+
+Данные отправителей не повторяются в каждом сообщении: они отдаются
+один раз в словаре users.
+"""
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from users.serializers import UserBriefSerializer
+
+from .models import Message
+from .serializers import message_attachment_url
+
+SYNC_PARAMS = ('after', 'since', 'before', 'limit')
+DEFAULT_LIMIT = 50
+
+
+class SyncMessageSerializer(serializers.ModelSerializer):
+    """Сообщение без вложенных данных отправителя (они в users ответа)."""
+    attachment_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Message
+        fields = [
+            'id', 'chat', 'sender', 'content', 'attachment', 'attachment_url',
+            'is_system_message', 'read_by_client', 'read_by_creator', 'created_at'
+        ]
+        read_only_fields = fields
+
+    def get_attachment_url(self, obj):
+        return message_attachment_url(obj, self.context.get('request'))
+
+
+def is_sync_request(query_params):
+    """Передан ли хотя бы один параметр синхронизации."""
+    return any(param in query_params for param in SYNC_PARAMS)
+
+
+def _parse_id(value, name):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({name: 'Ожидается ID сообщения'})
+    if value < 0:
+        raise ValidationError({name: 'Ожидается ID сообщения'})
+    return value
+
+
+def parse_sync_params(query_params):
+    """
+    Разбирает параметры синхронизации.
+
+    Returns:
+        dict: after, since, before (или None) и limit.
+    """
+    max_limit = getattr(settings, 'CHAT_SYNC_MAX_LIMIT', 200)
+    params = {'after': None, 'since': None, 'before': None, 'limit': DEFAULT_LIMIT}
+
+    if query_params.get('after'):
+        params['after'] = _parse_id(query_params['after'], 'after')
+    if query_params.get('before'):
+        params['before'] = _parse_id(query_params['before'], 'before')
+    if query_params.get('since'):
+        since = parse_datetime(query_params['since'])
+        if since is None:
+            raise ValidationError({'since': 'Ожидается дата и время в формате ISO 8601'})
+        params['since'] = since
+    if query_params.get('limit'):
+        try:
+            params['limit'] = int(query_params['limit'])
+        except ValueError:
+            raise ValidationError({'limit': 'Ожидается целое число'})
+        if params['limit'] < 1:
+            raise ValidationError({'limit': 'Должно быть не меньше 1'})
+        params['limit'] = min(params['limit'], max_limit)
+
+    if sum(params[name] is not None for name in ('after', 'since', 'before')) > 1:
+        raise ValidationError({'detail': 'Параметры after, since и before взаимоисключающие'})
+    return params
+
+
+def _anchor(chat, message_id):
+    """Позиция (created_at, id) сообщения или None, если его нет в чате (удалено)."""
+    anchor = chat.messages.filter(pk=message_id).values('created_at', 'id').first()
+    if anchor is None:
+        return None
+    return anchor['created_at'], anchor['id']
+
+
+def sync_messages(chat, params, context=None):
+    """
+    Возвращает окно сообщений чата по разобранным параметрам синхронизации.
+
+    Returns:
+        dict: results (от старых к новым), users, has_more, newest_id, oldest_id.
+            has_more для after/since — есть ли еще более новые сообщения,
+            для before и последних сообщений — есть ли более старые.
+    """
+    limit = params['limit']
+    queryset = chat.messages.select_related('sender').order_by()
+
+    if params['after'] is not None or params['since'] is not None:
+        if params['after'] is not None:
+            anchor = _anchor(chat, params['after'])
+            if anchor is None:
+                queryset = queryset.filter(id__gt=params['after'])
+            else:
+                created_at, message_id = anchor
+                queryset = queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=message_id),
+                    created_at__gte=created_at,
+                )
+        else:
+            queryset = queryset.filter(created_at__gt=params['since'])
+        rows = list(queryset.order_by('created_at', 'id')[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+    else:
+        if params['before'] is not None:
+            anchor = _anchor(chat, params['before'])
+            if anchor is None:
+                queryset = queryset.filter(id__lt=params['before'])
+            else:
+                created_at, message_id = anchor
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=message_id),
+                    created_at__lte=created_at,
+                )
+        rows = list(queryset.order_by('-created_at', '-id')[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        rows.reverse()
+
+    senders = {message.sender_id: message.sender for message in rows if message.sender_id}
+    return {
+        'results': SyncMessageSerializer(rows, many=True, context=context).data,
+        'users': {
+            str(user_id): UserBriefSerializer(user, context=context).data
+            for user_id, user in senders.items()
+        },
+        'has_more': has_more,
+        'newest_id': rows[-1].id if rows else None,
+        'oldest_id': rows[0].id if rows else None,
+    }
@@ -1,3 +1,583 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.pagination import StandardPagination
+from orders.models import Order
+
+from . import lookup
+from .consumers import CLOSE_FORBIDDEN, CLOSE_UNAUTHORIZED
+from .middleware import JWTAuthMiddleware
+from .models import Chat, Message, UserUnreadCounter
+from .routing import websocket_urlpatterns
+
+User = get_user_model()
+
+
+class ChatListQueryCountTests(TestCase):
+    """Список чатов — одна выборка строк при любом размере страницы."""
+
+    CHATS = 25
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='chat_owner', email='chat_owner@example.com', password='x')
+        cls.chats = []
+        for i in range(cls.CHATS):
+            creator = User.objects.create_user(
+                username=f'chat_creator_{i}', email=f'chat_creator_{i}@example.com', password='x',
+            )
+            chat = Chat.objects.create(client=cls.user, creator=creator)
+            Message.objects.create(chat=chat, sender=creator, content=f'Сообщение {i}')
+            cls.chats.append(chat)
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def _get(self, url, page_size, queries):
+        with mock.patch.object(StandardPagination, 'page_size', page_size):
+            with self.assertNumQueries(queries):
+                response = self.api.get(url, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_page_query_count_does_not_depend_on_page_size(self):
+        # COUNT и страница строк
+        for page_size in (5, 20):
+            with self.subTest(page_size=page_size):
+                response = self._get('/api/chats/', page_size, 2)
+                self.assertEqual(len(response.data['chat_participants']), page_size)
+                self.assertEqual(response.data['count'], self.CHATS)
+
+    def test_cursor_query_count_does_not_depend_on_page_size(self):
+        # Без COUNT: только страница строк
+        for page_size in (5, 20):
+            with self.subTest(page_size=page_size):
+                response = self._get('/api/chats/?pagination=cursor', page_size, 1)
+                self.assertEqual(len(response.data['chat_participants']), page_size)
+
+    def test_cursor_pages_cover_all_chats(self):
+        """Проход по ссылкам next (как при прокрутке CreatorsList) отдает каждый чат один раз."""
+        seen = []
+        url = '/api/chats/?pagination=cursor'
+        with mock.patch.object(StandardPagination, 'page_size', 10):
+            while url:
+                response = self.api.get(url, HTTP_HOST='localhost')
+                self.assertEqual(response.status_code, 200)
+                seen.extend(row['chat_pk'] for row in response.data['chat_participants'])
+                url = response.data['next']
+        self.assertEqual(sorted(seen), sorted(chat.pk for chat in self.chats))
+        self.assertTrue(all(row['unread_count'] == 1 for row in response.data['chat_participants']))
+
+    def test_pair_lookup_answers_404_without_chat(self):
+        """GET /api/chats/<креатор>-<клиент>/ (chatExists на фронтенде) находит чат пары в любом порядке ID."""
+        creator = self.chats[0].creator
+        for chat_id in (f'{creator.pk}-{self.user.pk}', f'{self.user.pk}-{creator.pk}'):
+            response = self.api.get(f'/api/chats/{chat_id}/', HTTP_HOST='localhost')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['id'], self.chats[0].pk)
+        stranger = User.objects.create_user(username='chat_stranger', email='chat_stranger@example.com', password='x')
+        response = self.api.get(f'/api/chats/{stranger.pk}-{self.user.pk}/', HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 404)
+
+
+class ChatUnreadCounterTests(TestCase):
+    """Счетчики непрочитанных чата и пользователя и last_message следуют за сообщениями."""
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(
+            username='unread_client', email='unread_client@example.com', password='x',
+        )
+        self.creator = User.objects.create_user(
+            username='unread_creator', email='unread_creator@example.com', password='x',
+        )
+        self.chat = Chat.objects.create(client=self.client_user, creator=self.creator)
+        self.api = APIClient()
+
+    def _counts(self):
+        """(непрочитано клиентом, креатором в чате, всего у клиента, всего у креатора)."""
+        self.chat.refresh_from_db()
+        return (
+            self.chat.client_unread_count,
+            self.chat.creator_unread_count,
+            UserUnreadCounter.get_for_user(self.client_user),
+            UserUnreadCounter.get_for_user(self.creator),
+        )
+
+    def _send(self, sender, **kwargs):
+        return Message.objects.create(chat=self.chat, sender=sender, content='Сообщение', **kwargs)
+
+    def test_message_counts_for_recipient_only(self):
+        message = self._send(self.client_user)
+        self.assertEqual(self._counts(), (0, 1, 0, 1))
+        self.assertEqual(self.chat.last_message_id, message.pk)
+
+        self._send(self.creator)
+        self.assertEqual(self._counts(), (1, 1, 1, 1))
+
+    def test_system_message_counts_for_both_participants(self):
+        message = Message.objects.create(chat=self.chat, content='Чат создан', is_system_message=True)
+        self.assertEqual(self._counts(), (1, 1, 1, 1))
+        self.assertEqual(self.chat.last_message_id, message.pk)
+
+    def test_delete_decrements_counters_and_moves_last_message_back(self):
+        first = self._send(self.creator)
+        second = self._send(self.creator)
+        self.assertEqual(self._counts(), (2, 0, 2, 0))
+        self.assertEqual(self.chat.last_message_id, second.pk)
+
+        second.delete()
+        self.assertEqual(self._counts(), (1, 0, 1, 0))
+        self.assertEqual(self.chat.last_message_id, first.pk)
+
+        # Удаление прочитанного сообщения счетчики не меняет
+        self.chat.mark_messages_as_read(self.client_user)
+        self._send(self.client_user).delete()
+        first.delete()
+        self.assertEqual(self._counts(), (0, 0, 0, 0))
+        self.assertIsNone(self.chat.last_message_id)
+
+    def test_mark_read_resets_chat_and_user_counters(self):
+        self._send(self.creator)
+        self._send(self.creator)
+        self._send(self.client_user)
+        self.api.force_authenticate(self.client_user)
+        response = self.api.post(f'/api/chats/{self.chat.pk}/mark_as_read/', HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._counts(), (0, 1, 0, 1))
+
+    def test_unread_count_endpoint_returns_total(self):
+        other = User.objects.create_user(username='unread_other', email='unread_other@example.com', password='x')
+        other_chat = Chat.objects.create(client=other, creator=self.creator)
+        self._send(self.client_user)
+        self._send(self.client_user)
+        Message.objects.create(chat=other_chat, sender=other, content='Сообщение')
+
+        self.api.force_authenticate(self.creator)
+        response = self.api.get('/api/chats/unread-count/', HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'unread_count': 3})
+
+
+class ReadWatermarkTests(TestCase):
+    """Отметки прочтения в Chat и производные от них флаги прочтения сообщений."""
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(
+            username='mark_client', email='mark_client@example.com', password='x',
+        )
+        self.creator = User.objects.create_user(
+            username='mark_creator', email='mark_creator@example.com', password='x',
+        )
+        self.chat = Chat.objects.create(client=self.client_user, creator=self.creator)
+        self.messages = [
+            Message.objects.create(chat=self.chat, sender=sender, content=f'Сообщение {i}')
+            for i, sender in enumerate([self.creator, self.creator, self.client_user, self.creator])
+        ]
+        self.chat.refresh_from_db()
+
+    def _reload(self, message):
+        return Message.objects.select_related('chat').get(pk=message.pk)
+
+    def test_watermark_only_moves_forward(self):
+        self.assertEqual(self.chat.mark_read_up_to(self.client_user, self.messages[3].pk), 3)
+        self.assertEqual(self.chat.mark_read_up_to(self.client_user, self.messages[0].pk), 0)
+        self.chat.refresh_from_db()
+        self.assertEqual(self.chat.client_last_read_id, self.messages[3].pk)
+        self.assertEqual(self.chat.client_unread_count, 0)
+
+    def test_mark_older_message_recounts_messages_after_it(self):
+        self._reload(self.messages[1]).mark_as_read_by(self.client_user)
+        self.chat.refresh_from_db()
+        self.assertEqual(self.chat.client_last_read_id, self.messages[1].pk)
+        # Свое сообщение клиента после отметки непрочитанным не считается
+        self.assertEqual(self.chat.client_unread_count, 1)
+        self.assertEqual(UserUnreadCounter.get_for_user(self.client_user), 1)
+
+    def test_count_unread_after_ignores_own_messages(self):
+        self.assertEqual(self.chat.count_unread_after(self.client_user, 0), 3)
+        self.assertEqual(self.chat.count_unread_after(self.creator, 0), 1)
+        self.assertEqual(self.chat.count_unread_after(self.creator, self.messages[2].pk), 0)
+
+    def test_read_flags_derive_from_watermarks(self):
+        self.chat.mark_read_up_to(self.client_user, self.messages[1].pk)
+        flags = [
+            (message.read_by_client, message.read_by_creator)
+            for message in map(self._reload, self.messages)
+        ]
+        self.assertEqual(flags, [(True, True), (True, True), (True, False), (False, True)])
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Данные создаются в схеме migrate_from и проверяются после миграции до migrate_to."""
+
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        super().setUp()
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        self.old_apps = executor.loader.project_state(self.migrate_from).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        super().tearDown()
+
+    def migrate(self):
+        """Выполняет миграции до migrate_to и возвращает модели этого состояния."""
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        return executor.loader.project_state(self.migrate_to).apps
+
+
+class ReadWatermarkMigrationTests(MigrationTestCase):
+    """0008 переносит флаги read_by_* в отметки прочтения, не делая непрочитанное прочитанным."""
+
+    migrate_from = [('chats', '0007_chat_unread_counters')]
+    migrate_to = [('chats', '0008_chat_read_watermarks')]
+
+    def test_flags_map_to_watermarks(self):
+        Chat = self.old_apps.get_model('chats', 'Chat')
+        Message = self.old_apps.get_model('chats', 'Message')
+        client = User.objects.create_user(username='mig_client', email='mig_client@example.com', password='x')
+        creator = User.objects.create_user(username='mig_creator', email='mig_creator@example.com', password='x')
+        chat = Chat.objects.create(client_id=client.pk, creator_id=creator.pk)
+        read_chat = Chat.objects.create(client_id=creator.pk, creator_id=client.pk)
+        empty_chat = Chat.objects.create(client_id=client.pk, creator_id=creator.pk)
+
+        def message(target, sender, read_by_client, read_by_creator):
+            return Message.objects.create(
+                chat=target, sender_id=sender.pk, content='Сообщение',
+                read_by_client=read_by_client, read_by_creator=read_by_creator,
+            ).pk
+
+        message(chat, creator, True, False)
+        first_unread_by_creator = message(chat, client, False, False)
+        first_unread_by_client = message(chat, creator, False, False)
+        # Прочитано отдельно после непрочитанного: остается непрочитанным
+        message(chat, creator, True, False)
+        message(read_chat, creator, False, True)
+        read_last = message(read_chat, client, True, True)
+
+        apps = self.migrate()
+        Chat = apps.get_model('chats', 'Chat')
+        UserUnreadCounter = apps.get_model('chats', 'UserUnreadCounter')
+
+        chat = Chat.objects.get(pk=chat.pk)
+        self.assertEqual(chat.client_last_read_id, first_unread_by_client - 1)
+        self.assertEqual(chat.creator_last_read_id, first_unread_by_creator - 1)
+        self.assertEqual((chat.client_unread_count, chat.creator_unread_count), (2, 1))
+        read_chat = Chat.objects.get(pk=read_chat.pk)
+        self.assertEqual((read_chat.client_last_read_id, read_chat.creator_last_read_id), (read_last, read_last))
+        self.assertEqual((read_chat.client_unread_count, read_chat.creator_unread_count), (0, 0))
+        empty_chat = Chat.objects.get(pk=empty_chat.pk)
+        self.assertEqual((empty_chat.client_last_read_id, empty_chat.creator_last_read_id), (0, 0))
+        self.assertEqual(
+            dict(UserUnreadCounter.objects.values_list('user_id', 'unread_count')),
+            {client.pk: 2, creator.pk: 1},
+        )
+
+
+class ChatConsumerTests(TestCase):
+    """WebSocket-события чата: аутентификация по JWT, доступ и рассылка участникам."""
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(
+            username='ws_client', email='ws_client@example.com', password='x',
+        )
+        self.creator = User.objects.create_user(
+            username='ws_creator', email='ws_creator@example.com', password='x',
+        )
+        self.outsider = User.objects.create_user(
+            username='ws_outsider', email='ws_outsider@example.com', password='x',
+        )
+        self.chat = Chat.objects.create(client=self.client_user, creator=self.creator)
+        self.application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+        self.connected = []
+        # database_sync_to_async закрывает «старые» соединения, в том числе
+        # соединение с открытой транзакцией теста
+        patcher = mock.patch('channels.db.close_old_connections')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _connect(self, user=None):
+        path = f'/ws/chats/{self.chat.pk}/'
+        if user is not None:
+            path += f'?token={AccessToken.for_user(user)}'
+        communicator = WebsocketCommunicator(self.application, path)
+        connected, code = await communicator.connect()
+        if connected:
+            self.connected.append(communicator)
+        return communicator, connected, code
+
+    async def _disconnect(self):
+        for communicator in self.connected:
+            await communicator.disconnect()
+
+    async def _participants(self):
+        client, connected, _ = await self._connect(self.client_user)
+        self.assertTrue(connected)
+        creator, connected, _ = await self._connect(self.creator)
+        self.assertTrue(connected)
+        return client, creator
+
+    def _send_message(self, sender):
+        # Рассылка выполняется после коммита транзакции
+        with self.captureOnCommitCallbacks(execute=True):
+            return Message.objects.create(chat=self.chat, sender=sender, content='Привет')
+
+    async def test_participant_connects_others_are_rejected(self):
+        _, connected, _ = await self._connect(self.client_user)
+        self.assertTrue(connected)
+
+        _, connected, code = await self._connect(self.outsider)
+        self.assertFalse(connected)
+        self.assertEqual(code, CLOSE_FORBIDDEN)
+
+        _, connected, code = await self._connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, CLOSE_UNAUTHORIZED)
+
+        communicator = WebsocketCommunicator(self.application, f'/ws/chats/{self.chat.pk}/?token=invalid')
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, CLOSE_UNAUTHORIZED)
+        await self._disconnect()
+
+    async def test_new_message_fans_out_to_participants(self):
+        client, creator = await self._participants()
+        message = await sync_to_async(self._send_message)(self.client_user)
+
+        for communicator in (client, creator):
+            event = await communicator.receive_json_from(timeout=2)
+            self.assertEqual(event['type'], 'message')
+            self.assertEqual(event['chat_id'], self.chat.pk)
+            self.assertEqual(event['data']['id'], message.pk)
+        await self._disconnect()
+
+    async def test_socket_read_resets_counter_without_self_echo(self):
+        client, creator = await self._participants()
+        await sync_to_async(self._send_message)(self.creator)
+        await client.receive_json_from(timeout=2)
+        await creator.receive_json_from(timeout=2)
+
+        await client.send_json_to({'type': 'read'})
+        event = await creator.receive_json_from(timeout=2)
+        self.assertEqual(event['type'], 'read')
+        self.assertEqual(event['data']['user_id'], self.client_user.pk)
+        self.assertEqual(event['data']['updated'], 1)
+        self.assertTrue(await client.receive_nothing(timeout=0.2))
+
+        await sync_to_async(self.chat.refresh_from_db)()
+        self.assertEqual(self.chat.client_unread_count, 0)
+        self.assertEqual(await sync_to_async(UserUnreadCounter.get_for_user)(self.client_user), 0)
+        await self._disconnect()
+
+    async def test_typing_is_throttled_and_not_echoed(self):
+        client, creator = await self._participants()
+
+        await client.send_json_to({'type': 'typing', 'is_typing': True})
+        event = await creator.receive_json_from(timeout=2)
+        self.assertEqual(event['data'], {'user_id': self.client_user.pk, 'is_typing': True})
+        self.assertTrue(await client.receive_nothing(timeout=0.2))
+
+        # Повтор того же состояния в пределах TYPING_REPEAT_INTERVAL не пересылается
+        await client.send_json_to({'type': 'typing', 'is_typing': True})
+        self.assertTrue(await creator.receive_nothing(timeout=0.2))
+
+        await client.send_json_to({'type': 'typing', 'is_typing': False})
+        event = await creator.receive_json_from(timeout=2)
+        self.assertEqual(event['data'], {'user_id': self.client_user.pk, 'is_typing': False})
+        await self._disconnect()
+
+
+class MessageSyncTests(TestCase):
+    """Окна синхронизации сообщений: after, before, since и limit."""
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(
+            username='sync_client', email='sync_client@example.com', password='x',
+        )
+        self.creator = User.objects.create_user(
+            username='sync_creator', email='sync_creator@example.com', password='x',
+        )
+        self.chat = Chat.objects.create(client=self.client_user, creator=self.creator)
+        self.messages = [Message.objects.create(chat=self.chat, content='Чат создан', is_system_message=True)]
+        for i in range(4):
+            sender = self.creator if i % 2 else self.client_user
+            self.messages.append(Message.objects.create(chat=self.chat, sender=sender, content=f'Сообщение {i}'))
+        self.api = APIClient()
+        self.api.force_authenticate(self.client_user)
+
+    def _sync(self, expected_status=200, **params):
+        response = self.api.get(f'/api/chats/{self.chat.pk}/messages/sync/', params, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, expected_status)
+        return response.data
+
+    def _ids(self, data):
+        return [row['id'] for row in data['results']]
+
+    def _pks(self, *indexes):
+        return [self.messages[i].pk for i in indexes]
+
+    def test_latest_messages_window(self):
+        data = self._sync(limit=2)
+        self.assertEqual(self._ids(data), self._pks(3, 4))
+        self.assertTrue(data['has_more'])
+        self.assertEqual((data['oldest_id'], data['newest_id']), tuple(self._pks(3, 4)))
+
+        data = self._sync()
+        self.assertEqual(self._ids(data), self._pks(0, 1, 2, 3, 4))
+        self.assertFalse(data['has_more'])
+
+    def test_after_and_before_windows(self):
+        data = self._sync(after=self.messages[1].pk, limit=2)
+        self.assertEqual(self._ids(data), self._pks(2, 3))
+        self.assertTrue(data['has_more'])
+        data = self._sync(after=self.messages[3].pk, limit=2)
+        self.assertEqual(self._ids(data), self._pks(4))
+        self.assertFalse(data['has_more'])
+
+        data = self._sync(before=self.messages[3].pk, limit=2)
+        self.assertEqual(self._ids(data), self._pks(1, 2))
+        self.assertTrue(data['has_more'])
+        data = self._sync(before=self.messages[1].pk, limit=2)
+        self.assertEqual(self._ids(data), self._pks(0))
+        self.assertFalse(data['has_more'])
+
+    def test_since_window(self):
+        data = self._sync(since=self.messages[2].created_at.isoformat())
+        self.assertEqual(self._ids(data), self._pks(3, 4))
+        self.assertFalse(data['has_more'])
+
+    def test_deleted_anchor_falls_back_to_id_bound(self):
+        anchor = self.messages[2].pk
+        self.messages[2].delete()
+        self.assertEqual(self._ids(self._sync(after=anchor)), self._pks(3, 4))
+        self.assertEqual(self._ids(self._sync(before=anchor)), self._pks(0, 1))
+
+    @override_settings(CHAT_SYNC_MAX_LIMIT=3)
+    def test_limit_is_capped_and_validated(self):
+        self.assertEqual(self._ids(self._sync(limit=100)), self._pks(2, 3, 4))
+        self._sync(400, limit=0)
+        self._sync(400, limit='many')
+
+    def test_window_parameters_are_mutually_exclusive(self):
+        self._sync(400, after=self.messages[1].pk, before=self.messages[3].pk)
+        self._sync(400, after=self.messages[1].pk, since=self.messages[0].created_at.isoformat())
+        self._sync(400, after='abc')
+        self._sync(400, since='вчера')
+
+    def test_users_map_lists_each_sender_once(self):
+        data = self._sync()
+        self.assertEqual(set(data['users']), {str(self.client_user.pk), str(self.creator.pk)})
+        self.assertEqual(data['users'][str(self.creator.pk)]['username'], 'sync_creator')
+        self.assertEqual([row['sender'] for row in data['results']][:2], [None, self.client_user.pk])
+
+        data = self._sync(after=self.messages[3].pk)
+        self.assertEqual(set(data['users']), {str(self.creator.pk)})
+
+
+class ChatLookupTests(TestCase):
+    """get_or_create_chat возвращает единственный чат пары независимо от ролей."""
+
+    def setUp(self):
+        self.first = User.objects.create_user(username='pair_first', email='pair_first@example.com', password='x')
+        self.second = User.objects.create_user(username='pair_second', email='pair_second@example.com', password='x')
+        self.chat = Chat.objects.create(client=self.first, creator=self.second)
+
+    def test_existing_chat_is_returned_for_swapped_roles(self):
+        self.assertEqual(lookup.get_or_create_chat(self.second, self.first), (self.chat, False))
+        self.assertEqual(Chat.objects.count(), 1)
+
+    def test_concurrent_insert_returns_existing_row(self):
+        find_chat = lookup.find_chat
+        calls = []
+
+        def racing_find_chat(*args, **kwargs):
+            # Первый поиск не видит чат, созданный «параллельным» запросом
+            calls.append(args)
+            return None if len(calls) == 1 else find_chat(*args, **kwargs)
+
+        with mock.patch.object(lookup, 'find_chat', side_effect=racing_find_chat):
+            chat, created = lookup.get_or_create_chat(self.second, self.first)
+        self.assertEqual((chat, created), (self.chat, False))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(Chat.objects.count(), 1)
+
+
+class ParticipantPairMigrationTests(MigrationTestCase):
+    """0009 объединяет чаты одной пары с переставленными ролями без потери данных."""
+
+    migrate_from = [('chats', '0008_chat_read_watermarks')]
+    migrate_to = [('chats', '0010_chat_participant_pair_uniq')]
+
+    def test_duplicate_chats_are_merged(self):
+        Chat = self.old_apps.get_model('chats', 'Chat')
+        Message = self.old_apps.get_model('chats', 'Message')
+        UserUnreadCounter = self.old_apps.get_model('chats', 'UserUnreadCounter')
+        first = User.objects.create_user(username='merge_first', email='merge_first@example.com', password='x')
+        second = User.objects.create_user(username='merge_second', email='merge_second@example.com', password='x')
+        keep = Chat.objects.create(client_id=first.pk, creator_id=second.pk)
+        duplicate = Chat.objects.create(client_id=second.pk, creator_id=first.pk)
+
+        def message(chat, sender):
+            return Message.objects.create(chat=chat, sender_id=sender.pk, content='Сообщение').pk
+
+        read_by_first = message(keep, second)
+        unread_by_second = message(keep, first)
+        read_by_second = message(duplicate, first)
+        unread_by_first = message(duplicate, second)
+        Chat.objects.filter(pk=keep.pk).update(
+            last_message_id=unread_by_second, client_last_read_id=read_by_first, creator_unread_count=1,
+        )
+        Chat.objects.filter(pk=duplicate.pk).update(
+            last_message_id=unread_by_first, client_last_read_id=read_by_second, creator_unread_count=1,
+        )
+        UserUnreadCounter.objects.create(user_id=first.pk, unread_count=1)
+        UserUnreadCounter.objects.create(user_id=second.pk, unread_count=1)
+        order = Order.objects.create(
+            title='Заказ',
+            description='Описание',
+            client=second,
+            budget=Decimal('1000.00'),
+            deadline=date.today() + timedelta(days=30),
+            chat_id=duplicate.pk,
+        )
+
+        apps = self.migrate()
+        Chat = apps.get_model('chats', 'Chat')
+        Message = apps.get_model('chats', 'Message')
+        UserUnreadCounter = apps.get_model('chats', 'UserUnreadCounter')
+
+        self.assertEqual(list(Chat.objects.values_list('pk', flat=True)), [keep.pk])
+        self.assertEqual(
+            sorted(Message.objects.filter(chat_id=keep.pk).values_list('pk', flat=True)),
+            [read_by_first, unread_by_second, read_by_second, unread_by_first],
+        )
+        order.refresh_from_db()
+        self.assertEqual(order.chat_id, keep.pk)
+
+        chat = Chat.objects.get(pk=keep.pk)
+        self.assertEqual(chat.last_message_id, unread_by_first)
+        # Отметка каждого участника стоит перед его первым непрочитанным сообщением
+        self.assertEqual(chat.client_last_read_id, unread_by_first - 1)
+        self.assertEqual(chat.creator_last_read_id, unread_by_second - 1)
+        self.assertEqual((chat.client_unread_count, chat.creator_unread_count), (1, 2))
+        self.assertEqual(
+            dict(UserUnreadCounter.objects.values_list('user_id', 'unread_count')),
+            {first.pk: 1, second.pk: 2},
+        )
@@ -10,7 +10,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from .views import (
-    ChatViewSet, MessageViewSet, 
+    ChatViewSet, MessageViewSet, MessageSyncView, MessageAttachmentView,
     ChatByParticipantsView, ChatMessagesByParticipantsView
 )
 # Добавляем импорт CreateOrderResponseByOrderView
@@ -25,14 +25,16 @@ urlpatterns = [
     # Маршруты для стандартных ViewSet'ов
     path('', include(router.urls)),
     
+    # Маршруты для сообщений в чатах (вложенный ресурс); до маршрутов <str:participant_ids>, иначе они перехватывают числовые ID
+    path('<int:chat_pk>/messages/', MessageViewSet.as_view({'get': 'list', 'post': 'create'}), name='chat-messages'),  # Убираем префикс 'chats/'
+    path('<int:chat_pk>/messages/sync/', MessageSyncView.as_view(), name='chat-messages-sync'),
+    path('<int:chat_pk>/messages/<int:pk>/', MessageViewSet.as_view({'get': 'retrieve'}), name='chat-message-detail'),  # Убираем префикс 'chats/'
+    path('<int:chat_pk>/messages/<int:pk>/attachment/', MessageAttachmentView.as_view(), name='chat-message-attachment'),
+    
     # Маршруты для доступа к чату по ID участников
     path('<str:participant_ids>/', ChatByParticipantsView.as_view(), name='chat-by-participants'),  # Убираем префикс 'chats/'
     path('<str:participant_ids>/messages/', ChatMessagesByParticipantsView.as_view(), name='chat-messages-by-participants'),  # Убираем префикс 'chats/'
     
-    # Маршруты для сообщений в чатах (вложенный ресурс)
-    path('<int:chat_pk>/messages/', MessageViewSet.as_view({'get': 'list', 'post': 'create'}), name='chat-messages'),  # Убираем префикс 'chats/'
-    path('<int:chat_pk>/messages/<int:pk>/', MessageViewSet.as_view({'get': 'retrieve'}), name='chat-message-detail'),  # Убираем префикс 'chats/'
-    
     # Маршрут для создания отклика на заказ через чат
     path('create-for-order/<int:chat_id>/', CreateOrderResponseByChatView.as_view(), name='create-order-response-by-chat'),  # Убираем префикс 'chats/'
     
@@ -11,16 +11,22 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Case, CharField, F, Q, Value, When
+from django.db.models.functions import Left
 from django.contrib.auth import get_user_model
 
-from .models import Chat, Message
+from .lookup import find_chat, get_or_create_chat
+from .models import Chat, Message, UserUnreadCounter
 from .serializers import (
-    ChatListSerializer, ChatDetailSerializer, ChatCreateSerializer,
+    ChatDetailSerializer, ChatCreateSerializer,
     MessageSerializer
 )
 from .permissions import IsClientOrCreator, IsParticipantInChat
+from .realtime import mark_chat_read
+from .sync import is_sync_request, parse_sync_params, sync_messages
 from orders.models import Order, OrderResponse
+from core.media import ProtectedFileView
+from core.pagination import StandardPagination
 
 User = get_user_model()
 
@@ -35,6 +41,10 @@ class ChatViewSet(viewsets.ModelViewSet):
     Предоставляет стандартные операции CRUD для чатов.
     """
     permission_classes = [permissions.IsAuthenticated]
+    # Курсорная пагинация списка (?cursor=...): от недавно активных чатов к давним
+    cursor_ordering = ('-updated_at', '-id')
+    # Длина превью последнего сообщения в списке чатов
+    LAST_MESSAGE_PREVIEW_LENGTH = 200
     
     def get_queryset(self):
         """
@@ -43,18 +53,48 @@ class ChatViewSet(viewsets.ModelViewSet):
         user = self.request.user
         return Chat.objects.filter(
             Q(client=user) | Q(creator=user)
-        ).select_related('client', 'creator').prefetch_related('orders')
+        ).select_related('client', 'creator')
     
     def get_serializer_class(self):
         """
         Возвращает соответствующий сериализатор в зависимости от действия.
         """
-        if self.action == 'list':
-            return ChatListSerializer
-        elif self.action == 'create':
+        # Список (list) собирает строки без сериализатора, см. get_participants_queryset
+        if self.action == 'create':
             return ChatCreateSerializer
         return ChatDetailSerializer
     
+    def get_participants_queryset(self):
+        """
+        Строки списка чатов одним запросом (values()): собеседник, превью
+        последнего сообщения, счетчик непрочитанных и время последней активности.
+        
+        Время активности — updated_at чата, который сдвигается при каждом
+        новом сообщении (Chat.register_message).
+        """
+        user = self.request.user
+        is_client = Q(client_id=user.id)
+        
+        def for_role(client_value, creator_value, output_field=None):
+            # Значение для текущего пользователя-клиента или пользователя-креатора
+            return Case(When(is_client, then=client_value), default=creator_value, output_field=output_field)
+        
+        return Chat.objects.filter(
+            Q(client=user) | Q(creator=user)
+        ).annotate(
+            other_id=for_role(F('creator_id'), F('client_id')),
+            other_username=for_role(F('creator__username'), F('client__username')),
+            other_avatar=for_role(F('creator__avatar'), F('client__avatar'), output_field=CharField()),
+            other_role=for_role(Value('creator'), Value('client'), output_field=CharField()),
+            unread_count=for_role(F('client_unread_count'), F('creator_unread_count')),
+            last_message_preview=Left('last_message__content', self.LAST_MESSAGE_PREVIEW_LENGTH),
+        ).order_by('-updated_at', '-id').values(
+            'id', 'client_id', 'creator_id', 'updated_at',
+            'other_id', 'other_username', 'other_avatar', 'other_role', 'unread_count',
+            'last_message_id', 'last_message_preview', 'last_message__sender_id',
+            'last_message__is_system_message', 'last_message__created_at',
+        )
+    
     def list(self, request, *args, **kwargs):
         """
         Переопределяем метод list для возврата данных в формате, ожидаемом фронтендом.
@@ -67,53 +107,42 @@ class ChatViewSet(viewsets.ModelViewSet):
             role: 'creator' | 'client',
             chat_id: string // формат: "{id_креатора}-{id_клиента}"
         }
+        
+        Дополнительно для каждого чата отдаются превью последнего сообщения
+        (last_message), количество непрочитанных (unread_count) и время
+        последней активности (last_activity_at). Список постраничный
+        (?page=N или ?cursor=...), отсортирован по активности.
         """
-        user = request.user
-        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(self.get_participants_queryset())
+        avatar_storage = User._meta.get_field('avatar').storage
         
-        # Преобразуем чаты в формат участников, ожидаемый фронтендом
         chat_participants = []
-        
-        for chat in queryset:
-            # Определяем другого участника чата (не текущего пользователя)
-            other_participant = None
-            role = None
-            
-            if user == chat.client:
-                other_participant = chat.creator
-                role = 'creator'
-            else:
-                other_participant = chat.client
-                role = 'client'
-            
-            # Формируем ID чата в формате "{id_креатора}-{id_клиента}"
-            chat_id = f"{chat.creator.id}-{chat.client.id}"
-            
-            # Получаем URL аватара, если он есть
-            avatar_url = None
-            if hasattr(other_participant, 'avatar') and other_participant.avatar:
-                try:
-                    avatar_url = other_participant.avatar.url
-                except ValueError:
-                    # Если возникла ошибка, значит у аватара нет файла
-                    avatar_url = None
-                    
-            # Добавляем участника в список
+        for row in page:
+            last_message = None
+            if row['last_message_id']:
+                last_message = {
+                    'id': row['last_message_id'],
+                    'content': row['last_message_preview'],
+                    'sender_id': row['last_message__sender_id'],
+                    'is_system_message': row['last_message__is_system_message'],
+                    'created_at': row['last_message__created_at'],
+                }
             chat_participants.append({
-                'id': other_participant.id,
-                'username': other_participant.username,
-                'avatar': avatar_url,
-                'role': role,
-                'chat_id': chat_id
+                'id': row['other_id'],
+                'username': row['other_username'],
+                'avatar': avatar_storage.url(row['other_avatar']) if row['other_avatar'] else None,
+                'role': row['other_role'],
+                'chat_id': f"{row['creator_id']}-{row['client_id']}",
+                'chat_pk': row['id'],
+                'unread_count': row['unread_count'],
+                'last_message': last_message,
+                'last_activity_at': row['updated_at'],
             })
         
         # Возвращаем chat_participants на верхнем уровне ответа
-        return Response({
-            'count': len(chat_participants),
-            'next': None,
-            'previous': None,
-            'chat_participants': chat_participants
-        })
+        response = self.get_paginated_response(chat_participants)
+        response.data['chat_participants'] = response.data.pop('results')
+        return response
     
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated], url_path='client-orders')
     def client_orders(self, request):
@@ -246,13 +275,24 @@ class ChatViewSet(viewsets.ModelViewSet):
             creator_id = int(creator_id)
             client_id = int(client_id)
             
-            # Получаем чат по креатору и клиенту
-            chat = Chat.objects.get(creator_id=creator_id, client_id=client_id)
+            # Получаем чат по паре участников среди чатов текущего пользователя
+            chat = find_chat(creator_id, client_id, queryset=self.get_queryset())
+            if chat is None:
+                raise Chat.DoesNotExist
             serializer = self.get_serializer(chat)
             return Response(serializer.data)
         except (ValueError, Chat.DoesNotExist):
             return Response({"detail": "Чат не найден."}, status=status.HTTP_404_NOT_FOUND)
     
+    # Маршруты действий регистрируются в алфавитном порядке имен методов: имя должно
+    # быть «меньше» get_by_chat_id, иначе его шаблон (?P<chat_id>...) перехватит URL
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def count_unread(self, request):
+        """
+        Общее количество непрочитанных сообщений пользователя во всех чатах (для значка).
+        """
+        return Response({'unread_count': UserUnreadCounter.get_for_user(request.user)})
+    
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
         """
@@ -271,13 +311,8 @@ class ChatViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Отмечаем сообщения как прочитанные
-        if is_client:
-            unread_messages = chat.messages.filter(read_by_client=False)
-            unread_messages.update(read_by_client=True)
-        elif is_creator:
-            unread_messages = chat.messages.filter(read_by_creator=False)
-            unread_messages.update(read_by_creator=True)
+        # Отмечаем сообщения как прочитанные и уведомляем собеседника
+        mark_chat_read(chat, user)
         
         return Response({'status': 'Сообщения отмечены как прочитанные'})
 
@@ -290,13 +325,16 @@ class MessageViewSet(viewsets.ModelViewSet):
     """
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated, IsParticipantInChat]
+    # Курсорная пагинация (?cursor=...) идет от новых сообщений к старым
+    cursor_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         """
         Возвращает сообщения для указанного чата.
         """
         chat_id = self.kwargs.get('chat_pk')
-        return Message.objects.filter(chat_id=chat_id)
+        # Чат нужен для статусов прочтения (Message.read_by_client/read_by_creator)
+        return Message.objects.filter(chat_id=chat_id).select_related('chat', 'sender')
     
     def perform_create(self, serializer):
         """
@@ -315,6 +353,42 @@ class MessageViewSet(viewsets.ModelViewSet):
         serializer.save(chat=chat, sender=user)
 
 
+class MessageSyncView(APIView):
+    """
+    Инкрементальная синхронизация сообщений чата (см. chats.sync).
+    
+    URL формат: /api/chats/<chat_id>/messages/sync/?after=<id>&limit=50
+    """
+    permission_classes = [permissions.IsAuthenticated, IsParticipantInChat]
+    
+    def get(self, request, chat_pk):
+        chat = get_object_or_404(Chat, pk=chat_pk)
+        params = parse_sync_params(request.query_params)
+        return Response(sync_messages(chat, params, context={'request': request}))
+
+
+class MessageAttachmentView(ProtectedFileView):
+    """
+    Отдача вложения сообщения (с поддержкой Range, см. core.media).
+    
+    URL формат: /api/chats/<chat_id>/messages/<message_id>/attachment/
+    Доступ: участники чата или подписанная ссылка attachment_url.
+    """
+    kind = 'message-attachment'
+    
+    def get_object(self):
+        return get_object_or_404(
+            Message.objects.select_related('chat'),
+            pk=self.kwargs['pk'], chat_id=self.kwargs['chat_pk']
+        )
+    
+    def has_access(self, user, obj):
+        return user.is_superuser or user.pk in (obj.chat.client_id, obj.chat.creator_id)
+    
+    def get_file(self, obj):
+        return obj.attachment
+
+
 class ChatByParticipantsView(APIView):
     """
     Представление для получения или создания чата по ID участников.
@@ -322,6 +396,7 @@ class ChatByParticipantsView(APIView):
     URL формат: /api/chats/<creator_id>-<client_id>/
     """
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = MessageViewSet.cursor_ordering
     
     def get(self, request, participant_ids):
         """
@@ -347,40 +422,24 @@ class ChatByParticipantsView(APIView):
                 )
             
             # Ищем чат по участникам (в любом порядке)
-            chat = Chat.objects.filter(
-                (Q(creator_id=creator_id) & Q(client_id=client_id)) |
-                (Q(creator_id=client_id) & Q(client_id=creator_id))
-            ).first()
+            chat = find_chat(creator_id, client_id)
             
             if not chat:
                 # Если чат не существует, создаем новый
                 creator = get_object_or_404(User, id=creator_id)
                 client = get_object_or_404(User, id=client_id)
-                
-                # Проверяем, что оба участника существуют
-                if not creator or not client:
-                    return Response(
-                        {'error': 'Один из участников не найден'},
-                        status=status.HTTP_404_NOT_FOUND
-                    )
-                
-                # Создаем новый чат
-                chat = Chat.objects.create(creator=creator, client=client)
+                chat, created = get_or_create_chat(client, creator)
                 
                 # Добавляем системное сообщение
-                Message.objects.create(
-                    chat=chat,
-                    content="Чат создан",
-                    is_system_message=True
-                )
+                if created:
+                    Message.objects.create(
+                        chat=chat,
+                        content="Чат создан",
+                        is_system_message=True
+                    )
             
             # Отмечаем сообщения как прочитанные для текущего пользователя
-            if user.id == chat.client.id:
-                unread_messages = chat.messages.filter(read_by_client=False)
-                unread_messages.update(read_by_client=True)
-            elif user.id == chat.creator.id:
-                unread_messages = chat.messages.filter(read_by_creator=False)
-                unread_messages.update(read_by_creator=True)
+            mark_chat_read(chat, user)
             
             # Сериализуем чат и возвращаем
             serializer = ChatDetailSerializer(chat, context={'request': request})
@@ -405,6 +464,7 @@ class ChatMessagesByParticipantsView(APIView):
     URL формат: /api/chats/<creator_id>-<client_id>/messages/
     """
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = MessageViewSet.cursor_ordering
     
     def get(self, request, participant_ids):
         """
@@ -430,10 +490,7 @@ class ChatMessagesByParticipantsView(APIView):
                 )
             
             # Ищем чат по участникам (в любом порядке)
-            chat = Chat.objects.filter(
-                (Q(creator_id=creator_id) & Q(client_id=client_id)) |
-                (Q(creator_id=client_id) & Q(client_id=creator_id))
-            ).first()
+            chat = find_chat(creator_id, client_id)
             
             if not chat:
                 return Response(
@@ -441,6 +498,18 @@ class ChatMessagesByParticipantsView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
+            # ?after / ?since / ?before / ?limit — окно сообщений (инкрементальная синхронизация)
+            if is_sync_request(request.query_params):
+                params = parse_sync_params(request.query_params)
+                return Response(sync_messages(chat, params, context={'request': request}))
+            
+            # С ?cursor / ?pagination=cursor отдаем страницу от новых сообщений к старым
+            paginator = StandardPagination()
+            if paginator.is_cursor_request(request, self):
+                page = paginator.paginate_queryset(chat.messages.all().order_by(), request, view=self)
+                serializer = MessageSerializer(page, many=True, context={'request': request})
+                return paginator.get_paginated_response(serializer.data)
+            
             # Получаем сообщения по чату в порядке от старых к новым
             messages = chat.messages.all().order_by('created_at')
             
@@ -485,32 +554,21 @@ class ChatMessagesByParticipantsView(APIView):
                 )
             
             # Ищем чат по участникам (в любом порядке)
-            chat = Chat.objects.filter(
-                (Q(creator_id=creator_id) & Q(client_id=client_id)) |
-                (Q(creator_id=client_id) & Q(client_id=creator_id))
-            ).first()
+            chat = find_chat(creator_id, client_id)
             
             if not chat:
                 # Если чат не существует, создаем новый
                 creator = get_object_or_404(User, id=creator_id)
                 client = get_object_or_404(User, id=client_id)
-                
-                # Проверяем, что оба участника существуют
-                if not creator or not client:
-                    return Response(
-                        {'error': 'Один из участников не найден'},
-                        status=status.HTTP_404_NOT_FOUND
-                    )
-                
-                # Создаем новый чат
-                chat = Chat.objects.create(creator=creator, client=client)
+                chat, created = get_or_create_chat(client, creator)
                 
                 # Добавляем системное сообщение
-                Message.objects.create(
-                    chat=chat,
-                    content="Чат создан",
-                    is_system_message=True
-                )
+                if created:
+                    Message.objects.create(
+                        chat=chat,
+                        content="Чат создан",
+                        is_system_message=True
+                    )
             
             # Создаем новое сообщение
             content = request.data.get('content', '').strip()
@@ -528,9 +586,7 @@ class ChatMessagesByParticipantsView(APIView):
                 chat=chat,
                 sender=user,
                 content=content,
-                attachment=attachment,
-                read_by_client=user.id == chat.client.id,
-                read_by_creator=user.id == chat.creator.id
+                attachment=attachment
             )
             
             # Сериализуем сообщение и возвращаем
@@ -0,0 +1,281 @@
+"""Management command to check that hot API endpoints use indexes.
+
+Seeds a large synthetic dataset (users, creator profiles, orders, chats,
+messages) inside a transaction, runs ANALYZE, calls the endpoints through the
+API client and runs EXPLAIN for every SELECT they issue. The creator catalog
+is checked with every supported sort alone, with each range filter and with
+all range filters at once (users.catalog). The command fails if a plan reads
+one of the guarded tables (creator profiles, orders, chats, messages) with a
+sequential scan.
+The transaction is always rolled back, so the database is left untouched.
+
+PostgreSQL only. The test suite runs it on a PostgreSQL test database
+(core.tests.QueryPlanRegressionTests), so a regression fails the tests.
+
+Usage:
+  python manage.py check_query_plans
+  python manage.py check_query_plans --seed 50000 --verbose
+"""
+from __future__ import annotations
+
+import json
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from chats.models import Chat, Message
+from orders.models import Order
+from users.catalog import RANGE_FILTERS, SORTS
+from users.models import CreatorProfile
+
+User = get_user_model()
+
+GUARDED_TABLES = {
+    CreatorProfile._meta.db_table,
+    Order._meta.db_table,
+    Chat._meta.db_table,
+    Message._meta.db_table,
+}
+SEED_TABLES = GUARDED_TABLES | {User._meta.db_table}
+
+_STATUS_WEIGHTS = {
+    'draft': 10,
+    'published': 30,
+    'awaiting_response': 10,
+    'in_progress': 20,
+    'on_review': 5,
+    'completed': 20,
+    'canceled': 5,
+}
+
+CATALOG_MIN_SIZE = 10000
+# Значения диапазонных фильтров каталога для проверки
+_CATALOG_FILTER_VALUES = {
+    'min_price': '3000',
+    'max_price': '20000',
+    'min_rating': '4',
+    'average_work_time': 'up_to_10_days',
+}
+
+
+def iter_plan_nodes(node):
+    """Обходит дерево плана EXPLAIN (FORMAT JSON)."""
+    yield node
+    for child in node.get('Plans', ()):
+        yield from iter_plan_nodes(child)
+
+
+class Command(BaseCommand):
+    help = "Seed a large dataset in a rolled-back transaction and fail if hot endpoints use sequential scans"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=20000, help="Number of orders to seed (default: 20000).")
+        parser.add_argument("--verbose", action="store_true", help="Print every checked query with its scans.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("EXPLAIN checks require PostgreSQL")
+
+        size = max(options["seed"], 1000)
+        self.verbose = options["verbose"]
+        failures = []
+
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {size} orders…")
+            fixtures = self._seed(size)
+            with connection.cursor() as cursor:
+                for table in sorted(SEED_TABLES):
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(table)}')
+
+            for name, user, url in self._endpoints(fixtures):
+                failures.extend(self._check_endpoint(name, user, url))
+            failures.extend(self._check_unread_count(fixtures))
+
+            # Проверка ничего не должна оставлять в базе
+            transaction.set_rollback(True)
+
+        if failures:
+            for name, table, sql in failures:
+                self.stderr.write(f"  - {name}: Seq Scan on {table}\n      {sql[:300]}")
+            raise CommandError(f"{len(failures)} query plan(s) regressed to a sequential scan")
+        self.stdout.write(self.style.SUCCESS("All checked queries use indexes."))
+
+    # ------------------------------------------------------------------
+    # Данные
+    # ------------------------------------------------------------------
+    def _seed(self, size):
+        rnd = random.Random(42)
+        users_count = max(size // 50, 20)
+
+        users = User.objects.bulk_create(
+            [
+                User(username=f'plan_user_{i}', email=f'plan_user_{i}@example.invalid', is_verified=True)
+                for i in range(users_count * 2)
+            ],
+            batch_size=1000,
+        )
+        clients, creators = users[:users_count], users[users_count:]
+
+        statuses = list(_STATUS_WEIGHTS)
+        weights = list(_STATUS_WEIGHTS.values())
+        orders = []
+        for i in range(size):
+            status = rnd.choices(statuses, weights)[0]
+            creator = rnd.choice(creators) if status not in ('draft', 'published') else None
+            is_private = rnd.random() < 0.1
+            orders.append(Order(
+                title=f'Заказ {i}',
+                description='Синтетический заказ для проверки планов запросов',
+                client=rnd.choice(clients),
+                budget=Decimal(rnd.randint(1, 1000) * 100),
+                deadline='2030-01-01',
+                status=status,
+                is_private=is_private,
+                creator=creator,
+                target_creator=rnd.choice(creators) if is_private else creator,
+            ))
+        Order.objects.bulk_create(orders, batch_size=2000)
+
+        pairs = set()
+        while len(pairs) < min(size // 4, users_count * users_count):
+            pairs.add((rnd.choice(clients).pk, rnd.choice(creators).pk))
+        chats = Chat.objects.bulk_create(
+            [Chat(client_id=client_id, creator_id=creator_id) for client_id, creator_id in pairs],
+            batch_size=2000,
+        )
+
+        # Один «длинный» чат, остальные сообщения распределены по всем чатам
+        main_chat = chats[0]
+        messages = []
+        for i in range(size * 3):
+            chat = main_chat if i % 10 == 0 else rnd.choice(chats)
+            from_client = rnd.random() < 0.5
+            messages.append(Message(
+                chat=chat,
+                sender_id=chat.client_id if from_client else chat.creator_id,
+                content=f'Сообщение {i}',
+            ))
+        Message.objects.bulk_create(messages, batch_size=5000)
+        self._seed_catalog(creators, size)
+
+        recent = Message.objects.filter(chat=main_chat).order_by('-created_at', '-id')
+        return {
+            'client': User.objects.get(pk=main_chat.client_id),
+            'creator': User.objects.get(pk=main_chat.creator_id),
+            'chat': main_chat,
+            'recent_message_id': recent.values_list('id', flat=True)[20],
+        }
+
+    def _seed_catalog(self, creators, size):
+        """
+        Каталог креаторов: профили у креаторов заказов и у отдельных
+        пользователей. На маленькой таблице полный просмотр дешевле индекса,
+        поэтому профилей не меньше CATALOG_MIN_SIZE.
+        """
+        rnd = random.Random(7)
+        catalog_size = max(size // 2, CATALOG_MIN_SIZE)
+        catalog_users = User.objects.bulk_create(
+            [
+                User(username=f'plan_creator_{i}', email=f'plan_creator_{i}@example.invalid', is_verified=True)
+                for i in range(max(catalog_size - len(creators), 0))
+            ],
+            batch_size=1000,
+        )
+        work_times = list(CreatorProfile.AVERAGE_WORK_TIME_RANKS) + [None]
+        CreatorProfile.objects.bulk_create(
+            [
+                CreatorProfile(
+                    user=user,
+                    specialization='Синтетический креатор',
+                    experience='1 год',
+                    rating=Decimal(rnd.randint(0, 500)) / 100,
+                    completed_orders=rnd.randint(0, 200),
+                    reviews_count=rnd.randint(0, 100),
+                    base_price=Decimal(rnd.choice([0, rnd.randint(5, 500) * 100])),
+                    average_work_time=rnd.choice(work_times),
+                )
+                for user in creators + catalog_users
+            ],
+            batch_size=2000,
+        )
+        # created_at при bulk_create одинаковый; разносим профили во времени
+        with connection.cursor() as cursor:
+            table = connection.ops.quote_name(CreatorProfile._meta.db_table)
+            cursor.execute(f"UPDATE {table} SET created_at = created_at - id * interval '1 minute'")
+
+    def _endpoints(self, fixtures):
+        client, creator, chat = fixtures['client'], fixtures['creator'], fixtures['chat']
+        pair = f'{chat.creator_id}-{chat.client_id}'
+        return [
+            ('orders list', client, '/api/orders/?pagination=cursor'),
+            ('my orders', client, '/api/orders/my-orders/?pagination=cursor'),
+            ('my created orders', creator, '/api/orders/my_created_orders/?pagination=cursor'),
+            ('chats list', client, '/api/chats/'),
+            ('chat messages', client, f'/api/chats/{chat.pk}/messages/?pagination=cursor'),
+            ('chat messages by participants', creator, f'/api/chats/{pair}/messages/?pagination=cursor'),
+            ('chat by participants', client, f'/api/chats/{pair}/'),
+            ('chat sync after', client, f'/api/chats/{chat.pk}/messages/sync/?after={fixtures["recent_message_id"]}'),
+            ('chat sync before', client, f'/api/chats/{chat.pk}/messages/sync/?before={fixtures["recent_message_id"]}'),
+        ] + self._catalog_endpoints(client)
+
+    def _catalog_endpoints(self, user):
+        """Каталог креаторов: каждая сортировка без фильтров, с каждым фильтром и со всеми."""
+        filter_sets = [{}] + [{param: _CATALOG_FILTER_VALUES[param]} for param in RANGE_FILTERS]
+        filter_sets.append({param: _CATALOG_FILTER_VALUES[param] for param in RANGE_FILTERS})
+        endpoints = []
+        for sort in SORTS:
+            for filters in filter_sets:
+                query = ''.join(f'&{param}={value}' for param, value in filters.items())
+                name = f'creators by {sort}' + (f' with {", ".join(filters)}' if filters else '')
+                endpoints.append((name, user, f'/api/creator-profiles/?pagination=cursor&ordering={sort}{query}'))
+        return endpoints
+
+    def _check_unread_count(self, fixtures):
+        """Пересчет непрочитанных после отметки прочтения — диапазон по (chat, id)."""
+        chat, client = fixtures['chat'], fixtures['client']
+        with CaptureQueriesContext(connection) as captured:
+            chat.count_unread_after(client, fixtures['recent_message_id'])
+        return self._explain('unread after read mark', [query['sql'] for query in captured.captured_queries])
+
+    # ------------------------------------------------------------------
+    # Проверка
+    # ------------------------------------------------------------------
+    def _check_endpoint(self, name, user, url):
+        api = APIClient()
+        api.force_authenticate(user)
+        with override_settings(ALLOWED_HOSTS=['*']), CaptureQueriesContext(connection) as captured:
+            response = api.get(url)
+        if response.status_code != 200:
+            raise CommandError(f"{name}: GET {url} returned {response.status_code}")
+
+        return self._explain(name, [query['sql'] for query in captured.captured_queries])
+
+    def _explain(self, name, queries):
+        failures = []
+        selects = [sql for sql in queries if sql.lstrip().upper().startswith('SELECT')]
+        with connection.cursor() as cursor:
+            for sql in selects:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                scans = [
+                    (node['Node Type'], node.get('Relation Name'))
+                    for node in iter_plan_nodes(plan[0]['Plan'])
+                    if node.get('Relation Name')
+                ]
+                for node_type, table in scans:
+                    if node_type == 'Seq Scan' and table in GUARDED_TABLES:
+                        failures.append((name, table, sql))
+                if self.verbose:
+                    described = ', '.join(f'{node_type} on {table}' for node_type, table in scans)
+                    self.stdout.write(f"    {described or 'no table scans'}\n      {sql[:200]}")
+
+        status = self.style.ERROR('FAIL') if failures else self.style.SUCCESS('ok')
+        self.stdout.write(f"  - {name}: {len(selects)} queries {status}")
+        return failures
@@ -0,0 +1,59 @@
+"""Management command to delete abandoned chunked uploads.
+
+Removes upload sessions that were not completed or not attached within
+CHUNKED_UPLOAD_EXPIRE_HOURS of their last activity, together with their
+temporary files, and deletes orphaned *.part (and *.part.attach) files left
+without a session. Also deletes profile image copies in PROFILE_IMAGE_SPOOL_DIR
+older than the same limit (left behind by rolled back transactions, see
+users.image_uploads).
+Intended to run periodically (cron).
+
+Usage:
+  python manage.py cleanup_uploads
+  python manage.py cleanup_uploads --dry-run
+"""
+from __future__ import annotations
+
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.models import UploadSession
+from core.uploads import expired_sessions, get_setting, temp_dir
+from users.image_uploads import stale_spool_files
+
+
+class Command(BaseCommand):
+    help = "Delete expired chunked upload sessions and their temporary files"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted.")
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        sessions = list(expired_sessions())
+        for session in sessions:
+            self.stdout.write(f"  - {session.pk} {session.file_name} ({session.offset}/{session.size} bytes, {session.status})")
+            if not dry_run:
+                # Временный файл удаляется сигналом post_delete
+                session.delete()
+
+        max_age = get_setting('CHUNKED_UPLOAD_EXPIRE_HOURS', 24) * 3600
+        orphans = self._orphaned_parts() + stale_spool_files(max_age)
+        for path in orphans:
+            self.stdout.write(f"  - orphaned {path}")
+            if not dry_run:
+                os.remove(path)
+
+        action = "Would delete" if dry_run else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{action} {len(sessions)} session(s), {len(orphans)} orphaned file(s)"))
+
+    def _orphaned_parts(self):
+        directory = temp_dir()
+        if not os.path.isdir(directory):
+            return []
+        names = {name for name in os.listdir(directory) if name.endswith(('.part', '.part.attach'))}
+        known = set()
+        for pk in UploadSession.objects.values_list('pk', flat=True).iterator():
+            known.update((f'{pk}.part', f'{pk}.part.attach'))
+        return [os.path.join(directory, name) for name in sorted(names - known)]
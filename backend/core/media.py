@@ -0,0 +1,287 @@
+"""
+Отдача защищенных медиафайлов (результаты работ, вложения заказов и чатов).
+
+Файлы отдаются представлениями-наследниками ProtectedFileView после
+проверки доступа:
+
+- поддерживаются диапазоны байт (Range / 206 Partial Content, If-Range),
+  поэтому видео в превью перематывается без загрузки файла целиком;
+- условные запросы (ETag / If-None-Match, Last-Modified / If-Modified-Since)
+  отвечают 304 без чтения файла;
+- файл читается потоком (FileResponse) блоками, а не загружается в память;
+- если задан MEDIA_ACCEL_REDIRECT_PREFIX, Django только проверяет доступ и
+  передает отдачу nginx через X-Accel-Redirect (internal location с alias
+  на MEDIA_ROOT), который сам обрабатывает Range и кэширующие заголовки.
+
+Тег <video> не может передать JWT в заголовке, поэтому ссылки на файлы в
+ответах API подписываются (signed_download_url): подпись дает доступ к
+одному файлу на MEDIA_SIGNED_URL_MAX_AGE секунд. Поля файлов в ответах API
+тоже содержат подписанную ссылку, а не путь /media/: каталоги
+PROTECTED_MEDIA_PREFIXES напрямую не отдаются ни nginx (см. deploy.md),
+ни Django в режиме разработки.
+"""
+
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.http import FileResponse, Http404, HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.static import serve
+from rest_framework import permissions
+from rest_framework.exceptions import NotAuthenticated
+from rest_framework.views import APIView
+
+# Каталоги MEDIA_ROOT (upload_to), файлы которых отдаются только через ProtectedFileView
+PROTECTED_MEDIA_PREFIXES = ('orders/attachments/', 'orders/deliveries/', 'chat_attachments/')
+
+SIGNATURE_PARAM = 'signature'
+SIGNATURE_SALT = 'core.media.download'
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    """Запрошенный диапазон лежит за пределами файла."""
+
+
+def parse_range(header, size):
+    """
+    Разбирает заголовок Range с одним диапазоном байт.
+
+    Returns:
+        tuple | None: (start, end) включительно или None, если заголовок
+            не задан или не поддерживается (несколько диапазонов) — тогда
+            отдается весь файл.
+
+    Raises:
+        RangeNotSatisfiable: Диапазон не пересекается с файлом.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if first == '' and last == '':
+        return None
+    if first == '':
+        # Суффиксный диапазон: последние N байт
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def make_etag(size, mtime):
+    """Строгий ETag по размеру и времени изменения (как у nginx)."""
+    return f'"{int(mtime):x}-{size:x}"'
+
+
+def if_range_matches(request, etag, mtime):
+    """Выполнено ли условие If-Range (без заголовка — всегда)."""
+    value = request.headers.get('If-Range')
+    if not value:
+        return True
+    value = value.strip()
+    if value.startswith('"') or value.startswith('W/'):
+        return value == etag
+    return parse_http_date_safe(value) == int(mtime)
+
+
+class RangeFile:
+    """Файловый объект, читающий только length байт с позиции start."""
+
+    def __init__(self, fh, start, length):
+        self.fh = fh
+        self.remaining = length
+        fh.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.fh.close()
+
+
+def _stat(field_file):
+    """Размер и время изменения файла (одним stat() для файловой системы)."""
+    storage, name = field_file.storage, field_file.name
+    try:
+        stat = os.stat(storage.path(name))
+        return stat.st_size, stat.st_mtime
+    except NotImplementedError:
+        # Хранилище без локальных путей (например, облачное)
+        return storage.size(name), storage.get_modified_time(name).timestamp()
+    except FileNotFoundError:
+        raise Http404('Файл не найден')
+
+
+def _base_headers(response, etag, mtime, cache_control):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = cache_control
+
+
+def serve_file(request, field_file, filename=None, as_attachment=False):
+    """
+    Отдает файл FileField с поддержкой Range и условных запросов.
+
+    Args:
+        request: Запрос (HttpRequest или DRF Request).
+        field_file: Значение FileField (FieldFile).
+        filename: Имя файла для Content-Disposition (по умолчанию — имя в хранилище).
+        as_attachment: Отдавать как вложение (скачивание), а не inline.
+    """
+    if not field_file:
+        raise Http404('Файл не найден')
+    request = getattr(request, '_request', request)
+    filename = filename or os.path.basename(field_file.name)
+    size, mtime = _stat(field_file)
+    etag = make_etag(size, mtime)
+    cache_control = getattr(settings, 'MEDIA_CACHE_CONTROL', 'private, max-age=3600')
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(mtime))
+    if not_modified is not None:
+        _base_headers(not_modified, etag, mtime, cache_control)
+        return not_modified
+
+    accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '')
+    if accel_prefix:
+        response = HttpResponse(content_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(field_file.name)
+        disposition = 'attachment' if as_attachment else 'inline'
+        response['Content-Disposition'] = f"{disposition}; filename*=UTF-8''{quote(filename)}"
+        _base_headers(response, etag, mtime, cache_control)
+        return response
+
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        _base_headers(response, etag, mtime, cache_control)
+        return response
+    if byte_range is not None and not if_range_matches(request, etag, mtime):
+        byte_range = None
+
+    fh = field_file.storage.open(field_file.name, 'rb')
+    if byte_range is None:
+        response = FileResponse(fh, as_attachment=as_attachment, filename=filename)
+        response['Content-Length'] = str(size)
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            RangeFile(fh, start, end - start + 1),
+            status=206,
+            as_attachment=as_attachment,
+            filename=filename,
+        )
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    _base_headers(response, etag, mtime, cache_control)
+    return response
+
+
+def serve_public_media(request, path, document_root=None):
+    """
+    Отдача медиафайлов в режиме разработки без каталогов PROTECTED_MEDIA_PREFIXES.
+
+    serve сам сводит '//', '.' и '..' в пути, поэтому каталог проверяется
+    по нормализованному пути, а не по URL.
+    """
+    if posixpath.normpath(path).lstrip('/').startswith(PROTECTED_MEDIA_PREFIXES):
+        raise Http404('Файл не найден')
+    return serve(request, path, document_root=document_root)
+
+
+def sign_download(kind, object_id):
+    """Подпись ссылки на файл объекта kind с указанным ID."""
+    return signing.dumps([kind, object_id], salt=SIGNATURE_SALT, compress=True)
+
+
+def check_download_signature(token, kind, object_id):
+    """Действительна ли подпись для этого файла."""
+    if not token:
+        return False
+    max_age = getattr(settings, 'MEDIA_SIGNED_URL_MAX_AGE', 6 * 3600)
+    try:
+        return signing.loads(token, salt=SIGNATURE_SALT, max_age=max_age) == [kind, object_id]
+    except signing.BadSignature:
+        return False
+
+
+def signed_download_url(request, viewname, kind, object_id, **kwargs):
+    """
+    Ссылка скачивания с подписью (для <video src>, <a href> без заголовка Authorization).
+
+    Args:
+        request: Запрос (для абсолютного URL) или None.
+        viewname: Имя маршрута представления отдачи файла.
+        kind: Метка файла в подписи (ProtectedFileView.kind).
+        object_id: ID объекта с файлом.
+        **kwargs: Дополнительные аргументы маршрута (кроме pk).
+    """
+    path = reverse(viewname, kwargs={'pk': object_id, **kwargs})
+    path = f'{path}?{SIGNATURE_PARAM}={sign_download(kind, object_id)}'
+    return request.build_absolute_uri(path) if request is not None else path
+
+
+class ProtectedFileView(APIView):
+    """
+    Базовое представление отдачи файла с проверкой доступа.
+
+    Доступ есть у пользователя, для которого has_access() истинно, или
+    по действительной подписи ссылки. Подпись и аутентификация проверяются
+    до обращения к базе; несуществующий и чужой файл отвечают одинаково
+    (404). Параметр ?download=1 отдает файл как вложение.
+
+    Наследники задают kind (метка в подписи) и реализуют get_object(),
+    has_access() и get_file().
+    """
+    kind = None
+    # Доступ проверяется в get(): запрос по подписанной ссылке приходит без JWT
+    permission_classes = [permissions.AllowAny]
+
+    def get_object(self):
+        raise NotImplementedError
+
+    def has_access(self, user, obj):
+        raise NotImplementedError
+
+    def get_file(self, obj):
+        raise NotImplementedError
+
+    def get_filename(self, obj):
+        return None
+
+    def get(self, request, *args, **kwargs):
+        signed = check_download_signature(request.query_params.get(SIGNATURE_PARAM), self.kind, self.kwargs['pk'])
+        if not signed and not request.user.is_authenticated:
+            raise NotAuthenticated()
+        try:
+            obj = self.get_object()
+        except Http404:
+            obj = None
+        if obj is None or not (signed or self.has_access(request.user, obj)):
+            raise Http404('Файл не найден')
+        as_attachment = request.query_params.get('download') in ('1', 'true')
+        return serve_file(request, self.get_file(obj), filename=self.get_filename(obj), as_attachment=as_attachment)
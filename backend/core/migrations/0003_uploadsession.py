@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-16 20:37
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_tag_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file_name', models.CharField(max_length=255, verbose_name='имя файла')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='тип файла')),
+                ('size', models.PositiveBigIntegerField(verbose_name='размер файла в байтах')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='принято байт')),
+                ('sha256', models.CharField(blank=True, max_length=64, verbose_name='SHA-256')),
+                ('status', models.CharField(choices=[('uploading', 'Загружается'), ('completed', 'Загружен'), ('attached', 'Прикреплен')], default='uploading', max_length=20, verbose_name='статус')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='дата обновления')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='пользователь')),
+            ],
+            options={
+                'verbose_name': 'сессия загрузки',
+                'verbose_name_plural': 'сессии загрузки',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='upload_status_updated_idx')],
+            },
+        ),
+    ]
@@ -1,9 +1,13 @@
 """Модели для приложения Core.
 
 В данном модуле определены основные общие модели, используемые в разных частях приложения.
-Здесь находится единая модель Tag, которая используется как для заказов, так и для профилей пользователей.
+Здесь находится единая модель Tag, которая используется как для заказов, так и для профилей пользователей,
+и модель UploadSession для порционной загрузки файлов (см. core.uploads).
 """
 
+import uuid
+
+from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -55,3 +59,65 @@ class Tag(models.Model):
     def __str__(self):
         """Возвращает строковое представление тега."""
         return self.name
+
+
+class UploadSession(models.Model):
+    """
+    Сессия порционной (chunked) загрузки файла.
+    
+    Файл принимается частями во временный файл на диске (core.uploads),
+    после завершения загрузки проверяется его SHA-256, и файл прикрепляется
+    к сообщению чата, заказу или сдаче работы.
+    
+    Attributes:
+        id (UUIDField): Идентификатор сессии (не подбирается перебором).
+        user (ForeignKey): Пользователь, загружающий файл.
+        file_name (CharField): Исходное имя файла.
+        content_type (CharField): MIME-тип файла.
+        size (PositiveBigIntegerField): Полный размер файла в байтах.
+        offset (PositiveBigIntegerField): Сколько байт уже принято.
+        sha256 (CharField): Контрольная сумма завершенной загрузки.
+        status (CharField): Состояние сессии.
+    """
+    STATUS_UPLOADING = 'uploading'
+    STATUS_COMPLETED = 'completed'
+    STATUS_ATTACHED = 'attached'
+    STATUS_CHOICES = [
+        (STATUS_UPLOADING, _('Загружается')),
+        (STATUS_COMPLETED, _('Загружен')),
+        (STATUS_ATTACHED, _('Прикреплен')),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        verbose_name=_('пользователь')
+    )
+    file_name = models.CharField(_('имя файла'), max_length=255)
+    content_type = models.CharField(_('тип файла'), max_length=100, blank=True)
+    size = models.PositiveBigIntegerField(_('размер файла в байтах'))
+    offset = models.PositiveBigIntegerField(_('принято байт'), default=0)
+    sha256 = models.CharField(_('SHA-256'), max_length=64, blank=True)
+    status = models.CharField(_('статус'), max_length=20, choices=STATUS_CHOICES, default=STATUS_UPLOADING)
+    created_at = models.DateTimeField(_('дата создания'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('дата обновления'), auto_now=True)
+    
+    class Meta:
+        verbose_name = _('сессия загрузки')
+        verbose_name_plural = _('сессии загрузки')
+        ordering = ['-created_at']
+        indexes = [
+            # Очистка брошенных загрузок (cleanup_uploads)
+            models.Index(fields=['status', 'updated_at'], name='upload_status_updated_idx'),
+        ]
+    
+    def __str__(self):
+        """Возвращает строковое представление сессии загрузки."""
+        return f"{self.file_name} ({self.offset}/{self.size})"
+    
+    @property
+    def is_complete(self):
+        """Приняты ли все байты файла."""
+        return self.offset >= self.size
@@ -0,0 +1,247 @@
+"""
+Пагинация API.
+
+StandardPagination — пагинация по умолчанию (settings.REST_FRAMEWORK).
+Без дополнительных параметров она работает как PageNumberPagination
+(?page=N, с полем count). Если представление объявляет атрибут
+`cursor_ordering`, то запрос с параметром ?cursor=... или
+?pagination=cursor переключается в курсорный (keyset) режим:
+
+- страница выбирается условием по ключу сортировки, а не OFFSET,
+  поэтому глубокие страницы стоят столько же, сколько первая;
+- общее количество (COUNT) считается только при ?with_count=true;
+- курсор — непрозрачная строка со значениями ключа последней (или первой,
+  для ссылки previous) записи страницы. Ссылка previous с пустой страницы
+  включает саму позицию курсора, поэтому возвращает страницу, с которой
+  клиент пришел.
+
+Ключ сортировки должен быть уникальным, поэтому он заканчивается первичным
+ключом, например ('-created_at', '-id'). Для него должен существовать
+составной индекс — тогда каждая страница читается диапазоном индекса.
+
+Если queryset уже отсортирован по аннотации (например, по релевантности
+search_rank при поиске), аннотация становится первой частью ключа и
+попадает в курсор. Значение аннотации должно точно восстанавливаться из
+строки (для чисел — double precision, а не real).
+"""
+
+import base64
+import copy
+import json
+from types import SimpleNamespace
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def encode_cursor(data):
+    """Кодирует позицию в непрозрачную строку курсора."""
+    raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Декодирует курсор; ValueError для некорректного значения."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('Некорректный курсор')
+    if not isinstance(data, dict) or not isinstance(data.get('p'), list):
+        raise ValueError('Некорректный курсор')
+    return data
+
+
+class StandardPagination(PageNumberPagination):
+    """
+    Постраничная пагинация с курсорным режимом для представлений с cursor_ordering.
+    """
+
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    count_query_param = 'with_count'
+
+    def is_cursor_request(self, request, view=None):
+        """Запрошен ли курсорный режим (и поддерживает ли его представление)."""
+        if view is not None and not getattr(view, 'cursor_ordering', None):
+            return False
+        params = request.query_params
+        return self.cursor_query_param in params or params.get(self.mode_query_param) == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.is_cursor_request(request, view)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_keyset(queryset, request, view.cursor_ordering)
+
+    def get_paginated_response(self, data):
+        if not getattr(self, 'cursor_mode', False):
+            return super().get_paginated_response(data)
+
+        payload = {}
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return Response(payload)
+
+    def get_next_link(self):
+        if not getattr(self, 'cursor_mode', False):
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        data = {'p': self.next_position}
+        if self.next_inclusive:
+            data['i'] = 1
+        return self._cursor_link(data)
+
+    def get_previous_link(self):
+        if not getattr(self, 'cursor_mode', False):
+            return super().get_previous_link()
+        if self.previous_position is None:
+            return None
+        data = {'p': self.previous_position, 'r': 1}
+        if self.previous_inclusive:
+            data['i'] = 1
+        return self._cursor_link(data)
+
+    # ------------------------------------------------------------------
+    # Курсорный режим
+    # ------------------------------------------------------------------
+    def paginate_keyset(self, queryset, request, ordering):
+        """
+        Возвращает страницу queryset после (или перед) позицией из курсора.
+
+        Args:
+            queryset: Отфильтрованный queryset. Если он уже отсортирован,
+                сортировка должна быть началом ordering; перед ней допускаются
+                аннотации queryset (они добавляются в начало ключа).
+            request: Запрос.
+            ordering: Уникальный ключ сортировки, например ('-created_at', '-id').
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.count = None
+        self.next_position = None
+        self.previous_position = None
+        self.next_inclusive = False
+        self.previous_inclusive = False
+
+        ordering = tuple(ordering)
+        current = tuple(queryset.query.order_by)
+        annotations = queryset.query.annotations
+        # Сортировка по аннотациям (релевантность поиска) предшествует ключу представления
+        leading = 0
+        while leading < len(current) and str(current[leading]).lstrip('-') in annotations:
+            leading += 1
+        rest = current[leading:]
+        if rest and rest != ordering[:len(rest)]:
+            raise ValidationError({
+                self.cursor_query_param: 'Курсорная пагинация поддерживает только сортировку '
+                                         f'{", ".join(ordering)}'
+            })
+        ordering = current[:leading] + ordering
+
+        if request.query_params.get(self.count_query_param, '').lower() in TRUE_VALUES:
+            self.count = queryset.order_by().count()
+
+        fields = [
+            (self._ordering_field(queryset, name.lstrip('-')), name.startswith('-'))
+            for name in ordering
+        ]
+
+        reverse = False
+        inclusive = False
+        position = None
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                data = decode_cursor(cursor)
+                if len(data['p']) != len(fields):
+                    raise ValueError('Некорректный курсор')
+                position = [field.to_python(value) for (field, _), value in zip(fields, data['p'])]
+            except Exception:
+                raise ValidationError({self.cursor_query_param: 'Некорректный курсор'})
+            reverse = bool(data.get('r'))
+            inclusive = bool(data.get('i'))
+
+        if reverse:
+            # Страница перед позицией: идем в обратном порядке и разворачиваем результат
+            fields = [(field, not descending) for field, descending in fields]
+        queryset = queryset.order_by(*[
+            f'-{field.attname}' if descending else field.attname for field, descending in fields
+        ])
+        if position is not None:
+            queryset = queryset.filter(self._position_filter(fields, position, inclusive))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if rows:
+            has_next = position is not None if reverse else has_more
+            has_previous = has_more if reverse else position is not None
+            if has_next:
+                self.next_position = self._position_of(rows[-1], fields)
+            if has_previous:
+                self.previous_position = self._position_of(rows[0], fields)
+        elif position is not None:
+            # Пустая страница: даем вернуться к исходной позиции (включая ее саму)
+            if reverse:
+                self.next_position = data['p']
+                self.next_inclusive = True
+            else:
+                self.previous_position = data['p']
+                self.previous_inclusive = True
+        return rows
+
+    @staticmethod
+    def _ordering_field(queryset, name):
+        """Поле модели или поле результата аннотации с именем name."""
+        annotation = queryset.query.annotations.get(name)
+        if annotation is None:
+            return queryset.model._meta.get_field(name)
+        field = copy.copy(annotation.output_field)
+        field.set_attributes_from_name(name)
+        return field
+
+    @staticmethod
+    def _position_filter(fields, position, inclusive=False):
+        """
+        Условие «строго после позиции» для ключа (a, b, ...):
+        a > x OR (a = x AND b > y) OR ...; с inclusive — «после или на позиции».
+
+        Дополнительное условие a >= x по первому полю задает границу
+        диапазона индекса.
+        """
+        condition = Q()
+        equal = {}
+        for (field, descending), value in zip(fields, position):
+            lookup = 'lt' if descending else 'gt'
+            condition |= Q(**equal, **{f'{field.attname}__{lookup}': value})
+            equal[field.attname] = value
+        if inclusive:
+            condition |= Q(**equal)
+        first_field, first_descending = fields[0]
+        bound = {f'{first_field.attname}__{"lte" if first_descending else "gte"}': position[0]}
+        return Q(**bound) & condition
+
+    @staticmethod
+    def _position_of(obj, fields):
+        if isinstance(obj, dict):
+            # Строка queryset.values(): значения берем по имени поля
+            obj = SimpleNamespace(**{field.attname: obj[field.attname] for field, _ in fields})
+        return [field.value_to_string(obj) for field, _ in fields]
+
+    def _cursor_link(self, data):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, encode_cursor(data))
@@ -0,0 +1,48 @@
+"""
+Сериализаторы приложения Core.
+"""
+
+from django.conf import settings
+from rest_framework import serializers
+
+from .models import UploadSession
+from .uploads import max_upload_size
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор сессии порционной загрузки.
+    
+    chunk_size — рекомендуемый размер части для клиента.
+    """
+    chunk_size = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'file_name', 'content_type', 'size', 'offset', 'sha256',
+            'status', 'chunk_size', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'offset', 'sha256', 'status', 'created_at', 'updated_at']
+    
+    def get_chunk_size(self, obj):
+        return getattr(settings, 'CHUNKED_UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024)
+    
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('Размер файла должен быть больше нуля')
+        if value > max_upload_size():
+            raise serializers.ValidationError(f'Размер файла не должен превышать {max_upload_size()} байт')
+        return value
+
+
+class UploadCompleteSerializer(serializers.Serializer):
+    """Завершение загрузки: ожидаемая контрольная сумма файла (необязательно)."""
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False)
+
+
+class UploadAttachSerializer(serializers.Serializer):
+    """Прикрепление загрузки к объекту: target — message, order или delivery."""
+    target = serializers.CharField()
+    id = serializers.IntegerField(min_value=1)
+    description = serializers.CharField(required=False, allow_blank=True)
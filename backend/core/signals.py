@@ -0,0 +1,94 @@
+"""Обработчики сигналов приложения Core.
+
+Сбрасывают кэш каталога тегов (core.tag_catalog) при изменении тегов
+и категорий и удаляют временные файлы удаленных сессий загрузки.
+Запоминают прежнее название тега (Tag._previous_name) для обработчиков
+post_save, которые пересчитывают поисковые документы заказов и креаторов.
+Поддерживают индекс тегов в памяти (core.tag_index).
+"""
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from orders.models import Category
+
+from .models import Tag, UploadSession
+from .tag_catalog import bump_catalog_version
+from .tag_index import SOURCES, apply_change, get_source
+from .uploads import remove_temp_file
+
+
+@receiver(pre_save, sender=Tag)
+def remember_tag_name(sender, instance, **kwargs):
+    """Запоминает прежнее название тега, чтобы понять, нужен ли пересчет документов."""
+    if instance.pk:
+        instance._previous_name = Tag.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_tag_catalog(sender, **kwargs):
+    """Сдвигает версию каталога тегов после фиксации транзакции."""
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_delete, sender=UploadSession)
+def remove_upload_temp_file(sender, instance, **kwargs):
+    """Удаляет временный файл сессии загрузки (в том числе при удалении пользователя)."""
+    remove_temp_file(instance)
+
+
+# ------ индекс тегов ------------------------------------------------------
+
+def _schedule_index_change(kind, change=None):
+    transaction.on_commit(lambda: apply_change(kind, change))
+
+
+def _connect_tag_index(kind):
+    model, field = get_source(kind)
+
+    def on_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+        if action == 'pre_clear':
+            # Для clear() pk_set не передается: запоминаем затронутые связи
+            related = getattr(instance, field.remote_field.get_accessor_name() if reverse else field.name)
+            instance.__dict__[f'_tag_index_cleared_{kind}'] = list(related.values_list('pk', flat=True))
+            return
+        if action == 'post_clear':
+            pk_set = instance.__dict__.pop(f'_tag_index_cleared_{kind}', [])
+        elif action not in ('post_add', 'post_remove'):
+            return
+        if not pk_set:
+            return
+        object_ids, tag_ids = (list(pk_set), [instance.pk]) if reverse else ([instance.pk], list(pk_set))
+        if action == 'post_add':
+            _schedule_index_change(kind, ('add_tags', object_ids, tag_ids))
+        else:
+            _schedule_index_change(kind, ('remove_tags', object_ids, tag_ids))
+
+    def on_save(sender, instance, created, raw=False, **kwargs):
+        if created:
+            _schedule_index_change(kind, ('add_objects', [instance.pk]))
+
+    def on_delete(sender, instance, **kwargs):
+        # Связи с тегами удаляются каскадом без m2m_changed: объект снимается
+        # со всех тегов сразу
+        _schedule_index_change(kind, ('remove_objects', [instance.pk]))
+
+    uid = f'tag_index:{kind}'
+    m2m_changed.connect(on_tags_changed, sender=field.remote_field.through, weak=False, dispatch_uid=uid)
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=uid)
+
+
+for _kind in SOURCES:
+    _connect_tag_index(_kind)
+
+
+@receiver(post_delete, sender=Tag)
+def drop_tag_from_index(sender, instance, **kwargs):
+    """Убирает удаленный тег из индексов тегов."""
+    for kind in SOURCES:
+        _schedule_index_change(kind, ('drop_tag', instance.pk))
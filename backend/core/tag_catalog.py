@@ -0,0 +1,185 @@
+"""Кэш каталога тегов.
+
+Каталог тегов меняется только при импорте (import_tags*, import_tags_categories)
+и правках в админке, а читается при каждой загрузке страницы. Поэтому
+сериализованный каталог для каждого типа тегов хранится:
+
+- в общем кэше (Django cache) — под ключом, включающим версию каталога;
+- в памяти процесса — вместе с уже закодированными JSON-байтами.
+
+Версия каталога лежит в общем кэше и сдвигается сигналами при изменении
+Tag или Category (см. core.signals), после чего все процессы перестраивают
+снимок при следующем запросе. Версия — время изменения в микросекундах,
+она служит только для инвалидации снимков (из нее же берется Last-Modified).
+ETag — хэш закодированного JSON: у одинакового каталога он совпадает во
+всех воркерах и не меняется при пересоздании версии, поэтому 304 отдается,
+пока содержимое не изменилось.
+
+Инвалидация между процессами требует общего кэша (REDIS_URL). С кэшем в
+памяти процесса (LocMemCache) версия хранится TAG_CATALOG_VERSION_TTL секунд,
+после чего каждый воркер перечитывает каталог из базы — правка в одном
+воркере становится видна остальным с этой задержкой.
+"""
+
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+
+from .models import Tag
+
+CATALOG_VERSION_KEY = 'core:tag_catalog:version'
+CATALOG_SNAPSHOT_KEY = 'core:tag_catalog:{version}:{tag_type}'
+# Снимок в общем кэше живет сутки: после смены версии старые ключи не нужны
+CATALOG_SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+# Тип «все теги» (без фильтра по type)
+ALL_TYPES = 'all'
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+class CatalogSnapshot:
+    """Снимок каталога тегов одного типа."""
+
+    __slots__ = ('version', 'tag_type', 'rows', 'content', 'digest')
+
+    def __init__(self, version, tag_type, rows, content):
+        self.version = version
+        self.tag_type = tag_type
+        self.rows = rows
+        self.content = content
+        # Хэш считается один раз на снимок: снимок живет в памяти процесса до смены версии
+        self.digest = hashlib.sha256(content).hexdigest()[:32]
+
+    @property
+    def etag(self):
+        return self.etag_for()
+
+    def etag_for(self, suffix=''):
+        """ETag снимка по содержимому; suffix различает представления (например, страницы)."""
+        return f'"tags-{self.tag_type}-{self.digest}{suffix}"'
+
+    @property
+    def last_modified(self):
+        """Время изменения каталога (timestamp, секунды)."""
+        return self.version // 1_000_000
+
+
+def _version_timeout():
+    """Время жизни версии: None (бессрочно) для общего кэша, иначе TAG_CATALOG_VERSION_TTL."""
+    return getattr(settings, 'TAG_CATALOG_VERSION_TTL', None)
+
+
+def get_catalog_version():
+    """Текущая версия каталога (создается при первом обращении)."""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = time.time_ns() // 1000
+        # add: если другой процесс уже выставил версию, используем ее
+        if not cache.add(CATALOG_VERSION_KEY, version, timeout=_version_timeout()):
+            version = cache.get(CATALOG_VERSION_KEY, version)
+    return version
+
+
+def bump_catalog_version():
+    """Сдвигает версию каталога — все снимки считаются устаревшими."""
+    previous = cache.get(CATALOG_VERSION_KEY) or 0
+    version = max(time.time_ns() // 1000, previous + 1)
+    cache.set(CATALOG_VERSION_KEY, version, timeout=_version_timeout())
+    with _memo_lock:
+        _memo.clear()
+    return version
+
+
+def normalize_tag_type(tag_type):
+    """Возвращает тип тега для каталога или None для неизвестного типа."""
+    if not tag_type:
+        return ALL_TYPES
+    if tag_type in (Tag.TAG_TYPE_ORDER, Tag.TAG_TYPE_CREATOR):
+        return tag_type
+    return None
+
+
+def _build_rows(tag_type):
+    queryset = Tag.objects.order_by('name', 'id')
+    if tag_type != ALL_TYPES:
+        queryset = queryset.filter(type=tag_type)
+    rows = []
+    # values() с join на категорию: один запрос без создания моделей
+    for tag in queryset.values('id', 'name', 'slug', 'type', 'category_id', 'category__name'):
+        category_info = None
+        if tag['category_id'] is not None:
+            category_info = {
+                'id': tag['category_id'],
+                'name': tag['category__name']
+            }
+        rows.append({
+            'id': tag['id'],
+            'name': tag['name'],
+            'slug': tag['slug'],
+            'category': category_info,
+            'type': tag['type']
+        })
+    return rows
+
+
+def get_catalog(tag_type=ALL_TYPES):
+    """
+    Возвращает снимок каталога тегов для типа ('order', 'creator' или ALL_TYPES).
+
+    Порядок поиска: память процесса -> общий кэш -> база данных.
+    """
+    version = get_catalog_version()
+
+    snapshot = _memo.get(tag_type)
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    key = CATALOG_SNAPSHOT_KEY.format(version=version, tag_type=tag_type)
+    cached = cache.get(key)
+    if cached is not None:
+        rows, content = cached
+    else:
+        rows = _build_rows(tag_type)
+        content = JSONRenderer().render(rows)
+        cache.set(key, (rows, content), timeout=CATALOG_SNAPSHOT_TIMEOUT)
+
+    snapshot = CatalogSnapshot(version, tag_type, rows, content)
+    with _memo_lock:
+        _memo[tag_type] = snapshot
+    return snapshot
+
+
+def apply_validators(response, etag, last_modified):
+    """Выставляет заголовки ETag/Last-Modified; клиент перепроверяет кэш при каждом запросе."""
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def not_modified_response(request, etag, last_modified):
+    """HttpResponseNotModified (304), если у клиента актуальная версия, иначе None."""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        apply_validators(response, etag, last_modified)
+    return response
+
+
+def catalog_http_response(request, snapshot):
+    """Ответ с заранее закодированным JSON каталога или 304."""
+    not_modified = not_modified_response(request, snapshot.etag, snapshot.last_modified)
+    if not_modified is not None:
+        return not_modified
+    response = HttpResponse(snapshot.content, content_type='application/json')
+    return apply_validators(response, snapshot.etag, snapshot.last_modified)
@@ -0,0 +1,386 @@
+"""
+Инвертированный индекс тегов в памяти процесса.
+
+Для каждого вида объектов с тегами (креаторы, заказы — см. SOURCES) индекс
+хранит битовую карту объектов каждого тега: бит N установлен, если объект
+с id = N имеет тег, — и карту всех объектов (universe). Битовая карта —
+целое число Python: пересечение, объединение и дополнение — операции
+& | ~ над ним, число объектов — int.bit_count().
+
+Из индекса без обращения к базе получаются:
+
+- выборки по тегам «любой из» (OR), «все» (AND) и «ни одного» (NOT);
+- счетчики фасетов: сколько объектов текущей выборки имеет каждый тег.
+
+Найденные id передаются в запрос ORM условием pk__in. Если их больше
+TAG_INDEX_MAX_IDS, фильтр выполняется в базе подзапросами EXISTS.
+
+Индекс строится при первом обращении в процессе (два запроса: id объектов
+и строки промежуточной таблицы тегов). Изменения тегов (m2m_changed),
+создание и удаление объектов и тегов (см. core.signals) после коммита
+сдвигают версию индекса в общем кэше, записывают изменение в журнал
+(ключ версии в том же кэше, хранится TAG_INDEX_CHANGE_LOG_TTL секунд) и
+применяются к индексу своего процесса. Другие процессы, увидев новую
+версию, применяют пропущенные изменения из журнала; перестройка индекса
+(два запроса выше) нужна, только если изменений больше
+TAG_INDEX_CHANGE_LOG_SIZE или какое-то из них уже вытеснено из кэша.
+
+Версия в кэше памяти процесса (LocMemCache, без REDIS_URL) другим воркерам
+не видна, поэтому там она живет TAG_INDEX_VERSION_TTL секунд: после этого
+воркер получает новую версию и перестраивает индекс, так что фильтры и
+фасеты отстают от изменений в других воркерах не дольше этого времени.
+"""
+
+import logging
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+logger = logging.getLogger(__name__)
+
+# Виды индексов: (модель, поле ManyToMany с тегами)
+SOURCES = {
+    'creators': ('users.CreatorProfile', 'tags'),
+    'orders': ('orders.Order', 'tags'),
+}
+
+INDEX_VERSION_KEY = 'core:tag_index:{kind}:version'
+INDEX_CHANGE_KEY = 'core:tag_index:{kind}:change:{version}'
+
+# Изменения индекса из журнала: имя метода TagIndex и его аргументы
+CHANGE_METHODS = {'add_objects', 'remove_objects', 'add_tags', 'remove_tags', 'drop_tag'}
+
+# Позиции установленных битов для каждого значения байта
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def is_enabled():
+    return getattr(settings, 'TAG_INDEX_ENABLED', True)
+
+
+def ids_to_bitmap(ids):
+    """Битовая карта из последовательности неотрицательных id."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    data = bytearray(max(ids) // 8 + 1)
+    for object_id in ids:
+        data[object_id >> 3] |= 1 << (object_id & 7)
+    return int.from_bytes(data, 'little')
+
+
+def bitmap_to_ids(bitmap):
+    """Список id (по возрастанию) из битовой карты."""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    ids = []
+    for position, byte in enumerate(data):
+        if byte:
+            base = position << 3
+            ids.extend(base + bit for bit in _BYTE_BITS[byte])
+    return ids
+
+
+def get_source(kind):
+    """(модель, поле тегов) для вида индекса."""
+    label, field_name = SOURCES[kind]
+    model = apps.get_model(label)
+    field = model._meta.get_field(field_name)
+    return model, field
+
+
+def _through_columns(field):
+    """(модель промежуточной таблицы, колонка объекта, колонка тега)."""
+    through = field.remote_field.through
+    return through, f'{field.m2m_field_name()}_id', f'{field.m2m_reverse_field_name()}_id'
+
+
+class TagIndex:
+    """Битовые карты тегов одного вида объектов."""
+
+    def __init__(self, kind, version, universe, tags):
+        self.kind = kind
+        self.version = version
+        self.universe = universe
+        self.tags = tags
+
+    @classmethod
+    def build(cls, kind, version):
+        model, field = get_source(kind)
+        through, object_column, tag_column = _through_columns(field)
+
+        universe = ids_to_bitmap(model.objects.order_by().values_list('pk', flat=True).iterator())
+        by_tag = {}
+        rows = through.objects.order_by().values_list(tag_column, object_column).iterator(chunk_size=5000)
+        for tag_id, object_id in rows:
+            by_tag.setdefault(tag_id, []).append(object_id)
+        tags = {tag_id: ids_to_bitmap(ids) for tag_id, ids in by_tag.items()}
+        return cls(kind, version, universe, tags)
+
+    # ------ запросы ----------------------------------------------------
+    def match(self, any_of=(), all_of=(), none_of=()):
+        """
+        Битовая карта объектов, у которых есть хотя бы один тег из any_of,
+        все теги из all_of и ни одного тега из none_of.
+
+        Пустые условия не ограничивают выборку.
+        """
+        result = self.universe
+        if any_of:
+            union = 0
+            for tag_id in any_of:
+                union |= self.tags.get(tag_id, 0)
+            result &= union
+        for tag_id in all_of:
+            result &= self.tags.get(tag_id, 0)
+            if not result:
+                return 0
+        for tag_id in none_of:
+            result &= ~self.tags.get(tag_id, 0)
+        return result
+
+    def facets(self, base=None):
+        """
+        Счетчики тегов в выборке base (по умолчанию — все объекты).
+
+        Returns:
+            dict: {id тега: число объектов выборки с тегом} без нулевых значений.
+        """
+        if base is None:
+            base = self.universe
+        counts = {}
+        for tag_id, bitmap in list(self.tags.items()):
+            count = (bitmap & base).bit_count()
+            if count:
+                counts[tag_id] = count
+        return counts
+
+    # ------ изменения --------------------------------------------------
+    def apply(self, change):
+        """Применяет изменение (метод из CHANGE_METHODS, *аргументы)."""
+        method, *args = change
+        if method not in CHANGE_METHODS:
+            raise ValueError(f'Неизвестное изменение индекса тегов: {method}')
+        getattr(self, method)(*args)
+
+    def add_objects(self, object_ids):
+        self.universe |= ids_to_bitmap(object_ids)
+
+    def remove_objects(self, object_ids):
+        mask = ~ids_to_bitmap(object_ids)
+        self.universe &= mask
+        for tag_id in list(self.tags):
+            self.tags[tag_id] &= mask
+            if not self.tags[tag_id]:
+                del self.tags[tag_id]
+
+    def add_tags(self, object_ids, tag_ids):
+        bitmap = ids_to_bitmap(object_ids)
+        self.universe |= bitmap
+        for tag_id in tag_ids:
+            self.tags[tag_id] = self.tags.get(tag_id, 0) | bitmap
+
+    def remove_tags(self, object_ids, tag_ids):
+        mask = ~ids_to_bitmap(object_ids)
+        for tag_id in tag_ids:
+            if tag_id in self.tags:
+                self.tags[tag_id] &= mask
+                if not self.tags[tag_id]:
+                    del self.tags[tag_id]
+
+    def drop_tag(self, tag_id):
+        self.tags.pop(tag_id, None)
+
+
+def _version_timeout():
+    """Время жизни версии: None (бессрочно) для общего кэша, иначе TAG_INDEX_VERSION_TTL."""
+    return getattr(settings, 'TAG_INDEX_VERSION_TTL', None)
+
+
+def _new_version():
+    # Время в микросекундах: новая версия не совпадает с версией уже построенных индексов
+    return time.time_ns() // 1000
+
+
+def _current_version(kind):
+    key = INDEX_VERSION_KEY.format(kind=kind)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        # add: если другой процесс уже выставил версию, используем ее
+        if not cache.add(key, version, timeout=_version_timeout()):
+            version = cache.get(key, version)
+    return version
+
+
+def _bump_version(kind):
+    """Сдвигает версию индекса в общем кэше; возвращает новую версию."""
+    key = INDEX_VERSION_KEY.format(kind=kind)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Ключа нет (кэш очищен или версия истекла): начинаем заново,
+        # индексы процессов перестроятся
+        version = _new_version()
+        if not cache.add(key, version, timeout=_version_timeout()):
+            version = cache.get(key, version)
+        return version
+
+
+def _catch_up(index, version):
+    """
+    Применяет к индексу пропущенные изменения из журнала в кэше.
+
+    Returns:
+        bool: Удалось ли довести индекс до версии version (иначе его нужно
+            перестроить).
+    """
+    missed = range(index.version + 1, version + 1)
+    if not missed or len(missed) > getattr(settings, 'TAG_INDEX_CHANGE_LOG_SIZE', 1000):
+        return False
+    keys = [INDEX_CHANGE_KEY.format(kind=index.kind, version=missed_version) for missed_version in missed]
+    changes = cache.get_many(keys)
+    if len(changes) != len(keys):
+        return False
+    for key in keys:
+        index.apply(changes[key])
+    index.version = version
+    return True
+
+
+def get_index(kind):
+    """Актуальный индекс вида kind (догоняется по журналу или перестраивается)."""
+    version = _current_version(kind)
+    index = _indexes.get(kind)
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        index = _indexes.get(kind)
+        if index is not None and index.version != version and _catch_up(index, version):
+            logger.debug("Индекс тегов %s догнал версию %s по журналу", kind, version)
+        elif index is None or index.version != version:
+            index = TagIndex.build(kind, version)
+            _indexes[kind] = index
+            logger.debug("Индекс тегов %s построен: %s тегов, версия %s", kind, len(index.tags), version)
+    return index
+
+
+def apply_change(kind, change=None):
+    """
+    Сдвигает общую версию, записывает изменение в журнал и применяет его
+    к индексу процесса.
+
+    Args:
+        change: Кортеж (метод TagIndex из CHANGE_METHODS, *аргументы). Если
+            None, индексы всех процессов перестроятся при следующем
+            обращении.
+
+    Вызывается после коммита транзакции (см. core.signals).
+    """
+    version = _bump_version(kind)
+    if change is not None:
+        cache.set(
+            INDEX_CHANGE_KEY.format(kind=kind, version=version), change,
+            timeout=getattr(settings, 'TAG_INDEX_CHANGE_LOG_TTL', 3600),
+        )
+    with _lock:
+        index = _indexes.get(kind)
+        if index is None:
+            return
+        if change is not None and index.version == version - 1:
+            index.apply(change)
+            index.version = version
+        elif change is None:
+            _indexes.pop(kind, None)
+        # Отставший индекс догонит версию по журналу при следующем обращении
+
+
+def reset():
+    """Сбрасывает индексы процесса (перестроятся при следующем обращении)."""
+    with _lock:
+        _indexes.clear()
+
+
+def filter_queryset(queryset, kind, any_of=(), all_of=(), none_of=()):
+    """
+    Ограничивает queryset объектами, подходящими под условия по тегам.
+
+    Выборка считается по индексу и передается в запрос как pk__in; при
+    выключенном индексе или слишком большой выборке условия выполняются
+    в базе подзапросами EXISTS.
+    """
+    any_of, all_of, none_of = list(any_of), list(all_of), list(none_of)
+    if not (any_of or all_of or none_of):
+        return queryset
+
+    if is_enabled():
+        bitmap = get_index(kind).match(any_of, all_of, none_of)
+        if not bitmap:
+            return queryset.none()
+        if bitmap.bit_count() <= getattr(settings, 'TAG_INDEX_MAX_IDS', 20000):
+            return queryset.filter(pk__in=bitmap_to_ids(bitmap))
+    return filter_queryset_in_database(queryset, kind, any_of, all_of, none_of)
+
+
+def filter_queryset_in_database(queryset, kind, any_of=(), all_of=(), none_of=()):
+    """Те же условия по тегам подзапросами EXISTS к промежуточной таблице."""
+    _model, field = get_source(kind)
+    through, object_column, tag_column = _through_columns(field)
+
+    def has_tags(tag_ids):
+        return Exists(through.objects.filter(**{object_column: OuterRef('pk'), f'{tag_column}__in': tag_ids}))
+
+    if any_of:
+        queryset = queryset.filter(has_tags(any_of))
+    for tag_id in all_of:
+        queryset = queryset.filter(has_tags([tag_id]))
+    if none_of:
+        queryset = queryset.filter(~has_tags(none_of))
+    return queryset
+
+
+def facet_counts(kind, queryset=None, base=None):
+    """
+    Счетчики фасетов: сколько объектов выборки имеет каждый тег.
+
+    Args:
+        queryset: Отфильтрованный queryset; его id читаются одним запросом.
+        base: Готовая битовая карта выборки (вместо queryset).
+
+    Returns:
+        tuple: (размер выборки, {id тега: число объектов}).
+    """
+    index = get_index(kind)
+    if base is None and queryset is not None:
+        base = ids_to_bitmap(queryset.order_by().values_list('pk', flat=True))
+    if base is None:
+        base = index.universe
+    return base.bit_count(), index.facets(base)
+
+
+def facets_data(kind, queryset=None, any_of=(), all_of=(), none_of=()):
+    """
+    Ответ API с фасетами тегов.
+
+    Если queryset не передан, выборка определяется только условиями по
+    тегам и считается по индексу без запросов к базе.
+
+    Returns:
+        dict: {'count': размер выборки, 'facets': [{'tag_id', 'count'}, ...]}
+            по убыванию числа объектов.
+    """
+    base = None
+    if queryset is None:
+        base = get_index(kind).match(any_of, all_of, none_of)
+    total, counts = facet_counts(kind, queryset=queryset, base=base)
+    facets = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return {
+        'count': total,
+        'facets': [{'tag_id': tag_id, 'count': count} for tag_id, count in facets],
+    }
@@ -1,3 +1,405 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, quote, urlparse
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from orders.models import Order, OrderAttachment
+from orders.search import update_search_vectors
+from users.models import CreatorProfile
+from users.search import update_search_documents
+
+from . import tag_catalog, tag_index
+from .models import Tag, UploadSession
+from .pagination import StandardPagination, encode_cursor
+from .tag_index import TagIndex
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN checks require PostgreSQL')
+class QueryPlanRegressionTests(TestCase):
+    """
+    Горячие запросы читают таблицы заказов, чатов, сообщений и профилей
+    креаторов по индексам (команда check_query_plans падает на Seq Scan).
+    """
+
+    def test_hot_endpoints_use_indexes(self):
+        stdout, stderr = StringIO(), StringIO()
+        # CommandError (план с Seq Scan) проваливает тест с перечнем запросов в stderr
+        try:
+            call_command('check_query_plans', seed=5000, stdout=stdout, stderr=stderr)
+        except CommandError:
+            self.fail(f"check_query_plans failed:\n{stdout.getvalue()}\n{stderr.getvalue()}")
+        self.assertIn('All checked queries use indexes.', stdout.getvalue())
+
+
+class TagIndexChangeLogTests(TestCase):
+    """Другой процесс догоняет индекс тегов по журналу изменений без перестройки."""
+
+    def setUp(self):
+        tag_index.reset()
+        self.addCleanup(tag_index.reset)
+        self.client_user = User.objects.create_user(
+            username='index_client', email='index_client@example.com', password='x',
+        )
+        self.tags = [Tag.objects.create(name=f'Индекс {i}', slug=f'index-tag-{i}') for i in range(2)]
+
+    def _create_order(self, tags):
+        order = Order.objects.create(
+            title='Заказ',
+            description='Описание',
+            client=self.client_user,
+            budget=Decimal('1000.00'),
+            deadline=date.today() + timedelta(days=30),
+        )
+        order.tags.set(tags)
+        return order
+
+    def test_peer_applies_logged_changes(self):
+        kept = self._create_order(self.tags)
+        index = tag_index.get_index('orders')
+        # Копия индекса — как в процессе, который не видел следующих изменений
+        peer = TagIndex('orders', index.version, index.universe, dict(index.tags))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            created = self._create_order(self.tags[:1])
+            kept.tags.remove(self.tags[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            kept.delete()
+
+        tag_index._indexes['orders'] = peer
+        with mock.patch.object(TagIndex, 'build', side_effect=AssertionError('index rebuilt')):
+            caught_up = tag_index.get_index('orders')
+        self.assertIs(caught_up, peer)
+
+        fresh = TagIndex.build('orders', caught_up.version)
+        self.assertEqual(caught_up.universe, fresh.universe)
+        self.assertEqual(caught_up.tags, fresh.tags)
+        self.assertEqual(tag_index.bitmap_to_ids(caught_up.universe), [created.pk])
+
+    @override_settings(TAG_INDEX_VERSION_TTL=60)
+    def test_local_cache_version_expires_and_index_rebuilds(self):
+        cache.delete(tag_index.INDEX_VERSION_KEY.format(kind='orders'))
+        index = tag_index.get_index('orders')
+        # Индекс другого воркера: изменение в этом процессе до него не дошло
+        tag_index._indexes['orders'] = TagIndex('orders', index.version, index.universe, dict(index.tags))
+        created = self._create_order(self.tags)
+        self.assertIs(tag_index.get_index('orders').universe, index.universe)
+
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=time.time() + 61):
+            rebuilt = tag_index.get_index('orders')
+        self.assertNotEqual(rebuilt.version, index.version)
+        self.assertIn(created.pk, tag_index.bitmap_to_ids(rebuilt.universe))
+
+
+class TagCatalogETagTests(TestCase):
+    """ETag каталога тегов зависит от содержимого, а не от версии в кэше."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(tag_catalog._memo.clear)
+        Tag.objects.create(name='Каталог', slug='catalog-tag', type=Tag.TAG_TYPE_ORDER)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='catalog', password='x'))
+
+    def _get(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get('/api/tags/', {'type': Tag.TAG_TYPE_ORDER}, **headers)
+
+    def test_etag_survives_version_regeneration(self):
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        # Версия истекла (LocMemCache) или запрос попал в другой воркер: новая версия, тот же каталог
+        cache.delete(tag_catalog.CATALOG_VERSION_KEY)
+        tag_catalog._memo.clear()
+        with mock.patch.object(tag_catalog.time, 'time_ns', return_value=time.time_ns() + 120 * 10 ** 9):
+            self.assertEqual(self._get(etag).status_code, 304)
+
+    def test_etag_changes_with_content(self):
+        etag = self._get()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Новый', slug='new-catalog-tag', type=Tag.TAG_TYPE_ORDER)
+
+        response = self._get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class KeysetPaginationTests(TestCase):
+    """Курсорный режим StandardPagination: ссылки next/previous, счетчик, ошибки курсора, поиск."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user(
+            username='cursor_client', email='cursor_client@example.com', password='x', is_verified=True,
+        )
+        # Две группы заказов с одинаковым created_at: порядок внутри группы задает id
+        first, second = timezone.now() - timedelta(days=2), timezone.now() - timedelta(days=1)
+        titles = ['Монтаж видео'] * 3 + ['Видео для видео-рекламы'] * 2 + ['Фото товаров'] * 2
+        for i, title in enumerate(titles):
+            order = Order.objects.create(
+                title=title,
+                description='Описание',
+                client=cls.client_user,
+                budget=Decimal('1000.00'),
+                deadline=date.today() + timedelta(days=30),
+                status='published',
+            )
+            Order.objects.filter(pk=order.pk).update(created_at=first if i % 2 else second)
+        update_search_vectors(Order.objects.all())
+        cls.expected = list(Order.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.client_user)
+        patcher = mock.patch.object(StandardPagination, 'page_size', 3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get(self, url, status_code=200):
+        response = self.api.get(url.replace('http://localhost', ''), HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, status_code, getattr(response, 'data', None))
+        return response.data
+
+    def _walk(self, url, link):
+        """Проходит по ссылкам link ('next' или 'previous'); возвращает страницы и последний ответ."""
+        pages = []
+        while url:
+            data = self._get(url)
+            pages.append([item['id'] for item in data['results']])
+            last, url = data, data[link]
+        return pages, last
+
+    def test_pages_forward_and_back_over_tied_timestamps(self):
+        pages, last = self._walk('/api/orders/?pagination=cursor', 'next')
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), self.expected)
+        self.assertNotIn('count', last)
+
+        back, first = self._walk(last['previous'], 'previous')
+        self.assertEqual(list(reversed(back)), pages[:-1])
+        self.assertIsNone(first['previous'])
+        self.assertIsNotNone(first['next'])
+
+    def test_empty_page_links_back_to_position(self):
+        last = Order.objects.get(pk=self.expected[-1])
+        cursor = encode_cursor({'p': [last.created_at.isoformat(), str(last.pk)]})
+        data = self._get(f'/api/orders/?cursor={cursor}')
+        self.assertEqual(data['results'], [])
+        self.assertIsNone(data['next'])
+
+        # Ссылка назад включает саму позицию: возвращается последняя страница
+        data = self._get(data['previous'])
+        self.assertEqual([item['id'] for item in data['results']], self.expected[-3:])
+        self.assertIsNotNone(data['previous'])
+
+    def test_with_count(self):
+        data = self._get('/api/orders/?pagination=cursor&with_count=true')
+        self.assertEqual(data['count'], len(self.expected))
+
+    def test_invalid_cursor_is_rejected(self):
+        wrong_length = encode_cursor({'p': ['2026-01-01T00:00:00+00:00']})
+        bad_value = encode_cursor({'p': ['not-a-date', '1']})
+        for cursor in ('garbage', wrong_length, bad_value):
+            with self.subTest(cursor=cursor):
+                data = self._get(f'/api/orders/?cursor={cursor}', status_code=400)
+                self.assertIn('cursor', data)
+
+    def test_values_rows(self):
+        paginator = StandardPagination()
+        view = SimpleNamespace(cursor_ordering=('-created_at', '-id'))
+        queryset = Order.objects.values('id', 'title', 'created_at')
+
+        request = Request(APIRequestFactory().get('/api/orders/', {'pagination': 'cursor'}))
+        rows = paginator.paginate_queryset(queryset, request, view)
+        self.assertEqual([row['id'] for row in rows], self.expected[:3])
+
+        cursor = parse_qs(urlparse(paginator.get_next_link()).query)['cursor'][0]
+        request = Request(APIRequestFactory().get('/api/orders/', {'cursor': cursor}))
+        rows = paginator.paginate_queryset(queryset, request, view)
+        self.assertEqual([row['id'] for row in rows], self.expected[3:6])
+
+    def test_search_results_page_by_relevance(self):
+        by_number = [
+            [item['id'] for item in self._get(f'/api/orders/?q={quote("видео")}&page={page}')['results']]
+            for page in (1, 2)
+        ]
+        pages, last = self._walk(f'/api/orders/?q={quote("видео")}&pagination=cursor', 'next')
+        self.assertEqual(pages, by_number)
+
+        back, _ = self._walk(last['previous'], 'previous')
+        self.assertEqual(list(reversed(back)), pages[:-1])
+
+    def test_creator_search_supports_cursor(self):
+        for i in range(4):
+            user = User.objects.create_user(
+                username=f'cursor_creator_{i}', email=f'cursor_creator_{i}@example.com', password='x',
+            )
+            CreatorProfile.objects.create(user=user, specialization='Видеограф', experience='5 лет')
+        update_search_documents(CreatorProfile.objects.all())
+
+        pages, _ = self._walk(f'/api/creator-profiles/?search={quote("видеограф")}&pagination=cursor', 'next')
+        self.assertEqual(len(sum(pages, [])), 4)
+        self.assertEqual(len(set(sum(pages, []))), 4)
+
+
+class ChunkedUploadTests(TestCase):
+    """Порционная загрузка через /api/uploads/: порядок частей, контрольные суммы, прикрепление."""
+
+    DATA = bytes(range(256)) * 40
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.temp_dir = os.path.join(self.root, 'sessions')
+        override = override_settings(MEDIA_ROOT=os.path.join(self.root, 'media'), CHUNKED_UPLOAD_TEMP_DIR=self.temp_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(username='uploader', email='uploader@example.com', password='x')
+        self.order = Order.objects.create(
+            title='Заказ',
+            description='Описание',
+            client=self.user,
+            budget=Decimal('1000.00'),
+            deadline=date.today() + timedelta(days=30),
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+        response = self.api.post(
+            '/api/uploads/', {'file_name': 'result.bin', 'size': len(self.DATA)}, format='json', HTTP_HOST='localhost',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.session_id = response.data['id']
+        self.url = f'/api/uploads/{self.session_id}/'
+        self.temp_path = os.path.join(self.temp_dir, f'{self.session_id}.part')
+
+    def _put(self, start, end, status_code=200, **headers):
+        response = self.api.put(
+            self.url, self.DATA[start:end], content_type='application/octet-stream', HTTP_HOST='localhost',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end - 1}/{len(self.DATA)}', **headers,
+        )
+        self.assertEqual(response.status_code, status_code, getattr(response, 'data', None))
+        return response
+
+    def _offset(self):
+        return UploadSession.objects.get(pk=self.session_id).offset
+
+    def _upload_all(self):
+        self._put(0, 4000)
+        self._put(4000, len(self.DATA))
+        response = self.api.post(
+            f'{self.url}complete/', {'sha256': hashlib.sha256(self.DATA).hexdigest()},
+            format='json', HTTP_HOST='localhost',
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['status'], UploadSession.STATUS_COMPLETED)
+
+    def _attach(self):
+        return self.api.post(
+            f'{self.url}attach/', {'target': 'order', 'id': self.order.pk}, format='json', HTTP_HOST='localhost',
+        )
+
+    def _media_files(self):
+        media = os.path.join(self.root, 'media')
+        return [os.path.join(root, name) for root, _, files in os.walk(media) for name in files]
+
+    def test_overlapping_chunk_skips_accepted_bytes(self):
+        self.assertEqual(self._put(0, 1000)['Upload-Offset'], '1000')
+        self.assertEqual(self._put(500, 1500)['Upload-Offset'], '1500')
+        # Повтор уже принятой части ничего не меняет
+        self.assertEqual(self._put(0, 1000)['Upload-Offset'], '1500')
+        with open(self.temp_path, 'rb') as fh:
+            self.assertEqual(fh.read(), self.DATA[:1500])
+
+    def test_out_of_order_chunk_is_rejected(self):
+        self._put(0, 1000)
+        self._put(2000, 3000, status_code=409)
+        self.assertEqual(self._offset(), 1000)
+        self.assertEqual(os.path.getsize(self.temp_path), 1000)
+
+    def test_chunk_checksum_mismatch_truncates_part(self):
+        self._put(0, 1000)
+        self._put(1000, 2000, status_code=400, HTTP_X_CHUNK_SHA256=hashlib.sha256(b'other').hexdigest())
+        self.assertEqual(self._offset(), 1000)
+        self.assertEqual(os.path.getsize(self.temp_path), 1000)
+
+        self._put(1000, 2000, HTTP_X_CHUNK_SHA256=hashlib.sha256(self.DATA[1000:2000]).hexdigest())
+        self.assertEqual(self._offset(), 2000)
+
+    def test_file_checksum_mismatch_keeps_session_open(self):
+        self._put(0, len(self.DATA))
+        response = self.api.post(
+            f'{self.url}complete/', {'sha256': hashlib.sha256(b'other').hexdigest()},
+            format='json', HTTP_HOST='localhost',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UploadSession.objects.get(pk=self.session_id).status, UploadSession.STATUS_UPLOADING)
+
+    def test_attach_moves_hard_link_and_removes_temp_file_on_commit(self):
+        self._upload_all()
+        inode = os.stat(self.temp_path).st_ino
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self._attach()
+        self.assertEqual(response.status_code, 201, response.data)
+        attachment = OrderAttachment.objects.get(order=self.order)
+        # Хранилище получило жесткую ссылку: данные не копировались
+        self.assertEqual(os.stat(attachment.file.path).st_ino, inode)
+        self.assertTrue(os.path.exists(self.temp_path))
+
+        for callback in callbacks:
+            callback()
+        self.assertFalse(os.path.exists(self.temp_path))
+        with attachment.file.open('rb') as fh:
+            self.assertEqual(fh.read(), self.DATA)
+        self.assertEqual(UploadSession.objects.get(pk=self.session_id).status, UploadSession.STATUS_ATTACHED)
+
+    def test_attach_copies_file_without_hard_links(self):
+        self._upload_all()
+        with mock.patch('core.uploads.os.link', side_effect=OSError('links not supported')), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self._attach()
+        self.assertEqual(response.status_code, 201, response.data)
+        attachment = OrderAttachment.objects.get(order=self.order)
+        with attachment.file.open('rb') as fh:
+            self.assertEqual(fh.read(), self.DATA)
+        self.assertFalse(os.path.exists(self.temp_path))
+
+    def test_attach_can_be_retried_after_rollback(self):
+        self._upload_all()
+        with mock.patch.object(OrderAttachment, 'save', side_effect=DatabaseError('insert failed')), \
+                self.assertLogs('core.uploads', 'WARNING'), self.assertLogs('django.request', 'ERROR'), \
+                self.assertRaises(DatabaseError):
+            self._attach()
+
+        # Сохраненный файл удален, временный остался, сессия по-прежнему завершена
+        self.assertEqual(self._media_files(), [])
+        self.assertTrue(os.path.exists(self.temp_path))
+        self.assertEqual(UploadSession.objects.get(pk=self.session_id).status, UploadSession.STATUS_COMPLETED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._attach()
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(self._media_files()), 1)
+        # Повторное прикрепление той же загрузки отклоняется
+        self.assertEqual(self._attach().status_code, 409)
@@ -0,0 +1,459 @@
+"""
+Порционная (chunked) загрузка файлов с возобновлением.
+
+Большие файлы (результаты работ, вложения заказов и чатов) не передаются
+одним multipart-запросом, который воркер буферизует в памяти. Протокол:
+
+1. POST /api/uploads/ {file_name, size, content_type} — создать сессию;
+2. PUT /api/uploads/<id>/ с заголовком Content-Range: bytes <start>-<end>/<size>
+   (или ?offset=<start>) и телом-частью файла; необязательный заголовок
+   X-Chunk-SHA256 проверяет целостность части;
+3. POST /api/uploads/<id>/complete/ {sha256} — завершить и сверить контрольную сумму;
+4. POST /api/uploads/<id>/attach/ {target, id} — прикрепить файл к сообщению
+   (message), заказу (order) или сдаче работы (delivery).
+
+Тело части читается из потока запроса блоками COPY_BLOCK_SIZE и сразу
+пишется во временный файл CHUNKED_UPLOAD_TEMP_DIR/<id>.part, поэтому
+память воркера не зависит от размера части и файла. Части принимаются
+строго по порядку: после обрыва соединения клиент узнает принятое смещение
+(GET/HEAD /api/uploads/<id>/, заголовок Upload-Offset) и продолжает с него.
+Повторно присланные байты пропускаются.
+
+SHA-256 файла считается по мере приема частей; состояние хеша хранится
+в памяти процесса, а если часть пришла в другой воркер, хеш уже принятой
+части файла пересчитывается с диска один раз. Временный каталог должен
+быть общим для всех воркеров.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, PermissionDenied, ValidationError
+
+from .models import UploadSession
+
+logger = logging.getLogger(__name__)
+
+# Размер блока при копировании тела запроса в файл и пересчете хеша
+COPY_BLOCK_SIZE = 64 * 1024
+# Сколько состояний хеша незавершенных загрузок хранится в памяти процесса
+MAX_CACHED_HASHERS = 256
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UploadConflict(APIException):
+    """Часть не может быть принята сейчас (не то смещение или параллельная запись)."""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Конфликт смещения загрузки'
+    default_code = 'upload_conflict'
+
+
+def get_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def max_upload_size():
+    return get_setting('CHUNKED_UPLOAD_MAX_SIZE', 2000 * 1024 * 1024)
+
+
+def max_chunk_size():
+    return get_setting('CHUNKED_UPLOAD_MAX_CHUNK_SIZE', 16 * 1024 * 1024)
+
+
+def temp_dir():
+    """Каталог временных файлов загрузок."""
+    return str(get_setting('CHUNKED_UPLOAD_TEMP_DIR', settings.BASE_DIR / 'upload_sessions'))
+
+
+def temp_path(session):
+    """Путь временного файла сессии."""
+    return os.path.join(temp_dir(), f'{session.pk}.part')
+
+
+class _HasherCache:
+    """Состояния SHA-256 незавершенных загрузок: id сессии -> (смещение, хеш)."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, session):
+        """Копия хеша, соответствующего принятому смещению сессии (или None)."""
+        with self._lock:
+            entry = self._data.get(session.pk)
+        if entry is None or entry[0] != session.offset:
+            return None
+        return entry[1].copy()
+
+    def put(self, session, hasher):
+        with self._lock:
+            self._data[session.pk] = (session.offset, hasher)
+            self._data.move_to_end(session.pk)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, session):
+        with self._lock:
+            self._data.pop(session.pk, None)
+
+
+hashers = _HasherCache(MAX_CACHED_HASHERS)
+
+
+def _hasher_for(session):
+    """SHA-256 уже принятой части файла: из памяти или пересчетом с диска."""
+    hasher = hashers.take(session)
+    if hasher is not None:
+        return hasher
+    hasher = hashlib.sha256()
+    remaining = session.offset
+    with open(temp_path(session), 'rb') as fh:
+        while remaining:
+            block = fh.read(min(COPY_BLOCK_SIZE, remaining))
+            if not block:
+                raise ValidationError({'detail': 'Временный файл загрузки поврежден'})
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def create_session(user, file_name, size, content_type=''):
+    """Создает сессию загрузки и пустой временный файл."""
+    session = UploadSession.objects.create(
+        user=user,
+        file_name=os.path.basename(file_name)[:255],
+        content_type=content_type or '',
+        size=size,
+    )
+    path = temp_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    return session
+
+
+def parse_chunk_range(content_range, offset_param, content_length, size):
+    """
+    Начало и длина части по Content-Range или ?offset и Content-Length.
+
+    Returns:
+        tuple: (start, length)
+    """
+    try:
+        length = int(content_length or 0)
+    except ValueError:
+        raise ValidationError({'detail': 'Некорректный Content-Length'})
+    if length <= 0:
+        raise ValidationError({'detail': 'Пустая часть файла'})
+    if length > max_chunk_size():
+        raise ValidationError({'detail': f'Часть больше {max_chunk_size()} байт'})
+
+    if content_range:
+        match = CONTENT_RANGE_RE.match(content_range.strip())
+        if not match:
+            raise ValidationError({'detail': 'Ожидается Content-Range: bytes <start>-<end>/<size>'})
+        start, end, total = match.groups()
+        start, end = int(start), int(end)
+        if end - start + 1 != length:
+            raise ValidationError({'detail': 'Content-Range не совпадает с Content-Length'})
+        if total != '*' and int(total) != size:
+            raise ValidationError({'detail': 'Размер в Content-Range не совпадает с размером загрузки'})
+    elif offset_param is not None:
+        try:
+            start = int(offset_param)
+        except ValueError:
+            raise ValidationError({'offset': 'Ожидается целое число'})
+    else:
+        raise ValidationError({'detail': 'Не указано смещение части (Content-Range или ?offset)'})
+
+    if start < 0 or start + length > size:
+        raise ValidationError({'detail': 'Часть выходит за границы файла'})
+    return start, length
+
+
+def write_chunk(session_id, user, stream, start, length, chunk_sha256=None):
+    """
+    Принимает часть файла из потока запроса.
+
+    Строка сессии блокируется без ожидания (SELECT FOR UPDATE NOWAIT):
+    параллельная запись в ту же сессию получает 409. Часть, начинающаяся
+    после принятого смещения, отклоняется (409) — клиент должен продолжить
+    с Upload-Offset. Уже принятые байты в начале части пропускаются.
+
+    Returns:
+        UploadSession: Сессия с новым смещением.
+    """
+    if chunk_sha256 is not None:
+        chunk_sha256 = chunk_sha256.strip().lower()
+        if not SHA256_RE.match(chunk_sha256):
+            raise ValidationError({'detail': 'X-Chunk-SHA256 должен быть hex-строкой SHA-256'})
+
+    with transaction.atomic():
+        try:
+            session = UploadSession.objects.select_for_update(nowait=True).filter(pk=session_id, user=user).first()
+        except DatabaseError:
+            raise UploadConflict('Часть этой загрузки уже принимается другим запросом')
+        if session is None:
+            raise NotFound('Загрузка не найдена')
+        if session.status != UploadSession.STATUS_UPLOADING:
+            raise UploadConflict('Загрузка уже завершена')
+        if start > session.offset:
+            raise UploadConflict(f'Ожидается часть со смещения {session.offset}')
+
+        skip = session.offset - start
+        if skip >= length:
+            # Часть целиком принята ранее (повтор после обрыва ответа)
+            return session
+
+        hasher = _hasher_for(session)
+        chunk_hasher = hashlib.sha256()
+        path = temp_path(session)
+        try:
+            with open(path, 'r+b') as fh:
+                fh.seek(session.offset)
+                remaining = length
+                while remaining:
+                    block = stream.read(min(COPY_BLOCK_SIZE, remaining))
+                    if not block:
+                        raise ValidationError({'detail': 'Часть файла получена не полностью'})
+                    remaining -= len(block)
+                    chunk_hasher.update(block)
+                    if skip:
+                        dropped = min(skip, len(block))
+                        block = block[dropped:]
+                        skip -= dropped
+                    if block:
+                        fh.write(block)
+                        hasher.update(block)
+                if chunk_sha256 is not None and chunk_hasher.hexdigest() != chunk_sha256:
+                    raise ValidationError({'detail': 'Контрольная сумма части не совпадает'})
+        except Exception:
+            # Недописанная часть отбрасывается: файл возвращается к принятому смещению
+            with open(path, 'r+b') as fh:
+                fh.truncate(session.offset)
+            raise
+
+        session.offset = start + length
+        session.save(update_fields=['offset', 'updated_at'])
+    hashers.put(session, hasher)
+    return session
+
+
+def complete_session(session, expected_sha256=None):
+    """
+    Завершает загрузку: проверяет, что приняты все байты, и сверяет SHA-256.
+
+    Returns:
+        UploadSession: Сессия в статусе completed.
+    """
+    if session.status != UploadSession.STATUS_UPLOADING:
+        return session
+    if not session.is_complete:
+        raise UploadConflict(f'Принято {session.offset} из {session.size} байт')
+
+    digest = _hasher_for(session).hexdigest()
+    if expected_sha256 and expected_sha256.strip().lower() != digest:
+        raise ValidationError({'sha256': 'Контрольная сумма файла не совпадает'})
+
+    session.sha256 = digest
+    session.status = UploadSession.STATUS_COMPLETED
+    session.save(update_fields=['sha256', 'status', 'updated_at'])
+    hashers.discard(session)
+    return session
+
+
+class _SessionFile(File):
+    """Временный файл сессии; хранилище копирует его содержимое."""
+
+    def __init__(self, session):
+        path = temp_path(session)
+        try:
+            handle = open(path, 'rb')
+        except FileNotFoundError:
+            raise UploadConflict('Временный файл загрузки не найден')
+        super().__init__(handle, name=session.file_name)
+
+
+class _LinkedSessionFile(_SessionFile):
+    """
+    Временный файл сессии, отданный хранилищу жесткой ссылкой:
+    FileSystemStorage перемещает ссылку на место (temporary_file_path)
+    без копирования данных, а сам временный файл остается до коммита.
+    """
+
+    def __init__(self, session, link_path):
+        super().__init__(session)
+        self.link_path = link_path
+
+    def temporary_file_path(self):
+        return self.link_path
+
+    def close(self):
+        super().close()
+        # Ссылка остается, только если хранилище ее не переместило
+        try:
+            os.remove(self.link_path)
+        except FileNotFoundError:
+            pass
+
+
+def _open_session_file(session):
+    """Файл сессии для сохранения в поле: по жесткой ссылке, если ее можно создать."""
+    link_path = f'{temp_path(session)}.attach'
+    try:
+        if os.path.exists(link_path):
+            os.remove(link_path)
+        os.link(temp_path(session), link_path)
+    except FileNotFoundError:
+        raise UploadConflict('Временный файл загрузки не найден')
+    except OSError:
+        # Файловая система без жестких ссылок: хранилище скопирует файл
+        return _SessionFile(session)
+    return _LinkedSessionFile(session, link_path)
+
+
+def _save_file(session, field_file, stored):
+    """
+    Сохраняет файл сессии в поле (без сохранения объекта).
+
+    Временный файл не перемещается: если транзакция прикрепления
+    откатится, сохраненные файлы из stored удаляются, а загрузку можно
+    прикрепить повторно.
+    """
+    content = _open_session_file(session)
+    try:
+        field_file.save(session.file_name, content, save=False)
+    finally:
+        content.close()
+    stored.append(field_file)
+
+
+def _attach_to_message(session, user, object_id, data, stored):
+    from chats.models import Message
+    from chats.serializers import MessageSerializer
+
+    message = Message.objects.select_related('chat').filter(pk=object_id).first()
+    if message is None:
+        raise NotFound('Сообщение не найдено')
+    if message.sender_id != user.id:
+        raise PermissionDenied('Прикрепить файл можно только к своему сообщению')
+    if message.attachment:
+        raise ValidationError({'detail': 'У сообщения уже есть вложение'})
+    _save_file(session, message.attachment, stored)
+    message.save(update_fields=['attachment'])
+    return MessageSerializer(message).data
+
+
+def _attach_to_order(session, user, object_id, data, stored):
+    from orders.models import Order, OrderAttachment
+    from orders.serializers import OrderAttachmentSerializer
+
+    order = Order.objects.filter(pk=object_id).first()
+    if order is None:
+        raise NotFound('Заказ не найден')
+    if user.id not in (order.client_id, order.creator_id):
+        raise PermissionDenied('Вы не являетесь участником этого заказа')
+    attachment = OrderAttachment(
+        order=order,
+        file_name=session.file_name,
+        file_type=session.content_type,
+        description=data.get('description') or None,
+        size=session.size,
+        uploaded_by=user,
+    )
+    _save_file(session, attachment.file, stored)
+    attachment.save()
+    return OrderAttachmentSerializer(attachment).data
+
+
+def _attach_to_delivery(session, user, object_id, data, stored):
+    from orders.models import Delivery, DeliveryFile
+    from orders.serializers import DeliveryFileSerializer
+
+    delivery = Delivery.objects.filter(pk=object_id).first()
+    if delivery is None:
+        raise NotFound('Сдача работы не найдена')
+    if delivery.creator_id != user.id:
+        raise PermissionDenied('Добавлять файлы может только автор сдачи работы')
+    delivery_file = DeliveryFile(
+        delivery=delivery,
+        file_name=session.file_name,
+        file_type=session.content_type,
+    )
+    _save_file(session, delivery_file.file, stored)
+    delivery_file.save()
+    return DeliveryFileSerializer(delivery_file).data
+
+
+# Куда можно прикрепить завершенную загрузку: target -> обработчик
+ATTACH_TARGETS = {
+    'message': _attach_to_message,
+    'order': _attach_to_order,
+    'delivery': _attach_to_delivery,
+}
+
+
+def attach_upload(session, user, target, object_id, data=None):
+    """
+    Прикрепляет завершенную загрузку к объекту.
+
+    Временный файл удаляется после коммита. Если прикрепление не удалось,
+    уже сохраненный файл удаляется, а временный остается: сессия по-прежнему
+    завершена, и прикрепление можно повторить.
+
+    Returns:
+        dict: Сериализованный объект, получивший файл.
+    """
+    handler = ATTACH_TARGETS.get(target)
+    if handler is None:
+        raise ValidationError({'target': f'Допустимые значения: {", ".join(ATTACH_TARGETS)}'})
+    stored = []
+    try:
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(pk=session.pk)
+            if session.status != UploadSession.STATUS_COMPLETED:
+                raise UploadConflict('Загрузка не завершена или уже прикреплена')
+            result = handler(session, user, object_id, data or {}, stored)
+            session.status = UploadSession.STATUS_ATTACHED
+            session.save(update_fields=['status', 'updated_at'])
+            transaction.on_commit(lambda: remove_temp_file(session))
+    except Exception:
+        for field_file in stored:
+            logger.warning('Прикрепление загрузки %s не удалось, удаляем файл %s', session.pk, field_file.name)
+            field_file.storage.delete(field_file.name)
+        raise
+    logger.info('Загрузка %s (%s байт) прикреплена: %s %s', session.pk, session.size, target, object_id)
+    return result
+
+
+def remove_temp_file(session):
+    hashers.discard(session)
+    path = temp_path(session)
+    # Вместе с файлом — ссылка прикрепления, оставшаяся после сбоя
+    for name in (path, f'{path}.attach'):
+        try:
+            os.remove(name)
+        except FileNotFoundError:
+            pass
+
+
+def expired_sessions(now=None):
+    """Незавершенные или неприкрепленные загрузки без активности дольше CHUNKED_UPLOAD_EXPIRE_HOURS."""
+    now = now or timezone.now()
+    hours = get_setting('CHUNKED_UPLOAD_EXPIRE_HOURS', 24)
+    return UploadSession.objects.filter(
+        status__in=[UploadSession.STATUS_UPLOADING, UploadSession.STATUS_COMPLETED],
+        updated_at__lt=now - timedelta(hours=hours),
+    )
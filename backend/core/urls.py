@@ -0,0 +1,15 @@
+"""
+Конфигурация URL маршрутов для приложения core.
+"""
+
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+
+from .views import UploadSessionViewSet
+
+router = DefaultRouter()
+router.register('uploads', UploadSessionViewSet, basename='upload-session')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -1,3 +1,82 @@
-from django.shortcuts import render
+"""
+Представления приложения Core.
 
-# Create your views here.
+UploadSessionViewSet — API порционной загрузки файлов (см. core.uploads).
+"""
+
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .models import UploadSession
+from .serializers import UploadAttachSerializer, UploadCompleteSerializer, UploadSessionSerializer
+from .uploads import (
+    attach_upload, complete_session, create_session, parse_chunk_range, write_chunk
+)
+
+
+class UploadSessionViewSet(mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Порционная загрузка файлов.
+    
+    POST   /api/uploads/                 — создать сессию {file_name, size, content_type}
+    GET    /api/uploads/<id>/            — состояние (принятое смещение — offset и Upload-Offset)
+    PUT    /api/uploads/<id>/            — часть файла (Content-Range или ?offset)
+    POST   /api/uploads/<id>/complete/   — завершить загрузку {sha256}
+    POST   /api/uploads/<id>/attach/     — прикрепить {target, id, description}
+    DELETE /api/uploads/<id>/            — отменить загрузку
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        return UploadSession.objects.filter(user=self.request.user)
+    
+    def session_response(self, session, status_code=status.HTTP_200_OK):
+        response = Response(self.get_serializer(session).data, status=status_code)
+        response['Upload-Offset'] = str(session.offset)
+        return response
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = create_session(request.user, **serializer.validated_data)
+        return self.session_response(session, status.HTTP_201_CREATED)
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.session_response(self.get_object())
+    
+    def update(self, request, *args, **kwargs):
+        """
+        Принимает часть файла. Тело запроса читается потоком (request.data
+        не используется), поэтому часть не буферизуется в памяти.
+        """
+        session = self.get_object()
+        start, length = parse_chunk_range(
+            request.headers.get('Content-Range'),
+            request.query_params.get('offset'),
+            request.headers.get('Content-Length'),
+            session.size,
+        )
+        session = write_chunk(
+            session.pk, request.user, request.stream, start, length,
+            chunk_sha256=request.headers.get('X-Chunk-SHA256'),
+        )
+        return self.session_response(session)
+    
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        serializer = UploadCompleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = complete_session(self.get_object(), serializer.validated_data.get('sha256'))
+        return self.session_response(session)
+    
+    @action(detail=True, methods=['post'])
+    def attach(self, request, pk=None):
+        serializer = UploadAttachSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        result = attach_upload(self.get_object(), request.user, data['target'], data['id'], data)
+        return Response({'target': data['target'], 'object': result}, status=status.HTTP_201_CREATED)
@@ -0,0 +1,35 @@
+"""
+Конфигурация приложения logging_system.
+"""
+
+from django.apps import AppConfig
+
+
+class LoggingSystemConfig(AppConfig):
+    """
+    Конфигурация централизованной системы логирования.
+    """
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'logging_system'
+    verbose_name = 'Система логирования'
+
+    def ready(self):
+        """Запускаем фоновое обслуживание логов, если оно включено в настройках."""
+        from django.conf import settings
+
+        interval = getattr(settings, 'LOGS_COMPACTION_INTERVAL', 0)
+        if not interval:
+            return
+
+        from .compaction import MaintenanceThread
+        from .logger import logger
+
+        max_size_mb = getattr(settings, 'LOGS_RETENTION_MAX_SIZE_MB', None)
+        MaintenanceThread(
+            interval,
+            base_path=logger.base_path,
+            keep_days=getattr(settings, 'LOGS_COMPACTION_KEEP_DAYS', 1),
+            max_age_days=getattr(settings, 'LOGS_RETENTION_DAYS', None),
+            max_total_bytes=max_size_mb * 1024 * 1024 if max_size_mb else None,
+            log_index=logger.index,
+        ).start()
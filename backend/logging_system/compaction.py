@@ -0,0 +1,456 @@
+"""
+Компактизация и хранение логов UgcMarket.
+
+Закрытые дни (директории logs/YYYY-MM-DD/...) сворачиваются в один архив
+на день: logs/archive/YYYY-MM-DD.ndjson.gz. Каждая группа
+(пользователь, источник, компонент) — отдельный gzip-member, а рядом лежит
+индекс смещений YYYY-MM-DD.index.json, поэтому чтение логов одного
+пользователя распаковывает только его участки архива. Весь архив при этом
+остается обычным gzip-файлом (zcat читает его целиком).
+
+Директория дня переносится в logs/archive/.YYYY-MM-DD.compacting, откуда
+записи сворачиваются в архив. Имя не зависит от процесса: если проход
+прервался, следующий (под той же блокировкой MaintenanceLock) найдет
+оставшуюся директорию и свернет ее. Метка прохода в директории и в индексе
+архива не дает свернуть одни и те же записи дважды.
+
+Здесь же — удаление старых данных по возрасту и суммарному размеру.
+"""
+
+import gzip
+import json
+import os
+import re
+import shutil
+import threading
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .storage import iter_log_file, list_log_files
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+ARCHIVE_DIR_NAME = 'archive'
+ARCHIVE_SUFFIX = '.ndjson.gz'
+ARCHIVE_INDEX_SUFFIX = '.index.json'
+LOCK_FILE_NAME = '.compaction.lock'
+WORK_DIR_SUFFIX = '.compacting'
+# Метка прохода компактизации в перенесенной директории дня
+WORK_ID_FILE_NAME = '.work_id'
+
+_DAY_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+# Перенесенная директория дня; старые версии добавляли к имени PID процесса
+_WORK_DIR_RE = re.compile(r'^\.(\d{4}-\d{2}-\d{2})(?:\.\d+)?' + re.escape(WORK_DIR_SUFFIX) + '$')
+
+
+def _group_name(user_id: str, source: str, component: str) -> str:
+    return f'{user_id}/{source}/{component}'
+
+
+def archive_paths(base_path, day: str) -> Tuple[Path, Path]:
+    """Пути к архиву дня и его индексу смещений."""
+    archive_dir = Path(base_path) / ARCHIVE_DIR_NAME
+    return archive_dir / f'{day}{ARCHIVE_SUFFIX}', archive_dir / f'{day}{ARCHIVE_INDEX_SUFFIX}'
+
+
+def work_dir_path(base_path, day: str) -> Path:
+    """Директория, в которую переносится директория дня на время компактизации."""
+    return Path(base_path) / ARCHIVE_DIR_NAME / f'.{day}{WORK_DIR_SUFFIX}'
+
+
+# ----------------------------------------------------------------------
+# Чтение архивов
+# ----------------------------------------------------------------------
+def _load_index_file(base_path, day: str) -> Dict[str, Any]:
+    _, index_path = archive_paths(base_path, day)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+
+def load_archive_index(base_path, day: str) -> Dict[str, Dict[str, int]]:
+    """Индекс смещений архива дня ({группа: {offset, length, count}}) или пустой словарь."""
+    return _load_index_file(base_path, day).get('groups', {})
+
+
+def _read_member(archive_path: Path, offset: int, length: int) -> Iterator[Dict[str, Any]]:
+    with open(archive_path, 'rb') as f:
+        f.seek(offset)
+        data = gzip.decompress(f.read(length))
+    for line in data.decode('utf-8').splitlines():
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+
+def list_archived_components(base_path, day: str, user_id: str, source: str) -> List[str]:
+    """Компоненты, заархивированные за день для пользователя и источника."""
+    prefix = f'{user_id}/{source}/'
+    return sorted(
+        name[len(prefix):] for name in load_archive_index(base_path, day)
+        if name.startswith(prefix)
+    )
+
+
+def iter_archived_entries(base_path, day: str, user_id: str, source: str,
+                          component: str) -> Iterator[Dict[str, Any]]:
+    """Записи одной группы из архива дня (распаковывается только ее участок)."""
+    groups = load_archive_index(base_path, day)
+    position = groups.get(_group_name(user_id, source, component))
+    if not position:
+        return
+    archive_path, _ = archive_paths(base_path, day)
+    try:
+        yield from _read_member(archive_path, position['offset'], position['length'])
+    except (IOError, OSError, EOFError):
+        return
+
+
+def iter_day_entries(base_path, day: str) -> Iterator[Tuple[Tuple[str, str, str, str], Dict[str, Any]]]:
+    """Все записи дня — из архива и из еще не свернутых файлов — в виде (ключ, запись)."""
+    archive_path, _ = archive_paths(base_path, day)
+    for name, position in load_archive_index(base_path, day).items():
+        user_id, source, component = name.split('/', 2)
+        try:
+            for entry in _read_member(archive_path, position['offset'], position['length']):
+                yield (day, user_id, source, component), entry
+        except (IOError, OSError, EOFError):
+            continue
+
+    day_dir = Path(base_path) / day
+    if not day_dir.is_dir():
+        return
+    for user_dir in sorted(p for p in day_dir.iterdir() if p.is_dir()):
+        for source_dir in sorted(p for p in user_dir.iterdir() if p.is_dir()):
+            for log_file in list_log_files(source_dir):
+                for entry in iter_log_file(log_file):
+                    yield (day, user_dir.name, source_dir.name, log_file.stem), entry
+
+
+# ----------------------------------------------------------------------
+# Компактизация
+# ----------------------------------------------------------------------
+def list_days(base_path) -> List[str]:
+    """Дни, для которых есть несвернутые директории логов."""
+    base = Path(base_path)
+    if not base.exists():
+        return []
+    return sorted(d.name for d in base.iterdir() if d.is_dir() and _DAY_RE.match(d.name))
+
+
+def list_archived_days(base_path) -> List[str]:
+    """Дни, для которых есть архивы."""
+    archive_dir = Path(base_path) / ARCHIVE_DIR_NAME
+    if not archive_dir.exists():
+        return []
+    return sorted(p.name[:-len(ARCHIVE_SUFFIX)] for p in archive_dir.glob(f'*{ARCHIVE_SUFFIX}'))
+
+
+def _leftover_work_dirs(base_path) -> List[Tuple[str, Path]]:
+    """Перенесенные директории дней, оставшиеся от прерванных проходов: (день, путь)."""
+    archive_dir = Path(base_path) / ARCHIVE_DIR_NAME
+    if not archive_dir.exists():
+        return []
+    leftovers = []
+    for path in sorted(archive_dir.glob(f'.*{WORK_DIR_SUFFIX}')):
+        match = _WORK_DIR_RE.match(path.name)
+        if match and path.is_dir():
+            leftovers.append((match.group(1), path))
+    return leftovers
+
+
+def interrupted_days(base_path) -> List[str]:
+    """Дни, компактизация которых прервалась (осталась директория .YYYY-MM-DD.compacting)."""
+    return sorted({day for day, _ in _leftover_work_dirs(base_path)})
+
+
+def closed_days(base_path, keep_days: int = 1) -> List[str]:
+    """
+    Несвернутые дни, в которые уже не пишутся логи.
+
+    Args:
+        keep_days: Сколько последних дней (кроме сегодняшнего) не трогать —
+            запас на записи frontend с отстающими часами.
+    """
+    threshold = (datetime.now().date() - timedelta(days=keep_days)).strftime('%Y-%m-%d')
+    return [day for day in list_days(base_path) if day < threshold]
+
+
+def days_to_compact(base_path, keep_days: int = 1) -> List[str]:
+    """Закрытые дни и дни с прерванной компактизацией."""
+    return sorted(set(closed_days(base_path, keep_days)) | set(interrupted_days(base_path)))
+
+
+def compact_day(base_path, day: str, compresslevel: int = 6) -> Dict[str, int]:
+    """
+    Сворачивает директорию дня в архив (с дозаписью в уже существующий архив).
+
+    Директория дня переносится в work_dir_path(), архив пишется во временный
+    файл и атомарно подменяется, после чего перенесенная директория удаляется.
+    Оставшаяся от прерванного прохода директория сворачивается первой.
+    Вызывается под MaintenanceLock.
+
+    Returns:
+        dict: Статистика: groups, entries, files, bytes.
+    """
+    base = Path(base_path)
+    day_dir = base / day
+    work_dir = work_dir_path(base, day)
+    work_dir.parent.mkdir(parents=True, exist_ok=True)
+
+    files = 0
+    for leftover_day, leftover in _leftover_work_dirs(base):
+        if leftover_day == day and (leftover != work_dir or day_dir.is_dir()):
+            files += _fold_work_dir(base, day, leftover, compresslevel)['files']
+
+    # Переносим директорию дня в сторону: опоздавшие записи writer создаст
+    # заново в logs/YYYY-MM-DD, и они попадут в архив при следующем проходе
+    if day_dir.is_dir():
+        os.replace(day_dir, work_dir)
+
+    stats = _fold_work_dir(base, day, work_dir, compresslevel)
+    stats['files'] += files
+    return stats
+
+
+def _work_id(work_dir: Path) -> Optional[str]:
+    """Метка прохода перенесенной директории (создается при первом обращении)."""
+    if not work_dir.is_dir():
+        return None
+    id_path = work_dir / WORK_ID_FILE_NAME
+    try:
+        return id_path.read_text(encoding='utf-8').strip()
+    except FileNotFoundError:
+        work_id = uuid.uuid4().hex
+        tmp_path = id_path.with_name(id_path.name + '.tmp')
+        tmp_path.write_text(work_id, encoding='utf-8')
+        os.replace(tmp_path, id_path)
+        return work_id
+
+
+def _fold_work_dir(base: Path, day: str, work_dir: Path, compresslevel: int) -> Dict[str, int]:
+    """Переписывает архив дня вместе с записями work_dir и удаляет work_dir."""
+    archive_path, index_path = archive_paths(base, day)
+    work_id = _work_id(work_dir)
+    old_index = _load_index_file(base, day)
+    # Архив уже содержит записи work_dir: проход прервался после подмены архива
+    if work_id is not None and old_index.get('work_id') == work_id:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        work_id = None
+
+    # Собираем строки по группам: сначала уже заархивированные, затем новые файлы
+    groups: Dict[str, List[bytes]] = {}
+    for name, position in old_index.get('groups', {}).items():
+        with open(archive_path, 'rb') as f:
+            f.seek(position['offset'])
+            data = gzip.decompress(f.read(position['length']))
+        groups.setdefault(name, []).append(data)
+
+    files = 0
+    if work_id is not None:
+        for user_dir in sorted(p for p in work_dir.iterdir() if p.is_dir()):
+            for source_dir in sorted(p for p in user_dir.iterdir() if p.is_dir()):
+                for log_file in list_log_files(source_dir):
+                    name = _group_name(user_dir.name, source_dir.name, log_file.stem)
+                    lines = [
+                        json.dumps(entry, ensure_ascii=False, default=str) + '\n'
+                        for entry in iter_log_file(log_file)
+                    ]
+                    groups.setdefault(name, []).append(''.join(lines).encode('utf-8'))
+                    files += 1
+
+    new_index: Dict[str, Dict[str, int]] = {}
+    entries = 0
+    tmp_archive = archive_path.with_name(archive_path.name + '.tmp')
+    with open(tmp_archive, 'wb') as out:
+        for name in sorted(groups):
+            data = b''.join(groups[name])
+            count = data.count(b'\n')
+            member = gzip.compress(data, compresslevel=compresslevel, mtime=0)
+            new_index[name] = {'offset': out.tell(), 'length': len(member), 'count': count}
+            out.write(member)
+            entries += count
+        out.flush()
+        os.fsync(out.fileno())
+
+    tmp_index = index_path.with_name(index_path.name + '.tmp')
+    with open(tmp_index, 'w', encoding='utf-8') as f:
+        json.dump({'day': day, 'work_id': work_id, 'groups': new_index}, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+
+    # Между двумя rename читатель может получить поврежденный участок —
+    # такие участки пропускаются при чтении
+    os.replace(tmp_archive, archive_path)
+    os.replace(tmp_index, index_path)
+
+    if work_dir.is_dir():
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'groups': len(new_index),
+        'entries': entries,
+        'files': files,
+        'bytes': archive_path.stat().st_size,
+    }
+
+
+# ----------------------------------------------------------------------
+# Хранение (retention)
+# ----------------------------------------------------------------------
+def _day_size(base: Path, day: str) -> int:
+    total = 0
+    for path in archive_paths(base, day):
+        if path.exists():
+            total += path.stat().st_size
+    day_dir = base / day
+    if day_dir.is_dir():
+        for root, _, files in os.walk(day_dir):
+            for file_name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, file_name))
+                except OSError:
+                    pass
+    return total
+
+
+def delete_day(base_path, day: str):
+    """Удаляет все данные дня: архив, индекс смещений и несвернутые директории."""
+    base = Path(base_path)
+    for path in archive_paths(base, day):
+        if path.exists():
+            path.unlink()
+    shutil.rmtree(base / day, ignore_errors=True)
+    for leftover_day, leftover in _leftover_work_dirs(base):
+        if leftover_day == day:
+            shutil.rmtree(leftover, ignore_errors=True)
+
+
+def apply_retention(base_path,
+                    max_age_days: Optional[int] = None,
+                    max_total_bytes: Optional[int] = None,
+                    log_index=None,
+                    dry_run: bool = False) -> List[str]:
+    """
+    Удаляет дни старше max_age_days, затем самые старые дни, пока общий
+    объем логов превышает max_total_bytes. Сегодняшний день не удаляется.
+
+    Returns:
+        list: Удаленные (или подлежащие удалению при dry_run) дни.
+    """
+    base = Path(base_path)
+    today = datetime.now().date().strftime('%Y-%m-%d')
+    days = sorted(set(list_days(base)) | set(list_archived_days(base)))
+    removable = [day for day in days if day < today]
+
+    to_delete: List[str] = []
+    if max_age_days:
+        threshold = (datetime.now().date() - timedelta(days=max_age_days)).strftime('%Y-%m-%d')
+        to_delete.extend(day for day in removable if day < threshold)
+
+    if max_total_bytes:
+        sizes = {day: _day_size(base, day) for day in days}
+        total = sum(size for day, size in sizes.items() if day not in to_delete)
+        for day in removable:
+            if total <= max_total_bytes:
+                break
+            if day in to_delete:
+                continue
+            to_delete.append(day)
+            total -= sizes[day]
+
+    if not dry_run:
+        for day in to_delete:
+            delete_day(base, day)
+        if log_index is not None and to_delete:
+            log_index.delete_days(to_delete)
+
+    return to_delete
+
+
+# ----------------------------------------------------------------------
+# Обслуживание
+# ----------------------------------------------------------------------
+class MaintenanceLock:
+    """Межпроцессная блокировка через flock: обслуживание выполняет один воркер."""
+
+    def __init__(self, base_path):
+        self.path = Path(base_path) / LOCK_FILE_NAME
+        self._file = None
+
+    def acquire(self) -> bool:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a')
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            self._file.close()
+            self._file = None
+            return False
+
+    def release(self):
+        if self._file is not None:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+def run_maintenance(base_path,
+                    keep_days: int = 1,
+                    max_age_days: Optional[int] = None,
+                    max_total_bytes: Optional[int] = None,
+                    log_index=None) -> Optional[Dict[str, Any]]:
+    """
+    Один проход обслуживания: компактизация закрытых дней и удаление по правилам хранения.
+
+    Returns:
+        dict со статистикой или None, если обслуживание уже выполняет другой процесс.
+    """
+    lock = MaintenanceLock(base_path)
+    if not lock.acquire():
+        return None
+    try:
+        compacted = {}
+        for day in days_to_compact(base_path, keep_days):
+            compacted[day] = compact_day(base_path, day)
+        deleted = apply_retention(base_path, max_age_days, max_total_bytes, log_index)
+        return {'compacted': compacted, 'deleted': deleted}
+    finally:
+        lock.release()
+
+
+class MaintenanceThread(threading.Thread):
+    """Фоновый поток, периодически выполняющий run_maintenance."""
+
+    def __init__(self, interval: float, **maintenance_kwargs):
+        super().__init__(name='ugc-log-maintenance', daemon=True)
+        self.interval = interval
+        self.maintenance_kwargs = maintenance_kwargs
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                run_maintenance(**self.maintenance_kwargs)
+            except Exception as e:
+                # Ошибки обслуживания не должны останавливать поток
+                from .logger import logger, ErrorCode
+                logger.error('logging_maintenance', f'Ошибка обслуживания логов: {e}',
+                             ErrorCode.FILE_OPERATION_ERROR)
+
+    def stop(self):
+        self._stop_event.set()
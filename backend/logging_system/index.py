@@ -0,0 +1,291 @@
+"""
+Индекс логов UgcMarket (SQLite sidecar).
+
+Файлы NDJSON остаются основным хранилищем, а рядом с ними (`index.sqlite3`)
+ведется индекс, который writer пополняет каждым записанным пакетом.
+Индекс позволяет фильтровать по уровню, компоненту, коду ошибки и времени,
+искать по тексту сообщения (FTS5) и листать результаты курсором, так что
+время ответа зависит от размера выборки, а не от общего объема логов.
+"""
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+INDEX_FILE_NAME = 'index.sqlite3'
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS entries (
+        id INTEGER PRIMARY KEY,
+        ts TEXT NOT NULL,
+        day TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        source TEXT NOT NULL,
+        component TEXT NOT NULL,
+        level TEXT NOT NULL,
+        error_code TEXT NOT NULL,
+        message TEXT NOT NULL,
+        entry TEXT NOT NULL
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS entries_user_ts ON entries (user_id, ts, id)',
+    'CREATE INDEX IF NOT EXISTS entries_user_day ON entries (user_id, day)',
+    'CREATE INDEX IF NOT EXISTS entries_user_level_ts ON entries (user_id, level, ts, id)',
+    'CREATE INDEX IF NOT EXISTS entries_user_component_ts ON entries (user_id, component, ts, id)',
+    'CREATE INDEX IF NOT EXISTS entries_user_error_code_ts ON entries (user_id, error_code, ts, id)',
+    'CREATE INDEX IF NOT EXISTS entries_day ON entries (day)',
+)
+
+_FTS_SCHEMA = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts
+    USING fts5(message, content='entries', content_rowid='id')
+    """,
+)
+
+
+def encode_cursor(data: Dict[str, Any]) -> str:
+    """Кодирует позицию выборки в непрозрачную строку курсора."""
+    raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Декодирует курсор; ValueError для некорректного значения."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('Некорректный курсор')
+    if not isinstance(data, dict):
+        raise ValueError('Некорректный курсор')
+    return data
+
+
+class LogIndex:
+    """
+    SQLite-индекс записей логов.
+
+    Запись выполняется через одно соединение под блокировкой (фактически
+    из фонового writer'а), чтение — через соединения, отдельные для каждого
+    потока. База работает в режиме WAL, поэтому чтение не блокирует запись.
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._write_conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self.fts_enabled = False
+        self._initialized = False
+
+    # ------------------------------------------------------------------
+    # Соединения
+    # ------------------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # isolation_level=None: транзакциями управляем явно
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection):
+        if self._initialized:
+            return
+        with _immediate(conn):
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            try:
+                for statement in _FTS_SCHEMA:
+                    conn.execute(statement)
+                self.fts_enabled = True
+            except sqlite3.OperationalError:
+                # SQLite собран без FTS5 — поиск по тексту будет через LIKE
+                self.fts_enabled = False
+        self._initialized = True
+
+    def _writer(self) -> sqlite3.Connection:
+        pid = os.getpid()
+        if self._write_conn is None or self._pid != pid:
+            # После fork соединение родителя использовать нельзя
+            self._write_conn = self._connect()
+            self._pid = pid
+            self._ensure_schema(self._write_conn)
+        return self._write_conn
+
+    def _reader(self) -> sqlite3.Connection:
+        pid = os.getpid()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != pid:
+            conn = self._connect()
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            self._local.pid = pid
+            if not self._initialized:
+                with self._lock:
+                    self._ensure_schema(conn)
+        return conn
+
+    # ------------------------------------------------------------------
+    # Запись
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _row(key: Tuple[str, str, str, str], entry: Dict[str, Any], raw: Optional[str] = None) -> tuple:
+        date_str, user_id, source, component = key
+        return (
+            str(entry.get('timestamp') or date_str),
+            date_str,
+            user_id,
+            source,
+            component,
+            str(entry.get('level', '')),
+            str(entry.get('error_code', '')),
+            str(entry.get('message', '')),
+            raw if raw is not None else json.dumps(entry, ensure_ascii=False, default=str),
+        )
+
+    def add_batch(self, items: Iterable[Tuple[Tuple[str, str, str, str], Dict[str, Any], Optional[str]]]):
+        """
+        Добавляет пакет записей в индекс одной транзакцией.
+
+        Args:
+            items: Кортежи (ключ файла, запись, сериализованная запись или None).
+        """
+        rows = [self._row(key, entry, raw) for key, entry, raw in items]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._writer()
+            # BEGIN IMMEDIATE: индекс общий для всех воркеров, блокировку
+            # на запись берем до чтения MAX(id)
+            with _immediate(conn):
+                first_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM entries').fetchone()[0] + 1
+                conn.executemany(
+                    'INSERT INTO entries (id, ts, day, user_id, source, component, level, '
+                    'error_code, message, entry) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(first_id + i, *row) for i, row in enumerate(rows)],
+                )
+                if self.fts_enabled:
+                    conn.executemany(
+                        'INSERT INTO entries_fts (rowid, message) VALUES (?, ?)',
+                        [(first_id + i, row[7]) for i, row in enumerate(rows)],
+                    )
+
+    def delete_days(self, days: Iterable[str]):
+        """Удаляет из индекса записи за указанные дни."""
+        days = list(days)
+        if not days:
+            return
+        with self._lock:
+            conn = self._writer()
+            with _immediate(conn):
+                for day in days:
+                    if self.fts_enabled:
+                        conn.execute(
+                            "INSERT INTO entries_fts (entries_fts, rowid, message) "
+                            "SELECT 'delete', id, message FROM entries WHERE day = ?",
+                            (day,),
+                        )
+                    conn.execute('DELETE FROM entries WHERE day = ?', (day,))
+
+    def indexed_days(self) -> List[str]:
+        """Дни, для которых в индексе есть записи."""
+        rows = self._reader().execute('SELECT DISTINCT day FROM entries ORDER BY day').fetchall()
+        return [row[0] for row in rows]
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+    def query(self,
+              user_id: str,
+              date_from: str,
+              date_to: str,
+              level: Optional[str] = None,
+              component: Optional[str] = None,
+              error_code: Optional[str] = None,
+              source: Optional[str] = None,
+              since: Optional[str] = None,
+              until: Optional[str] = None,
+              search: Optional[str] = None,
+              cursor: Optional[Dict[str, Any]] = None,
+              limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Возвращает страницу записей пользователя (новые сначала).
+
+        Returns:
+            (записи, позиция следующей страницы или None).
+        """
+        where = ['e.user_id = ?', 'e.day >= ?', 'e.day <= ?']
+        params: List[Any] = [user_id, date_from, date_to]
+
+        for column, value in (('level', level), ('component', component),
+                              ('error_code', error_code), ('source', source)):
+            if value:
+                where.append(f'e.{column} = ?')
+                params.append(value)
+        if since:
+            where.append('e.ts >= ?')
+            params.append(since)
+        if until:
+            where.append('e.ts <= ?')
+            params.append(until)
+        if cursor:
+            where.append('(e.ts < ? OR (e.ts = ? AND e.id < ?))')
+            params.extend([cursor['ts'], cursor['ts'], int(cursor['id'])])
+
+        join = ''
+        if search:
+            if self.fts_enabled:
+                join = 'JOIN entries_fts f ON f.rowid = e.id'
+                where.append('entries_fts MATCH ?')
+                params.append(_fts_query(search))
+            else:
+                where.append('e.message LIKE ?')
+                params.append(f'%{search}%')
+
+        sql = (
+            f'SELECT e.id, e.ts, e.source, e.entry FROM entries e {join} '
+            f'WHERE {" AND ".join(where)} '
+            'ORDER BY e.ts DESC, e.id DESC LIMIT ?'
+        )
+        params.append(limit + 1)
+        rows = self._reader().execute(sql, params).fetchall()
+
+        next_position = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_position = {'ts': rows[-1]['ts'], 'id': rows[-1]['id']}
+
+        entries = []
+        for row in rows:
+            entry = json.loads(row['entry'])
+            entry['source'] = row['source']
+            entries.append(entry)
+        return entries, next_position
+
+
+class _immediate:
+    """Контекст транзакции BEGIN IMMEDIATE ... COMMIT/ROLLBACK."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
+
+
+def _fts_query(search: str) -> str:
+    """Превращает пользовательскую строку в безопасный запрос FTS5 (все слова, префиксный поиск)."""
+    terms = [term.replace('"', '""') for term in search.split() if term]
+    return ' '.join(f'"{term}"*' for term in terms) or '""'
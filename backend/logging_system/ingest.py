@@ -0,0 +1,247 @@
+"""
+Прием логов от frontend.
+
+Запрос может содержать одну запись или массив записей. Записи проверяются
+пакетом, проходят через лимиты (на пользователя и на IP) и ставятся в очередь
+общего writer'а NDJSONLogStorage без ожидания записи на диск.
+"""
+
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from .logger import logger, LogLevel
+from .throttling import TokenBucketLimiter
+
+REQUIRED_FIELDS = ('timestamp', 'level', 'component', 'message', 'error_code', 'user_id')
+LOG_LEVELS = frozenset(level.value for level in LogLevel)
+
+# component и user_id становятся частью пути к файлу лога
+_SAFE_NAME_RE = re.compile(r'^[\w\-]{1,100}$')
+_ERROR_CODE_MAX_LENGTH = 50
+_URL_MAX_LENGTH = 2000
+_USER_AGENT_MAX_LENGTH = 500
+
+
+class IngestStats:
+    """Счетчики приема логов (в пределах процесса)."""
+
+    FIELDS = ('requests', 'received', 'accepted', 'rejected', 'throttled', 'dropped')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, **counts: int):
+        with self._lock:
+            for name, value in counts.items():
+                self._counters[name] += value
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+
+class IngestResult:
+    """Результат обработки одного запроса на прием логов."""
+
+    def __init__(self):
+        self.accepted = 0
+        self.throttled = 0
+        self.dropped = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.retry_after: Optional[int] = None
+
+    @property
+    def rejected(self) -> int:
+        return len(self.errors)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'throttled': self.throttled,
+            'dropped': self.dropped,
+            'errors': self.errors,
+        }
+
+
+class FrontendLogIngestor:
+    """
+    Проверка, ограничение скорости и постановка в очередь логов frontend.
+
+    Лимиты считаются в записях, а не в запросах: пакет расходует столько
+    токенов, сколько в нем записей.
+    """
+
+    def __init__(self, storage=None):
+        self.storage = storage or logger.storage
+        self.max_batch_size = getattr(settings, 'LOGS_FRONTEND_MAX_BATCH', 100)
+        self.max_message_length = getattr(settings, 'LOGS_FRONTEND_MAX_MESSAGE_LENGTH', 4000)
+        self.user_limiter = TokenBucketLimiter(
+            rate=getattr(settings, 'LOGS_FRONTEND_USER_RATE', 5),
+            burst=getattr(settings, 'LOGS_FRONTEND_USER_BURST', 100),
+        )
+        self.ip_limiter = TokenBucketLimiter(
+            rate=getattr(settings, 'LOGS_FRONTEND_IP_RATE', 20),
+            burst=getattr(settings, 'LOGS_FRONTEND_IP_BURST', 300),
+        )
+        self.stats = IngestStats()
+
+    # ------------------------------------------------------------------
+    # Валидация
+    # ------------------------------------------------------------------
+    def validate_entry(self, data: Any) -> Tuple[Optional[Tuple[str, str, Dict[str, Any]]], Optional[str]]:
+        """
+        Проверяет и нормализует одну запись.
+
+        Returns:
+            ((date_str, user_id, log_entry), None) для корректной записи
+            или (None, текст ошибки).
+        """
+        if not isinstance(data, dict):
+            return None, 'Запись должна быть объектом'
+
+        for field in REQUIRED_FIELDS:
+            if field not in data:
+                return None, f'Отсутствует обязательное поле: {field}'
+
+        timestamp_str = data['timestamp']
+        level_str = data['level']
+        component = data['component']
+        message = data['message']
+        error_code_str = data['error_code']
+        user_id = str(data['user_id'])
+        extra_data = data.get('extra_data') or {}
+        url = data.get('url') or ''
+        user_agent = data.get('user_agent') or ''
+
+        if not isinstance(component, str) or not _SAFE_NAME_RE.match(component):
+            return None, 'Некорректное поле: component'
+        if not _SAFE_NAME_RE.match(user_id):
+            return None, 'Некорректное поле: user_id'
+        if level_str not in LOG_LEVELS:
+            return None, 'Некорректное поле: level'
+        if not isinstance(message, str):
+            return None, 'Некорректное поле: message'
+        if not isinstance(error_code_str, str) or len(error_code_str) > _ERROR_CODE_MAX_LENGTH:
+            return None, 'Некорректное поле: error_code'
+        if not isinstance(extra_data, dict):
+            return None, 'Некорректное поле: extra_data'
+        if not isinstance(url, str) or not isinstance(user_agent, str):
+            return None, 'Некорректное поле: url или user_agent'
+
+        try:
+            timestamp = datetime.fromisoformat(str(timestamp_str).replace('Z', '+00:00'))
+            date_str = timestamp.strftime('%Y-%m-%d')
+        except ValueError:
+            date_str = datetime.now().strftime('%Y-%m-%d')
+
+        # Добавляем frontend-специфичные данные в extra_data
+        extra_data = dict(extra_data)
+        extra_data.update({
+            'url': url[:_URL_MAX_LENGTH],
+            'user_agent': user_agent[:_USER_AGENT_MAX_LENGTH],
+            'source': 'frontend'
+        })
+
+        log_entry = {
+            'timestamp': str(timestamp_str),
+            'level': level_str,
+            'component': component,
+            'message': message[:self.max_message_length],
+            'error_code': error_code_str,
+            'user_id': user_id,
+            'extra_data': extra_data
+        }
+        return (date_str, user_id, log_entry), None
+
+    # ------------------------------------------------------------------
+    # Прием пакета
+    # ------------------------------------------------------------------
+    def ingest(self, entries: List[Any], client_ip: str, auth_user_id: Optional[str] = None) -> IngestResult:
+        """
+        Обрабатывает пакет записей.
+
+        Args:
+            entries: Список записей из тела запроса.
+            client_ip: IP клиента (ключ лимита по IP).
+            auth_user_id: ID аутентифицированного пользователя; если его нет,
+                лимит по пользователю считается по IP клиента. user_id из
+                записей на лимиты не влияет: клиент может подставить любой.
+        """
+        result = IngestResult()
+
+        valid: List[Tuple[str, str, Dict[str, Any]]] = []
+        for index, data in enumerate(entries):
+            item, error = self.validate_entry(data)
+            if error:
+                result.errors.append({'index': index, 'error': error})
+            else:
+                valid.append(item)
+
+        if valid:
+            self._throttle_and_enqueue(valid, client_ip, auth_user_id, result)
+
+        self.stats.add(
+            requests=1,
+            received=len(entries),
+            accepted=result.accepted,
+            rejected=result.rejected,
+            throttled=result.throttled,
+            dropped=result.dropped,
+        )
+        return result
+
+    def _throttle_and_enqueue(self, valid, client_ip, auth_user_id, result: IngestResult):
+        ip_key = f'ip:{client_ip}'
+        ip_budget = self.ip_limiter.consume(ip_key, len(valid))
+
+        # Весь пакет расходует один бакет пользователя: аутентифицированного
+        # или, для анонимных запросов, IP клиента
+        user_key = f'user:{auth_user_id}' if auth_user_id else f'anon:{client_ip}'
+        wanted = min(len(valid), ip_budget)
+        granted = self.user_limiter.consume(user_key, wanted) if wanted else 0
+        ip_budget -= granted
+
+        for date_str, user_id, log_entry in valid[:granted]:
+            key = (date_str, user_id, 'frontend', log_entry['component'])
+            # Не ждем writer: при переполненной очереди запись отбрасывается
+            if self.storage.enqueue(key, log_entry, block=False):
+                result.accepted += 1
+            else:
+                result.dropped += 1
+
+        if granted < len(valid):
+            result.throttled += len(valid) - granted
+            limiter = self.user_limiter if granted < wanted else self.ip_limiter
+            result.retry_after = max(result.retry_after or 0, limiter.retry_after(len(valid) - granted))
+
+        # Токены IP, не израсходованные из-за лимита пользователя, возвращаем
+        self.ip_limiter.refund(ip_key, ip_budget)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Счетчики приема и состояние очереди writer'а."""
+        stats = self.stats.snapshot()
+        stats.update({
+            'queue_pending': self.storage.pending,
+            'queue_size': self.storage.queue_size,
+        })
+        return stats
+
+
+def get_client_ip(request) -> str:
+    """IP клиента: REMOTE_ADDR или заголовок reverse proxy (LOGS_CLIENT_IP_HEADER)."""
+    header = getattr(settings, 'LOGS_CLIENT_IP_HEADER', '')
+    if header:
+        value = request.META.get(header, '')
+        if value:
+            return value.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '') or 'unknown'
+
+
+# Глобальный экземпляр приемника логов frontend
+frontend_ingestor = FrontendLogIngestor()
@@ -1,18 +1,19 @@
 """
 Централизованная система логирования для UgcMarket backend.
-Создает иерархическую структуру логов: дата/пользователь/backend/компонент.json
+Создает иерархическую структуру логов: дата/пользователь/backend/компонент.ndjson
 """
 
-import json
 import os
 from datetime import datetime
 from enum import Enum
 from typing import Optional, Dict, Any, Union
-from pathlib import Path
 import threading
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 
+from .index import LogIndex, INDEX_FILE_NAME
+from .storage import NDJSONLogStorage
+
 
 class LogLevel(Enum):
     """Уровни логирования"""
@@ -60,7 +61,10 @@ class UgcLogger:
     Централизованный логгер для UgcMarket.
     
     Создает структуру логов:
-    logs/YYYY-MM-DD/user_id/backend/component.json
+    logs/YYYY-MM-DD/user_id/backend/component.ndjson
+
+    Записи пишутся асинхронно через NDJSONLogStorage: вызов логгера
+    только ставит запись в очередь фонового writer.
     """
     
     _instance = None
@@ -77,6 +81,16 @@ class UgcLogger:
         if not hasattr(self, 'initialized'):
             self.base_path = getattr(settings, 'LOGS_BASE_PATH', 
                                    os.path.join(settings.BASE_DIR, 'logs'))
+            self.index = None
+            if getattr(settings, 'LOGS_INDEX_ENABLED', True):
+                self.index = LogIndex(os.path.join(self.base_path, INDEX_FILE_NAME))
+            self.storage = NDJSONLogStorage(
+                self.base_path,
+                flush_interval=getattr(settings, 'LOGS_FLUSH_INTERVAL', 1.0),
+                max_batch_size=getattr(settings, 'LOGS_MAX_BATCH_SIZE', 500),
+                queue_size=getattr(settings, 'LOGS_QUEUE_SIZE', 10000),
+                index=self.index,
+            )
             self.initialized = True
     
     def _get_user_id(self, user) -> str:
@@ -85,12 +99,6 @@ class UgcLogger:
             return 'anonymous'
         return str(user.id)
     
-    def _ensure_log_directory(self, date_str: str, user_id: str) -> Path:
-        """Создает необходимые директории для логов"""
-        log_dir = Path(self.base_path) / date_str / user_id / 'backend'
-        log_dir.mkdir(parents=True, exist_ok=True)
-        return log_dir
-    
     def _create_log_entry(self, 
                          level: LogLevel, 
                          component: str,
@@ -114,34 +122,17 @@ class UgcLogger:
         return log_entry
     
     def _write_log(self, log_entry: Dict[str, Any], component: str, user_id: str):
-        """Записывает лог в файл"""
-        try:
-            date_str = datetime.now().strftime('%Y-%m-%d')
-            log_dir = self._ensure_log_directory(date_str, user_id)
-            log_file = log_dir / f'{component}.json'
-            
-            # Читаем существующие логи или создаем новый список
-            logs = []
-            if log_file.exists():
-                try:
-                    with open(log_file, 'r', encoding='utf-8') as f:
-                        logs = json.load(f)
-                except (json.JSONDecodeError, IOError):
-                    logs = []
-            
-            # Добавляем новую запись
-            logs.append(log_entry)
-            
-            # Записываем обратно
-            with open(log_file, 'w', encoding='utf-8') as f:
-                json.dump(logs, f, ensure_ascii=False, indent=2)
-                
-        except Exception as e:
-            # Fallback: записываем в общий лог ошибок
-            fallback_path = Path(self.base_path) / 'system_errors.log'
-            fallback_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(fallback_path, 'a', encoding='utf-8') as f:
-                f.write(f"{datetime.now().isoformat()} - LOGGING_ERROR: {str(e)}\n")
+        """Ставит запись в очередь на запись в файл компонента"""
+        date_str = log_entry['timestamp'][:10]
+        self.storage.enqueue((date_str, user_id, 'backend', component), log_entry)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Дожидается записи на диск всех поставленных в очередь логов"""
+        return self.storage.flush(timeout)
+    
+    def shutdown(self, timeout: Optional[float] = 5.0):
+        """Останавливает фоновую запись, не теряя записи из очереди"""
+        self.storage.close(timeout)
     
     def log(self, 
             level: LogLevel,
@@ -0,0 +1,84 @@
+"""Management command to benchmark the NDJSON log storage.
+
+Writes N entries into a single component file and reports per-call latency
+for every step of entries, so it is visible that the cost of a log call does
+not grow with the size of the file.
+
+Usage:
+  python manage.py benchmark_logger --entries 100000 --step 10000
+"""
+from __future__ import annotations
+
+import shutil
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from logging_system.logger import logger, LogLevel, ErrorCode
+from logging_system.storage import NDJSONLogStorage
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-call latency of the append-only log storage"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entries", type=int, default=100_000, help="Total entries to write (default: 100000).")
+        parser.add_argument("--step", type=int, default=10_000, help="Report latency every N entries (default: 10000).")
+        parser.add_argument("--batch-size", type=int, default=500, help="Writer max batch size (default: 500).")
+        parser.add_argument("--flush-interval", type=float, default=1.0, help="Writer flush interval, seconds (default: 1.0).")
+        parser.add_argument("--queue-size", type=int, default=10_000, help="Writer queue size (default: 10000).")
+
+    def handle(self, *args, **options):
+        entries = options["entries"]
+        step = max(options["step"], 1)
+        base_path = tempfile.mkdtemp(prefix="ugc_logs_bench_")
+        storage = NDJSONLogStorage(
+            base_path,
+            flush_interval=options["flush_interval"],
+            max_batch_size=options["batch_size"],
+            queue_size=options["queue_size"],
+        )
+        key = ("2000-01-01", "bench", "backend", "benchmark")
+
+        self.stdout.write(f"Writing {entries} entries to {storage.get_log_file(key)}")
+        self.stdout.write(f"{'entries':>10} {'mean, us':>10} {'p50, us':>10} {'p99, us':>10} {'max, us':>10}")
+
+        try:
+            started = time.perf_counter()
+            samples = []
+            for i in range(1, entries + 1):
+                entry = logger._create_log_entry(
+                    LogLevel.INFO, "benchmark", f"entry {i}", ErrorCode.SUCCESS, {"i": i}, "bench"
+                )
+                t0 = time.perf_counter()
+                storage.enqueue(key, entry)
+                samples.append((time.perf_counter() - t0) * 1_000_000)
+
+                if i % step == 0 or i == entries:
+                    samples.sort()
+                    self.stdout.write(
+                        f"{i:>10} {statistics.fmean(samples):>10.1f} "
+                        f"{samples[len(samples) // 2]:>10.1f} "
+                        f"{samples[int(len(samples) * 0.99) - 1]:>10.1f} "
+                        f"{samples[-1]:>10.1f}"
+                    )
+                    samples = []
+
+            enqueued = time.perf_counter() - started
+            storage.flush()
+            drained = time.perf_counter() - started
+            storage.close()
+
+            with open(storage.get_log_file(key), "rb") as f:
+                written = sum(1 for _ in f)
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Done: {written}/{entries} entries on disk, "
+                    f"enqueue {enqueued:.2f}s, drained {drained:.2f}s."
+                )
+            )
+        finally:
+            shutil.rmtree(base_path, ignore_errors=True)
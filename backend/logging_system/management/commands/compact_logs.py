@@ -0,0 +1,87 @@
+"""Management command to compact closed log days and enforce retention.
+
+Every closed day directory (logs/YYYY-MM-DD/...) is folded into a single
+gzip NDJSON archive with an offset index in logs/archive/. Days whose
+compaction was interrupted are folded as well. Afterwards days
+older than --max-age-days are removed, then the oldest days until the logs
+tree fits into --max-size-mb.
+
+Usage:
+  python manage.py compact_logs
+  python manage.py compact_logs --max-age-days 90 --max-size-mb 2048
+  python manage.py compact_logs --day 2025-01-15
+"""
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from logging_system.compaction import MaintenanceLock, apply_retention, compact_day, days_to_compact
+from logging_system.logger import logger
+
+
+class Command(BaseCommand):
+    help = "Compact closed log days into gzip archives and apply retention rules"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--day", type=str, default=None, help="Compact only this day (YYYY-MM-DD).")
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=getattr(settings, "LOGS_COMPACTION_KEEP_DAYS", 1),
+            help="Recent days (besides today) left uncompacted. Default: LOGS_COMPACTION_KEEP_DAYS.",
+        )
+        parser.add_argument(
+            "--max-age-days",
+            type=int,
+            default=getattr(settings, "LOGS_RETENTION_DAYS", None),
+            help="Delete days older than this. Default: LOGS_RETENTION_DAYS.",
+        )
+        parser.add_argument(
+            "--max-size-mb",
+            type=int,
+            default=getattr(settings, "LOGS_RETENTION_MAX_SIZE_MB", None),
+            help="Delete oldest days while logs exceed this size. Default: LOGS_RETENTION_MAX_SIZE_MB.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only show what would be done.")
+
+    def handle(self, *args, **options):
+        base_path = logger.base_path
+        dry_run = options["dry_run"]
+
+        # Записи из очереди должны попасть в файлы до компактизации
+        logger.flush()
+
+        lock = MaintenanceLock(base_path)
+        if not lock.acquire():
+            raise CommandError("Log maintenance is already running in another process")
+        try:
+            days = [options["day"]] if options["day"] else days_to_compact(base_path, options["keep_days"])
+            self.stdout.write(f"Compacting {len(days)} day(s) in {base_path}…")
+
+            for day in days:
+                if dry_run:
+                    self.stdout.write(f"  - {day}: would compact")
+                    continue
+                stats = compact_day(base_path, day)
+                self.stdout.write(
+                    f"  - {day}: {stats['files']} files, {stats['entries']} entries "
+                    f"-> {stats['groups']} groups, {stats['bytes']} bytes"
+                )
+
+            max_size_mb = options["max_size_mb"]
+            deleted = apply_retention(
+                base_path,
+                max_age_days=options["max_age_days"],
+                max_total_bytes=max_size_mb * 1024 * 1024 if max_size_mb else None,
+                log_index=logger.index,
+                dry_run=dry_run,
+            )
+            for day in deleted:
+                self.stdout.write(self.style.WARNING(f"  - {day}: {'would delete' if dry_run else 'deleted'}"))
+        finally:
+            lock.release()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Compaction finished. Days compacted: {len(days)}, days deleted: {len(deleted)}.")
+        )
@@ -0,0 +1,63 @@
+"""Management command to rebuild the log index from log files.
+
+Drops index rows for every selected day and re-reads the day's compacted
+archive and NDJSON (and legacy JSON) files. Useful after enabling the index
+on an existing logs/ tree or if index.sqlite3 was lost.
+
+Usage:
+  python manage.py reindex_logs
+  python manage.py reindex_logs --date-from 2025-01-01 --date-to 2025-01-31
+"""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from logging_system.compaction import iter_day_entries, list_archived_days, list_days
+from logging_system.logger import logger
+
+_CHUNK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Rebuild the SQLite log index from log files"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date-from", type=str, default=None, help="First day to reindex (YYYY-MM-DD).")
+        parser.add_argument("--date-to", type=str, default=None, help="Last day to reindex (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        index = logger.index
+        if index is None:
+            raise CommandError("Log index is disabled (LOGS_INDEX_ENABLED = False)")
+
+        # Записи из очереди должны попасть в файлы до перестроения
+        logger.flush()
+
+        base_path = logger.base_path
+        date_from = options["date_from"]
+        date_to = options["date_to"]
+        days = sorted(
+            day for day in set(list_days(base_path)) | set(list_archived_days(base_path))
+            if (not date_from or day >= date_from) and (not date_to or day <= date_to)
+        )
+
+        self.stdout.write(f"Reindexing {len(days)} day(s) in {base_path}…")
+
+        total = 0
+        for day in days:
+            index.delete_days([day])
+            count = 0
+            chunk = []
+            for key, entry in iter_day_entries(base_path, day):
+                chunk.append((key, entry, None))
+                if len(chunk) >= _CHUNK_SIZE:
+                    index.add_batch(chunk)
+                    count += len(chunk)
+                    chunk = []
+            if chunk:
+                index.add_batch(chunk)
+                count += len(chunk)
+            total += count
+            self.stdout.write(f"  - {day}: {count} entries")
+
+        self.stdout.write(self.style.SUCCESS(f"Reindex finished. Entries indexed: {total}."))
@@ -0,0 +1,129 @@
+"""
+Выборка логов пользователя.
+
+Основной путь — запрос к индексу (LogIndex). Если индекс отключен или
+недоступен, записи читаются из файлов и архивов за запрошенный диапазон дней.
+Курсор индекса нельзя продолжить просмотром файлов: при сбое индекса на
+второй и следующих страницах поднимается LogIndexUnavailable.
+"""
+
+import logging
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .compaction import iter_archived_entries, list_archived_components
+from .index import encode_cursor, decode_cursor
+from .storage import iter_log_file, list_log_files
+
+LOG_SOURCES = ('backend', 'frontend')
+
+# Стандартный logging, а не UgcLogger: его записи идут в тот же индекс, который сейчас недоступен
+log = logging.getLogger(__name__)
+
+
+class LogIndexUnavailable(Exception):
+    """Индекс недоступен, а страницу по его курсору нельзя получить из файлов."""
+
+
+def iter_days(date_from: date, date_to: date):
+    """Дни диапазона (включительно) в формате YYYY-MM-DD."""
+    current = date_from
+    while current <= date_to:
+        yield current.strftime('%Y-%m-%d')
+        current += timedelta(days=1)
+
+
+def query_user_logs(base_path: str,
+                    index,
+                    user_id: str,
+                    date_from: date,
+                    date_to: date,
+                    level: Optional[str] = None,
+                    component: Optional[str] = None,
+                    error_code: Optional[str] = None,
+                    source: Optional[str] = None,
+                    since: Optional[str] = None,
+                    until: Optional[str] = None,
+                    search: Optional[str] = None,
+                    cursor: Optional[str] = None,
+                    limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Возвращает страницу логов пользователя (новые сначала) и курсор следующей страницы.
+
+    Raises:
+        ValueError: Некорректный курсор.
+        LogIndexUnavailable: Индекс недоступен при запросе страницы по курсору.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    filters = dict(level=level, component=component, error_code=error_code, source=source,
+                   since=since, until=until, search=search)
+
+    if index is not None and (position is None or 'id' in position):
+        try:
+            entries, next_position = index.query(
+                user_id,
+                date_from.strftime('%Y-%m-%d'),
+                date_to.strftime('%Y-%m-%d'),
+                cursor=position,
+                limit=limit,
+                **filters,
+            )
+            return entries, encode_cursor(next_position) if next_position else None
+        except Exception as e:
+            log.exception('Запрос к индексу логов пользователя %s не выполнен', user_id)
+            if position is not None:
+                # Смещение файлового просмотра не совпадает с курсором индекса —
+                # повтор с первой страницы дал бы клиенту дубликаты
+                raise LogIndexUnavailable('Индекс логов недоступен, повторите запрос позже') from e
+            # Первая страница: индекс поврежден или заблокирован — читаем файлы
+
+    return _scan_files(base_path, user_id, date_from, date_to, position, limit, **filters)
+
+
+def _scan_files(base_path, user_id, date_from, date_to, position, limit,
+                level=None, component=None, error_code=None, source=None,
+                since=None, until=None, search=None):
+    """Запасной путь: полный просмотр файлов и архивов за диапазон дней."""
+    offset = int(position.get('offset', 0)) if position else 0
+    sources = [source] if source else LOG_SOURCES
+    search_lower = search.lower() if search else None
+
+    def iter_source_entries(date_str, log_source):
+        # Сначала свернутые в архив дни, затем несвернутые файлы
+        for archived_component in list_archived_components(base_path, date_str, user_id, log_source):
+            if component and archived_component != component:
+                continue
+            yield from iter_archived_entries(base_path, date_str, user_id, log_source, archived_component)
+        log_dir = Path(base_path) / date_str / user_id / log_source
+        for log_file in list_log_files(log_dir):
+            if component and log_file.stem != component:
+                continue
+            yield from iter_log_file(log_file)
+
+    user_logs = []
+    for date_str in iter_days(date_from, date_to):
+        for log_source in sources:
+            for log_entry in iter_source_entries(date_str, log_source):
+                if level and log_entry.get('level') != level:
+                    continue
+                if error_code and log_entry.get('error_code') != error_code:
+                    continue
+                timestamp = str(log_entry.get('timestamp', ''))
+                if since and timestamp < since:
+                    continue
+                if until and timestamp > until:
+                    continue
+                if search_lower and search_lower not in str(log_entry.get('message', '')).lower():
+                    continue
+                log_entry['source'] = log_source
+                user_logs.append(log_entry)
+
+    # Сортируем по времени (новые сначала)
+    user_logs.sort(key=lambda x: str(x.get('timestamp', '')), reverse=True)
+
+    page = user_logs[offset:offset + limit]
+    next_cursor = None
+    if offset + limit < len(user_logs):
+        next_cursor = encode_cursor({'offset': offset + limit})
+    return page, next_cursor
@@ -0,0 +1,162 @@
+"""
+Диагностика SQL-запросов по HTTP-запросам.
+
+По умолчанию выключена и ничего не стоит: обертка над выполнением SQL
+(connection.execute_wrapper) ставится только для запросов, которые
+диагностируются:
+
+- все запросы, если QUERY_DIAGNOSTICS = True;
+- отдельный запрос с заголовком X-Query-Diagnostics: 1 (или параметром
+  ?_diagnostics=1), если QUERY_DIAGNOSTICS_ALLOW_FLAG = True. Результат
+  такого запроса отдается только персоналу (is_staff).
+
+Для диагностируемого запроса собираются число и суммарное время SQL,
+самые медленные запросы и повторы одного и того же SQL (признак N+1).
+Сводка пишется в систему логов (компонент query_diagnostics; WARNING, если
+какой-то SQL повторился не меньше QUERY_DIAGNOSTICS_DUPLICATE_THRESHOLD раз),
+а для запроса с флагом еще и в заголовки ответа X-Query-Count,
+X-Query-Time-Ms и Server-Timing.
+"""
+
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .logger import ErrorCode, LogLevel, logger as ugc_logger
+
+COMPONENT = 'query_diagnostics'
+FLAG_HEADER = 'X-Query-Diagnostics'
+FLAG_PARAM = '_diagnostics'
+# Сколько запросов каждого вида попадает в сводку и длина SQL в ней
+TOP_QUERIES = 5
+SQL_PREVIEW_LENGTH = 500
+
+
+class QueryDiagnostics:
+    """
+    Сборщик статистики SQL на время блока with.
+
+    Записывает все запросы всех подключений текущего потока; повтором
+    считается одинаковый текст SQL (параметры передаются отдельно, поэтому
+    запросы, отличающиеся только значениями, совпадают).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.by_sql = defaultdict(lambda: [0, 0.0])
+        self.slowest = []
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            stats = self.by_sql[sql]
+            stats[0] += 1
+            stats[1] += elapsed
+            self.slowest.append((elapsed, sql))
+            if len(self.slowest) > TOP_QUERIES * 4:
+                self.slowest.sort(reverse=True)
+                del self.slowest[TOP_QUERIES:]
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        self._stack = None
+        return False
+
+    def duplicates(self, threshold=2):
+        """Повторявшиеся запросы: [(sql, count, duration)] по убыванию числа повторов."""
+        rows = [(sql, count, duration) for sql, (count, duration) in self.by_sql.items() if count >= threshold]
+        rows.sort(key=lambda row: (-row[1], -row[2]))
+        return rows
+
+    def summary(self):
+        """Сводка для лога."""
+        return {
+            'query_count': self.count,
+            'query_time_ms': round(self.duration * 1000, 2),
+            'distinct_queries': len(self.by_sql),
+            'slowest': [
+                {'sql': sql[:SQL_PREVIEW_LENGTH], 'time_ms': round(elapsed * 1000, 2)}
+                for elapsed, sql in sorted(self.slowest, reverse=True)[:TOP_QUERIES]
+            ],
+            'duplicates': [
+                {'sql': sql[:SQL_PREVIEW_LENGTH], 'count': count, 'time_ms': round(duration * 1000, 2)}
+                for sql, count, duration in self.duplicates()[:TOP_QUERIES]
+            ],
+        }
+
+
+def flag_requested(request):
+    """Запрошена ли диагностика этого запроса заголовком или параметром."""
+    value = request.headers.get(FLAG_HEADER) or request.GET.get(FLAG_PARAM)
+    return value in ('1', 'true', 'yes')
+
+
+def _flag_allowed(request):
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated and user.is_staff)
+
+
+class QueryDiagnosticsMiddleware:
+    """Включает QueryDiagnostics для запросов по настройке или флагу."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        always = getattr(settings, 'QUERY_DIAGNOSTICS', False)
+        flagged = getattr(settings, 'QUERY_DIAGNOSTICS_ALLOW_FLAG', False) and flag_requested(request)
+        if not (always or flagged):
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        with QueryDiagnostics() as diagnostics:
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        # Пользователь известен только после view (JWT проверяет DRF)
+        flagged = flagged and _flag_allowed(request)
+        if always or flagged:
+            self._log(request, response, diagnostics, elapsed)
+        if flagged:
+            db_ms = diagnostics.duration * 1000
+            response['X-Query-Count'] = str(diagnostics.count)
+            response['X-Query-Time-Ms'] = f'{db_ms:.2f}'
+            response['Server-Timing'] = f'db;dur={db_ms:.2f};desc="{diagnostics.count} queries"'
+        return response
+
+    def _log(self, request, response, diagnostics, elapsed):
+        threshold = getattr(settings, 'QUERY_DIAGNOSTICS_DUPLICATE_THRESHOLD', 10)
+        summary = diagnostics.summary()
+        match = getattr(request, 'resolver_match', None)
+        summary.update({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'request_time_ms': round(elapsed * 1000, 2),
+        })
+        suspicious = bool(diagnostics.duplicates(threshold))
+        ugc_logger.log(
+            LogLevel.WARNING if suspicious else LogLevel.INFO,
+            COMPONENT,
+            f"{request.method} {request.path}: {diagnostics.count} SQL, {summary['query_time_ms']} ms",
+            ErrorCode.SUCCESS,
+            summary,
+            getattr(request, 'user', None),
+        )
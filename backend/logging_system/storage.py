@@ -0,0 +1,301 @@
+"""
+Хранилище логов UgcMarket в формате NDJSON.
+
+Каждая запись — одна строка JSON, файлы только дописываются (append-only).
+Вызов логгера лишь кладет запись в ограниченную очередь, а фоновый поток
+сбрасывает накопленные записи на диск пакетами, поэтому стоимость одного
+вызова не зависит от размера файла и не блокирует поток запроса.
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Ключ файла лога: (дата, пользователь, источник, компонент)
+LogKey = Tuple[str, str, str, str]
+
+LOG_FILE_SUFFIX = '.ndjson'
+LEGACY_LOG_FILE_SUFFIX = '.json'
+
+_STOP = object()
+
+
+class _FlushMarker:
+    """Маркер в очереди, по которому writer сообщает о сбросе всех предыдущих записей."""
+
+    def __init__(self):
+        self.event = threading.Event()
+
+
+class NDJSONLogStorage:
+    """
+    Append-only хранилище логов с фоновой пакетной записью.
+
+    Args:
+        base_path: Корневая директория логов.
+        flush_interval: Максимальное время (сек.) накопления пакета перед записью.
+        max_batch_size: Максимальное количество записей в одном пакете.
+        queue_size: Размер очереди; при переполнении запись выполняется синхронно
+            (или отбрасывается, если вызывающий код не готов ждать).
+        index: Индекс логов (LogIndex), который пополняется каждым записанным пакетом.
+    """
+
+    def __init__(self,
+                 base_path: str,
+                 flush_interval: float = 1.0,
+                 max_batch_size: int = 500,
+                 queue_size: int = 10000,
+                 index=None):
+        self.base_path = Path(base_path)
+        self.index = index
+        self.flush_interval = max(float(flush_interval), 0.0)
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self.queue_size = max(int(queue_size), 1)
+
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._known_dirs = set()
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._closed = False
+
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------
+    # Публичный API
+    # ------------------------------------------------------------------
+    def get_log_file(self, key: LogKey) -> Path:
+        """Возвращает путь к файлу лога для ключа (дата, пользователь, источник, компонент)."""
+        date_str, user_id, source, component = key
+        return self.base_path / date_str / user_id / source / f'{component}{LOG_FILE_SUFFIX}'
+
+    def enqueue(self, key: LogKey, entry: Dict[str, Any], block: bool = True) -> bool:
+        """
+        Ставит запись в очередь на запись.
+
+        Args:
+            key: Ключ файла лога.
+            entry: Запись лога.
+            block: Если очередь переполнена — записать синхронно (True)
+                или отказаться от записи (False).
+
+        Returns:
+            bool: True, если запись принята (поставлена в очередь или записана).
+        """
+        if self._closed:
+            self._write_batch([(key, entry)])
+            return True
+
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((key, entry))
+            return True
+        except queue.Full:
+            if not block:
+                return False
+            # Обратное давление: пишем сами, но ничего не теряем
+            self._write_batch([(key, entry)])
+            return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Дожидается записи на диск всех записей, поставленных в очередь до вызова.
+
+        Returns:
+            bool: True, если сброс завершился до истечения таймаута.
+        """
+        if self._queue is None or self._thread is None or not self._thread.is_alive():
+            return True
+        marker = _FlushMarker()
+        self._queue.put(marker)
+        return marker.event.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """
+        Останавливает фоновый поток, предварительно записав все записи из очереди.
+
+        Вызывается автоматически при завершении процесса.
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+        # Записи, попавшие в очередь после маркера остановки, дописываем синхронно
+        if self._queue is not None and self._pid == os.getpid():
+            remaining = []
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, tuple):
+                    remaining.append(item)
+                elif isinstance(item, _FlushMarker):
+                    item.event.set()
+            if remaining:
+                self._write_batch(remaining)
+
+    @property
+    def pending(self) -> int:
+        """Количество записей, ожидающих записи на диск."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # ------------------------------------------------------------------
+    # Фоновый writer
+    # ------------------------------------------------------------------
+    def _ensure_worker(self):
+        """Запускает фоновый поток (в том числе заново после fork воркера)."""
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == pid and self._thread.is_alive():
+                return
+            if self._pid != pid:
+                # После fork очередь родителя принадлежит родителю
+                self._queue = queue.Queue(maxsize=self.queue_size)
+                self._known_dirs = set()
+            self._pid = pid
+            self._thread = threading.Thread(
+                target=self._run,
+                name='ugc-log-writer',
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _run(self):
+        """Основной цикл writer: собирает пакет и записывает его одним проходом."""
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+
+            batch: List[Tuple[LogKey, Dict[str, Any]]] = []
+            markers: List[_FlushMarker] = []
+            stop = False
+
+            if isinstance(item, _FlushMarker):
+                markers.append(item)
+            else:
+                batch.append(item)
+
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch_size and not markers:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                if isinstance(item, _FlushMarker):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+
+            if batch:
+                self._write_batch(batch)
+            for marker in markers:
+                marker.event.set()
+            if stop:
+                return
+
+    def _ensure_directory(self, directory: Path):
+        """Создает директорию лога один раз за время жизни процесса."""
+        if directory in self._known_dirs:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        self._known_dirs.add(directory)
+
+    def _write_batch(self, batch: List[Tuple[LogKey, Dict[str, Any]]]):
+        """Группирует пакет по файлам и дописывает строки в каждый файл одним вызовом write."""
+        grouped: Dict[Path, List[str]] = {}
+        indexed = []
+        for key, entry in batch:
+            line = json.dumps(entry, ensure_ascii=False, default=str)
+            grouped.setdefault(self.get_log_file(key), []).append(line + '\n')
+            indexed.append((key, entry, line))
+
+        with self._write_lock:
+            for log_file, lines in grouped.items():
+                try:
+                    self._ensure_directory(log_file.parent)
+                    try:
+                        with open(log_file, 'a', encoding='utf-8') as f:
+                            f.write(''.join(lines))
+                    except FileNotFoundError:
+                        # Директорию удалила компактизация — создаем заново
+                        self._known_dirs.discard(log_file.parent)
+                        self._ensure_directory(log_file.parent)
+                        with open(log_file, 'a', encoding='utf-8') as f:
+                            f.write(''.join(lines))
+                except Exception as e:
+                    self._write_fallback(f'{log_file}: {e}')
+
+        if self.index is not None:
+            try:
+                self.index.add_batch(indexed)
+            except Exception as e:
+                self._write_fallback(f'index: {e}')
+
+    def _write_fallback(self, error: str):
+        """Fallback: записываем ошибку записи в общий лог ошибок."""
+        try:
+            fallback_path = self.base_path / 'system_errors.log'
+            fallback_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(fallback_path, 'a', encoding='utf-8') as f:
+                f.write(f"{datetime.now().isoformat()} - LOGGING_ERROR: {error}\n")
+        except Exception:
+            pass
+
+
+def iter_log_file(log_file: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Читает записи из файла лога.
+
+    Поддерживает как NDJSON-файлы, так и файлы старого формата (JSON-массив).
+    Поврежденные строки пропускаются.
+    """
+    try:
+        if log_file.suffix == LEGACY_LOG_FILE_SUFFIX:
+            with open(log_file, 'r', encoding='utf-8') as f:
+                logs = json.load(f)
+            if isinstance(logs, list):
+                yield from logs
+            return
+
+        with open(log_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+    except (json.JSONDecodeError, IOError):
+        return
+
+
+def list_log_files(log_dir: Path) -> List[Path]:
+    """Возвращает файлы логов директории (NDJSON и старого формата)."""
+    if not log_dir.exists():
+        return []
+    return sorted(
+        list(log_dir.glob(f'*{LOG_FILE_SUFFIX}')) + list(log_dir.glob(f'*{LEGACY_LOG_FILE_SUFFIX}'))
+    )
@@ -0,0 +1,295 @@
+import gzip
+import json
+import os
+import queue
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from . import compaction
+from .compaction import (
+    archive_paths, closed_days, compact_day, interrupted_days, iter_day_entries, list_days,
+    run_maintenance, work_dir_path,
+)
+from .index import LogIndex, decode_cursor
+from .ingest import get_client_ip
+from .query import LogIndexUnavailable, query_user_logs
+from .storage import NDJSONLogStorage, iter_log_file
+
+
+def _entry(timestamp, message, level='INFO', error_code='SUCCESS'):
+    return {'timestamp': timestamp, 'level': level, 'error_code': error_code, 'message': message}
+
+
+class LogStorageTestMixin:
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base, True)
+
+    def make_storage(self, **kwargs):
+        kwargs.setdefault('flush_interval', 0.05)
+        storage = NDJSONLogStorage(self.base, **kwargs)
+        self.addCleanup(storage.close)
+        return storage
+
+
+class NDJSONLogStorageTests(LogStorageTestMixin, SimpleTestCase):
+    """Запись в очередь, фоновый сброс пакетами и чтение NDJSON-файлов."""
+
+    def test_flush_writes_queued_entries(self):
+        storage = self.make_storage()
+        key = ('2026-01-02', '7', 'backend', 'orders')
+        entries = [_entry(f'2026-01-02T10:00:0{i}', f'сообщение {i}') for i in range(5)]
+        for entry in entries:
+            self.assertTrue(storage.enqueue(key, entry))
+
+        self.assertTrue(storage.flush(timeout=5))
+        self.assertEqual(storage.pending, 0)
+        log_file = storage.get_log_file(key)
+        self.assertEqual(log_file.suffix, '.ndjson')
+        self.assertEqual(list(iter_log_file(log_file)), entries)
+
+    def test_corrupt_lines_are_skipped(self):
+        storage = self.make_storage()
+        key = ('2026-01-02', '7', 'backend', 'orders')
+        storage.enqueue(key, _entry('2026-01-02T10:00:00', 'первая'))
+        storage.flush(timeout=5)
+        with open(storage.get_log_file(key), 'a', encoding='utf-8') as f:
+            f.write('{"broken": \n')
+        storage.enqueue(key, _entry('2026-01-02T10:00:01', 'вторая'))
+        storage.flush(timeout=5)
+
+        messages = [entry['message'] for entry in iter_log_file(storage.get_log_file(key))]
+        self.assertEqual(messages, ['первая', 'вторая'])
+
+    def test_full_queue_applies_backpressure(self):
+        storage = self.make_storage(queue_size=1)
+        key = ('2026-01-02', '7', 'backend', 'orders')
+        # Writer не запущен — очередь переполняется на второй записи
+        with mock.patch.object(NDJSONLogStorage, '_ensure_worker'):
+            storage._queue = queue.Queue(maxsize=1)
+            self.assertTrue(storage.enqueue(key, _entry('2026-01-02T10:00:00', 'в очереди')))
+            self.assertFalse(storage.enqueue(key, _entry('2026-01-02T10:00:01', 'отброшена'), block=False))
+            self.assertTrue(storage.enqueue(key, _entry('2026-01-02T10:00:02', 'синхронно')))
+
+        messages = [entry['message'] for entry in iter_log_file(storage.get_log_file(key))]
+        self.assertEqual(messages, ['синхронно'])
+        self.assertEqual(storage.pending, 1)
+
+    def test_close_writes_remaining_entries(self):
+        storage = self.make_storage(flush_interval=60)
+        key = ('2026-01-02', '7', 'backend', 'orders')
+        for i in range(3):
+            storage.enqueue(key, _entry(f'2026-01-02T10:00:0{i}', f'сообщение {i}'))
+        storage.close()
+
+        self.assertEqual(len(list(iter_log_file(storage.get_log_file(key)))), 3)
+        # После закрытия запись выполняется синхронно
+        storage.enqueue(key, _entry('2026-01-02T10:00:09', 'после закрытия'))
+        self.assertEqual(len(list(iter_log_file(storage.get_log_file(key)))), 4)
+
+    def test_worker_restarts_after_fork(self):
+        storage = self.make_storage()
+        key = ('2026-01-02', '7', 'backend', 'orders')
+        storage.enqueue(key, _entry('2026-01-02T10:00:00', 'родитель'))
+        storage.flush(timeout=5)
+        parent_queue, parent_thread = storage._queue, storage._thread
+
+        with mock.patch('logging_system.storage.os.getpid', return_value=os.getpid() + 100000):
+            storage.enqueue(key, _entry('2026-01-02T10:00:01', 'потомок'))
+            self.assertIsNot(storage._queue, parent_queue)
+            self.assertIsNot(storage._thread, parent_thread)
+            self.assertTrue(storage.flush(timeout=5))
+            storage.close()
+
+        messages = [entry['message'] for entry in iter_log_file(storage.get_log_file(key))]
+        self.assertEqual(messages, ['родитель', 'потомок'])
+
+
+class LogIndexQueryTests(LogStorageTestMixin, SimpleTestCase):
+    """Индекс пополняется writer'ом, фильтрует записи и листает их курсором."""
+
+    def setUp(self):
+        super().setUp()
+        self.index = LogIndex(os.path.join(self.base, 'index.sqlite3'))
+        self.storage = self.make_storage(index=self.index)
+        for i in range(5):
+            self.storage.enqueue(
+                ('2026-01-02', '7', 'backend', 'orders'),
+                _entry(f'2026-01-02T10:00:0{i}', f'заказ {i} обработан', level='ERROR' if i % 2 else 'INFO'),
+            )
+        self.storage.enqueue(('2026-01-02', '8', 'backend', 'orders'), _entry('2026-01-02T10:00:09', 'чужой'))
+        self.storage.enqueue(('2026-01-03', '7', 'frontend', 'ui'), _entry('2026-01-03T09:00:00', 'интерфейс'))
+        self.assertTrue(self.storage.flush(timeout=5))
+
+    def _query(self, **kwargs):
+        return query_user_logs(self.base, self.index, '7', date(2026, 1, 1), date(2026, 1, 3), **kwargs)
+
+    def test_cursor_pages_through_user_entries(self):
+        messages, cursor = [], None
+        while True:
+            page, cursor = self._query(limit=2, cursor=cursor)
+            self.assertLessEqual(len(page), 2)
+            messages.extend(entry['message'] for entry in page)
+            if cursor is None:
+                break
+            self.assertIn('id', decode_cursor(cursor))
+
+        self.assertEqual(messages, ['интерфейс'] + [f'заказ {i} обработан' for i in reversed(range(5))])
+
+    def test_filters(self):
+        page, cursor = self._query(level='ERROR')
+        self.assertEqual([entry['message'] for entry in page], ['заказ 3 обработан', 'заказ 1 обработан'])
+        self.assertIsNone(cursor)
+
+        page, _ = self._query(source='frontend')
+        self.assertEqual([(entry['message'], entry['source']) for entry in page], [('интерфейс', 'frontend')])
+
+        page, _ = self._query(search='заказ 4')
+        self.assertEqual([entry['message'] for entry in page], ['заказ 4 обработан'])
+
+        page, _ = self._query(since='2026-01-02T10:00:03', until='2026-01-02T23:59:59')
+        self.assertEqual(len(page), 2)
+
+    def test_file_scan_matches_index(self):
+        indexed, _ = self._query(limit=100)
+        scanned, _ = query_user_logs(self.base, None, '7', date(2026, 1, 1), date(2026, 1, 3), limit=100)
+        self.assertEqual(scanned, indexed)
+
+    def test_invalid_cursor_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            self._query(cursor='not-a-cursor')
+
+    def test_index_failure_on_first_page_falls_back_to_files(self):
+        indexed, _ = self._query(limit=100)
+        with mock.patch.object(self.index, 'query', side_effect=RuntimeError('database is locked')):
+            with self.assertLogs('logging_system.query', level='ERROR'):
+                scanned, _ = self._query(limit=100)
+        self.assertEqual(scanned, indexed)
+
+    def test_index_failure_with_cursor_raises(self):
+        _, cursor = self._query(limit=2)
+        with mock.patch.object(self.index, 'query', side_effect=RuntimeError('database is locked')):
+            with self.assertLogs('logging_system.query', level='ERROR'):
+                with self.assertRaises(LogIndexUnavailable):
+                    self._query(limit=2, cursor=cursor)
+
+
+class LogCompactionTests(LogStorageTestMixin, SimpleTestCase):
+    """Закрытые дни сворачиваются в gzip-архив без потери записей."""
+
+    def setUp(self):
+        super().setUp()
+        self.day = (datetime.now().date() - timedelta(days=3)).strftime('%Y-%m-%d')
+        self.today = datetime.now().date().strftime('%Y-%m-%d')
+        storage = self.make_storage()
+        for i in range(3):
+            storage.enqueue((self.day, '7', 'backend', 'orders'), _entry(f'{self.day}T10:00:0{i}', f'старая {i}'))
+        storage.enqueue((self.day, '7', 'frontend', 'ui'), _entry(f'{self.day}T11:00:00', 'интерфейс'))
+        storage.enqueue((self.today, '7', 'backend', 'orders'), _entry(f'{self.today}T10:00:00', 'сегодня'))
+        storage.flush(timeout=5)
+
+    def test_closed_day_is_compacted(self):
+        self.assertEqual(closed_days(self.base, keep_days=1), [self.day])
+        before = sorted(json.dumps(entry) for _, entry in iter_day_entries(self.base, self.day))
+
+        stats = compact_day(self.base, self.day)
+
+        self.assertEqual(stats['entries'], 4)
+        self.assertEqual(stats['groups'], 2)
+        self.assertNotIn(self.day, list_days(self.base))
+        archive_path, index_path = archive_paths(self.base, self.day)
+        self.assertTrue(archive_path.exists())
+        self.assertTrue(index_path.exists())
+        with gzip.open(archive_path, 'rt', encoding='utf-8') as f:
+            self.assertEqual(len(f.read().splitlines()), 4)
+        after = sorted(json.dumps(entry) for _, entry in iter_day_entries(self.base, self.day))
+        self.assertEqual(after, before)
+
+        # Архивированные записи доступны через чтение файлов
+        page, _ = query_user_logs(self.base, None, '7', datetime.now().date() - timedelta(days=5),
+                                  datetime.now().date(), component='orders')
+        self.assertEqual([entry['message'] for entry in page], ['сегодня', 'старая 2', 'старая 1', 'старая 0'])
+
+    def test_late_entries_are_appended_to_archive(self):
+        compact_day(self.base, self.day)
+        storage = self.make_storage()
+        storage.enqueue((self.day, '7', 'backend', 'orders'), _entry(f'{self.day}T23:59:59', 'опоздавшая'))
+        storage.flush(timeout=5)
+
+        stats = compact_day(self.base, self.day)
+
+        self.assertEqual(stats['entries'], 5)
+        messages = [entry['message'] for _, entry in iter_day_entries(self.base, self.day)]
+        self.assertIn('опоздавшая', messages)
+
+    def test_maintenance_applies_retention(self):
+        index = LogIndex(os.path.join(self.base, 'index.sqlite3'))
+        result = run_maintenance(self.base, keep_days=1, max_age_days=2, log_index=index)
+
+        self.assertEqual(list(result['compacted']), [self.day])
+        self.assertEqual(result['deleted'], [self.day])
+        self.assertFalse(archive_paths(self.base, self.day)[0].exists())
+        self.assertEqual(list_days(self.base), [self.today])
+
+    def _messages(self):
+        return sorted(entry['message'] for _, entry in iter_day_entries(self.base, self.day))
+
+    def test_interrupted_compaction_is_resumed(self):
+        before = self._messages()
+        # Процесс упал сразу после переноса директории дня
+        with mock.patch.object(compaction, '_fold_work_dir', side_effect=OSError('crash')):
+            with self.assertRaises(OSError):
+                compact_day(self.base, self.day)
+        self.assertTrue(work_dir_path(self.base, self.day).is_dir())
+        self.assertEqual(interrupted_days(self.base), [self.day])
+
+        # Опоздавшая запись создает директорию дня заново
+        storage = self.make_storage()
+        storage.enqueue((self.day, '7', 'backend', 'orders'), _entry(f'{self.day}T23:59:59', 'опоздавшая'))
+        storage.flush(timeout=5)
+
+        result = run_maintenance(self.base, keep_days=1)
+        self.assertEqual(result['compacted'][self.day]['entries'], 5)
+        self.assertEqual(self._messages(), sorted(before + ['опоздавшая']))
+        self.assertEqual(interrupted_days(self.base), [])
+
+    def test_work_dir_left_after_archive_replace_is_not_folded_twice(self):
+        before = self._messages()
+        # Процесс упал после подмены архива, но до удаления перенесенной директории
+        with mock.patch.object(compaction.shutil, 'rmtree'):
+            compact_day(self.base, self.day)
+        self.assertEqual(interrupted_days(self.base), [self.day])
+
+        stats = compact_day(self.base, self.day)
+        self.assertEqual(stats['entries'], 4)
+        self.assertEqual(self._messages(), before)
+        self.assertFalse(work_dir_path(self.base, self.day).exists())
+
+    def test_pid_named_leftover_is_folded(self):
+        before = self._messages()
+        legacy = os.path.join(self.base, 'archive', f'.{self.day}.4242.compacting')
+        os.makedirs(os.path.dirname(legacy), exist_ok=True)
+        os.replace(os.path.join(self.base, self.day), legacy)
+        self.assertEqual(interrupted_days(self.base), [self.day])
+
+        run_maintenance(self.base, keep_days=1)
+        self.assertFalse(os.path.exists(legacy))
+        self.assertEqual(self._messages(), before)
+
+
+class ClientIpTests(SimpleTestCase):
+    """IP для лимита анонимного приема берется из заголовка proxy только по настройке."""
+
+    def setUp(self):
+        self.request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.5', HTTP_X_REAL_IP='203.0.113.9')
+
+    def test_remote_addr_by_default(self):
+        self.assertEqual(get_client_ip(self.request), '10.0.0.5')
+
+    @override_settings(LOGS_CLIENT_IP_HEADER='HTTP_X_REAL_IP')
+    def test_proxy_header_is_opt_in(self):
+        self.assertEqual(get_client_ip(self.request), '203.0.113.9')
@@ -0,0 +1,74 @@
+"""
+Ограничение скорости приема логов (token bucket).
+
+Каждый ключ (пользователь или IP) получает «ведро» токенов, которое
+пополняется с постоянной скоростью. Одна запись лога расходует один токен,
+поэтому пакет из 50 записей стоит столько же, сколько 50 отдельных запросов.
+Состояние хранится в памяти процесса: задача лимитера — защитить диск
+конкретного воркера, а не вести точный глобальный учет.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+
+class TokenBucketLimiter:
+    """
+    Набор token bucket'ов, индексированных произвольным ключом.
+
+    Args:
+        rate: Скорость пополнения (токенов в секунду).
+        burst: Емкость ведра (максимальный всплеск).
+        max_keys: Максимальное количество отслеживаемых ключей; самые давно
+            не использованные ключи вытесняются (ведро для них начнется заново).
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000):
+        self.rate = max(float(rate), 0.0)
+        self.burst = max(int(burst), 1)
+        self.max_keys = max(int(max_keys), 1)
+        self._buckets: 'OrderedDict[str, Tuple[float, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, amount: int = 1) -> int:
+        """
+        Списывает до `amount` токенов для ключа.
+
+        Returns:
+            int: Сколько токенов удалось списать (от 0 до amount).
+        """
+        if amount <= 0:
+            return 0
+
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated_at) * self.rate)
+
+            granted = min(amount, int(tokens))
+            tokens -= granted
+
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return granted
+
+    def refund(self, key: str, amount: int):
+        """Возвращает неиспользованные токены (например, если другой лимит отказал)."""
+        if amount <= 0:
+            return
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return
+            tokens, updated_at = bucket
+            self._buckets[key] = (min(float(self.burst), tokens + amount), updated_at)
+
+    def retry_after(self, amount: int = 1) -> int:
+        """Оценка времени (сек.), через которое будет доступно `amount` токенов."""
+        if self.rate <= 0:
+            return 60
+        return max(1, int(min(amount, self.burst) / self.rate + 0.999))
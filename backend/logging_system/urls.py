@@ -8,4 +8,5 @@ from . import views
 urlpatterns = [
     path('frontend/', views.log_frontend_entry, name='log_frontend_entry'),
     path('user/', views.get_user_logs, name='get_user_logs'),
-]
\ No newline at end of file
+    path('stats/', views.get_ingest_stats, name='get_ingest_stats'),
+]
@@ -2,18 +2,18 @@
 API views для системы логирования.
 """
 
-import json
 import os
 from datetime import datetime
-from pathlib import Path
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 
 from .logger import logger, LogLevel, ErrorCode
+from .ingest import frontend_ingestor, get_client_ip
+from .query import query_user_logs, LogIndexUnavailable, LOG_SOURCES
 
 
 @api_view(['POST'])
@@ -22,7 +22,7 @@ def log_frontend_entry(request):
     """
     API endpoint для получения логов от frontend.
     
-    Принимает JSON с полями:
+    Принимает одну запись или массив записей (JSON) с полями:
     - timestamp: строка ISO формата
     - level: уровень логирования
     - component: компонент frontend
@@ -32,84 +32,54 @@ def log_frontend_entry(request):
     - extra_data: дополнительные данные
     - url: URL страницы
     - user_agent: User Agent браузера
+
+    Записи ставятся в очередь на запись, ответ 202 возвращается сразу.
+    Некорректные записи и записи сверх лимита перечисляются в ответе.
     """
     try:
         data = request.data
-        
-        # Валидация обязательных полей
-        required_fields = ['timestamp', 'level', 'component', 'message', 'error_code', 'user_id']
-        for field in required_fields:
-            if field not in data:
+        is_batch = isinstance(data, list)
+        entries = data if is_batch else [data]
+
+        if not entries:
+            return Response({'error': 'Пустой пакет логов'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(entries) > frontend_ingestor.max_batch_size:
+            return Response(
+                {'error': f'Слишком много записей в пакете (максимум {frontend_ingestor.max_batch_size})'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+        auth_user_id = None
+        if request.user and request.user.is_authenticated:
+            auth_user_id = str(request.user.id)
+
+        result = frontend_ingestor.ingest(entries, get_client_ip(request), auth_user_id)
+
+        if result.accepted == 0:
+            if result.throttled:
+                response = Response(
+                    {'error': 'Превышен лимит отправки логов', **result.as_dict()},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS
+                )
+                response['Retry-After'] = str(result.retry_after or 1)
+                return response
+            if result.dropped:
                 return Response(
-                    {'error': f'Отсутствует обязательное поле: {field}'}, 
-                    status=status.HTTP_400_BAD_REQUEST
+                    {'error': 'Очередь логов переполнена', **result.as_dict()},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
                 )
-        
-        # Получаем данные из запроса
-        timestamp_str = data['timestamp']
-        level_str = data['level']
-        component = data['component']
-        message = data['message']
-        error_code_str = data['error_code']
-        user_id = data['user_id']
-        extra_data = data.get('extra_data', {})
-        url = data.get('url', '')
-        user_agent = data.get('user_agent', '')
-        
-        # Добавляем frontend-специфичные данные в extra_data
-        extra_data.update({
-            'url': url,
-            'user_agent': user_agent,
-            'source': 'frontend'
-        })
-        
-        # Создаем структуру директорий для frontend логов
-        try:
-            timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-            date_str = timestamp.strftime('%Y-%m-%d')
-        except ValueError:
-            date_str = datetime.now().strftime('%Y-%m-%d')
-        
-        base_path = getattr(settings, 'LOGS_BASE_PATH', 
-                           os.path.join(settings.BASE_DIR, 'logs'))
-        log_dir = Path(base_path) / date_str / user_id / 'frontend'
-        log_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Создаем запись лога
-        log_entry = {
-            'timestamp': timestamp_str,
-            'level': level_str,
-            'component': component,
-            'message': message,
-            'error_code': error_code_str,
-            'user_id': user_id,
-            'extra_data': extra_data
-        }
-        
-        # Записываем в файл компонента
-        log_file = log_dir / f'{component}.json'
-        
-        # Читаем существующие логи или создаем новый список
-        logs = []
-        if log_file.exists():
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    logs = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                logs = []
-        
-        # Добавляем новую запись
-        logs.append(log_entry)
-        
-        # Ограничиваем количество записей в файле (последние 1000)
-        if len(logs) > 1000:
-            logs = logs[-1000:]
-        
-        # Записываем обратно
-        with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump(logs, f, ensure_ascii=False, indent=2)
-        
-        return Response({'status': 'success'}, status=status.HTTP_201_CREATED)
+            if not is_batch:
+                # Одиночная запись: сохраняем прежний формат ошибки
+                return Response({'error': result.errors[0]['error']}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(
+                {'error': 'Нет корректных записей', **result.as_dict()},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        response = Response({'status': 'accepted', **result.as_dict()}, status=status.HTTP_202_ACCEPTED)
+        if result.throttled:
+            response['Retry-After'] = str(result.retry_after or 1)
+        return response
         
     except Exception as e:
         # Логируем ошибку в системе логирования backend
@@ -117,7 +87,7 @@ def log_frontend_entry(request):
             'logging_api',
             f'Ошибка при обработке лога от frontend: {str(e)}',
             ErrorCode.UNKNOWN_ERROR,
-            {'request_data': request.data, 'error': str(e)}
+            {'error': str(e)}
         )
         
         return Response(
@@ -126,6 +96,18 @@ def log_frontend_entry(request):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_ingest_stats(request):
+    """
+    API endpoint со счетчиками приема логов frontend.
+
+    Возвращает количество принятых, отклоненных, ограниченных лимитом
+    и отброшенных (переполнение очереди) записей с момента запуска процесса.
+    """
+    return Response(frontend_ingestor.get_stats())
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_logs(request):
@@ -134,66 +116,79 @@ def get_user_logs(request):
     
     Параметры запроса:
     - date: дата в формате YYYY-MM-DD (по умолчанию сегодня)
+    - date_from, date_to: диапазон дат YYYY-MM-DD (вместо date)
+    - since, until: границы по времени записи (ISO формат)
     - component: фильтр по компоненту (опционально)
     - level: фильтр по уровню логирования (опционально)
+    - error_code: фильтр по коду ошибки (опционально)
     - source: backend или frontend (опционально)
+    - q: полнотекстовый поиск по сообщению (опционально)
+    - cursor: курсор следующей страницы из предыдущего ответа
+    - limit: размер страницы (по умолчанию 100)
     """
     try:
         user_id = str(request.user.id)
-        date_str = request.GET.get('date', datetime.now().strftime('%Y-%m-%d'))
-        component_filter = request.GET.get('component')
-        level_filter = request.GET.get('level')
-        source_filter = request.GET.get('source')  # backend или frontend
-        
+        params = request.GET
+
+        try:
+            today = datetime.now().date()
+            single_date = params.get('date')
+            date_from = _parse_date(params.get('date_from') or single_date, today)
+            date_to = _parse_date(params.get('date_to') or single_date, today)
+        except ValueError:
+            return Response({'error': 'Некорректная дата, ожидается YYYY-MM-DD'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        max_days = getattr(settings, 'LOGS_QUERY_MAX_DAYS', 31)
+        if date_from > date_to:
+            return Response({'error': 'date_from не может быть позже date_to'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if (date_to - date_from).days >= max_days:
+            return Response({'error': f'Диапазон дат не может превышать {max_days} дн.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        source_filter = params.get('source')  # backend или frontend
+        if source_filter and source_filter not in LOG_SOURCES:
+            return Response({'error': 'source должен быть backend или frontend'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(params.get('limit', 100))
+        except ValueError:
+            limit = 100
+        limit = max(1, min(limit, getattr(settings, 'LOGS_QUERY_MAX_LIMIT', 500)))
+
         base_path = getattr(settings, 'LOGS_BASE_PATH', 
                            os.path.join(settings.BASE_DIR, 'logs'))
-        
-        user_logs = []
-        
-        # Определяем источники для поиска
-        sources = []
-        if source_filter:
-            sources = [source_filter]
-        else:
-            sources = ['backend', 'frontend']
-        
-        for source in sources:
-            log_dir = Path(base_path) / date_str / user_id / source
-            
-            if not log_dir.exists():
-                continue
-            
-            # Проходим по всем файлам логов в директории
-            for log_file in log_dir.glob('*.json'):
-                component_name = log_file.stem
-                
-                # Применяем фильтр по компоненту
-                if component_filter and component_name != component_filter:
-                    continue
-                
-                try:
-                    with open(log_file, 'r', encoding='utf-8') as f:
-                        logs = json.load(f)
-                    
-                    for log_entry in logs:
-                        # Применяем фильтр по уровню
-                        if level_filter and log_entry.get('level') != level_filter:
-                            continue
-                        
-                        # Добавляем информацию об источнике
-                        log_entry['source'] = source
-                        user_logs.append(log_entry)
-                        
-                except (json.JSONDecodeError, IOError):
-                    continue
-        
-        # Сортируем по времени (новые сначала)
-        user_logs.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+
+        try:
+            user_logs, next_cursor = query_user_logs(
+                base_path,
+                logger.index,
+                user_id,
+                date_from,
+                date_to,
+                level=params.get('level'),
+                component=params.get('component'),
+                error_code=params.get('error_code'),
+                source=source_filter,
+                since=params.get('since'),
+                until=params.get('until'),
+                search=params.get('q'),
+                cursor=params.get('cursor'),
+                limit=limit,
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except LogIndexUnavailable as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         
         return Response({
             'logs': user_logs,
-            'total_count': len(user_logs),
-            'date': date_str,
+            'count': len(user_logs),
+            'next_cursor': next_cursor,
+            'date_from': date_from.strftime('%Y-%m-%d'),
+            'date_to': date_to.strftime('%Y-%m-%d'),
             'user_id': user_id
         })
         
@@ -208,4 +203,11 @@ def get_user_logs(request):
         return Response(
             {'error': 'Внутренняя ошибка сервера'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+
+def _parse_date(value, default):
+    """Разбирает дату YYYY-MM-DD; ValueError для некорректного значения."""
+    if not value:
+        return default
+    return datetime.strptime(value, '%Y-%m-%d').date()
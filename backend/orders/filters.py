@@ -5,9 +5,19 @@
 """
 
 import django_filters
+
+from core import tag_index
+from core.models import Tag
+
 from .models import Order
 
 
+def _tag_ids(value):
+    """id тегов по списку slug через запятую."""
+    slugs = [slug.strip() for slug in value.split(',') if slug.strip()]
+    return list(Tag.objects.filter(slug__in=slugs).values_list('id', flat=True))
+
+
 class OrderFilter(django_filters.FilterSet):
     """
     Фильтр для заказов.
@@ -20,6 +30,8 @@ class OrderFilter(django_filters.FilterSet):
     deadline_after = django_filters.DateFilter(field_name='deadline', lookup_expr='gte')
     category = django_filters.CharFilter(field_name='category__slug')
     tags = django_filters.CharFilter(method='filter_by_tags')
+    tags_all = django_filters.CharFilter(method='filter_by_all_tags')
+    exclude_tags = django_filters.CharFilter(method='exclude_by_tags')
     client = django_filters.NumberFilter(field_name='client')
     target_creator = django_filters.NumberFilter(field_name='target_creator')
     status = django_filters.CharFilter(field_name='status')
@@ -32,14 +44,15 @@ class OrderFilter(django_filters.FilterSet):
         fields = [
             'min_budget', 'max_budget', 
             'deadline_before', 'deadline_after',
-            'category', 'tags', 'status',
+            'category', 'tags', 'tags_all', 'exclude_tags', 'status',
             'client', 'target_creator', 'is_private',
             'created_after', 'created_before'
         ]
     
     def filter_by_tags(self, queryset, name, value):
         """
-        Фильтрует заказы по нескольким тегам (разделенным запятыми).
+        Фильтрует заказы по нескольким тегам (разделенным запятыми):
+        подходят заказы хотя бы с одним из тегов (индекс core.tag_index).
         
         Args:
             queryset: Исходный QuerySet заказов
@@ -49,5 +62,20 @@ class OrderFilter(django_filters.FilterSet):
         Returns:
             QuerySet: Отфильтрованный QuerySet
         """
-        tag_slugs = value.split(',')
-        return queryset.filter(tags__slug__in=tag_slugs).distinct()
\ No newline at end of file
+        tag_ids = _tag_ids(value)
+        if not tag_ids:
+            return queryset.none()
+        return tag_index.filter_queryset(queryset, 'orders', any_of=tag_ids)
+
+    def filter_by_all_tags(self, queryset, name, value):
+        """Заказы со всеми тегами из списка slug (через запятую)."""
+        slugs = {slug.strip() for slug in value.split(',') if slug.strip()}
+        tag_ids = _tag_ids(value)
+        if len(tag_ids) < len(slugs):
+            # Несуществующего тега нет ни у одного заказа
+            return queryset.none()
+        return tag_index.filter_queryset(queryset, 'orders', all_of=tag_ids)
+
+    def exclude_by_tags(self, queryset, name, value):
+        """Заказы без тегов из списка slug (через запятую)."""
+        return tag_index.filter_queryset(queryset, 'orders', none_of=_tag_ids(value))
\ No newline at end of file
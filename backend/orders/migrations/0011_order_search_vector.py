@@ -0,0 +1,56 @@
+# Generated by Django 5.2.3 on 2026-10-16 20:14
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+BACKFILL_SQL = """
+UPDATE orders_order o
+SET search_vector =
+    setweight(to_tsvector('russian', coalesce(o.title, '')), 'A') ||
+    setweight(to_tsvector('russian', coalesce(o.description, '')), 'B') ||
+    setweight(to_tsvector('russian', coalesce(t.names, '')), 'C') ||
+    setweight(to_tsvector('english', coalesce(o.title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(o.description, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(t.names, '')), 'C')
+FROM orders_order oo
+LEFT JOIN (
+    SELECT ot.order_id, string_agg(tag.name, ' ' ORDER BY tag.name) AS names
+    FROM orders_order_tags ot
+    JOIN core_tag tag ON tag.id = ot.tag_id
+    GROUP BY ot.order_id
+) t ON t.order_id = oo.id
+WHERE oo.id = o.id
+"""
+
+
+def backfill_search_vector(apps, schema_editor):
+    """Заполняет поисковые документы существующих заказов (только PostgreSQL)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(BACKFILL_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0004_remove_chat_order'),
+        ('core', '0002_tag_type'),
+        ('orders', '0010_alter_order_chat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True, verbose_name='поисковый документ'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='order_search_vector_gin'),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-16 20:16
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_responses_count(apps, schema_editor):
+    """Заполняет счетчик откликов существующих заказов."""
+    Order = apps.get_model('orders', 'Order')
+    OrderResponse = apps.get_model('orders', 'OrderResponse')
+    counts = (
+        OrderResponse.objects.filter(order=OuterRef('pk'))
+        .order_by()
+        .values('order')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Order.objects.update(responses_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_order_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='responses_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='количество откликов'),
+        ),
+        migrations.RunPython(backfill_responses_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-16 20:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0005_message_message_chat_created_id_idx'),
+        ('core', '0002_tag_type'),
+        ('orders', '0012_order_responses_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='order_status_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['client', '-created_at', '-id'], name='order_client_created_id_idx'),
+        ),
+    ]
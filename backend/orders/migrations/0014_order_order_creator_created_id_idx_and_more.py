@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-16 20:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0006_chat_chat_creator_client_idx_and_more'),
+        ('core', '0002_tag_type'),
+        ('orders', '0013_order_order_status_created_id_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['creator', '-created_at', '-id'], name='order_creator_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['target_creator', '-created_at', '-id'], name='order_target_created_id_idx'),
+        ),
+    ]
@@ -5,12 +5,15 @@
 категориями, тегами и взаимодействием между заказами и пользователями.
 """
 
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.core.validators import MinValueValidator
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from users.models import Service
+from users.stats import apply_review_delta
 from core.models import Tag  # Импортируем единую модель Tag
 
 import logging
@@ -80,8 +83,10 @@ class Order(models.Model):
         is_private (BooleanField): Флаг приватности заказа.
         target_creator (ForeignKey): Целевой креатор для приватного заказа.
         views_count (PositiveIntegerField): Счетчик просмотров заказа.
+        responses_count (PositiveIntegerField): Количество откликов на заказ.
         created_at (DateTimeField): Дата создания заказа.
         updated_at (DateTimeField): Дата обновления заказа.
+        search_vector (SearchVectorField): Поисковый документ для полнотекстового поиска.
     """
     STATUS_CHOICES = [
         ('draft', _('Черновик')),
@@ -147,6 +152,8 @@ class Order(models.Model):
         verbose_name=_('целевой креатор')
     )
     views_count = models.PositiveIntegerField(_('количество просмотров'), default=0)
+    # Денормализованный счетчик откликов; поддерживается сигналами OrderResponse
+    responses_count = models.PositiveIntegerField(_('количество откликов'), default=0, editable=False)
     created_at = models.DateTimeField(_('дата создания'), auto_now_add=True)
     updated_at = models.DateTimeField(_('дата обновления'), auto_now=True)
     
@@ -159,10 +166,22 @@ class Order(models.Model):
         help_text=_('Ссылки на примеры работ, которые нравятся клиенту')
     )
     
+    # Поисковый документ (заголовок, описание, теги); обновляется в orders.signals
+    search_vector = SearchVectorField(_('поисковый документ'), null=True, blank=True, editable=False)
+    
     class Meta:
         verbose_name = _('заказ')
         verbose_name_plural = _('заказы')
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='order_search_vector_gin'),
+            # Ключ курсорной пагинации (created_at, id) для общей ленты и «моих заказов»
+            models.Index(fields=['status', '-created_at', '-id'], name='order_status_created_id_idx'),
+            models.Index(fields=['client', '-created_at', '-id'], name='order_client_created_id_idx'),
+            # Заказы исполнителя и целевого креатора
+            models.Index(fields=['creator', '-created_at', '-id'], name='order_creator_created_id_idx'),
+            models.Index(fields=['target_creator', '-created_at', '-id'], name='order_target_created_id_idx'),
+        ]
     
     def __str__(self):
         """Возвращает строковое представление заказа."""
@@ -564,28 +583,41 @@ class Review(models.Model):
     def save(self, *args, **kwargs):
         """
         Переопределяем метод save для обновления рейтинга креатора
-        при добавлении отзыва.
+        при добавлении или изменении отзыва.
         """
         # Проверяем, что заказ завершен перед созданием отзыва
         if not self.pk and self.order.status != 'completed':
             raise ValueError("Отзыв можно оставить только к завершенному заказу")
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Прежние значения читаются под блокировкой строки: параллельное
+            # изменение того же отзыва ждет и считает приращение от нашего результата
+            previous = None
+            if self.pk:
+                previous = (
+                    Review.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values('recipient_id', 'rating')
+                    .first()
+                )
+            super().save(*args, **kwargs)
+            # Обновляем рейтинг креатора
+            self.update_creator_rating(previous)
+    
+    def update_creator_rating(self, previous=None):
+        """
+        Обновляет счетчики отзывов и рейтинг креатора приращениями (users.stats).
         
-        # Обновляем рейтинг креатора
-        self.update_creator_rating()
-    
-    def update_creator_rating(self):
-        """Обновляет рейтинг креатора на основании всех отзывов."""
-        recipient = self.recipient
-        if hasattr(recipient, 'creator_profile'):
-            creator_profile = recipient.creator_profile
-            reviews = Review.objects.filter(recipient=recipient)
-            avg_rating = reviews.aggregate(models.Avg('rating'))['rating__avg'] or 0
-            creator_profile.rating = avg_rating
-            creator_profile.save(update_fields=['rating'])
-            return avg_rating
-        return None
+        Args:
+            previous: Прежние recipient_id и rating, если отзыв уже был сохранен.
+        """
+        if previous is None:
+            apply_review_delta(self.recipient_id, self.rating, 1)
+        elif previous['recipient_id'] != self.recipient_id:
+            apply_review_delta(previous['recipient_id'], -previous['rating'], -1)
+            apply_review_delta(self.recipient_id, self.rating, 1)
+        else:
+            apply_review_delta(self.recipient_id, self.rating - previous['rating'], 0)
     
     @property
     def is_positive(self):
@@ -0,0 +1,137 @@
+"""
+Полнотекстовый поиск по заказам.
+
+Поисковый документ заказа (Order.search_vector) собирается из заголовка,
+описания и названий тегов в конфигурациях russian и english и хранится
+в колонке tsvector с GIN-индексом. Документ обновляется сигналами
+(см. orders.signals) при сохранении заказа, изменении его тегов
+и переименовании тега.
+
+На базах, отличных от PostgreSQL (локальная разработка на SQLite),
+поиск выполняется по вхождению подстроки в заголовок и описание.
+"""
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, FloatField, OuterRef, Q, Subquery, TextField, Value
+from django.db.models.functions import Cast, Coalesce
+from rest_framework.filters import BaseFilterBackend
+
+from core.models import Tag
+
+from .models import Order
+
+SEARCH_CONFIGS = ('russian', 'english')
+SEARCH_PARAMS = ('q', 'search')
+
+# Веса частей документа: заголовок важнее описания, описание важнее тегов
+TITLE_WEIGHT = 'A'
+DESCRIPTION_WEIGHT = 'B'
+TAGS_WEIGHT = 'C'
+
+
+def is_search_supported():
+    """Полнотекстовый поиск доступен только на PostgreSQL."""
+    return connection.vendor == 'postgresql'
+
+
+def tags_text_expression():
+    """Названия тегов заказа через пробел (коррелированный подзапрос)."""
+    names = (
+        Tag.objects.filter(orders=OuterRef('pk'))
+        .order_by()
+        .values('orders')
+        .annotate(names=StringAgg('name', delimiter=' ', ordering='name'))
+        .values('names')
+    )
+    return Coalesce(Subquery(names), Value(''), output_field=TextField())
+
+
+def build_search_vector():
+    """Выражение tsvector для заказа: заголовок, описание и теги в обеих конфигурациях."""
+    tags_text = tags_text_expression()
+    vector = None
+    for config in SEARCH_CONFIGS:
+        part = (
+            SearchVector('title', weight=TITLE_WEIGHT, config=config)
+            + SearchVector('description', weight=DESCRIPTION_WEIGHT, config=config)
+            + SearchVector(tags_text, weight=TAGS_WEIGHT, config=config)
+        )
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def update_search_vectors(queryset):
+    """
+    Пересчитывает поисковые документы заказов из queryset одним UPDATE.
+
+    Сигналы не вызываются, updated_at не меняется.
+    """
+    if not is_search_supported():
+        return 0
+    return queryset.update(search_vector=build_search_vector())
+
+
+def update_order_search_vector(order_id):
+    """Пересчитывает поисковый документ одного заказа."""
+    return update_search_vectors(Order.objects.filter(pk=order_id))
+
+
+def update_search_vectors_for_tag(tag_id):
+    """Пересчитывает документы всех заказов с тегом (после переименования тега)."""
+    return update_search_vectors(Order.objects.filter(tags=tag_id))
+
+
+def build_search_query(text):
+    """Запрос для обеих конфигураций в синтаксисе websearch (кавычки, OR, минус)."""
+    query = None
+    for config in SEARCH_CONFIGS:
+        part = SearchQuery(text, config=config, search_type='websearch')
+        query = part if query is None else query | part
+    return query
+
+
+class OrderSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск заказов по параметру `q` (`search` — для совместимости).
+
+    Результаты сортируются по релевантности (затем по дате и id), если явно
+    не передан параметр ordering. Фильтр должен стоять после OrderingFilter.
+    """
+
+    ordering_param = 'ordering'
+
+    def get_search_text(self, request):
+        for param in SEARCH_PARAMS:
+            value = request.query_params.get(param, '').strip()
+            if value:
+                return value
+        return ''
+
+    def filter_queryset(self, request, queryset, view):
+        text = self.get_search_text(request)
+        if not text:
+            return queryset
+
+        if not is_search_supported():
+            return queryset.filter(Q(title__icontains=text) | Q(description__icontains=text))
+
+        query = build_search_query(text)
+        # double precision вместо real: ранг точно восстанавливается из курсора
+        queryset = queryset.filter(search_vector=query).annotate(
+            search_rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+        )
+        if not request.query_params.get(self.ordering_param):
+            # id — уникальный хвост ключа: стабильный порядок страниц и курсорный режим
+            queryset = queryset.order_by('-search_rank', '-created_at', '-id')
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': 'q',
+            'required': False,
+            'in': 'query',
+            'description': 'Полнотекстовый поиск по заголовку, описанию и тегам',
+            'schema': {'type': 'string'},
+        }]
@@ -9,6 +9,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from users.serializers import UserSerializer, ServiceSerializer
 from core import models as core_models  # Импортируем модели из приложения core
+from core.media import signed_download_url
 from .models import (
     Category, Order, OrderAttachment,  # Удален Tag, так как теперь он в core.models
     OrderResponse, Delivery, DeliveryFile, Review
@@ -49,14 +50,27 @@ class OrderAttachmentSerializer(serializers.ModelSerializer):
     Сериализатор для модели OrderAttachment.
     """
     uploaded_by = UserSerializer(read_only=True)
+    download_url = serializers.SerializerMethodField()
     
     class Meta:
         model = OrderAttachment
         fields = [
             'id', 'file', 'file_name', 'file_type',
-            'description', 'uploaded_by', 'created_at'
+            'description', 'uploaded_by', 'created_at', 'download_url'
         ]
         read_only_fields = ['file_name', 'file_type', 'uploaded_by', 'created_at']
+    
+    def get_download_url(self, obj):
+        """Подписанная ссылка на отдачу файла с поддержкой Range."""
+        return signed_download_url(
+            self.context.get('request'), 'order-attachment-download', 'order-attachment', obj.pk
+        )
+    
+    def to_representation(self, instance):
+        # Вместо пути /media/ (не отдается напрямую) — подписанная ссылка
+        data = super().to_representation(instance)
+        data['file'] = data['download_url'] if instance.file else None
+        return data
 
 
 class OrderResponseSerializer(serializers.ModelSerializer):
@@ -83,10 +97,24 @@ class DeliveryFileSerializer(serializers.ModelSerializer):
     """
     Сериализатор для модели DeliveryFile.
     """
+    download_url = serializers.SerializerMethodField()
+    
     class Meta:
         model = DeliveryFile
-        fields = ['id', 'file', 'file_name', 'file_type', 'created_at']
+        fields = ['id', 'file', 'file_name', 'file_type', 'created_at', 'download_url']
         read_only_fields = ['file_name', 'file_type', 'created_at']
+    
+    def get_download_url(self, obj):
+        """Подписанная ссылка на отдачу файла с поддержкой Range."""
+        return signed_download_url(
+            self.context.get('request'), 'delivery-file-download', 'delivery-file', obj.pk
+        )
+    
+    def to_representation(self, instance):
+        # Вместо пути /media/ (не отдается напрямую) — подписанная ссылка
+        data = super().to_representation(instance)
+        data['file'] = data['download_url'] if instance.file else None
+        return data
 
 
 class DeliverySerializer(serializers.ModelSerializer):
@@ -163,7 +191,7 @@ class OrderListSerializer(serializers.ModelSerializer):
     client = UserSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
-    responses_count = serializers.SerializerMethodField()
+    responses_count = serializers.IntegerField(read_only=True)
     days_left = serializers.IntegerField(read_only=True)
     is_overdue = serializers.BooleanField(read_only=True)
     target_creator = UserSerializer(read_only=True)
@@ -181,9 +209,18 @@ class OrderListSerializer(serializers.ModelSerializer):
             'can_view', 'can_respond'
         ]
     
-    def get_responses_count(self, obj):
-        """Возвращает количество откликов на заказ."""
-        return obj.responses.count()
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Подгружает все, что затрагивает сериализатор, фиксированным числом запросов.
+
+        UserSerializer обращается к creator_profile и client_profile пользователя,
+        поэтому они загружаются вместе с client, target_creator и creator.
+        """
+        user_relations = []
+        for field in ('client', 'target_creator', 'creator'):
+            user_relations.extend([field, f'{field}__creator_profile', f'{field}__client_profile'])
+        return queryset.select_related(*user_relations).prefetch_related('tags')
     
     def get_can_view(self, obj):
         """Проверяет, может ли текущий пользователь просматривать заказ."""
@@ -0,0 +1,97 @@
+"""
+Обработчики сигналов приложения orders.
+
+Поддерживают поисковый документ заказа (Order.search_vector) в актуальном
+состоянии: при сохранении заказа, изменении его тегов и переименовании тега.
+Ведут счетчик откликов заказа (Order.responses_count) и уменьшают счетчики
+отзывов креатора при удалении отзыва (users.stats; добавление и изменение
+учитывает Review.save).
+"""
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from core.models import Tag
+from users.stats import apply_review_delta
+
+from .models import Order, OrderResponse, Review
+from .search import update_order_search_vector, update_search_vectors, update_search_vectors_for_tag
+
+
+@receiver(post_save, sender=Order)
+def update_order_search_document(sender, instance, update_fields=None, **kwargs):
+    """Пересчитывает поисковый документ после сохранения заказа."""
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+    order_id = instance.pk
+    transaction.on_commit(lambda: update_order_search_vector(order_id))
+
+
+@receiver(m2m_changed, sender=Order.tags.through)
+def update_order_search_document_on_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """Пересчитывает поисковый документ при изменении тегов заказа."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            order_id = instance.pk
+            transaction.on_commit(lambda: update_order_search_vector(order_id))
+        return
+
+    # Изменение со стороны тега: tag.orders.add(...) / tag.orders.clear()
+    if action == 'pre_clear':
+        instance._cleared_order_ids = list(instance.orders.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        order_ids = getattr(instance, '_cleared_order_ids', [])
+    elif action in ('post_add', 'post_remove'):
+        order_ids = list(pk_set or ())
+    else:
+        return
+    if order_ids:
+        transaction.on_commit(lambda: update_search_vectors(Order.objects.filter(pk__in=order_ids)))
+
+
+@receiver(post_save, sender=Tag)
+def update_orders_search_document_on_tag_rename(sender, instance, created, **kwargs):
+    """Пересчитывает документы заказов с тегом после его переименования (см. core.signals)."""
+    if created or getattr(instance, '_previous_name', instance.name) == instance.name:
+        return
+    tag_id = instance.pk
+    transaction.on_commit(lambda: update_search_vectors_for_tag(tag_id))
+
+
+@receiver(post_save, sender=OrderResponse)
+def increment_responses_count(sender, instance, created, **kwargs):
+    """Увеличивает счетчик откликов в той же транзакции, что и создание отклика."""
+    if created:
+        Order.objects.filter(pk=instance.order_id).update(responses_count=F('responses_count') + 1)
+
+
+@receiver(post_delete, sender=OrderResponse)
+def decrement_responses_count(sender, instance, **kwargs):
+    """Уменьшает счетчик откликов в той же транзакции, что и удаление отклика."""
+    Order.objects.filter(pk=instance.order_id).update(
+        responses_count=Greatest(F('responses_count') - 1, 0)
+    )
+
+
+@receiver(pre_delete, sender=Review)
+def lock_deleted_review(sender, instance, **kwargs):
+    """Блокирует строку удаляемого отзыва и запоминает его сохраненные получателя и оценку."""
+    instance._stored_review = (
+        Review.objects.select_for_update()
+        .filter(pk=instance.pk)
+        .values('recipient_id', 'rating')
+        .first()
+    )
+
+
+@receiver(post_delete, sender=Review)
+def decrement_creator_reviews(sender, instance, **kwargs):
+    """Вычитает удаленный отзыв из рейтинга креатора в той же транзакции."""
+    stored = getattr(instance, '_stored_review', None)
+    if stored is None:
+        stored = {'recipient_id': instance.recipient_id, 'rating': instance.rating}
+    apply_review_delta(stored['recipient_id'], -stored['rating'], -1)
@@ -1,3 +1,285 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.models import Tag
+from core.media import serve_public_media
+from core.pagination import StandardPagination
+from users.models import CreatorProfile
+from users.stats import recompute_stats
+
+from .models import Order, OrderAttachment, OrderResponse, Review
+
+User = get_user_model()
+
+
+class OrderListQueryCountTests(TestCase):
+    """Списки заказов выполняют одно и то же число запросов при любом размере страницы."""
+
+    ORDERS = 25
+    # Запросы списка: COUNT, страница (с пользователями и их профилями), теги
+    EXPECTED_QUERIES = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user(
+            username='list_client', email='list_client@example.com', password='x', is_verified=True,
+        )
+        cls.creator = User.objects.create_user(
+            username='list_creator', email='list_creator@example.com', password='x', is_verified=True,
+        )
+        responders = [
+            User.objects.create_user(
+                username=f'list_responder_{i}', email=f'list_responder_{i}@example.com', password='x',
+            )
+            for i in range(2)
+        ]
+        tags = [Tag.objects.create(name=f'Тег {i}', slug=f'list-tag-{i}') for i in range(3)]
+
+        for i in range(cls.ORDERS):
+            order = Order.objects.create(
+                title=f'Заказ {i}',
+                description='Описание',
+                client=cls.client_user,
+                budget=Decimal('1000.00'),
+                deadline=date.today() + timedelta(days=30),
+                status='published',
+                creator=cls.creator,
+                target_creator=cls.creator,
+            )
+            order.tags.set(tags[:1 + i % len(tags)])
+            for responder in responders:
+                OrderResponse.objects.create(
+                    order=order, creator=responder, message='Отклик', price=Decimal('900.00'), timeframe=5,
+                )
+
+    def setUp(self):
+        self.api = APIClient()
+
+    def _get(self, user, url, page_size):
+        self.api.force_authenticate(user)
+        with mock.patch.object(StandardPagination, 'page_size', page_size):
+            with self.assertNumQueries(self.EXPECTED_QUERIES):
+                response = self.api.get(url, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), page_size)
+        return response
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        endpoints = [
+            (self.client_user, '/api/orders/'),
+            (self.client_user, '/api/orders/my-orders/'),
+            (self.creator, '/api/orders/my_created_orders/'),
+        ]
+        for user, url in endpoints:
+            for page_size in (5, 20):
+                with self.subTest(url=url, page_size=page_size):
+                    self._get(user, url, page_size)
+
+    def test_list_serializes_denormalized_responses_count(self):
+        response = self._get(self.client_user, '/api/orders/my-orders/', 5)
+        self.assertTrue(all(item['responses_count'] == 2 for item in response.data['results']))
+
+
+class OrderResponsesCountTests(TestCase):
+    """Order.responses_count следует за созданием и удалением откликов."""
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(
+            username='count_client', email='count_client@example.com', password='x',
+        )
+        self.creators = [
+            User.objects.create_user(username=f'count_creator_{i}', email=f'count_creator_{i}@example.com', password='x')
+            for i in range(2)
+        ]
+        self.order = Order.objects.create(
+            title='Заказ',
+            description='Описание',
+            client=self.client_user,
+            budget=Decimal('1000.00'),
+            deadline=date.today() + timedelta(days=30),
+            status='published',
+        )
+
+    def _create_response(self, creator):
+        return OrderResponse.objects.create(
+            order=self.order, creator=creator, message='Отклик', price=Decimal('900.00'), timeframe=5,
+        )
+
+    def _count(self):
+        self.order.refresh_from_db(fields=['responses_count'])
+        return self.order.responses_count
+
+    def test_create_and_delete_update_counter(self):
+        first = self._create_response(self.creators[0])
+        self._create_response(self.creators[1])
+        self.assertEqual(self._count(), 2)
+
+        first.status = 'accepted'
+        first.save()
+        self.assertEqual(self._count(), 2)
+
+        first.delete()
+        self.assertEqual(self._count(), 1)
+        self.assertEqual(self._count(), self.order.responses.count())
+
+
+class OrderAttachmentAccessTests(TestCase):
+    """Отдача приложений заказа: подпись и доступ проверяются до поиска файла."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root, MEDIA_ACCEL_REDIRECT_PREFIX='')
+        cls.media_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(
+            username='file_client', email='file_client@example.com', password='x',
+        )
+        self.outsider = User.objects.create_user(
+            username='file_outsider', email='file_outsider@example.com', password='x',
+        )
+        order = Order.objects.create(
+            title='Заказ',
+            description='Описание',
+            client=self.client_user,
+            budget=Decimal('1000.00'),
+            deadline=date.today() + timedelta(days=30),
+        )
+        self.attachment = OrderAttachment.objects.create(
+            order=order,
+            file=SimpleUploadedFile('brief.txt', b'brief'),
+            file_name='brief.txt',
+            file_type='text/plain',
+            uploaded_by=self.client_user,
+        )
+        self.api = APIClient()
+
+    def _url(self, pk):
+        return f'/api/order-attachments/{pk}/download/'
+
+    def _status(self, url, user=None):
+        self.api.force_authenticate(user)
+        return self.api.get(url, HTTP_HOST='localhost').status_code
+
+    def test_missing_and_forbidden_look_the_same(self):
+        missing = self._url(self.attachment.pk + 1000)
+        existing = self._url(self.attachment.pk)
+        self.assertEqual(self._status(existing), 401)
+        self.assertEqual(self._status(missing), 401)
+        self.assertEqual(self._status(existing, self.outsider), 404)
+        self.assertEqual(self._status(missing, self.outsider), 404)
+        self.assertEqual(self._status(existing, self.client_user), 200)
+
+    def test_serialized_file_is_signed_link(self):
+        self.api.force_authenticate(self.client_user)
+        response = self.api.get(f'/api/order-attachments/{self.attachment.pk}/', HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['file'], response.data['download_url'])
+        self.assertNotIn('/media/', response.data['file'])
+        # Подписанная ссылка открывается без аутентификации
+        self.assertEqual(self._status(response.data['file'].replace('http://localhost', '')), 200)
+
+    def test_debug_media_route_normalizes_path(self):
+        name = self.attachment.file.name
+        public = default_storage.save('avatars/public.txt', ContentFile(b'public'))
+        request = RequestFactory().get('/media/')
+        self.assertEqual(serve_public_media(request, public, document_root=self.media_root).status_code, 200)
+        # Варианты пути, которые django.views.static.serve сводит к тому же файлу
+        for path in (name, f'/{name}', f'./{name}', f'x/../{name}'):
+            with self.subTest(path=path), self.assertRaises(Http404):
+                serve_public_media(request, path, document_root=self.media_root)
+
+
+class ReviewRatingStatsTests(TestCase):
+    """Приращения рейтинга креатора совпадают с полным пересчетом recompute_stats."""
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(
+            username='rating_client', email='rating_client@example.com', password='x',
+        )
+        self.creators = [
+            User.objects.create_user(username=f'rating_creator_{i}', email=f'rating_creator_{i}@example.com', password='x')
+            for i in range(2)
+        ]
+        self.profiles = [
+            CreatorProfile.objects.create(user=creator, specialization='Видео', experience='3 года')
+            for creator in self.creators
+        ]
+        self.orders = [
+            Order.objects.create(
+                title=f'Заказ {i}',
+                description='Описание',
+                client=self.client_user,
+                budget=Decimal('1000.00'),
+                deadline=date.today() + timedelta(days=30),
+                status='completed',
+            )
+            for i in range(2)
+        ]
+
+    def _review(self, order, recipient, rating):
+        return Review.objects.create(order=order, author=self.client_user, recipient=recipient, rating=rating)
+
+    def _stats(self):
+        return [
+            (profile.reviews_count, profile.rating_sum, profile.rating)
+            for profile in CreatorProfile.objects.filter(pk__in=[p.pk for p in self.profiles]).order_by('pk')
+        ]
+
+    def _assert_stats(self, expected):
+        self.assertEqual(self._stats(), expected)
+        recompute_stats()
+        self.assertEqual(self._stats(), expected)
+
+    def test_create_edit_move_and_delete(self):
+        first = self._review(self.orders[0], self.creators[0], 5)
+        self._review(self.orders[1], self.creators[0], 2)
+        self._assert_stats([(2, 7, Decimal('3.50')), (0, 0, Decimal('0.00'))])
+
+        first.rating = 3
+        first.save()
+        self._assert_stats([(2, 5, Decimal('2.50')), (0, 0, Decimal('0.00'))])
+
+        first.recipient = self.creators[1]
+        first.save()
+        self._assert_stats([(1, 2, Decimal('2.00')), (1, 3, Decimal('3.00'))])
+
+        first.delete()
+        self._assert_stats([(1, 2, Decimal('2.00')), (0, 0, Decimal('0.00'))])
+
+    def test_stale_instance_applies_delta_from_stored_row(self):
+        review = self._review(self.orders[0], self.creators[0], 5)
+        stale = Review.objects.get(pk=review.pk)
+        review.rating = 1
+        review.save()
+
+        stale.rating = 4
+        with CaptureQueriesContext(connection) as queries:
+            stale.save()
+        self.assertTrue(any('FOR UPDATE' in query['sql'] for query in queries.captured_queries))
+        self._assert_stats([(1, 4, Decimal('4.00')), (0, 0, Decimal('0.00'))])
+
+        # Удаление устаревшего экземпляра вычитает сохраненную оценку, а не оценку в памяти
+        review.delete()
+        self._assert_stats([(0, 0, Decimal('0.00')), (0, 0, Decimal('0.00'))])
@@ -9,7 +9,8 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     CategoryViewSet, TagViewSet, OrderViewSet,
     OrderAttachmentViewSet, OrderResponseViewSet,
-    DeliveryViewSet, ReviewViewSet
+    DeliveryViewSet, ReviewViewSet,
+    OrderAttachmentDownloadView, DeliveryFileDownloadView
 )
 
 # Создаем роутер для API
@@ -24,4 +25,7 @@ router.register('reviews', ReviewViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    # Отдача файлов с проверкой доступа и поддержкой Range (core.media)
+    path('order-attachments/<int:pk>/download/', OrderAttachmentDownloadView.as_view(), name='order-attachment-download'),
+    path('delivery-files/<int:pk>/download/', DeliveryFileDownloadView.as_view(), name='delivery-file-download'),
 ]
\ No newline at end of file
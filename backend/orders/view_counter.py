@@ -0,0 +1,199 @@
+"""
+Отложенный (write-behind) счетчик просмотров заказов.
+
+Просмотр заказа не обновляет строку orders_order сразу: приращения
+накапливаются в памяти воркера и раз в ORDER_VIEWS_FLUSH_INTERVAL секунд
+записываются одним запросом
+
+    UPDATE orders_order SET views_count = views_count + v.delta
+    FROM (VALUES (...), ...) AS v(id, delta) WHERE orders_order.id = v.id
+
+Так популярный заказ не держит блокировку строки на каждом просмотре,
+а число UPDATE не зависит от числа просмотров. Значение views_count
+в ответах отстает не более чем на интервал сброса.
+
+Повторные просмотры одного пользователя в пределах ORDER_VIEWS_DEDUPE_WINDOW
+секунд не учитываются; отметки о просмотрах хранятся в Django cache.
+Дедупликация между воркерами требует общего кэша (REDIS_URL): с кэшем в
+памяти процесса (LocMemCache) отметки у каждого воркера свои, и просмотр
+одного пользователя учитывается один раз в каждом воркере.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+DEDUPE_KEY = 'orders:view:{order_id}:{user_id}'
+# Сколько строк передается в одном VALUES
+FLUSH_CHUNK_SIZE = 1000
+
+
+class OrderViewCounter:
+    """
+    Буфер приращений views_count с периодическим пакетным сбросом в базу.
+
+    Args:
+        flush_interval: Период сброса в секундах; 0 — писать каждый просмотр сразу.
+        dedupe_window: Окно дедупликации просмотров пользователя в секундах; 0 — выключено.
+        max_pending: Количество разных заказов в буфере, при котором сброс
+            выполняется досрочно.
+    """
+
+    def __init__(self, flush_interval=10.0, dedupe_window=0, max_pending=5000):
+        self.flush_interval = max(float(flush_interval), 0.0)
+        self.dedupe_window = max(int(dedupe_window), 0)
+        self.max_pending = max(int(max_pending), 1)
+
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------
+    # Публичный API
+    # ------------------------------------------------------------------
+    def record(self, order_id, user_id=None):
+        """
+        Учитывает просмотр заказа.
+
+        Returns:
+            bool: True, если просмотр засчитан (не отброшен дедупликацией).
+        """
+        if self.dedupe_window and user_id is not None:
+            key = DEDUPE_KEY.format(order_id=order_id, user_id=user_id)
+            # add атомарен: засчитывает только первый просмотр в окне
+            if not cache.add(key, 1, timeout=self.dedupe_window):
+                return False
+
+        if self._closed or not self.flush_interval:
+            self._write({order_id: 1})
+            return True
+
+        self._ensure_worker()
+        with self._lock:
+            self._pending[order_id] += 1
+            overflow = len(self._pending) >= self.max_pending
+        if overflow:
+            self._wakeup.set()
+        return True
+
+    def flush(self):
+        """
+        Записывает накопленные приращения в базу.
+
+        Returns:
+            int: Количество обновленных заказов.
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, Counter()
+
+        try:
+            return self._write(batch)
+        except Exception:
+            # Не теряем просмотры: вернем их в буфер до следующего сброса
+            logger.exception('Не удалось записать счетчики просмотров (%s заказов)', len(batch))
+            with self._lock:
+                self._pending.update(batch)
+            return 0
+
+    def close(self):
+        """Останавливает фоновый поток и записывает остаток буфера."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            self._thread.join(self.flush_interval + 5)
+        if self._pid == os.getpid():
+            self.flush()
+
+    @property
+    def pending(self):
+        """Количество просмотров, ожидающих записи."""
+        with self._lock:
+            return sum(self._pending.values())
+
+    # ------------------------------------------------------------------
+    # Фоновый поток
+    # ------------------------------------------------------------------
+    def _ensure_worker(self):
+        """Запускает фоновый поток (в том числе заново после fork воркера)."""
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == pid and self._thread.is_alive():
+                return
+            if self._pid != pid:
+                # Буфер родителя после fork принадлежит родителю
+                with self._lock:
+                    self._pending = Counter()
+            self._pid = pid
+            self._thread = threading.Thread(
+                target=self._run,
+                name='ugc-order-views',
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                # Соединение потока не должно висеть между сбросами
+                connection.close()
+
+    def _write(self, batch):
+        """Прибавляет приращения {order_id: delta} к views_count."""
+        items = [(order_id, delta) for order_id, delta in batch.items() if delta]
+        if not items:
+            return 0
+
+        if connection.vendor != 'postgresql':
+            with transaction.atomic():
+                for order_id, delta in items:
+                    Order.objects.filter(pk=order_id).update(views_count=F('views_count') + delta)
+            return len(items)
+
+        table = connection.ops.quote_name(Order._meta.db_table)
+        # Сортировка по id задает одинаковый порядок блокировок во всех воркерах
+        items.sort()
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(items), FLUSH_CHUNK_SIZE):
+                chunk = items[start:start + FLUSH_CHUNK_SIZE]
+                values = ', '.join(['(%s::bigint, %s::integer)'] * len(chunk))
+                params = [value for item in chunk for value in item]
+                cursor.execute(
+                    f'UPDATE {table} AS o SET views_count = o.views_count + v.delta '
+                    f'FROM (VALUES {values}) AS v(id, delta) WHERE o.id = v.id',
+                    params,
+                )
+        return len(items)
+
+
+view_counter = OrderViewCounter(
+    flush_interval=getattr(settings, 'ORDER_VIEWS_FLUSH_INTERVAL', 10.0),
+    dedupe_window=getattr(settings, 'ORDER_VIEWS_DEDUPE_WINDOW', 0),
+    max_pending=getattr(settings, 'ORDER_VIEWS_MAX_PENDING', 5000),
+)
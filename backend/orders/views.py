@@ -10,13 +10,15 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import F, Q
 from django.utils import timezone
+from django.shortcuts import get_object_or_404
 
-# Импортируем модели Chat и Message для создания чата при отклике
-from chats.models import Chat, Message, SystemMessageTemplate
+# Чат пары клиент-креатор и системные сообщения при откликах на заказ
+from chats.lookup import get_or_create_chat
+from chats.models import Message, SystemMessageTemplate
 
 from .models import (
     Category, Tag, Order, OrderAttachment, 
-    OrderResponse, Delivery, Review
+    OrderResponse, Delivery, DeliveryFile, Review
 )
 from .serializers import (
     CategorySerializer, TagSerializer,
@@ -29,6 +31,11 @@ from .permissions import (
     IsOrderParticipant, IsReviewAuthor
 )
 from .filters import OrderFilter
+from .search import OrderSearchFilter
+from .view_counter import view_counter
+from core.media import ProtectedFileView
+from core.tag_catalog import get_catalog, normalize_tag_type, not_modified_response, apply_validators
+from core import tag_index
 
 # Получаем модель пользователя динамически, чтобы не допустить циклических импортов
 from django.contrib.auth import get_user_model
@@ -85,6 +92,37 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
             
         return queryset
 
+    # Параметры, при которых список отдается из кэша каталога тегов
+    CATALOG_QUERY_PARAMS = {'type', 'page', 'format'}
+
+    def list(self, request, *args, **kwargs):
+        """
+        Список тегов.
+
+        Без поиска и фильтров (кроме type) теги берутся из кэша каталога
+        (core.tag_catalog) без обращения к базе; ответ содержит ETag и
+        Last-Modified, при неизменном содержимом возвращается 304.
+        """
+        tag_type = request.query_params.get('type') or Tag.TAG_TYPE_CREATOR
+        if set(request.query_params) - self.CATALOG_QUERY_PARAMS or not normalize_tag_type(tag_type):
+            return super().list(request, *args, **kwargs)
+
+        snapshot = get_catalog(tag_type)
+        page_number = request.query_params.get(self.paginator.page_query_param, '1') if self.paginator else ''
+        etag = snapshot.etag_for(f'-p{page_number}')
+        not_modified = not_modified_response(request, etag, snapshot.last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        fields = TagSerializer.Meta.fields
+        rows = [{field: row[field] for field in fields} for row in snapshot.rows]
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            response = self.get_paginated_response(page)
+        else:
+            response = Response(rows)
+        return apply_validators(response, etag, snapshot.last_modified)
+
 
 class OrderViewSet(viewsets.ModelViewSet):
     """
@@ -96,11 +134,16 @@ class OrderViewSet(viewsets.ModelViewSet):
 
     queryset = Order.objects.all()
     permission_classes = [permissions.IsAuthenticated, IsClientOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # OrderSearchFilter стоит после OrderingFilter: без ?ordering сортирует по релевантности
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, OrderSearchFilter]
     filterset_class = OrderFilter
-    search_fields = ['title', 'description', 'category__name', 'tags__name']
     ordering_fields = ['created_at', 'deadline', 'budget']
     ordering = ['-created_at']
+    # Ключ курсорной пагинации (?cursor=...), индексы order_*_created_id_idx
+    cursor_ordering = ('-created_at', '-id')
+    
+    # Действия, которые отдают список заказов через OrderListSerializer
+    LIST_ACTIONS = ('list', 'my_orders', 'my_created_orders')
     
     def get_queryset(self):
         """
@@ -108,6 +151,10 @@ class OrderViewSet(viewsets.ModelViewSet):
         """
         queryset = super().get_queryset()
         
+        # Для списков подгружаем связанные объекты, которые выводит OrderListSerializer
+        if self.action in self.LIST_ACTIONS:
+            queryset = OrderListSerializer.setup_eager_loading(queryset)
+        
         # Фильтр по статусу опубликованный для неавторизованных пользователей
         if not self.request.user.is_authenticated:
             return queryset.filter(status='published', is_private=False)
@@ -121,8 +168,8 @@ class OrderViewSet(viewsets.ModelViewSet):
             # Возвращаем только заказы, где пользователь является исполнителем
             return queryset.filter(target_creator=self.request.user)
         
-        # Для списка показываем только доступные заказы со статусом "Новый" (published)
-        if self.action == 'list':
+        # Для списка (и его фасетов) показываем только доступные заказы со статусом "Новый" (published)
+        if self.action in ('list', 'tag_facets'):
             user = self.request.user
             
             # Для стаффа показываем все заказы со статусом published
@@ -145,7 +192,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         """
         Возвращает соответствующий сериализатор в зависимости от действия.
         """
-        if self.action in ['list', 'my_orders', 'my_created_orders']:
+        if self.action in self.LIST_ACTIONS:
             return OrderListSerializer
         elif self.action == 'create':
             return OrderCreateSerializer
@@ -168,7 +215,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         
         # Увеличиваем счетчик просмотров, если пользователь не является клиентом или исполнителем
         if user.is_authenticated and user != order.client and user != order.target_creator:
-            Order.objects.filter(id=order.id).update(views_count=F('views_count') + 1)
+            view_counter.record(order.id, user.id)
         
         # Возвращаем ответ с деталями заказа
         return super().retrieve(request, *args, **kwargs)
@@ -192,7 +239,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         Возвращает список заказов текущего пользователя в роли клиента.
         Доступно по URL: /api/orders/my-orders/
         """
-        queryset = Order.objects.filter(client=request.user)
+        queryset = OrderListSerializer.setup_eager_loading(Order.objects.filter(client=request.user))
         
         # Применяем фильтрацию
         queryset = self.filter_queryset(queryset)
@@ -204,6 +251,16 @@ class OrderViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'], url_path='tag-facets')
+    def tag_facets(self, request):
+        """
+        Фасеты тегов ленты заказов: сколько заказов текущей выборки (те же
+        фильтры, что у списка) имеет каждый тег.
+        Доступно по URL: /api/orders/tag-facets/
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(tag_index.facets_data('orders', queryset))
+    
     @action(detail=False, methods=['get'])
     def my_created_orders(self, request):
         """
@@ -323,15 +380,11 @@ class OrderViewSet(viewsets.ModelViewSet):
             logger.info(f"ОТЛАДКА: начинаем создание чата для заказа {order.id}, клиент: {order.client.username}, креатор: {creator.username}")
             
             try:
-                # Создаем новый чат для этого заказа
-                # Каждый заказ должен иметь свой отдельный чат
-                chat = Chat.objects.create(
-                    client=order.client,
-                    creator=creator,
-                    order=order,
-                    is_active=True
-                )
-                chat_created = True
+                # У пары клиент-креатор один чат: используем существующий или создаем новый
+                chat, chat_created = get_or_create_chat(order.client, creator)
+                if order.chat_id != chat.id:
+                    order.chat = chat
+                    order.save(update_fields=['chat'])
                 
                 logger.info(f"ОТЛАДКА: чат успешно создан для заказа {order.id}, chat_id={chat.id}")
             except Exception as chat_error:
@@ -461,11 +514,10 @@ class OrderViewSet(viewsets.ModelViewSet):
         # Создаем чат между клиентом и креатором, если его еще нет
         try:
             logger.info(f"Attempting to create chat for order {order.id} between client {order.client.id} and creator {user.id}")
-            chat, created = Chat.objects.get_or_create(
-                client=order.client,
-                creator=user,
-                order=order
-            )
+            chat, created = get_or_create_chat(order.client, user)
+            if order.chat_id != chat.id:
+                order.chat = chat
+                order.save(update_fields=['chat'])
             logger.info(f"Chat creation result: chat_id={chat.id}, created={created}")
             
             # Если был создан новый чат, добавляем первое системное сообщение
@@ -737,10 +789,8 @@ class OrderResponseViewSet(viewsets.ModelViewSet):
         creator = user
         
         # Проверяем, существует ли уже чат между клиентом и креатором
-        try:
-            # Ищем чат с этой парой клиент-креатор
-            chat = Chat.objects.get(client=client, creator=creator)
-            
+        chat, created = get_or_create_chat(client, creator)
+        if not created:
             # Если чат найден, но заказ не связан с чатом, добавляем связь
             if order.chat != chat:
                 # Связываем заказ с чатом
@@ -752,14 +802,8 @@ class OrderResponseViewSet(viewsets.ModelViewSet):
                     content=f'Креатор {creator.username} откликнулся на заказ "{order.title}".',
                     is_system_message=True
                 )
-        except Chat.DoesNotExist:
-            # Если чата не существует, создаем новый
-            chat = Chat.objects.create(
-                client=client,
-                creator=creator,
-                is_active=True
-            )
-            # Связываем заказ с чатом
+        else:
+            # Связываем заказ с новым чатом
             order.chat = chat
             order.save()
             
@@ -949,4 +993,51 @@ class ReviewViewSet(viewsets.ModelViewSet):
         serializer.save(
             author=self.request.user,
             recipient=order.target_creator
-        )
\ No newline at end of file
+        )
+
+
+class OrderAttachmentDownloadView(ProtectedFileView):
+    """
+    Отдача файла, приложенного к заказу (с поддержкой Range, см. core.media).
+    
+    Доступ: клиент и исполнитель заказа или подписанная ссылка download_url.
+    """
+    kind = 'order-attachment'
+    
+    def get_object(self):
+        return get_object_or_404(
+            OrderAttachment.objects.select_related('order'), pk=self.kwargs['pk']
+        )
+    
+    def has_access(self, user, obj):
+        return user.is_superuser or user.pk in (obj.order.client_id, obj.order.creator_id)
+    
+    def get_file(self, obj):
+        return obj.file
+    
+    def get_filename(self, obj):
+        return obj.file_name
+
+
+class DeliveryFileDownloadView(ProtectedFileView):
+    """
+    Отдача файла результата работы (с поддержкой Range, см. core.media).
+    
+    Доступ: клиент заказа и креатор, сдавший работу, или подписанная ссылка.
+    """
+    kind = 'delivery-file'
+    
+    def get_object(self):
+        return get_object_or_404(
+            DeliveryFile.objects.select_related('delivery__order'), pk=self.kwargs['pk']
+        )
+    
+    def has_access(self, user, obj):
+        delivery = obj.delivery
+        return user.is_superuser or user.pk in (delivery.order.client_id, delivery.creator_id)
+    
+    def get_file(self, obj):
+        return obj.file
+    
+    def get_filename(self, obj):
+        return obj.file_name
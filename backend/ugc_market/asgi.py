@@ -3,6 +3,9 @@ ASGI config for ugc_market project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+HTTP is served by Django, WebSocket connections (chat events) are routed
+by Channels with JWT authentication (see chats.routing, chats.middleware).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -13,4 +16,25 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ugc_market.settings')
 
-application = get_asgi_application()
+# Django должен быть инициализирован до импорта consumer'ов и моделей
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import OriginValidator  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+from chats.middleware import JWTAuthMiddleware  # noqa: E402
+from chats.routing import websocket_urlpatterns  # noqa: E402
+
+# Соединения принимаются с тех же origin, что и CORS-запросы к API
+allowed_origins = ['*'] if settings.CORS_ALLOW_ALL_ORIGINS else [
+    origin for origin in settings.CORS_ALLOWED_ORIGINS + settings.ALLOWED_HOSTS if origin
+]
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': OriginValidator(
+        JWTAuthMiddleware(URLRouter(websocket_urlpatterns)),
+        allowed_origins,
+    ),
+})
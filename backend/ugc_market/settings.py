@@ -42,6 +42,7 @@ USER_APPS = [
     'orders',
     'api',
     'chats',
+    'logging_system',
 ]
 
 SERVICE_APPS = [
@@ -55,12 +56,15 @@ SERVICE_APPS = [
 
 
 INSTALLED_APPS = [
+    # daphne должен идти первым: runserver обслуживает и WebSocket (ASGI)
+    'daphne',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ] + USER_APPS + SERVICE_APPS
 
 MIDDLEWARE = [
@@ -72,6 +76,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Диагностика SQL по запросу (logging_system.query_diagnostics); выключена по умолчанию
+    'logging_system.query_diagnostics.QueryDiagnosticsMiddleware',
 ]
 
 ROOT_URLCONF = 'ugc_market.urls'
@@ -92,6 +98,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'ugc_market.wsgi.application'
+ASGI_APPLICATION = 'ugc_market.asgi.application'
 
 
 # Database
@@ -108,6 +115,46 @@ DATABASES = {
     }
 }
 
+# Кэш: Redis (общий для всех воркеров), если задан REDIS_URL, иначе память процесса
+REDIS_URL = os.environ.get('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Версия каталога тегов (core.tag_catalog) в общем кэше хранится бессрочно.
+# В памяти процесса сдвиг версии не виден другим воркерам, поэтому без
+# REDIS_URL версия живет TAG_CATALOG_VERSION_TTL секунд: правки тегов доходят
+# до остальных воркеров не позже чем через это время (0 — бессрочно)
+TAG_CATALOG_VERSION_TTL = int(os.environ.get('TAG_CATALOG_VERSION_TTL', 0 if REDIS_URL else 60)) or None
+
+# Channel layer для WebSocket-событий чатов: Redis, если задан REDIS_URL
+# (нужен при нескольких процессах), иначе память процесса (разработка и тесты)
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [REDIS_URL],
+                'capacity': int(os.environ.get('CHANNEL_LAYER_CAPACITY', 1000)),
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -158,8 +205,10 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'  # Директория для сбора
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Увеличенные лимиты для загрузки файлов
-DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 20 MB (по умолчанию 2.5 MB)
-FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 20 MB (по умолчанию 2.5 MB)
+DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10 MB (по умолчанию 2.5 MB)
+# Файлы больше порога multipart-загрузки пишутся во временный файл, а не в память воркера.
+# Большие файлы загружаются порционно (/api/uploads/, core.uploads)
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5 MB (по умолчанию)
 
 # Настройка кастомной модели пользователя
 AUTH_USER_MODEL = 'users.User'
@@ -189,7 +238,8 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # ?page=N по умолчанию, ?cursor / ?pagination=cursor — курсорный режим (core.pagination)
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.StandardPagination',
     'PAGE_SIZE': 10
 }
 
@@ -250,3 +300,97 @@ LOGGING = {
     },
 }
 
+
+
+# Централизованная система логирования (logging_system)
+# Записи пишутся фоновым потоком пакетами в NDJSON-файлы
+LOGS_FLUSH_INTERVAL = float(os.environ.get('LOGS_FLUSH_INTERVAL', 1.0))  # секунды
+LOGS_MAX_BATCH_SIZE = int(os.environ.get('LOGS_MAX_BATCH_SIZE', 500))
+LOGS_QUEUE_SIZE = int(os.environ.get('LOGS_QUEUE_SIZE', 10000))
+
+# Прием логов от frontend: размер пакета и лимиты (записей в секунду / всплеск)
+LOGS_FRONTEND_MAX_BATCH = int(os.environ.get('LOGS_FRONTEND_MAX_BATCH', 100))
+LOGS_FRONTEND_MAX_MESSAGE_LENGTH = int(os.environ.get('LOGS_FRONTEND_MAX_MESSAGE_LENGTH', 4000))
+LOGS_FRONTEND_USER_RATE = float(os.environ.get('LOGS_FRONTEND_USER_RATE', 5))
+LOGS_FRONTEND_USER_BURST = int(os.environ.get('LOGS_FRONTEND_USER_BURST', 100))
+LOGS_FRONTEND_IP_RATE = float(os.environ.get('LOGS_FRONTEND_IP_RATE', 20))
+LOGS_FRONTEND_IP_BURST = int(os.environ.get('LOGS_FRONTEND_IP_BURST', 300))
+# Заголовок с IP клиента, который выставляет reverse proxy (пусто — REMOTE_ADDR).
+# Задается только за proxy, который перезаписывает заголовок (nginx из deploy.md:
+# HTTP_X_REAL_IP), иначе клиент подменяет IP и обходит лимит анонимного приема
+LOGS_CLIENT_IP_HEADER = os.environ.get('LOGS_CLIENT_IP_HEADER', '')
+
+# Индекс логов (SQLite рядом с файлами логов) для выборок get_user_logs
+LOGS_INDEX_ENABLED = os.environ.get('LOGS_INDEX_ENABLED', 'True') == 'True'
+LOGS_QUERY_MAX_DAYS = int(os.environ.get('LOGS_QUERY_MAX_DAYS', 31))
+LOGS_QUERY_MAX_LIMIT = int(os.environ.get('LOGS_QUERY_MAX_LIMIT', 500))
+
+# Компактизация и хранение логов (manage.py compact_logs или фоновый поток)
+# Интервал фонового обслуживания в секундах, 0 — выключено
+LOGS_COMPACTION_INTERVAL = int(os.environ.get('LOGS_COMPACTION_INTERVAL', 0))
+LOGS_COMPACTION_KEEP_DAYS = int(os.environ.get('LOGS_COMPACTION_KEEP_DAYS', 1))
+LOGS_RETENTION_DAYS = int(os.environ.get('LOGS_RETENTION_DAYS', 0)) or None
+LOGS_RETENTION_MAX_SIZE_MB = int(os.environ.get('LOGS_RETENTION_MAX_SIZE_MB', 0)) or None
+
+# Счетчик просмотров заказов: приращения копятся в памяти воркера и сбрасываются
+# в базу одним UPDATE раз в ORDER_VIEWS_FLUSH_INTERVAL секунд (0 — сразу)
+ORDER_VIEWS_FLUSH_INTERVAL = float(os.environ.get('ORDER_VIEWS_FLUSH_INTERVAL', 10.0))
+# Повторный просмотр заказа тем же пользователем в течение окна (сек.) не учитывается, 0 — выключено.
+# Между воркерами дедупликация работает только с общим кэшем (REDIS_URL)
+ORDER_VIEWS_DEDUPE_WINDOW = int(os.environ.get('ORDER_VIEWS_DEDUPE_WINDOW', 0))
+ORDER_VIEWS_MAX_PENDING = int(os.environ.get('ORDER_VIEWS_MAX_PENDING', 5000))
+
+# Максимальный размер окна синхронизации сообщений чата (?limit в /messages/sync/)
+CHAT_SYNC_MAX_LIMIT = int(os.environ.get('CHAT_SYNC_MAX_LIMIT', 200))
+
+# Порционная загрузка файлов (core.uploads). Временный каталог должен быть общим для воркеров
+CHUNKED_UPLOAD_TEMP_DIR = os.environ.get('CHUNKED_UPLOAD_TEMP_DIR', str(BASE_DIR / 'upload_sessions'))
+CHUNKED_UPLOAD_CHUNK_SIZE = int(os.environ.get('CHUNKED_UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024))
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = int(os.environ.get('CHUNKED_UPLOAD_MAX_CHUNK_SIZE', 16 * 1024 * 1024))
+CHUNKED_UPLOAD_MAX_SIZE = int(os.environ.get('CHUNKED_UPLOAD_MAX_SIZE', 2000 * 1024 * 1024))
+# Брошенные загрузки удаляются командой cleanup_uploads
+CHUNKED_UPLOAD_EXPIRE_HOURS = int(os.environ.get('CHUNKED_UPLOAD_EXPIRE_HOURS', 24))
+
+# Отдача защищенных файлов (core.media): префикс internal location nginx для
+# X-Accel-Redirect; пусто — файлы отдает Django (FileResponse с Range)
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX', '')
+# Время жизни подписанных ссылок на файлы (download_url, attachment_url), секунды
+MEDIA_SIGNED_URL_MAX_AGE = int(os.environ.get('MEDIA_SIGNED_URL_MAX_AGE', 6 * 3600))
+# Cache-Control для отдаваемых файлов: только кэш браузера
+MEDIA_CACHE_CONTROL = os.environ.get('MEDIA_CACHE_CONTROL', 'private, max-age=3600')
+
+# Уменьшенные копии изображений (users.image_variants): число потоков
+# генерации в процессе (0 — синхронно после коммита) и качество WebP/JPEG
+IMAGE_VARIANT_WORKERS = int(os.environ.get('IMAGE_VARIANT_WORKERS', 2))
+IMAGE_VARIANT_QUALITY = int(os.environ.get('IMAGE_VARIANT_QUALITY', 82))
+
+# Загрузка изображений профиля (users.image_uploads): предельный размер файла,
+# разрешение в пикселях и наибольшая сторона сохраняемого изображения
+PROFILE_IMAGE_MAX_UPLOAD_SIZE = int(os.environ.get('PROFILE_IMAGE_MAX_UPLOAD_SIZE', 10 * 1024 * 1024))
+PROFILE_IMAGE_MAX_PIXELS = int(os.environ.get('PROFILE_IMAGE_MAX_PIXELS', 40_000_000))
+PROFILE_IMAGE_MAX_SIDE = int(os.environ.get('PROFILE_IMAGE_MAX_SIDE', 2048))
+# Каталог копий загруженных изображений до их обработки в пуле
+PROFILE_IMAGE_SPOOL_DIR = os.environ.get('PROFILE_IMAGE_SPOOL_DIR', str(BASE_DIR / 'image_spool'))
+
+# Диагностика SQL (logging_system.query_diagnostics): сводка по каждому запросу
+# в логах (QUERY_DIAGNOSTICS) или только по запросам с заголовком
+# X-Query-Diagnostics: 1 от персонала (QUERY_DIAGNOSTICS_ALLOW_FLAG)
+QUERY_DIAGNOSTICS = os.environ.get('QUERY_DIAGNOSTICS', 'False').lower() == 'true'
+QUERY_DIAGNOSTICS_ALLOW_FLAG = os.environ.get('QUERY_DIAGNOSTICS_ALLOW_FLAG', 'True').lower() == 'true'
+# Сколько повторов одного SQL за запрос считать признаком N+1 (уровень WARNING)
+QUERY_DIAGNOSTICS_DUPLICATE_THRESHOLD = int(os.environ.get('QUERY_DIAGNOSTICS_DUPLICATE_THRESHOLD', 10))
+
+# Индекс тегов в памяти процесса (core.tag_index) для фильтров по тегам и фасетов
+TAG_INDEX_ENABLED = os.environ.get('TAG_INDEX_ENABLED', 'True').lower() == 'true'
+# Выборки больше этого числа id фильтруются в базе (EXISTS), а не через pk__in
+TAG_INDEX_MAX_IDS = int(os.environ.get('TAG_INDEX_MAX_IDS', 20000))
+# Журнал изменений индекса в общем кэше: другие процессы применяют до
+# TAG_INDEX_CHANGE_LOG_SIZE пропущенных изменений вместо перестройки индекса
+TAG_INDEX_CHANGE_LOG_SIZE = int(os.environ.get('TAG_INDEX_CHANGE_LOG_SIZE', 1000))
+TAG_INDEX_CHANGE_LOG_TTL = int(os.environ.get('TAG_INDEX_CHANGE_LOG_TTL', 3600))
+# Версия индекса в общем кэше хранится бессрочно. В памяти процесса сдвиг
+# версии не виден другим воркерам, поэтому без REDIS_URL версия живет
+# TAG_INDEX_VERSION_TTL секунд, после чего каждый воркер перестраивает индекс:
+# фильтры по тегам и фасеты отстают от правок в других воркерах не дольше
+# этого времени (0 — бессрочно)
+TAG_INDEX_VERSION_TTL = int(os.environ.get('TAG_INDEX_VERSION_TTL', 0 if REDIS_URL else 60)) or None
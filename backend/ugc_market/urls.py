@@ -19,11 +19,14 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.media import serve_public_media
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
 ]
 
-# Добавляем URL для медиа-файлов в режиме разработки
+# Добавляем URL для медиа-файлов в режиме разработки; защищенные файлы
+# (core.media.PROTECTED_MEDIA_PREFIXES) отдаются только через API
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += static(settings.MEDIA_URL, view=serve_public_media, document_root=settings.MEDIA_ROOT)
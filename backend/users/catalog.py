@@ -0,0 +1,177 @@
+"""
+Сортировки и диапазонные фильтры каталога креаторов.
+
+Каталог поддерживает только перечисленные здесь сортировки (параметр
+ordering) и диапазоны (min_price, max_price, min_rating, average_work_time).
+Каждая сортировка — ключ (поле, id) в одном направлении, и для каждого поля
+есть составной индекс (поле, id) в CreatorProfile.Meta.indexes; диапазоны
+ограничивают те же индексированные колонки. Поэтому любая комбинация
+сортировки и диапазонов читается по индексу, а курсорная пагинация
+(core.pagination, ?pagination=cursor) идет по ключу выбранной сортировки.
+
+Неизвестная сортировка или некорректное значение фильтра — ошибка 400,
+а не тихий возврат к сортировке по умолчанию. Поддерживаемые комбинации
+публикуются ответом /api/creator-profiles/sort-options/ (sort_options_data),
+по нему фронтенд строит элементы сортировки и фильтров. Проверка планов
+запросов всех комбинаций — команда check_query_plans.
+"""
+
+from decimal import Decimal, InvalidOperation
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import CreatorProfile
+
+ORDERING_PARAM = 'ordering'
+DEFAULT_SORT = 'id'
+
+# Поле модели и подпись для каждой сортировки; значение параметра ordering —
+# имя поля, с минусом для сортировки по убыванию
+SORT_FIELDS = {
+    'id': 'По порядку добавления',
+    'rating': 'По рейтингу',
+    'completed_orders': 'По числу выполненных заказов',
+    'base_price': 'По цене',
+    'created_at': 'По дате регистрации',
+    'reviews_count': 'По числу отзывов',
+}
+
+
+def _sort_ordering(value):
+    """Уникальный ключ сортировки: (поле, id) в одном направлении."""
+    descending = value.startswith('-')
+    name = value.lstrip('-')
+    if name == 'id':
+        return (value,)
+    return (value, '-id' if descending else 'id')
+
+
+SORTS = {
+    f'{prefix}{name}': _sort_ordering(f'{prefix}{name}')
+    for name in SORT_FIELDS
+    for prefix in ('', '-')
+}
+
+
+def _decimal(value):
+    number = Decimal(value)
+    if not number.is_finite() or number < 0:
+        raise ValueError(value)
+    return number
+
+
+def _work_time_rank(value):
+    return CreatorProfile.AVERAGE_WORK_TIME_RANKS[value]
+
+
+# Диапазонные фильтры: параметр -> (условие ORM, преобразование значения, описание)
+RANGE_FILTERS = {
+    # Креаторы без услуг (base_price = 0) в фильтры по цене не попадают
+    'min_price': ('base_price__gte', _decimal, 'Минимальная цена услуги не меньше'),
+    'max_price': ('base_price__lte', _decimal, 'Минимальная цена услуги не больше'),
+    'min_rating': ('rating__gte', _decimal, 'Рейтинг не меньше'),
+    # Вариант average_work_time; подходят креаторы с тем же или более быстрым
+    'average_work_time': ('average_work_time_rank__lte', _work_time_rank, 'Среднее время работы не дольше'),
+}
+
+
+def get_sort(request):
+    """
+    Ключ сортировки каталога из параметра ordering.
+
+    Raises:
+        ValidationError: Сортировка не поддерживается.
+    """
+    value = request.query_params.get(ORDERING_PARAM, '').strip() or DEFAULT_SORT
+    try:
+        return SORTS[value]
+    except KeyError:
+        raise ValidationError({
+            ORDERING_PARAM: f'Неподдерживаемая сортировка. Доступны: {", ".join(SORTS)}'
+        })
+
+
+def get_range_conditions(request):
+    """
+    Условия ORM диапазонных фильтров из параметров запроса.
+
+    Raises:
+        ValidationError: Некорректное значение фильтра.
+    """
+    conditions = {}
+    errors = {}
+    for param, (lookup, convert, _description) in RANGE_FILTERS.items():
+        value = request.query_params.get(param, '').strip()
+        if not value:
+            continue
+        try:
+            conditions[lookup] = convert(value)
+        except (KeyError, ValueError, InvalidOperation):
+            errors[param] = f'Некорректное значение: {value}'
+    if errors:
+        raise ValidationError(errors)
+    if 'base_price__gte' in conditions or 'base_price__lte' in conditions:
+        conditions['base_price__gt'] = Decimal('0')
+    return conditions
+
+
+class CreatorCatalogFilter(BaseFilterBackend):
+    """
+    Поддерживаемые сортировки и диапазонные фильтры каталога.
+
+    Сортировка по релевантности при поиске задается CreatorSearchFilter,
+    если параметр ordering не передан.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if view.action not in ('list', 'tag_facets'):
+            return queryset
+        return queryset.filter(**get_range_conditions(request)).order_by(*get_sort(request))
+
+    def get_schema_operation_parameters(self, view):
+        parameters = [{
+            'name': ORDERING_PARAM,
+            'required': False,
+            'in': 'query',
+            'description': 'Сортировка (см. sort-options)',
+            'schema': {'type': 'string', 'enum': list(SORTS)},
+        }]
+        for param, (_lookup, convert, description) in RANGE_FILTERS.items():
+            if convert is _work_time_rank:
+                schema = {'type': 'string', 'enum': list(CreatorProfile.AVERAGE_WORK_TIME_RANKS)}
+            else:
+                schema = {'type': 'number', 'minimum': 0}
+            parameters.append({
+                'name': param,
+                'required': False,
+                'in': 'query',
+                'description': description,
+                'schema': schema,
+            })
+        return parameters
+
+
+def sort_options_data():
+    """
+    Поддерживаемые сортировки и фильтры каталога для фронтенда.
+
+    Returns:
+        dict: {'default', 'sorts': [{'value', 'label', 'descending'}],
+            'filters': [{'param', 'label', 'choices'?}]}; любой фильтр
+            сочетается с любой сортировкой.
+    """
+    sorts = [
+        {'value': value, 'label': SORT_FIELDS[value.lstrip('-')], 'descending': value.startswith('-')}
+        for value in SORTS
+    ]
+    filters = []
+    for param, (_lookup, convert, description) in RANGE_FILTERS.items():
+        item = {'param': param, 'label': description}
+        if convert is _work_time_rank:
+            item['choices'] = [
+                {'value': value, 'label': str(label)}
+                for value, label in CreatorProfile.AVERAGE_WORK_TIME_CHOICES
+            ]
+        filters.append(item)
+    return {'default': DEFAULT_SORT, 'sorts': sorts, 'filters': filters}
@@ -0,0 +1,236 @@
+"""
+Загрузка изображений профиля (аватар, обложка профиля креатора).
+
+В запросе файл проверяется — формат, размер в байтах и в пикселях — и
+декодируется целиком (JPEG — в уменьшенном масштабе), поэтому поврежденный
+или обрезанный файл отклоняется ошибкой 400. Затем файл копируется во
+временный каталог PROFILE_IMAGE_SPOOL_DIR и для него резервируется итоговое
+имя в хранилище. Поворот по EXIF, удаление метаданных, уменьшение до
+PROFILE_IMAGE_MAX_SIDE и единственная запись файла выполняются после
+коммита в пуле users.image_variants, затем для файла строятся варианты.
+
+Поле модели получает итоговое имя сразу, поэтому ответ API уже содержит
+URL файла; сам файл появляется, как только задача пула завершится. Если
+задача не смогла записать файл, поле возвращается к прежнему изображению.
+Копии загрузок, оставшиеся после отката транзакции, удаляет команда
+cleanup_uploads.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+
+from .image_variants import delete_variant_files, generate_for, variants_field_name
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+PENDING_ATTR = '_pending_image_uploads'
+SPOOL_SUFFIX = '.upload'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def spool_dir():
+    """Каталог копий загруженных изображений, ожидающих обработки."""
+    return str(_setting('PROFILE_IMAGE_SPOOL_DIR', settings.BASE_DIR / 'image_spool'))
+
+
+def _spool(upload):
+    """Копирует загруженный файл во временный каталог и возвращает путь копии."""
+    directory = spool_dir()
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=SPOOL_SUFFIX, dir=directory)
+    with os.fdopen(fd, 'wb') as spool:
+        upload.seek(0)
+        shutil.copyfileobj(upload, spool)
+    return path
+
+
+def _remove_spool(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def stale_spool_files(max_age):
+    """Копии загрузок старше max_age секунд (задача для них уже не придет)."""
+    directory = spool_dir()
+    if not os.path.isdir(directory):
+        return []
+    deadline = time.time() - max_age
+    paths = (os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.endswith(SPOOL_SUFFIX))
+    return [path for path in paths if os.path.getmtime(path) < deadline]
+
+
+def inspect_image(upload):
+    """
+    Проверяет загруженное изображение и декодирует его целиком.
+
+    Returns:
+        bool: Есть ли в изображении прозрачность.
+
+    Raises:
+        serializers.ValidationError: Файл слишком большой, не изображение
+            или формат не поддерживается.
+    """
+    max_size = _setting('PROFILE_IMAGE_MAX_UPLOAD_SIZE', 10 * 1024 * 1024)
+    if upload.size > max_size:
+        raise serializers.ValidationError(
+            f'Размер изображения не должен превышать {max_size // (1024 * 1024)} МБ.'
+        )
+    invalid = serializers.ValidationError('Загрузите корректное изображение.')
+    try:
+        upload.seek(0)
+        # Image.open читает только заголовок: формат и разрешение проверяются
+        # до декодирования пикселей
+        image = Image.open(upload)
+        image_format, (width, height), mode = image.format, image.size, image.mode
+        has_alpha = mode in ('RGBA', 'LA', 'PA') or (mode == 'P' and 'transparency' in image.info)
+        if image_format not in ALLOWED_FORMATS:
+            raise serializers.ValidationError('Поддерживаемые форматы: JPEG, PNG, WEBP, GIF.')
+        if width * height > _setting('PROFILE_IMAGE_MAX_PIXELS', 40_000_000):
+            raise serializers.ValidationError('Слишком большое разрешение изображения.')
+        # Поврежденный или обрезанный файл отклоняется здесь, а не в задаче пула
+        if image_format == 'JPEG':
+            max_side = _setting('PROFILE_IMAGE_MAX_SIDE', 2048)
+            image.draft('RGB', (max_side, max_side))
+        image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError, ValueError):
+        raise invalid
+    finally:
+        upload.seek(0)
+    return has_alpha
+
+
+def assign_image(instance, field_name, upload):
+    """
+    Назначает полю модели загруженное изображение без записи в хранилище.
+
+    Поле получает зарезервированное имя итогового файла, копия загрузки
+    ждет во временном каталоге, а обработка и запись ставятся в очередь
+    обработчиком post_save (см. users.signals), поэтому после вызова
+    экземпляр нужно сохранить.
+    """
+    has_alpha = inspect_image(upload)
+
+    field = instance._meta.get_field(field_name)
+    ext = 'png' if has_alpha else 'jpg'
+    name = field.generate_filename(instance, f'{uuid.uuid4().hex}.{ext}')
+
+    variants_field = variants_field_name(field_name)
+    pending = instance.__dict__.setdefault(PENDING_ATTR, {})
+    if field_name in pending:
+        # Повторное назначение до сохранения: прежним остается файл до первого
+        _name, replaced_path, previous_name, previous_variants = pending[field_name]
+        _remove_spool(replaced_path)
+    else:
+        previous_name = getattr(instance, field_name).name or ''
+        previous_variants = getattr(instance, variants_field) or {}
+    path = _spool(upload)
+    setattr(instance, field_name, name)
+    # Описание вариантов помечается как относящееся к новому файлу, чтобы
+    # post_save не запускал генерацию до записи файла (ее запустит задача)
+    setattr(instance, variants_field, {'source': name, 'variants': {}})
+    pending[field_name] = (name, path, previous_name, previous_variants)
+
+
+def pop_pending_uploads(instance):
+    """
+    Забирает отложенные загрузки экземпляра.
+
+    Returns:
+        dict: {поле: (имя, путь копии, прежнее имя, прежние варианты)}.
+    """
+    return instance.__dict__.pop(PENDING_ATTR, {})
+
+
+def encode_image(source, has_alpha=None):
+    """
+    Декодирует изображение, поворачивает по EXIF, уменьшает и кодирует заново.
+
+    Метаданные (EXIF, ICC, геотеги) в результат не переносятся.
+
+    Args:
+        source: Путь к файлу или bytes.
+        has_alpha: Сохранять ли прозрачность (None — по режиму изображения).
+
+    Returns:
+        bytes: JPEG или PNG (для изображений с прозрачностью).
+    """
+    max_side = _setting('PROFILE_IMAGE_MAX_SIDE', 2048)
+    image = Image.open(BytesIO(source) if isinstance(source, bytes) else source)
+    if has_alpha is None:
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+    if image.format == 'JPEG':
+        # JPEG декодируется сразу в уменьшенном масштабе (1/2, 1/4, 1/8)
+        image.draft('RGB', (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+    buffer = BytesIO()
+    if has_alpha:
+        image.save(buffer, 'PNG', optimize=True)
+    else:
+        image.save(buffer, 'JPEG', quality=_setting('IMAGE_VARIANT_QUALITY', 82), optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _restore_previous(model, pk, field_name, name, previous_name, previous_variants):
+    """Возвращает полю прежнее изображение, если оно все еще указывает на name."""
+    restored = model.objects.filter(pk=pk, **{field_name: name}).update(
+        **{field_name: previous_name, variants_field_name(field_name): previous_variants}
+    )
+    if restored:
+        logger.warning("Поле %s.%s (pk=%s) возвращено к файлу %r", model._meta.label, field_name, pk, previous_name)
+
+
+def store_image(model, pk, field_name, name, path, previous_name, previous_variants):
+    """
+    Обрабатывает и записывает загруженное изображение (задача пула).
+
+    Если поле успело получить другой файл, загрузка отбрасывается. Если
+    файл не удалось обработать или записать, поле возвращается к прежнему
+    изображению. Копия загрузки удаляется в любом случае.
+    """
+    try:
+        if not model.objects.filter(pk=pk, **{field_name: name}).exists():
+            logger.info("Загрузка %s отброшена: поле %s.%s уже сменило файл", name, model._meta.label, field_name)
+            return None
+        storage = model._meta.get_field(field_name).storage
+        try:
+            content = encode_image(path, has_alpha=name.endswith('.png'))
+            saved_name = storage.save(name, ContentFile(content))
+        except Exception:
+            logger.exception("Не удалось сохранить изображение %s", name)
+            _restore_previous(model, pk, field_name, name, previous_name, previous_variants)
+            return None
+    finally:
+        _remove_spool(path)
+
+    if saved_name != name:
+        # Имя было занято: переносим поле на фактическое имя файла
+        updated = model.objects.filter(pk=pk, **{field_name: name}).update(
+            **{field_name: saved_name, variants_field_name(field_name): {'source': saved_name, 'variants': {}}}
+        )
+        if not updated:
+            storage.delete(saved_name)
+            return None
+
+    if previous_variants.get('source') and previous_variants['source'] != saved_name:
+        delete_variant_files(storage, previous_variants)
+    generate_for(model, pk, field_name, saved_name)
+    return saved_name
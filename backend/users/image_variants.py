@@ -0,0 +1,300 @@
+"""
+Уменьшенные копии (варианты) загруженных изображений.
+
+Аватары, обложки профилей и портфолио, изображения портфолио и услуг
+хранятся в исходном разрешении, а карточкам каталога нужны небольшие
+картинки. После загрузки файла для него в фоне строятся варианты
+VARIANT_SIZES (thumb/card/full — вписаны в квадрат заданной стороны) в
+двух форматах: WebP и запасной JPEG (PNG для изображений с прозрачностью).
+
+Варианты лежат в каталоге рядом с оригиналом, имя которого включает
+полное имя оригинала (вместе с расширением):
+
+    avatars/photo.jpg → avatars/photo.jpg.variants/thumb.webp, .../thumb.jpg, ...
+
+Имена оригиналов в хранилище уникальны, поэтому у разных оригиналов
+(work.jpg и work.png) разные каталоги вариантов, а сами оригиналы в
+каталог *.variants не попадают. Пайплайн перезаписывает и удаляет только
+файлы из каталога вариантов своего оригинала.
+
+Описание вариантов хранится в JSON-поле <поле>_variants той же модели
+(source — имя оригинала, для которого они построены). Описание с другим
+source или с файлами вне каталога вариантов (старая схема имен) считается
+устаревшим и в ответах API не отдается, поэтому сериализаторы не
+обращаются к диску.
+
+Генерация запускается после коммита транзакции (сигнал post_save) в пуле
+потоков процесса размером IMAGE_VARIANT_WORKERS (0 — синхронно, в том же
+потоке). Для уже загруженных файлов варианты строит команда
+generate_image_variants.
+"""
+
+import atexit
+import logging
+import os
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Наибольшая сторона варианта в пикселях
+VARIANT_SIZES = {
+    'thumb': 160,
+    'card': 480,
+    'full': 1600,
+}
+
+# Суффикс каталога вариантов оригинала
+VARIANTS_DIR_SUFFIX = '.variants'
+
+# Поля изображений, для которых строятся варианты: (модель, поле)
+IMAGE_FIELDS = (
+    ('users.User', 'avatar'),
+    ('users.CreatorProfile', 'cover_image'),
+    ('users.PortfolioItem', 'cover_image'),
+    ('users.PortfolioImage', 'image'),
+    ('users.ServiceImage', 'image'),
+)
+
+
+def variants_field_name(field_name):
+    """Имя JSON-поля с описанием вариантов для поля изображения."""
+    return f'{field_name}_variants'
+
+
+def iter_image_fields():
+    """Пары (класс модели, имя поля) из IMAGE_FIELDS."""
+    for label, field_name in IMAGE_FIELDS:
+        yield apps.get_model(label), field_name
+
+
+def variants_dir(source_name):
+    """Каталог вариантов оригинала: полное имя оригинала с суффиксом .variants."""
+    return f'{source_name}{VARIANTS_DIR_SUFFIX}'
+
+
+def variant_name(source_name, variant, ext):
+    """Имя файла варианта в каталоге вариантов оригинала."""
+    return posixpath.join(variants_dir(source_name), f'{variant}.{ext}')
+
+
+def is_variant_of(name, source_name):
+    """Лежит ли файл в каталоге вариантов оригинала source_name."""
+    return bool(source_name) and name.startswith(variants_dir(source_name) + '/')
+
+
+def _variant_files(variants):
+    variants = variants or {}
+    for info in variants.get('variants', {}).values():
+        for key in ('webp', 'fallback'):
+            if info.get(key):
+                yield info[key]
+
+
+def has_current_layout(variants):
+    """Все ли файлы описания лежат в каталоге вариантов его оригинала."""
+    source = (variants or {}).get('source', '')
+    return all(is_variant_of(name, source) for name in _variant_files(variants))
+
+
+def delete_variant_files(storage, variants):
+    """
+    Удаляет файлы вариантов, перечисленные в описании.
+
+    Удаляются только файлы из каталога вариантов оригинала: файлы старой
+    схемы имен могли совпадать с вариантами или оригиналами других загрузок.
+    """
+    source = (variants or {}).get('source', '')
+    for name in _variant_files(variants):
+        if not is_variant_of(name, source):
+            continue
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.warning("Не удалось удалить вариант изображения %s", name, exc_info=True)
+
+
+def _save(storage, source_name, variant, ext, image, fmt, **params):
+    buffer = BytesIO()
+    image.save(buffer, fmt, **params)
+    name = variant_name(source_name, variant, ext)
+    # Имена предсказуемые: повторная генерация перезаписывает файлы своего
+    # каталога вариантов, а не плодит копии с суффиксами
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def build_variants(field_file):
+    """
+    Строит варианты изображения и сохраняет их рядом с оригиналом.
+
+    Returns:
+        dict: Описание вариантов (source, width, height, variants). Для
+            файлов, которые Pillow не открывает (например, SVG), variants пуст.
+    """
+    storage, name = field_file.storage, field_file.name
+    quality = getattr(settings, 'IMAGE_VARIANT_QUALITY', 82)
+    description = {'source': name, 'variants': {}}
+
+    try:
+        with storage.open(name, 'rb') as fh:
+            image = Image.open(fh)
+            image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as exc:
+        logger.info("Варианты для %s не строятся: %s", name, exc)
+        return description
+
+    # Поворот по EXIF выполняется один раз, метаданные в варианты не попадают
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    description['width'], description['height'] = image.size
+
+    for variant, side in sorted(VARIANT_SIZES.items(), key=lambda item: -item[1]):
+        resized = image.copy()
+        resized.thumbnail((side, side), Image.LANCZOS)
+        info = {'width': resized.width, 'height': resized.height}
+        info['webp'] = _save(storage, name, variant, 'webp', resized, 'WEBP', quality=quality, method=4)
+        if has_alpha:
+            info['fallback'] = _save(storage, name, variant, 'png', resized, 'PNG', optimize=True)
+        else:
+            info['fallback'] = _save(
+                storage, name, variant, 'jpg', resized, 'JPEG',
+                quality=quality, optimize=True, progressive=True,
+            )
+        description['variants'][variant] = info
+        # Следующий вариант меньше: уменьшаем уже уменьшенную копию
+        image = resized
+    return description
+
+
+def generate_for(model, pk, field_name, expected_name=None):
+    """
+    Строит варианты для поля объекта и записывает их описание.
+
+    Args:
+        expected_name: Имя файла, для которого запрошена генерация. Если
+            оригинал успел смениться, генерация пропускается — ее выполнит
+            задача для нового файла.
+
+    Returns:
+        dict | None: Новое описание или None, если генерация пропущена.
+    """
+    variants_field = variants_field_name(field_name)
+    instance = model.objects.filter(pk=pk).only('pk', field_name, variants_field).first()
+    if instance is None:
+        return None
+    field_file = getattr(instance, field_name)
+    if expected_name is not None and field_file.name != expected_name:
+        return None
+
+    previous = getattr(instance, variants_field) or {}
+    if previous.get('source') and previous.get('source') != field_file.name:
+        delete_variant_files(field_file.storage, previous)
+
+    if field_file:
+        description = build_variants(field_file)
+        same_file = Q(**{field_name: field_file.name})
+    else:
+        description = {}
+        same_file = Q(**{field_name: ''}) | Q(**{f'{field_name}__isnull': True})
+    # Условное обновление: описание не перезапишет варианты более нового файла
+    model.objects.filter(same_file, pk=pk).update(**{variants_field: description})
+    return description
+
+
+class VariantWorkerPool:
+    """
+    Пул потоков для генерации вариантов.
+
+    Создается лениво и пересоздается после fork (воркеры gunicorn),
+    при workers=0 задачи выполняются синхронно.
+    """
+
+    def __init__(self, workers=2):
+        self.workers = max(int(workers), 0)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+    def submit(self, func, *args):
+        if not self.workers:
+            return self._run(func, *args)
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-variants')
+                self._pid = os.getpid()
+            return self._executor.submit(self._run, func, *args)
+
+    @staticmethod
+    def _run(func, *args):
+        try:
+            return func(*args)
+        except Exception:
+            logger.exception("Ошибка генерации вариантов изображения")
+        finally:
+            # Поток пула держит собственное соединение с базой
+            if threading.current_thread() is not threading.main_thread():
+                close_old_connections()
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+pool = VariantWorkerPool(getattr(settings, 'IMAGE_VARIANT_WORKERS', 2))
+
+
+def schedule_variants(instance, field_name):
+    """Ставит генерацию вариантов в очередь после коммита текущей транзакции."""
+    model, pk = type(instance), instance.pk
+    name = getattr(instance, field_name).name or ''
+    transaction.on_commit(lambda: pool.submit(generate_for, model, pk, field_name, name))
+
+
+def needs_variants(instance, field_name):
+    """Устарело ли описание вариантов для текущего файла поля."""
+    name = getattr(instance, field_name).name or ''
+    variants = getattr(instance, variants_field_name(field_name)) or {}
+    return variants.get('source', '') != name or not has_current_layout(variants)
+
+
+def variant_urls(field_file, variants, request=None):
+    """
+    URL вариантов изображения для ответа API.
+
+    Returns:
+        dict | None: {вариант: {url, webp, width, height}} или None, если
+            файла нет или варианты для него еще не построены.
+    """
+    if not field_file or not variants or variants.get('source') != field_file.name:
+        return None
+    if not variants.get('variants') or not has_current_layout(variants):
+        return None
+
+    def absolute(name):
+        url = field_file.storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+
+    return {
+        variant: {
+            'url': absolute(info['fallback']),
+            'webp': absolute(info['webp']),
+            'width': info['width'],
+            'height': info['height'],
+        }
+        for variant, info in variants['variants'].items()
+    }
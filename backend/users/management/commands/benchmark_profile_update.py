@@ -0,0 +1,165 @@
+"""Management command to benchmark creator profile updates with an avatar upload.
+
+Creates a throwaway creator, sends PATCH /api/creator-profiles/<id>/ with a
+multipart avatar (a generated JPEG with EXIF data, sent as both avatar and
+user.avatar like the profile edit page) the given number of times
+and reports:
+
+- request latency (what the client waits for);
+- background processing time (normalization and variants in the image pool);
+- files and bytes written under MEDIA_ROOT per update (original, variants);
+- files left in the system temp directory (leaks);
+- bytes written by the process (/proc/self/io, Linux only; includes the
+  database socket traffic, so compare runs rather than absolute values).
+
+MEDIA_ROOT is redirected to a temporary directory and the throwaway user is
+deleted afterwards, so real media files and data are not touched.
+
+Usage:
+  python manage.py benchmark_profile_update
+  python manage.py benchmark_profile_update --iterations 50 --width 6000 --height 4000
+  python manage.py benchmark_profile_update --no-file
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from users.image_variants import pool
+from users.models import CreatorProfile
+
+User = get_user_model()
+
+
+def written_since(path, since):
+    """(число файлов, байт) в каталоге, записанных не раньше момента since."""
+    files = size = 0
+    for root, _dirs, names in os.walk(path):
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            if stat.st_mtime >= since:
+                files += 1
+                size += stat.st_size
+    return files, size
+
+
+def process_write_bytes():
+    """Байты, записанные процессом (wchar из /proc/self/io), или None."""
+    try:
+        with open('/proc/self/io') as fh:
+            stats = dict(line.split(': ') for line in fh.read().splitlines())
+        return int(stats['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def sample_jpeg(width, height):
+    """JPEG с шумом (чтобы сжатие было реалистичным) и EXIF-ориентацией."""
+    image = Image.effect_noise((width, height), 64).convert('RGB')
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: повернуть на 90°
+    exif[0x010F] = 'Benchmark Camera'
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=92, exif=exif)
+    return buffer.getvalue()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = "Benchmark creator profile PATCH latency and disk writes per avatar upload"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Number of updates (default: 20).")
+        parser.add_argument("--width", type=int, default=4000, help="Avatar width in pixels (default: 4000).")
+        parser.add_argument("--height", type=int, default=3000, help="Avatar height in pixels (default: 3000).")
+        parser.add_argument("--no-file", action="store_true", help="Update text fields only, without an avatar.")
+
+    def handle(self, *args, **options):
+        iterations = max(options["iterations"], 1)
+        payload = None if options["no_file"] else sample_jpeg(options["width"], options["height"])
+        if payload is not None:
+            self.stdout.write(f"Avatar: {options['width']}x{options['height']} JPEG, {len(payload)} bytes")
+
+        media_root = tempfile.mkdtemp(prefix='profile-bench-media-')
+        tmp_dir = tempfile.gettempdir()
+        user = User.objects.create_user(
+            username=f'bench_{os.getpid()}_{int(time.time())}',
+            email=f'bench_{os.getpid()}_{int(time.time())}@example.invalid',
+            password=None,
+            is_verified=True,
+        )
+        try:
+            profile = CreatorProfile.objects.create(user=user, specialization='Benchmark', experience='1')
+            api = APIClient()
+            api.force_authenticate(user)
+            url = f'/api/creator-profiles/{profile.pk}/'
+
+            latencies, background, written_files, written_bytes, process_bytes = [], [], [], [], []
+            tmp_before = set(os.listdir(tmp_dir))
+            with override_settings(MEDIA_ROOT=media_root, ALLOWED_HOSTS=['*']):
+                for i in range(iterations):
+                    data = {'specialization': f'Benchmark {i}'}
+                    if payload is not None:
+                        # Как CreatorProfileEditPage: файл передается и как avatar, и как user.avatar
+                        for key in ('avatar', 'user.avatar'):
+                            data[key] = SimpleUploadedFile('avatar.jpg', payload, content_type='image/jpeg')
+                    iteration_started = time.time()
+                    io_before = process_write_bytes()
+
+                    started = time.perf_counter()
+                    response = api.patch(url, data, format='multipart')
+                    latencies.append(time.perf_counter() - started)
+                    if response.status_code != 200:
+                        self.stderr.write(f"PATCH returned {response.status_code}: {response.data}")
+                        return
+
+                    # Дожидаемся фоновой обработки (пул пересоздается при следующей задаче)
+                    started = time.perf_counter()
+                    pool.shutdown()
+                    background.append(time.perf_counter() - started)
+
+                    files, size = written_since(media_root, iteration_started)
+                    written_files.append(files)
+                    written_bytes.append(size)
+                    io_after = process_write_bytes()
+                    if io_before is not None and io_after is not None:
+                        process_bytes.append(io_after - io_before)
+            leaked = sorted(set(os.listdir(tmp_dir)) - tmp_before - {os.path.basename(media_root)})
+        finally:
+            user.delete()
+            pool.shutdown()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        ms = lambda seconds: f"{seconds * 1000:.1f} ms"  # noqa: E731
+        self.stdout.write(
+            f"Request latency:  p50 {ms(statistics.median(latencies))}, "
+            f"p95 {ms(percentile(latencies, 95))}, max {ms(max(latencies))}"
+        )
+        self.stdout.write(f"Background work:  p50 {ms(statistics.median(background))}, max {ms(max(background))}")
+        self.stdout.write(
+            f"Media written:    {statistics.mean(written_files):.1f} file(s), "
+            f"{statistics.mean(written_bytes) / 1024:.1f} KiB per update"
+        )
+        if process_bytes:
+            self.stdout.write(f"Process writes:   {statistics.mean(process_bytes) / 1024:.1f} KiB per update (wchar)")
+        self.stdout.write(f"Temp files left:  {len(leaked)}")
+        for name in leaked[:10]:
+            self.stdout.write(f"  - {os.path.join(tmp_dir, name)}")
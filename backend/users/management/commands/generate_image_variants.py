@@ -0,0 +1,65 @@
+"""Management command to build resized/WebP variants for existing images.
+
+New uploads get their variants in the background (users.image_variants);
+this command backfills images uploaded before the pipeline existed or
+described with the old <stem>.<variant>.<ext> naming, or rebuilds
+everything after VARIANT_SIZES change (--force). Variants are
+built synchronously in this process.
+
+Usage:
+  python manage.py generate_image_variants
+  python manage.py generate_image_variants --model users.PortfolioImage --force
+"""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from users.image_variants import (
+    IMAGE_FIELDS, generate_for, iter_image_fields, needs_variants, variants_field_name,
+)
+
+
+class Command(BaseCommand):
+    help = "Build thumb/card/full and WebP variants for uploaded images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            action="append",
+            choices=sorted({label for label, _field in IMAGE_FIELDS}),
+            help="Only process this model (may be repeated).",
+        )
+        parser.add_argument("--force", action="store_true", help="Rebuild variants that are already up to date.")
+
+    def handle(self, *args, **options):
+        models = set(options["model"] or ())
+        total = failed = 0
+        for model, field_name in iter_image_fields():
+            if models and model._meta.label not in models:
+                continue
+            variants_field = variants_field_name(field_name)
+            queryset = (
+                model.objects.exclude(Q(**{field_name: ''}) | Q(**{f'{field_name}__isnull': True}))
+                .only('pk', field_name, variants_field)
+                .order_by('pk')
+            )
+            done = 0
+            for instance in queryset.iterator(chunk_size=500):
+                name = getattr(instance, field_name).name
+                if not options["force"] and not needs_variants(instance, field_name):
+                    continue
+                try:
+                    description = generate_for(model, instance.pk, field_name, name)
+                except Exception as exc:  # noqa: BLE001 - продолжаем с остальными файлами
+                    failed += 1
+                    self.stderr.write(f"  - {model._meta.label}#{instance.pk} {name}: {exc}")
+                    continue
+                if description is not None:
+                    done += 1
+            total += done
+            self.stdout.write(f"  - {model._meta.label}.{field_name}: {done} image(s)")
+
+        if failed:
+            raise CommandError(f"{failed} image(s) failed, {total} processed")
+        self.stdout.write(self.style.SUCCESS(f"Built variants for {total} image(s)."))
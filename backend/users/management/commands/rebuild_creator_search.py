@@ -0,0 +1,43 @@
+"""Management command to rebuild creator search documents.
+
+Documents (CreatorProfile.search_vector and search_document) are kept up to
+date by signals (users.signals); this command recomputes all of them, e.g.
+after changing the document composition in users.search or after bulk
+updates that bypass signals. It also creates the trigram index on
+search_document if pg_trgm was installed after the migration ran.
+
+Usage:
+  python manage.py rebuild_creator_search
+  python manage.py rebuild_creator_search --batch-size 500
+"""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.models import CreatorProfile
+from users.search import ensure_trigram_index, is_search_supported, update_search_documents
+
+
+class Command(BaseCommand):
+    help = "Recompute full-text and trigram search documents for creator profiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Profiles per UPDATE (default: 1000).")
+
+    def handle(self, *args, **options):
+        if not is_search_supported():
+            raise CommandError("Creator search documents require PostgreSQL.")
+
+        if ensure_trigram_index():
+            self.stdout.write("Trigram index: present")
+        else:
+            self.stdout.write(self.style.WARNING(
+                "pg_trgm is not installed: typo-tolerant matching is disabled, full-text search only."
+            ))
+
+        batch_size = max(options["batch_size"], 1)
+        ids = list(CreatorProfile.objects.order_by("pk").values_list("pk", flat=True))
+        updated = 0
+        for start in range(0, len(ids), batch_size):
+            updated += update_search_documents(CreatorProfile.objects.filter(pk__in=ids[start:start + batch_size]))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search documents for {updated} creator profile(s)."))
@@ -0,0 +1,48 @@
+"""Management command to recompute materialized creator catalog stats.
+
+services_count, base_price, reviews_count, rating_sum and rating on
+CreatorProfile are maintained incrementally (users.stats): services on save
+and delete, reviews by running sums. This command recomputes all of them
+from services and reviews, e.g. after bulk imports that bypass signals, and
+reports how many profiles had drifted.
+
+Usage:
+  python manage.py recompute_creator_stats
+  python manage.py recompute_creator_stats --dry-run
+"""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from users.models import CreatorProfile
+from users.stats import recompute_stats
+
+STATS_FIELDS = ('services_count', 'base_price', 'reviews_count', 'rating_sum', 'rating')
+
+
+class Command(BaseCommand):
+    help = "Recompute services_count, base_price, reviews_count and rating for creator profiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report drifted profiles without saving.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            before = {row[0]: row[1:] for row in CreatorProfile.objects.values_list('pk', *STATS_FIELDS)}
+            updated = recompute_stats()
+            after = {row[0]: row[1:] for row in CreatorProfile.objects.values_list('pk', *STATS_FIELDS)}
+            drifted = sorted(pk for pk, values in after.items() if before.get(pk) != values)
+            for pk in drifted[:20]:
+                changes = ", ".join(
+                    f"{name} {old} -> {new}"
+                    for name, old, new in zip(STATS_FIELDS, before[pk], after[pk]) if old != new
+                )
+                self.stdout.write(f"  - CreatorProfile#{pk}: {changes}")
+            if options["dry_run"]:
+                transaction.set_rollback(True)
+
+        verb = "would be corrected" if options["dry_run"] else "corrected"
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {updated} creator profile(s), {len(drifted)} {verb}."
+        ))
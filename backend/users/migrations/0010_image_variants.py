@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-16 20:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_favoritecreator'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='creatorprofile',
+            name='cover_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='cover image variants'),
+        ),
+        migrations.AddField(
+            model_name='portfolioimage',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Варианты изображения'),
+        ),
+        migrations.AddField(
+            model_name='portfolioitem',
+            name='cover_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Варианты обложки'),
+        ),
+        migrations.AddField(
+            model_name='serviceimage',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Варианты изображения'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='avatar variants'),
+        ),
+    ]
@@ -0,0 +1,115 @@
+# Generated by Django 5.2.3 on 2026-10-16 20:52
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import DatabaseError, migrations, models, transaction
+
+
+TRIGRAM_INDEX_SQL = (
+    'CREATE INDEX IF NOT EXISTS creator_search_document_trgm '
+    'ON users_creatorprofile USING gin (search_document gin_trgm_ops)'
+)
+
+BACKFILL_SQL = """
+WITH docs AS (
+    SELECT
+        p.id,
+        concat_ws(' ', u.username, u.first_name, u.last_name, p.nickname) AS names,
+        coalesce(p.specialization, '') AS specialization,
+        coalesce(t.names, '') AS tags,
+        coalesce(s.titles, '') AS services
+    FROM users_creatorprofile p
+    JOIN users_user u ON u.id = p.user_id
+    LEFT JOIN (
+        SELECT pt.creatorprofile_id, string_agg(tag.name, ' ' ORDER BY tag.name) AS names
+        FROM users_creatorprofile_tags pt
+        JOIN core_tag tag ON tag.id = pt.tag_id
+        GROUP BY pt.creatorprofile_id
+    ) t ON t.creatorprofile_id = p.id
+    LEFT JOIN (
+        SELECT creator_profile_id, string_agg(title, ' ' ORDER BY title) AS titles
+        FROM users_service
+        WHERE is_active
+        GROUP BY creator_profile_id
+    ) s ON s.creator_profile_id = p.id
+)
+UPDATE users_creatorprofile p
+SET search_document = lower(concat_ws(' ', d.names, d.specialization, d.tags, d.services)),
+    search_vector =
+        setweight(to_tsvector('russian', d.names), 'A') ||
+        setweight(to_tsvector('russian', d.specialization), 'B') ||
+        setweight(to_tsvector('russian', d.tags), 'C') ||
+        setweight(to_tsvector('russian', d.services), 'D') ||
+        setweight(to_tsvector('english', d.names), 'A') ||
+        setweight(to_tsvector('english', d.specialization), 'B') ||
+        setweight(to_tsvector('english', d.tags), 'C') ||
+        setweight(to_tsvector('english', d.services), 'D')
+FROM docs d
+WHERE d.id = p.id
+"""
+
+
+def create_trigram_extension(apps, schema_editor):
+    """Устанавливает pg_trgm, если расширение доступно серверу и хватает прав."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        except DatabaseError:
+            # Без прав на CREATE EXTENSION поиск работает только по tsvector
+            pass
+
+
+def create_trigram_index(apps, schema_editor):
+    """Триграммный индекс по search_document (только при установленном pg_trgm)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone() is not None:
+            cursor.execute(TRIGRAM_INDEX_SQL)
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS creator_search_document_trgm')
+
+
+def backfill_search_documents(apps, schema_editor):
+    """Заполняет поисковые документы существующих профилей (только PostgreSQL)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(BACKFILL_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_uploadsession'),
+        ('users', '0010_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_extension, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='creatorprofile',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='search document'),
+        ),
+        migrations.AddField(
+            model_name='creatorprofile',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True, verbose_name='search vector'),
+        ),
+        migrations.AddIndex(
+            model_name='creatorprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='creator_search_vector_gin'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.3 on 2026-10-16 20:57
+
+from django.db import migrations, models
+
+
+BACKFILL_SQL = """
+UPDATE users_creatorprofile SET
+    services_count = (
+        SELECT COUNT(*) FROM users_service s WHERE s.creator_profile_id = users_creatorprofile.id
+    ),
+    base_price = COALESCE((
+        SELECT MIN(s.price) FROM users_service s WHERE s.creator_profile_id = users_creatorprofile.id
+    ), 0),
+    reviews_count = (
+        SELECT COUNT(*) FROM orders_review r WHERE r.recipient_id = users_creatorprofile.user_id
+    ),
+    rating_sum = COALESCE((
+        SELECT SUM(r.rating) FROM orders_review r WHERE r.recipient_id = users_creatorprofile.user_id
+    ), 0),
+    rating = COALESCE((
+        SELECT ROUND(AVG(r.rating), 2) FROM orders_review r WHERE r.recipient_id = users_creatorprofile.user_id
+    ), 0)
+"""
+
+
+def backfill_stats(apps, schema_editor):
+    """Заполняет статистику существующих профилей креаторов."""
+    schema_editor.execute(BACKFILL_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_uploadsession'),
+        ('orders', '0014_order_order_creator_created_id_idx_and_more'),
+        ('users', '0011_creator_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='creatorprofile',
+            name='base_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10, verbose_name='base price'),
+        ),
+        migrations.AddField(
+            model_name='creatorprofile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='rating sum'),
+        ),
+        migrations.AddField(
+            model_name='creatorprofile',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='reviews count'),
+        ),
+        migrations.AddField(
+            model_name='creatorprofile',
+            name='services_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='services count'),
+        ),
+        migrations.AddIndex(
+            model_name='creatorprofile',
+            index=models.Index(fields=['base_price', 'id'], name='creator_base_price_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creatorprofile',
+            index=models.Index(fields=['rating', 'id'], name='creator_rating_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creatorprofile',
+            index=models.Index(fields=['reviews_count', 'id'], name='creator_reviews_count_id_idx'),
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-16 21:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_uploadsession'),
+        ('users', '0012_creator_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='creatorprofile',
+            name='average_work_time_rank',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(average_work_time='up_to_24_hours', then=models.Value(1)), models.When(average_work_time='up_to_3_days', then=models.Value(2)), models.When(average_work_time='up_to_10_days', then=models.Value(3)), models.When(average_work_time='up_to_14_days', then=models.Value(4)), models.When(average_work_time='up_to_30_days', then=models.Value(5)), models.When(average_work_time='up_to_60_days', then=models.Value(6)), models.When(average_work_time='more_than_60_days', then=models.Value(7))), output_field=models.PositiveSmallIntegerField(null=True), verbose_name='average work time rank'),
+        ),
+        migrations.AddIndex(
+            model_name='creatorprofile',
+            index=models.Index(fields=['completed_orders', 'id'], name='creator_completed_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creatorprofile',
+            index=models.Index(fields=['created_at', 'id'], name='creator_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creatorprofile',
+            index=models.Index(fields=['average_work_time_rank', 'id'], name='creator_work_time_id_idx'),
+        ),
+    ]
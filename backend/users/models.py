@@ -5,7 +5,10 @@
 """
 
 from django.db import models
+from django.db.models import Case, Value, When
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -36,6 +39,8 @@ class User(AbstractUser):
     bio = models.TextField(_('biography'), blank=True, null=True)
     location = models.CharField(_('location'), max_length=255, blank=True, null=True)
     avatar = models.ImageField(_('avatar'), upload_to='avatars/', blank=True, null=True)
+    # Уменьшенные копии аватара (users.image_variants)
+    avatar_variants = models.JSONField(_('avatar variants'), default=dict, blank=True, editable=False)
     is_verified = models.BooleanField(_('verified'), default=False)
     gender = models.CharField(
         _('gender'),
@@ -203,10 +208,17 @@ class CreatorProfile(models.Model):
         cover_image (ImageField): Обложка профиля креатора.
         is_online (BooleanField): Статус онлайн/оффлайн креатора.
         available_for_hire (BooleanField): Доступность для новых заказов.
-        rating (DecimalField): Рейтинг креатора.
+        rating (DecimalField): Рейтинг креатора (средняя оценка отзывов).
         completed_orders (PositiveIntegerField): Количество завершенных заказов.
+        reviews_count (PositiveIntegerField): Количество отзывов.
+        rating_sum (PositiveIntegerField): Сумма оценок отзывов.
+        services_count (PositiveIntegerField): Количество услуг.
+        base_price (DecimalField): Минимальная цена услуги (0 без услуг).
         average_response_time (DurationField): Среднее время ответа.
         average_work_time (CharField): Среднее время выполнения работы.
+        average_work_time_rank (GeneratedField): Порядковый номер average_work_time.
+        search_document (TextField): Текст профиля для триграммного поиска.
+        search_vector (SearchVectorField): Поисковый документ для полнотекстового поиска.
         created_at (DateTimeField): Дата создания профиля.
         updated_at (DateTimeField): Дата обновления профиля.
     """
@@ -220,6 +232,10 @@ class CreatorProfile(models.Model):
         ('up_to_60_days', _('До 60 дней')),
         ('more_than_60_days', _('Более 60 дней')),
     ]
+    # Порядковые номера вариантов: чем меньше, тем быстрее работает креатор
+    AVERAGE_WORK_TIME_RANKS = {
+        value: rank for rank, (value, _label) in enumerate(AVERAGE_WORK_TIME_CHOICES, start=1)
+    }
     
     user = models.OneToOneField(
         User, 
@@ -232,10 +248,16 @@ class CreatorProfile(models.Model):
     experience = models.CharField(_('experience'), max_length=255)
     portfolio_link = models.URLField(_('portfolio link'), blank=True, null=True)
     cover_image = models.ImageField(_('cover image'), upload_to='creator_covers/', blank=True, null=True)
+    cover_image_variants = models.JSONField(_('cover image variants'), default=dict, blank=True, editable=False)
     is_online = models.BooleanField(_('online status'), default=False)
     available_for_hire = models.BooleanField(_('available for hire'), default=True)
     rating = models.DecimalField(_('rating'), max_digits=3, decimal_places=2, default=0)
     completed_orders = models.PositiveIntegerField(_('completed orders'), default=0)
+    # Статистика для каталога, поддерживается users.stats (не редактируется вручную)
+    reviews_count = models.PositiveIntegerField(_('reviews count'), default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(_('rating sum'), default=0, editable=False)
+    services_count = models.PositiveIntegerField(_('services count'), default=0, editable=False)
+    base_price = models.DecimalField(_('base price'), max_digits=10, decimal_places=2, default=0, editable=False)
     average_response_time = models.DurationField(_('average response time'), null=True, blank=True)
     average_work_time = models.CharField(
         _('average work time'),
@@ -246,6 +268,17 @@ class CreatorProfile(models.Model):
         null=True,
         help_text=_('Среднее время выполнения работы креатором')
     )
+    # Вычисляется базой из average_work_time; фильтр каталога «не дольше»
+    # сравнивает номера по индексу (NULL, если время не указано)
+    average_work_time_rank = models.GeneratedField(
+        expression=Case(*[
+            When(average_work_time=value, then=Value(rank))
+            for value, rank in AVERAGE_WORK_TIME_RANKS.items()
+        ]),
+        output_field=models.PositiveSmallIntegerField(null=True),
+        db_persist=True,
+        verbose_name=_('average work time rank'),
+    )
     # Новое поле тегов, заменяющее навыки
     tags = models.ManyToManyField(
         'core.Tag',  # Ссылаемся на модель Tag из приложения core
@@ -253,12 +286,26 @@ class CreatorProfile(models.Model):
         verbose_name=_('Tags'),
         blank=True
     )
+    # Поисковые документы каталога (см. users.search); триграммный индекс по
+    # search_document создается миграцией, если установлено расширение pg_trgm
+    search_document = models.TextField(_('search document'), blank=True, default='', editable=False)
+    search_vector = SearchVectorField(_('search vector'), null=True, blank=True, editable=False)
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     
     class Meta:
         verbose_name = _('creator profile')
         verbose_name_plural = _('creator profiles')
+        indexes = [
+            GinIndex(fields=['search_vector'], name='creator_search_vector_gin'),
+            # Сортировки и диапазоны каталога (см. users.catalog): ключ (поле, id)
+            models.Index(fields=['base_price', 'id'], name='creator_base_price_id_idx'),
+            models.Index(fields=['rating', 'id'], name='creator_rating_id_idx'),
+            models.Index(fields=['reviews_count', 'id'], name='creator_reviews_count_id_idx'),
+            models.Index(fields=['completed_orders', 'id'], name='creator_completed_id_idx'),
+            models.Index(fields=['created_at', 'id'], name='creator_created_id_idx'),
+            models.Index(fields=['average_work_time_rank', 'id'], name='creator_work_time_id_idx'),
+        ]
     
     def __str__(self):
         """Возвращает строковое представление профиля креатора."""
@@ -370,6 +417,12 @@ class PortfolioItem(models.Model):
         verbose_name=_('Обложка'),
         upload_to='portfolio/covers/'
     )
+    cover_image_variants = models.JSONField(
+        verbose_name=_('Варианты обложки'),
+        default=dict,
+        blank=True,
+        editable=False
+    )
     external_url = models.URLField(
         verbose_name=_('Внешняя ссылка'),
         blank=True,
@@ -410,6 +463,12 @@ class PortfolioImage(models.Model):
         verbose_name=_('Изображение'),
         upload_to='portfolio/images/'
     )
+    image_variants = models.JSONField(
+        verbose_name=_('Варианты изображения'),
+        default=dict,
+        blank=True,
+        editable=False
+    )
     caption = models.CharField(
         verbose_name=_('Подпись'),
         max_length=255,
@@ -569,6 +628,12 @@ class ServiceImage(models.Model):
         upload_to='services/',
         verbose_name=_('Изображение')
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name=_('Варианты изображения')
+    )
     caption = models.CharField(
         max_length=255,
         blank=True,
@@ -0,0 +1,266 @@
+"""
+Поиск креаторов в каталоге.
+
+Для каждого профиля креатора поддерживается поисковый документ из имени
+пользователя, имени и фамилии, псевдонима, специализации, названий тегов
+и активных услуг в двух видах:
+
+- CreatorProfile.search_vector — tsvector (конфигурации russian и english)
+  с GIN-индексом: ранжированный полнотекстовый поиск, слова запроса ищутся
+  как префиксы («ани» находит «анимация»);
+- CreatorProfile.search_document — тот же текст в нижнем регистре с
+  триграммным GIN-индексом (pg_trgm): поиск с опечатками через
+  word_similarity («ивнов» находит «иванов»).
+
+Документы обновляются сигналами (см. users.signals) при изменении профиля,
+имени пользователя, тегов профиля, услуг и при переименовании или удалении
+тега — одним UPDATE на изменение после коммита. Команда
+rebuild_creator_search пересчитывает все документы.
+
+Если расширение pg_trgm не установлено, поиск работает только по tsvector.
+На базах, отличных от PostgreSQL (локальная разработка на SQLite), поиск
+выполняется по вхождению подстроки в имя, псевдоним и специализацию.
+"""
+
+import re
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, FloatField, OuterRef, Q, Subquery, TextField, Value
+from django.db.models.functions import Cast, Coalesce, Concat, Lower
+from rest_framework.filters import BaseFilterBackend
+
+from core.models import Tag
+
+from .models import CreatorProfile, Service, User
+
+SEARCH_CONFIGS = ('russian', 'english')
+SEARCH_PARAMS = ('search', 'q')
+TRIGRAM_INDEX_NAME = 'creator_search_document_trgm'
+
+# Веса частей документа: имя важнее специализации, специализация — тегов,
+# теги — названий услуг
+NAME_WEIGHT = 'A'
+SPECIALIZATION_WEIGHT = 'B'
+TAGS_WEIGHT = 'C'
+SERVICES_WEIGHT = 'D'
+
+# Слова запроса для to_tsquery: буквы, цифры и символ подчеркивания
+WORD_RE = re.compile(r'\w+')
+# Не больше стольких слов запроса попадает в tsquery
+MAX_QUERY_WORDS = 8
+
+_trigram_supported = None
+
+
+def is_search_supported():
+    """Полнотекстовый поиск доступен только на PostgreSQL."""
+    return connection.vendor == 'postgresql'
+
+
+def is_trigram_supported():
+    """Установлено ли расширение pg_trgm (проверяется один раз на процесс)."""
+    global _trigram_supported
+    if _trigram_supported is None:
+        if not is_search_supported():
+            _trigram_supported = False
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                _trigram_supported = cursor.fetchone() is not None
+    return _trigram_supported
+
+
+def ensure_trigram_index():
+    """
+    Создает триграммный индекс по search_document, если pg_trgm установлен.
+
+    Returns:
+        bool: Есть ли индекс (pg_trgm мог быть установлен после миграции).
+    """
+    global _trigram_supported
+    _trigram_supported = None
+    if not is_trigram_supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX_NAME} '
+            f'ON {CreatorProfile._meta.db_table} USING gin (search_document gin_trgm_ops)'
+        )
+    return True
+
+
+def _text(expression):
+    return Coalesce(expression, Value(''), output_field=TextField())
+
+
+def names_text_expression():
+    """Имя пользователя, имя, фамилия и псевдоним креатора."""
+    user_names = (
+        User.objects.filter(pk=OuterRef('user_id'))
+        .annotate(names=Concat(
+            'username', Value(' '), 'first_name', Value(' '), 'last_name',
+            output_field=TextField(),
+        ))
+        .values('names')[:1]
+    )
+    return Concat(_text(Subquery(user_names)), Value(' '), _text(F('nickname')), output_field=TextField())
+
+
+def tags_text_expression():
+    """Названия тегов профиля через пробел (коррелированный подзапрос)."""
+    names = (
+        Tag.objects.filter(creators=OuterRef('pk'))
+        .order_by()
+        .values('creators')
+        .annotate(names=StringAgg('name', delimiter=' ', ordering='name'))
+        .values('names')
+    )
+    return _text(Subquery(names))
+
+
+def services_text_expression():
+    """Названия активных услуг креатора через пробел."""
+    titles = (
+        Service.objects.filter(creator_profile=OuterRef('pk'), is_active=True)
+        .order_by()
+        .values('creator_profile')
+        .annotate(titles=StringAgg('title', delimiter=' ', ordering='title'))
+        .values('titles')
+    )
+    return _text(Subquery(titles))
+
+
+def build_search_vector():
+    """Выражение tsvector профиля: имя, специализация, теги и услуги в обеих конфигурациях."""
+    vector = None
+    for config in SEARCH_CONFIGS:
+        part = (
+            SearchVector(names_text_expression(), weight=NAME_WEIGHT, config=config)
+            + SearchVector(_text(F('specialization')), weight=SPECIALIZATION_WEIGHT, config=config)
+            + SearchVector(tags_text_expression(), weight=TAGS_WEIGHT, config=config)
+            + SearchVector(services_text_expression(), weight=SERVICES_WEIGHT, config=config)
+        )
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def build_search_document():
+    """Выражение для search_document: весь текст профиля в нижнем регистре."""
+    return Lower(Concat(
+        names_text_expression(), Value(' '),
+        _text(F('specialization')), Value(' '),
+        tags_text_expression(), Value(' '),
+        services_text_expression(),
+        output_field=TextField(),
+    ))
+
+
+def update_search_documents(queryset):
+    """
+    Пересчитывает поисковые документы профилей из queryset одним UPDATE.
+
+    Сигналы не вызываются, updated_at не меняется.
+    """
+    if not is_search_supported():
+        return 0
+    return queryset.update(search_vector=build_search_vector(), search_document=build_search_document())
+
+
+def update_creator_search_document(profile_id):
+    """Пересчитывает поисковый документ одного профиля."""
+    return update_search_documents(CreatorProfile.objects.filter(pk=profile_id))
+
+
+def build_search_query(text):
+    """
+    Префиксный tsquery для обеих конфигураций: все слова запроса должны
+    встретиться в документе, последнее может быть недописанным.
+
+    Returns:
+        SearchQuery | None: None, если в запросе нет слов.
+    """
+    words = WORD_RE.findall(text.lower())[:MAX_QUERY_WORDS]
+    if not words:
+        return None
+    raw = ' & '.join(f'{word}:*' for word in words)
+    query = None
+    for config in SEARCH_CONFIGS:
+        part = SearchQuery(raw, config=config, search_type='raw')
+        query = part if query is None else query | part
+    return query
+
+
+def search_creators(queryset, text):
+    """
+    Фильтрует профили по поисковому запросу и добавляет аннотацию search_rank.
+
+    Профиль подходит, если его tsvector соответствует префиксному запросу
+    или (при установленном pg_trgm) запрос похож на слово документа с
+    учетом опечаток (оператор %>, порог pg_trgm.word_similarity_threshold).
+    """
+    query = build_search_query(text)
+    if query is None:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+
+    rank = SearchRank(F('search_vector'), query)
+    condition = Q(search_vector=query)
+    if is_trigram_supported():
+        text = text.lower()
+        condition |= Q(search_document__trigram_word_similar=text)
+        rank = rank + TrigramWordSimilarity(text, 'search_document')
+    # double precision вместо real: ранг точно восстанавливается из курсора
+    return queryset.filter(condition).annotate(search_rank=Cast(rank, FloatField()))
+
+
+def search_creators_fallback(queryset, text):
+    """Поиск по вхождению подстроки для баз без полнотекстового поиска."""
+    condition = (
+        Q(user__username__icontains=text)
+        | Q(nickname__icontains=text)
+        | Q(specialization__icontains=text)
+    )
+    for word in text.split():
+        condition |= Q(user__first_name__icontains=word) | Q(user__last_name__icontains=word)
+    return queryset.filter(condition)
+
+
+class CreatorSearchFilter(BaseFilterBackend):
+    """
+    Поиск креаторов по параметру `search` (`q` — как у заказов).
+
+    Результаты сортируются по релевантности, затем по id, если явно не
+    передан параметр ordering.
+    """
+
+    ordering_param = 'ordering'
+
+    def get_search_text(self, request):
+        for param in SEARCH_PARAMS:
+            value = request.query_params.get(param, '').strip()
+            if value:
+                return value
+        return ''
+
+    def filter_queryset(self, request, queryset, view):
+        text = self.get_search_text(request)
+        if not text:
+            return queryset
+
+        if not is_search_supported():
+            return search_creators_fallback(queryset, text)
+
+        queryset = search_creators(queryset, text)
+        if not request.query_params.get(self.ordering_param):
+            queryset = queryset.order_by('-search_rank', 'id')
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': 'search',
+            'required': False,
+            'in': 'query',
+            'description': 'Поиск по имени, псевдониму, специализации, тегам и услугам (с опечатками)',
+            'schema': {'type': 'string'},
+        }]
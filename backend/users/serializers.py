@@ -10,6 +10,8 @@ from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 from core import models as core_models  # Импортируем модели из приложения core
 
+from .image_uploads import assign_image
+from .image_variants import variant_urls, variants_field_name
 from .models import (
     ClientProfile,
     CreatorProfile,
@@ -25,6 +27,29 @@ from .models import (
 User = get_user_model()
 
 
+class ImageVariantsField(serializers.Field):
+    """
+    URL уменьшенных копий изображения (см. users.image_variants).
+
+    Отдает {вариант: {url, webp, width, height}} или null, пока копии не
+    построены. source указывает на объект с полем изображения
+    ('*' — сам объект, 'user' — связанный пользователь).
+    """
+
+    def __init__(self, field_name, **kwargs):
+        self.field_name_on_source = field_name
+        kwargs['read_only'] = True
+        kwargs.setdefault('source', '*')
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return variant_urls(
+            getattr(instance, self.field_name_on_source),
+            getattr(instance, variants_field_name(self.field_name_on_source)),
+            self.context.get('request'),
+        )
+
+
 # ──────────────────────────────── USER ────────────────────────────────
 class UserBriefSerializer(serializers.ModelSerializer):
     """
@@ -34,6 +59,7 @@ class UserBriefSerializer(serializers.ModelSerializer):
     где требуется только основная информация о пользователе.
     """
     full_name = serializers.CharField(read_only=True)
+    avatar_variants = ImageVariantsField('avatar')
     
     class Meta:
         model = User
@@ -45,6 +71,7 @@ class UserBriefSerializer(serializers.ModelSerializer):
             "last_name",
             "full_name",
             "avatar",
+            "avatar_variants",
         ]
         read_only_fields = fields
 
@@ -57,11 +84,15 @@ class UserSerializer(serializers.ModelSerializer):
     creator_profile_id = serializers.IntegerField(source="creator_profile.id", read_only=True)
     # Явно указываем тип поля для аватара
     avatar = serializers.ImageField(required=False, allow_null=True)
+    avatar_variants = ImageVariantsField('avatar')
     
     def update(self, instance, validated_data):
         """
         Обновляет пользователя с обработкой аватара.
         
+        Новый аватар только проверяется и получает имя файла; обработка и
+        запись выполняются после коммита (см. users.image_uploads).
+        
         Args:
             instance: Экземпляр модели User для обновления
             validated_data: Проверенные данные для обновления
@@ -69,66 +100,13 @@ class UserSerializer(serializers.ModelSerializer):
         Returns:
             Обновленный экземпляр модели User
         """
-        import os
-        from django.conf import settings
-        
-        print(f"DEBUG - UserSerializer.update - начало обновления пользователя {instance.username}")
-        print(f"DEBUG - UserSerializer.update - validated_data: {validated_data}")
-        
-        # Проверяем наличие аватара в данных
         avatar = validated_data.pop('avatar', None)
         if avatar is not None:
-            print(f"DEBUG - UserSerializer.update - найден аватар: {avatar}")
-            print(f"DEBUG - UserSerializer.update - тип аватара: {type(avatar)}")
-            print(f"DEBUG - UserSerializer.update - имя файла: {avatar.name}")
-            print(f"DEBUG - UserSerializer.update - размер файла: {avatar.size} байт")
-            
-            # Проверяем директорию для сохранения аватаров
-            avatar_dir = os.path.join(settings.MEDIA_ROOT, 'avatars')
-            print(f"DEBUG - UserSerializer.update - директория для аватаров: {avatar_dir}")
-            print(f"DEBUG - UserSerializer.update - директория существует: {os.path.exists(avatar_dir)}")
-            
-            # Создаем директорию, если она не существует
-            if not os.path.exists(avatar_dir):
-                try:
-                    os.makedirs(avatar_dir)
-                    print(f"DEBUG - UserSerializer.update - создана директория: {avatar_dir}")
-                except Exception as e:
-                    print(f"DEBUG - UserSerializer.update - ошибка при создании директории: {e}")
-            
-            # Проверяем права доступа к директории
-            try:
-                print(f"DEBUG - UserSerializer.update - права доступа к директории: {oct(os.stat(avatar_dir).st_mode)[-3:]}")
-            except Exception as e:
-                print(f"DEBUG - UserSerializer.update - ошибка при проверке прав доступа: {e}")
-            
-            # Устанавливаем аватар
-            old_avatar = instance.avatar
-            instance.avatar = avatar
-            print(f"DEBUG - UserSerializer.update - аватар установлен: {instance.avatar}")
+            assign_image(instance, 'avatar', avatar)
         
-        # Обновляем остальные поля
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        
-        # Сохраняем пользователя
-        try:
-            instance.save()
-            print(f"DEBUG - UserSerializer.update - пользователь сохранен, аватар: {instance.avatar}")
-            
-            # Проверяем, что файл сохранен на диск
-            if instance.avatar:
-                try:
-                    avatar_path = instance.avatar.path
-                    print(f"DEBUG - UserSerializer.update - путь к файлу аватара: {avatar_path}")
-                    print(f"DEBUG - UserSerializer.update - файл существует: {os.path.exists(avatar_path)}")
-                    if os.path.exists(avatar_path):
-                        print(f"DEBUG - UserSerializer.update - размер файла на диске: {os.path.getsize(avatar_path)} байт")
-                except Exception as e:
-                    print(f"DEBUG - UserSerializer.update - ошибка при проверке файла: {e}")
-        except Exception as e:
-            print(f"DEBUG - UserSerializer.update - ошибка при сохранении пользователя: {e}")
-        
+        instance.save()
         return instance
 
     class Meta:
@@ -141,6 +119,7 @@ class UserSerializer(serializers.ModelSerializer):
             "last_name",
             "full_name",
             "avatar",
+            "avatar_variants",
             "phone",
             "bio",
             "location",
@@ -234,6 +213,7 @@ class UserCatalogSerializer(serializers.ModelSerializer):
     has_creator_profile = serializers.BooleanField(read_only=True)
     has_client_profile = serializers.BooleanField(read_only=True)
     creator_profile_id = serializers.IntegerField(source="creator_profile.id", read_only=True)
+    avatar_variants = ImageVariantsField('avatar')
 
     class Meta:
         model = User
@@ -245,6 +225,7 @@ class UserCatalogSerializer(serializers.ModelSerializer):
             "last_name",
             "full_name",
             "avatar",
+            "avatar_variants",
             "bio",
             "location",
             "is_verified",
@@ -274,6 +255,7 @@ class CreatorProfileListSerializer(serializers.ModelSerializer):
     first_name = serializers.CharField(source="user.first_name", read_only=True)
     last_name = serializers.CharField(source="user.last_name", read_only=True)
     avatar = serializers.ImageField(source="user.avatar", read_only=True)
+    avatar_variants = ImageVariantsField('avatar', source='user')
 
     class Meta:
         model = CreatorProfile
@@ -284,11 +266,13 @@ class CreatorProfileListSerializer(serializers.ModelSerializer):
             "first_name",
             "last_name",
             "avatar",
+            "avatar_variants",
             "nickname",
             "tags",
             "services_count",
             "base_price",
             "rating",
+            "reviews_count",
             "specialization",
             "experience",
             "available_for_hire",
@@ -310,10 +294,11 @@ class CreatorProfileCatalogSerializer(serializers.ModelSerializer):
     first_name = serializers.CharField(source="user.first_name", read_only=True)
     last_name = serializers.CharField(source="user.last_name", read_only=True)
     avatar = serializers.ImageField(source="user.avatar", read_only=True)
+    avatar_variants = ImageVariantsField('avatar', source='user')
     bio = serializers.CharField(source="user.bio", read_only=True)
     services_count = serializers.IntegerField(read_only=True)
     base_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
-    reviews_count = serializers.SerializerMethodField()
+    reviews_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = CreatorProfile
@@ -323,15 +308,13 @@ class CreatorProfileCatalogSerializer(serializers.ModelSerializer):
             "first_name",
             "last_name",
             "avatar",
+            "avatar_variants",
             "bio",
             "services_count",
             "base_price",
             "reviews_count",
         ]
 
-    def get_reviews_count(self, obj):  # TODO: заменить, когда появятся отзывы
-        return 0
-
 
 # ─────────────────── CREATOR PROFILE (detail / edit) ───────────────────
 class SocialLinkSerializer(serializers.ModelSerializer):
@@ -368,6 +351,8 @@ class CreatorProfileSerializer(serializers.ModelSerializer):
     username = serializers.SerializerMethodField(read_only=True)
     # Явно указываем поле avatar для обработки загружаемых файлов
     avatar = serializers.ImageField(required=False, allow_null=True)
+    avatar_variants = ImageVariantsField('avatar', source='user')
+    cover_image_variants = ImageVariantsField('cover_image')
     bio = serializers.SerializerMethodField(read_only=True)
     location = serializers.SerializerMethodField(read_only=True)
     social_links = SocialLinkSerializer(many=True, required=False)
@@ -385,12 +370,14 @@ class CreatorProfileSerializer(serializers.ModelSerializer):
             "full_name",
             "username",
             "avatar",  # Поле для загрузки аватара
+            "avatar_variants",
             "bio",
             "location",
             "specialization",
             "experience",
             "portfolio_link",
             "cover_image",
+            "cover_image_variants",
             "is_online",
             "available_for_hire",
             "social_links",
@@ -398,6 +385,7 @@ class CreatorProfileSerializer(serializers.ModelSerializer):
             "skills",
             "tags",
             "rating",
+            "reviews_count",
             "completed_orders",
             "services_count",
             "average_response_time",
@@ -408,6 +396,7 @@ class CreatorProfileSerializer(serializers.ModelSerializer):
         read_only_fields = [
             "id",
             "rating",
+            "reviews_count",
             "completed_orders",
             "created_at",
             "updated_at",
@@ -452,124 +441,44 @@ class CreatorProfileSerializer(serializers.ModelSerializer):
         import logging
         logger = logging.getLogger('django')
         
-        # Отладка входящих данных
-        logger.info(f"[CreatorProfileSerializer.update] Начало обновления профиля креатора {instance.id}")
-        logger.info(f"[CreatorProfileSerializer.update] Полученные данные: {validated_data.keys()}")
-        
-        # Проверяем наличие аватара в контексте
-        avatar_from_context = None
-        if self.context and 'avatar_file' in self.context:
-            avatar_from_context = self.context['avatar_file']
-            logger.info(f"[CreatorProfileSerializer.update] Найден аватар в контексте: {avatar_from_context}")
-        
         # Получаем social_links из social_links_data (для multipart/form-data)
         social_links_data = validated_data.pop("social_links_data", None)
         if social_links_data is not None:
-            logger.info(f"[CreatorProfileSerializer.update] Найдено social_links_data: {social_links_data}")
             social_links = social_links_data
         else:
             # Стандартная обработка (для application/json)
             social_links = validated_data.pop("social_links", None)
             
         tags_data = validated_data.pop("tags", None)
-        user_data = validated_data.pop("user", {})
+        validated_data.pop("user", None)
         bio = validated_data.pop("bio", None)
         location = validated_data.pop("location_write", None)
         avatar = validated_data.pop("avatar", None)
-        
-        # Если аватар не найден в validated_data, но есть в контексте, используем его
-        if avatar is None and avatar_from_context is not None:
-            avatar = avatar_from_context
-            logger.info(f"[CreatorProfileSerializer.update] Используем аватар из контекста: {avatar}")
-        
-        # Отладка полей после извлечения
-        logger.info(f"[CreatorProfileSerializer.update] user_data: {user_data}")
-        logger.info(f"[CreatorProfileSerializer.update] bio: {bio}")
-        logger.info(f"[CreatorProfileSerializer.update] location: {location}")
-        logger.info(f"[CreatorProfileSerializer.update] avatar получен: {avatar is not None}")
-        if avatar is not None:
-            logger.info(f"[CreatorProfileSerializer.update] Тип аватара: {type(avatar)}")
-            logger.info(f"[CreatorProfileSerializer.update] Имя файла: {getattr(avatar, 'name', 'None')}")
-            logger.info(f"[CreatorProfileSerializer.update] Размер файла: {getattr(avatar, 'size', 'None')} байт")
 
         # --- update CreatorProfile itself
+        # Изображения только проверяются и получают имя файла; обработка и
+        # запись выполняются после коммита (см. users.image_uploads)
+        if validated_data.get("cover_image") is not None:
+            assign_image(instance, "cover_image", validated_data.pop("cover_image"))
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
 
         # --- update related User
         user = instance.user
+        user_changed = []
         if bio is not None:
             user.bio = bio
+            user_changed.append("bio")
         if location is not None:
             user.location = location
-            
-        # Обработка аватара
-        # Используем ранее извлеченный аватар, а не пытаемся получить его из validated_data снова
+            user_changed.append("location")
         if avatar is not None:
-            logger.info(f"[CreatorProfileSerializer.update] avatar перед сохранением: {avatar} (тип: {type(avatar)})")
-            
-        
-        # Проверяем, что файл существует и доступен для чтения
-        try:
-            logger.info(f"[CreatorProfileSerializer.update] размер файла: {avatar.size} байт")
-            logger.info(f"[CreatorProfileSerializer.update] имя файла: {avatar.name}")
-            logger.info(f"[CreatorProfileSerializer.update] content_type: {avatar.content_type}")
-            
-            # Проверяем чтение файла
-            avatar.seek(0)  # Убедимся, что указатель в начале файла
-            data = avatar.read(1024)  # Прочитаем первый килобайт
-            avatar.seek(0)  # Вернем указатель в начало
-            logger.info(f"[CreatorProfileSerializer.update] файл успешно прочитан, размер прочитанных данных: {len(data)} байт")
-            
-            # Устанавливаем аватар
-            user.avatar = avatar
-            logger.info(f"[CreatorProfileSerializer.update] user.avatar после присвоения: {user.avatar} (тип: {type(user.avatar)})")
-            
-        except Exception as e:
-            logger.error(f"[CreatorProfileSerializer.update] ошибка при доступе к файлу: {e}")
-            # Попробуем сохранить файл вручную
-            try:
-                from django.core.files.storage import default_storage
-                from django.core.files.base import ContentFile
-                import os
-                import traceback
-                
-                logger.error(f"[CreatorProfileSerializer.update] Полный стек ошибки: {traceback.format_exc()}")
-                
-                # Сохраняем файл во временный файл
-                temp_path = default_storage.save(f"avatars/temp_{avatar.name}", ContentFile(avatar.read()))
-                avatar.seek(0)  # Возвращаем указатель в начало файла
-                logger.info(f"[CreatorProfileSerializer.update] файл успешно сохранен во временный файл: {temp_path}")
-                
-                # Устанавливаем аватар
-                user.avatar = avatar
-                logger.info(f"[CreatorProfileSerializer.update] user.avatar после присвоения: {user.avatar} (тип: {type(user.avatar)})")
-            except Exception as e2:
-                logger.error(f"[CreatorProfileSerializer.update] ошибка при ручном сохранении файла: {e2}")
-                logger.error(f"[CreatorProfileSerializer.update] Полный стек ошибки: {traceback.format_exc()}")
-        
-        # Сохраняем пользователя сразу после установки аватара
-        try:
-            user.save()
-            logger.info(f"[CreatorProfileSerializer.update] пользователь сохранен с аватаром")
-            
-            # Проверяем, что файл сохранен
-            if user.avatar and hasattr(user.avatar, 'path'):
-                logger.info(f"[CreatorProfileSerializer.update] путь к файлу аватара: {user.avatar.path}")
-                
-                # Проверяем существование файла на диске
-                import os
-                if os.path.exists(user.avatar.path):
-                    logger.info(f"[CreatorProfileSerializer.update] файл аватара существует на диске")
-                else:
-                    logger.error(f"[CreatorProfileSerializer.update] файл аватара НЕ существует на диске!")
-            else:
-                logger.error(f"[CreatorProfileSerializer.update] после сохранения user.avatar отсутствует или не имеет path")
-        except Exception as e:
-            import traceback
-            logger.error(f"[CreatorProfileSerializer.update] ошибка при сохранении пользователя: {e}")
-            logger.error(f"[CreatorProfileSerializer.update] Полный стек ошибки: {traceback.format_exc()}")
+            assign_image(user, "avatar", avatar)
+            user_changed += ["avatar", "avatar_variants"]
+        if user_changed:
+            user.save(update_fields=user_changed)
+
         if tags_data is not None:
             from django.utils.text import slugify
             tags_to_set = []
@@ -735,6 +644,7 @@ class CreatorProfileDetailSerializer(CreatorProfileSerializer):
             "skills",
             "tags",
             "rating",
+            "reviews_count",
             "completed_orders",
             "services_count",
             "available_for_hire",
@@ -746,7 +656,7 @@ class CreatorProfileDetailSerializer(CreatorProfileSerializer):
         read_only_fields = [
             "id",
             "rating",
-            "review_count",
+            "reviews_count",
             "completed_orders",
             "created_at",
             "updated_at",
@@ -767,10 +677,11 @@ class PortfolioImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
     # Заменяем ImageField на FileField с кастомным валидатором для поддержки SVG
     image = serializers.FileField(validators=[validate_image_or_svg], write_only=True)
+    image_variants = ImageVariantsField('image')
 
     class Meta:
         model = PortfolioImage
-        fields = ["id", "portfolio_item", "image", "image_url", "caption", "order"]
+        fields = ["id", "portfolio_item", "image", "image_url", "image_variants", "caption", "order"]
         # Убираю portfolio_item из read_only_fields, так как контроллер ожидает это поле в запросе
         read_only_fields = []
 
@@ -799,6 +710,7 @@ class PortfolioItemSerializer(serializers.ModelSerializer):
     # Заменяем ImageField на FileField с кастомным валидатором для поддержки SVG
     cover_image = serializers.FileField(validators=[validate_image_or_svg], write_only=True)
     cover_image_url = serializers.SerializerMethodField()
+    cover_image_variants = ImageVariantsField('cover_image')
 
     class Meta:
         model = PortfolioItem
@@ -809,6 +721,7 @@ class PortfolioItemSerializer(serializers.ModelSerializer):
             "description",
             "cover_image",
             "cover_image_url",
+            "cover_image_variants",
             "external_url",
             "images",
             "uploaded_images",
@@ -867,9 +780,11 @@ class PortfolioItemSerializer(serializers.ModelSerializer):
 
 # ───────────────────────── SERVICES ─────────────────────────
 class ServiceImageSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField('image')
+
     class Meta:
         model = ServiceImage
-        fields = ["id", "image", "caption", "order"]
+        fields = ["id", "image", "image_variants", "caption", "order"]
 
 
 class ServiceSerializer(serializers.ModelSerializer):
@@ -0,0 +1,177 @@
+"""
+Обработчики сигналов приложения users.
+
+Запускают обработку загруженных изображений профиля (users.image_uploads)
+и построение уменьшенных копий (users.image_variants) после смены файла,
+удаляют копии вместе с объектом. Поддерживают поисковые документы
+креаторов (users.search) и статистику услуг креатора (users.stats) в
+актуальном состоянии. Запоминают прежний профиль услуги
+(Service._previous_creator_profile_id), чтобы при переносе услуги
+пересчитать оба профиля.
+"""
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.models import Tag
+
+from .image_uploads import pop_pending_uploads, store_image
+from .image_variants import (
+    delete_variant_files, iter_image_fields, needs_variants, pool,
+    schedule_variants, variants_field_name,
+)
+from .models import CreatorProfile, Service, User
+from .search import update_creator_search_document, update_search_documents
+from .stats import refresh_service_stats
+
+
+def _schedule_store(instance, field_name, pending):
+    model, pk = type(instance), instance.pk
+    # pending: (имя, путь копии загрузки, прежнее имя, прежние варианты)
+    transaction.on_commit(lambda: pool.submit(store_image, model, pk, field_name, *pending))
+
+
+def _connect(model, field_name):
+    def on_save(sender, instance, raw=False, **kwargs):
+        # При загрузке фикстур (raw) файлы могут отсутствовать
+        if raw:
+            return
+        pending = pop_pending_uploads(instance)
+        for pending_field, upload in pending.items():
+            _schedule_store(instance, pending_field, upload)
+        if field_name not in pending and needs_variants(instance, field_name):
+            schedule_variants(instance, field_name)
+
+    def on_delete(sender, instance, **kwargs):
+        field_file = getattr(instance, field_name)
+        variants = getattr(instance, variants_field_name(field_name))
+        if variants:
+            transaction.on_commit(lambda: delete_variant_files(field_file.storage, variants))
+
+    uid = f'image_variants:{model._meta.label}.{field_name}'
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=uid)
+
+
+for _model, _field_name in iter_image_fields():
+    _connect(_model, _field_name)
+
+
+# ------ поисковые документы креаторов -----------------------------------
+
+# Поля, от которых зависит поисковый документ (для save(update_fields=...))
+PROFILE_SEARCH_FIELDS = {'nickname', 'specialization'}
+USER_SEARCH_FIELDS = {'username', 'first_name', 'last_name'}
+SERVICE_SEARCH_FIELDS = {'title', 'is_active', 'creator_profile'}
+
+
+def _schedule_search_update(profile_ids):
+    profile_ids = [pk for pk in profile_ids if pk]
+    if profile_ids:
+        transaction.on_commit(
+            lambda: update_search_documents(CreatorProfile.objects.filter(pk__in=profile_ids))
+        )
+
+
+@receiver(post_save, sender=CreatorProfile)
+def update_creator_search_on_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Пересчитывает поисковый документ после сохранения профиля."""
+    if raw or (update_fields is not None and not PROFILE_SEARCH_FIELDS & set(update_fields)):
+        return
+    profile_id = instance.pk
+    transaction.on_commit(lambda: update_creator_search_document(profile_id))
+
+
+@receiver(post_save, sender=User)
+def update_creator_search_on_user_save(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Пересчитывает документ профиля креатора после смены имени пользователя."""
+    if raw or created or (update_fields is not None and not USER_SEARCH_FIELDS & set(update_fields)):
+        return
+    user_id = instance.pk
+    transaction.on_commit(lambda: update_search_documents(CreatorProfile.objects.filter(user_id=user_id)))
+
+
+@receiver(m2m_changed, sender=CreatorProfile.tags.through)
+def update_creator_search_on_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """Пересчитывает поисковые документы при изменении тегов профиля."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            _schedule_search_update([instance.pk])
+        return
+
+    # Изменение со стороны тега: tag.creators.add(...) / tag.creators.clear()
+    if action == 'pre_clear':
+        instance._cleared_creator_ids = list(instance.creators.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        _schedule_search_update(getattr(instance, '_cleared_creator_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        _schedule_search_update(pk_set or ())
+
+
+@receiver(post_save, sender=Tag)
+def update_creator_search_on_tag_rename(sender, instance, created, **kwargs):
+    """Пересчитывает документы креаторов с тегом после его переименования (см. core.signals)."""
+    if created or getattr(instance, '_previous_name', instance.name) == instance.name:
+        return
+    tag_id = instance.pk
+    transaction.on_commit(lambda: update_search_documents(CreatorProfile.objects.filter(tags=tag_id)))
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_tag_creators(sender, instance, **kwargs):
+    """Запоминает креаторов удаляемого тега: связи удаляются без m2m_changed."""
+    instance._deleted_creator_ids = list(instance.creators.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def update_creator_search_on_tag_delete(sender, instance, **kwargs):
+    """Убирает название удаленного тега из документов креаторов."""
+    _schedule_search_update(getattr(instance, '_deleted_creator_ids', []))
+
+
+@receiver(pre_save, sender=Service)
+def remember_service_profile(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Запоминает прежний профиль услуги: при переносе пересчитываются оба креатора."""
+    previous_id = None
+    if not raw and instance.pk and (update_fields is None or 'creator_profile' in update_fields):
+        previous_id = Service.objects.filter(pk=instance.pk).values_list('creator_profile_id', flat=True).first()
+    instance._previous_creator_profile_id = previous_id
+
+
+def _service_profile_ids(instance):
+    """Текущий и (при переносе услуги) прежний профиль креатора."""
+    return {instance.creator_profile_id, getattr(instance, '_previous_creator_profile_id', None)}
+
+
+@receiver(post_save, sender=Service)
+def update_creator_search_on_service_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Пересчитывает документ креатора (и прежнего владельца услуги) после изменения услуги."""
+    if raw or (update_fields is not None and not SERVICE_SEARCH_FIELDS & set(update_fields)):
+        return
+    _schedule_search_update(_service_profile_ids(instance))
+
+
+@receiver(post_delete, sender=Service)
+def update_creator_search_on_service_delete(sender, instance, **kwargs):
+    """Убирает название удаленной услуги из документа креатора."""
+    _schedule_search_update([instance.creator_profile_id])
+
+
+# ------ статистика услуг креатора ---------------------------------------
+
+SERVICE_STATS_FIELDS = {'price', 'creator_profile'}
+
+
+@receiver(post_save, sender=Service)
+def refresh_service_stats_on_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Пересчитывает services_count и base_price креатора (и прежнего владельца) в той же транзакции."""
+    if raw or (update_fields is not None and not SERVICE_STATS_FIELDS & set(update_fields)):
+        return
+    refresh_service_stats(_service_profile_ids(instance))
+
+
+@receiver(post_delete, sender=Service)
+def refresh_service_stats_on_delete(sender, instance, **kwargs):
+    """Пересчитывает services_count и base_price креатора после удаления услуги."""
+    refresh_service_stats([instance.creator_profile_id])
@@ -0,0 +1,117 @@
+"""
+Материализованная статистика креатора для каталога.
+
+Каталог сортирует и фильтрует креаторов по цене, рейтингу и популярности,
+поэтому эти значения хранятся в колонках CreatorProfile (с индексами), а не
+считаются агрегатами по услугам и отзывам на каждый запрос:
+
+- services_count, base_price — число услуг и минимальная цена услуги (0,
+  если услуг нет). Пересчитываются одним UPDATE для затронутого креатора
+  при сохранении и удалении услуги (сигналы, см. users.signals);
+- reviews_count, rating_sum — число отзывов и сумма оценок, rating — их
+  среднее. Меняются приращениями (F-выражения) в той же транзакции, что и
+  отзыв (см. orders.models.Review), без повторной агрегации всех отзывов.
+
+Команда recompute_creator_stats пересчитывает все значения с нуля.
+"""
+
+from decimal import Decimal
+
+from django.apps import apps
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Min, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.db.models.lookups import GreaterThan
+
+from .models import CreatorProfile, Service
+
+ZERO = Decimal('0.00')
+PRICE_FIELD = DecimalField(max_digits=10, decimal_places=2)
+RATING_FIELD = DecimalField(max_digits=3, decimal_places=2)
+
+
+def _aggregate(queryset, group_field, aggregate, output_field, default):
+    """Коррелированный подзапрос с агрегатом по группе (default, если строк нет)."""
+    values = (
+        queryset.order_by()
+        .values(group_field)
+        .annotate(value=aggregate)
+        .values('value')
+    )
+    return Coalesce(Subquery(values), Value(default), output_field=output_field)
+
+
+def _average(rating_sum, reviews_count):
+    """Выражение rating_sum / reviews_count (0 без отзывов)."""
+    return Case(
+        When(
+            GreaterThan(reviews_count, 0),
+            then=Cast(rating_sum, DecimalField(max_digits=12, decimal_places=4)) / reviews_count,
+        ),
+        default=Value(ZERO),
+        output_field=RATING_FIELD,
+    )
+
+
+# ------ услуги ------------------------------------------------------------
+
+def service_stats_expressions():
+    """Выражения services_count и base_price по услугам креатора."""
+    services = Service.objects.filter(creator_profile=OuterRef('pk'))
+    return {
+        'services_count': _aggregate(services, 'creator_profile', Count('pk'), IntegerField(), 0),
+        'base_price': _aggregate(services, 'creator_profile', Min('price'), PRICE_FIELD, ZERO),
+    }
+
+
+def refresh_service_stats(profile_ids):
+    """Пересчитывает статистику услуг креаторов одним UPDATE."""
+    profile_ids = {pk for pk in profile_ids if pk}
+    if not profile_ids:
+        return 0
+    return CreatorProfile.objects.filter(pk__in=profile_ids).update(**service_stats_expressions())
+
+
+# ------ отзывы ------------------------------------------------------------
+
+def apply_review_delta(recipient_id, rating_delta, count_delta):
+    """
+    Применяет изменение отзывов креатора к счетчикам и рейтингу.
+
+    Args:
+        recipient_id: id пользователя-креатора (Review.recipient).
+        rating_delta: Изменение суммы оценок.
+        count_delta: Изменение числа отзывов (1, -1 или 0).
+
+    Returns:
+        int: Число обновленных профилей (0, если получатель не креатор).
+    """
+    if not recipient_id or not (rating_delta or count_delta):
+        return 0
+    rating_sum = F('rating_sum') + rating_delta
+    reviews_count = F('reviews_count') + count_delta
+    # В UPDATE все выражения видят старые значения строки, поэтому среднее
+    # считается по тем же приращениям
+    return CreatorProfile.objects.filter(user_id=recipient_id).update(
+        rating_sum=rating_sum,
+        reviews_count=reviews_count,
+        rating=_average(F('rating_sum') + rating_delta, F('reviews_count') + count_delta),
+    )
+
+
+def review_stats_expressions():
+    """Выражения reviews_count, rating_sum и rating по всем отзывам креатора."""
+    reviews = apps.get_model('orders', 'Review').objects.filter(recipient=OuterRef('user_id'))
+    rating_sum = _aggregate(reviews, 'recipient', Sum('rating'), IntegerField(), 0)
+    reviews_count = _aggregate(reviews, 'recipient', Count('pk'), IntegerField(), 0)
+    return {
+        'rating_sum': rating_sum,
+        'reviews_count': reviews_count,
+        'rating': _average(rating_sum, reviews_count),
+    }
+
+
+def recompute_stats(queryset=None):
+    """Пересчитывает всю статистику профилей queryset (по умолчанию — всех) с нуля."""
+    if queryset is None:
+        queryset = CreatorProfile.objects.all()
+    return queryset.update(**service_stats_expressions(), **review_stats_expressions())
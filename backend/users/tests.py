@@ -1,3 +1,153 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import BytesIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework import serializers
+
+from .image_uploads import PENDING_ATTR, assign_image, inspect_image, store_image
+from .image_variants import build_variants, delete_variant_files, variant_name, variant_urls
+from .models import CreatorProfile, Service, User
+
+
+def _png(size=(64, 64), color=(200, 30, 30)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ProfileImageUploadTests(TestCase):
+    """Загрузка аватара: проверка в запросе и откат поля при ошибке записи."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.spool = os.path.join(self.root, 'spool')
+        override = override_settings(MEDIA_ROOT=os.path.join(self.root, 'media'), PROFILE_IMAGE_SPOOL_DIR=self.spool)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.user = User.objects.create_user(
+            username='avatar_user', email='avatar_user@example.com', password='x',
+            avatar='avatars/old.jpg',
+            avatar_variants={'source': 'avatars/old.jpg', 'variants': {'thumb': {}}},
+        )
+
+    def test_truncated_image_is_rejected(self):
+        data = _png((256, 256))
+        upload = SimpleUploadedFile('broken.png', data[:len(data) // 2], content_type='image/png')
+        with self.assertRaises(serializers.ValidationError):
+            inspect_image(upload)
+
+    def test_failed_store_restores_previous_image(self):
+        assign_image(self.user, 'avatar', SimpleUploadedFile('new.png', _png(), content_type='image/png'))
+        name, path, previous_name, previous_variants = self.user.__dict__[PENDING_ATTR]['avatar']
+        self.assertTrue(os.path.exists(path))
+        with self.captureOnCommitCallbacks():
+            self.user.save()
+
+        with mock.patch.object(FileSystemStorage, 'save', side_effect=OSError('disk full')), \
+                self.assertLogs('users.image_uploads', 'WARNING'):
+            self.assertIsNone(
+                store_image(User, self.user.pk, 'avatar', name, path, previous_name, previous_variants)
+            )
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar.name, 'avatars/old.jpg')
+        self.assertEqual(self.user.avatar_variants['source'], 'avatars/old.jpg')
+        self.assertFalse(os.path.exists(path))
+
+
+class ImageVariantNamingTests(TestCase):
+    """Варианты разных оригиналов с одинаковой основой имени не пересекаются."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.storage = FileSystemStorage(location=self.root)
+
+    def _upload(self, name, color):
+        return SimpleNamespace(storage=self.storage, name=self.storage.save(name, BytesIO(_png((320, 320), color))))
+
+    def _thumb_color(self, description):
+        with self.storage.open(description['variants']['thumb']['fallback'], 'rb') as fh:
+            return Image.open(fh).convert('RGB').getpixel((10, 10))
+
+    def test_jpg_and_png_with_same_stem_keep_own_variants(self):
+        self.assertNotEqual(
+            variant_name('portfolio/images/work.jpg', 'thumb', 'webp'),
+            variant_name('portfolio/images/work.png', 'thumb', 'webp'),
+        )
+        # Оригинал, чье имя совпало бы с вариантом по старой схеме имен
+        lookalike = self._upload('portfolio/images/work.thumb.jpg', (0, 200, 0))
+        first = build_variants(self._upload('portfolio/images/work.jpg', (200, 0, 0)))
+        second = build_variants(self._upload('portfolio/images/work.png', (0, 0, 200)))
+
+        self.assertTrue(self.storage.exists(lookalike.name))
+        self.assertGreater(self._thumb_color(first)[0], 150)
+        self.assertGreater(self._thumb_color(second)[2], 150)
+
+        delete_variant_files(self.storage, first)
+        self.assertFalse(self.storage.exists(first['variants']['thumb']['webp']))
+        self.assertTrue(self.storage.exists(second['variants']['thumb']['webp']))
+
+    def test_files_outside_variants_dir_are_never_deleted(self):
+        original = self._upload('portfolio/images/work.jpg', (200, 0, 0))
+        other = self._upload('portfolio/images/work.thumb.jpg', (0, 200, 0))
+        legacy = {
+            'source': original.name,
+            'variants': {'thumb': {'webp': other.name, 'fallback': other.name, 'width': 160, 'height': 160}},
+        }
+        delete_variant_files(self.storage, legacy)
+        self.assertTrue(self.storage.exists(other.name))
+        # Описание старой схемы имен в ответы API не попадает
+        self.assertIsNone(variant_urls(SimpleNamespace(name=original.name, storage=self.storage), legacy))
+
+
+class ServiceTransferStatsTests(TestCase):
+    """Перенос услуги в другой профиль пересчитывает статистику и поиск обоих креаторов."""
+
+    def setUp(self):
+        self.profiles = [
+            CreatorProfile.objects.create(
+                user=User.objects.create_user(
+                    username=f'service_creator_{i}', email=f'service_creator_{i}@example.com', password='x',
+                ),
+                specialization='Видео',
+                experience='3 года',
+            )
+            for i in range(2)
+        ]
+        self.service = Service.objects.create(
+            creator_profile=self.profiles[0], title='Монтаж', description='Описание', price=Decimal('500.00'),
+        )
+
+    def _stats(self, profile):
+        profile.refresh_from_db(fields=['services_count', 'base_price'])
+        return profile.services_count, profile.base_price
+
+    def test_moving_service_refreshes_old_and_new_profile(self):
+        self.assertEqual(self._stats(self.profiles[0]), (1, Decimal('500.00')))
+
+        self.service.creator_profile = self.profiles[1]
+        with mock.patch('users.signals.update_search_documents') as update_search:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.service.save()
+
+        self.assertEqual(self._stats(self.profiles[0]), (0, Decimal('0')))
+        self.assertEqual(self._stats(self.profiles[1]), (1, Decimal('500.00')))
+        updated = {profile.pk for call in update_search.call_args_list for profile in call.args[0]}
+        self.assertEqual(updated, {profile.pk for profile in self.profiles})
+
+    def test_update_fields_without_profile_skips_lookup(self):
+        self.service.price = Decimal('300.00')
+        with self.assertNumQueries(2):
+            # UPDATE услуги и пересчет статистики, без запроса прежнего профиля
+            self.service.save(update_fields=['price'])
+        self.assertEqual(self._stats(self.profiles[0]), (1, Decimal('300.00')))
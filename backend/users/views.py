@@ -7,8 +7,7 @@ import logging
 
 from django.utils.encoding import force_str
 from django.utils.http import urlsafe_base64_decode
-from django.db.models import Count, Min, Value, DecimalField, Q
-from django.db.models.functions import Coalesce
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets, generics, permissions
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
@@ -16,6 +15,8 @@ from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.exceptions import ValidationError
 
+from core import tag_index
+
 from .models import (
     User,
     ClientProfile,
@@ -38,6 +39,8 @@ from .serializers import (
     ServiceSerializer,
     FavoriteCreatorSerializer,
 )
+from .catalog import CreatorCatalogFilter, get_sort, sort_options_data
+from .search import CreatorSearchFilter
 from .tokens import email_verification_token
 from .utils import send_verification_email
 
@@ -290,6 +293,11 @@ class CreatorProfileViewSet(viewsets.ModelViewSet):
     serializer_class = CreatorProfileSerializer
     permission_classes = [IsAuthenticated, IsVerifiedUser]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
+    # ?ordering= и диапазоны цены, рейтинга и времени работы (users.catalog);
+    # ?search= — поиск по поисковому документу креатора, сортирует по релевантности
+    filter_backends = [DjangoFilterBackend, CreatorCatalogFilter, CreatorSearchFilter]
+    # Параметры фильтра по тегам (см. get_tag_filter)
+    TAG_FILTER_PARAMS = {"tag_ids", "tag_match_type", "exclude_tag_ids"}
     
     # Переопределяем стандартный метод partial_update
     def partial_update(self, request, *args, **kwargs):
@@ -297,240 +305,45 @@ class CreatorProfileViewSet(viewsets.ModelViewSet):
         Обновляет профиль креатора с поддержкой multipart/form-data.
         
         Поддерживает обработку вложенных JSON-полей и загрузку файлов.
+        Аватар можно передать как avatar или user.avatar; файл проверяется
+        в запросе, а обработка и запись выполняются после ответа
+        (см. users.image_uploads).
         """
-        import os
-        from django.conf import settings
-        
         instance = self.get_object()
-        print(f"DEBUG - CreatorProfileViewSet.partial_update - начало обработки для профиля {instance.id}")
-        
-        # Отладка: проверяем тип запроса и наличие файлов
-        print(f"DEBUG - CreatorProfileViewSet.partial_update - Content-Type: {request.content_type}")
-        print(f"DEBUG - CreatorProfileViewSet.partial_update - Файлы в запросе: {request.FILES.keys()}")
-        
-        # Проверяем директорию для сохранения аватаров
-        avatar_dir = os.path.join(settings.MEDIA_ROOT, 'avatars')
-        print(f"DEBUG - CreatorProfileViewSet.partial_update - директория для аватаров: {avatar_dir}")
-        print(f"DEBUG - CreatorProfileViewSet.partial_update - директория существует: {os.path.exists(avatar_dir)}")
-        
-        # Создаем директорию, если она не существует
-        if not os.path.exists(avatar_dir):
-            try:
-                os.makedirs(avatar_dir)
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - создана директория: {avatar_dir}")
-            except Exception as e:
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - ошибка при создании директории: {e}")
-        
-        # Проверяем права доступа к директории
-        try:
-            print(f"DEBUG - CreatorProfileViewSet.partial_update - права доступа к директории: {oct(os.stat(avatar_dir).st_mode)[-3:]}")
-        except Exception as e:
-            print(f"DEBUG - CreatorProfileViewSet.partial_update - ошибка при проверке прав доступа: {e}")
         
         # Обработка multipart/form-data с вложенными JSON-полями
         processed_data = {}
-        
-        # Обрабатываем обычные поля из request.data
         for key, value in request.data.items():
-            # Обработка вложенных JSON-полей
             if key == 'user' and isinstance(value, str):
                 try:
-                    print(f"DEBUG - Десериализация user из строки JSON: {value}")
-                    user_data = json.loads(value)
-                    processed_data['user'] = user_data
-                    
-                    # Если аватар еще не добавлен в processed_data, добавляем его
-                    if 'avatar' not in processed_data and 'user.avatar' in request.FILES:
-                        processed_data['avatar'] = request.FILES['user.avatar']
-                        print(f"DEBUG - Обработка user.avatar: {request.FILES['user.avatar']} (тип: {type(request.FILES['user.avatar'])}), размер: {request.FILES['user.avatar'].size} байт")
-                except Exception as e:
-                    print(f"DEBUG - Ошибка при десериализации user: {e}")
+                    processed_data['user'] = json.loads(value)
+                except ValueError:
                     # Если не удалось десериализовать, передаем как есть
+                    logger.debug("Поле user не является JSON: %r", value)
                     processed_data[key] = value
-                    
-                    # Если аватар еще не добавлен в processed_data, добавляем его
-                    if 'avatar' not in processed_data and 'user.avatar' in request.FILES:
-                        processed_data['avatar'] = request.FILES['user.avatar']
-                        print(f"DEBUG - Обработка user.avatar: {request.FILES['user.avatar']} (тип: {type(request.FILES['user.avatar'])}), размер: {request.FILES['user.avatar'].size} байт")
-            # Остальные поля передаем как есть
             else:
                 processed_data[key] = value
         
-        # Добавляем отладочную информацию для аватара и обрабатываем файлы
-        if 'avatar' in request.FILES:
-            print(f"DEBUG - CreatorProfileViewSet.partial_update - avatar в request.FILES: {request.FILES['avatar']}")
-            print(f"DEBUG - CreatorProfileViewSet.partial_update - тип avatar: {type(request.FILES['avatar'])}")
-            print(f"DEBUG - CreatorProfileViewSet.partial_update - размер avatar: {request.FILES['avatar'].size} байт")
-            print(f"DEBUG - CreatorProfileViewSet.partial_update - имя файла: {request.FILES['avatar'].name}")
-            print(f"DEBUG - CreatorProfileViewSet.partial_update - content_type: {request.FILES['avatar'].content_type}")
-            processed_data['avatar'] = request.FILES['avatar']
-        elif 'user.avatar' in request.FILES:
-            print(f"DEBUG - CreatorProfileViewSet.partial_update - user.avatar в request.FILES: {request.FILES['user.avatar']}")
-            print(f"DEBUG - CreatorProfileViewSet.partial_update - тип user.avatar: {type(request.FILES['user.avatar'])}")
-            print(f"DEBUG - CreatorProfileViewSet.partial_update - размер user.avatar: {request.FILES['user.avatar'].size} байт")
-            print(f"DEBUG - CreatorProfileViewSet.partial_update - имя файла: {request.FILES['user.avatar'].name}")
-            print(f"DEBUG - CreatorProfileViewSet.partial_update - content_type: {request.FILES['user.avatar'].content_type}")
+        if 'avatar' not in request.FILES and 'user.avatar' in request.FILES:
             processed_data['avatar'] = request.FILES['user.avatar']
-            
-            # Проверяем, что файл корректно читается
-            try:
-                file_content = request.FILES['user.avatar'].read(1024)  # Читаем первые 1024 байта для проверки
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - файл успешно прочитан, первые байты: {file_content[:20]}")
-                request.FILES['user.avatar'].seek(0)  # Возвращаем указатель в начало файла
-            except Exception as e:
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - ошибка при чтении файла: {e}")
-                
-            # Проверяем, что файл корректно открывается
-            try:
-                from PIL import Image
-                img = Image.open(request.FILES['user.avatar'])
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - изображение успешно открыто, размер: {img.size}")
-                request.FILES['user.avatar'].seek(0)  # Возвращаем указатель в начало файла
-            except Exception as e:
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - ошибка при открытии изображения: {e}")
-                
-            # Проверяем, что файл корректно сохраняется
-            try:
-                from django.core.files.storage import default_storage
-                from django.core.files.base import ContentFile
-                path = default_storage.save(f"avatars/test_{request.FILES['user.avatar'].name}", ContentFile(request.FILES['user.avatar'].read()))
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - файл успешно сохранен по пути: {path}")
-                request.FILES['user.avatar'].seek(0)  # Возвращаем указатель в начало файла
-            except Exception as e:
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - ошибка при сохранении файла: {e}")
-                
-            # Проверяем, что файл корректно копируется
-            try:
-                import shutil
-                import tempfile
-                with tempfile.NamedTemporaryFile(delete=False) as tmp:
-                    shutil.copyfileobj(request.FILES['user.avatar'], tmp)
-                    print(f"DEBUG - CreatorProfileViewSet.partial_update - файл успешно скопирован во временный файл: {tmp.name}")
-                request.FILES['user.avatar'].seek(0)  # Возвращаем указатель в начало файла
-            except Exception as e:
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - ошибка при копировании файла: {e}")
-                
-            # Проверяем, что файл корректно передается в processed_data
-            try:
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - файл в processed_data: {processed_data['avatar']}")
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - тип файла в processed_data: {type(processed_data['avatar'])}")
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - размер файла в processed_data: {processed_data['avatar'].size} байт")
-            except Exception as e:
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - ошибка при проверке файла в processed_data: {e}")
-                
-            # Проверяем, что файл корректно передается в сериализатор
-            try:
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - файл перед передачей в сериализатор: {processed_data['avatar']}")
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - тип файла перед передачей в сериализатор: {type(processed_data['avatar'])}")
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - размер файла перед передачей в сериализатор: {processed_data['avatar'].size} байт")
-            except Exception as e:
-                print(f"DEBUG - CreatorProfileViewSet.partial_update - ошибка при проверке файла перед передачей в сериализатор: {e}")
-        
-        print(f"DEBUG - CreatorProfileViewSet.partial_update - ключи в processed_data: {processed_data.keys()}")
-        if 'avatar' in processed_data:
-            print(f"DEBUG - CreatorProfileViewSet.partial_update - avatar в processed_data: {processed_data['avatar']}")
+        processed_data.pop('user.avatar', None)
         
-        # Обработка social_links
-        if 'social_links' in processed_data and isinstance(processed_data['social_links'], str):
+        # social_links приходит строкой JSON в multipart-запросе
+        if isinstance(processed_data.get('social_links'), str):
             try:
-                print("DEBUG - Текущие social_links в БД:", list(instance.social_links.all().values()))
-                print("DEBUG - Десериализация social_links из строки JSON:", processed_data['social_links'])
-                social_links_data = json.loads(processed_data['social_links'])
-                print("DEBUG - После десериализации social_links_data:", social_links_data)
-                
-                # Добавляем social_links_data в обработанные данные
-                processed_data['social_links_data'] = social_links_data
-                # Удаляем исходное поле social_links
-                del processed_data['social_links']
-            except Exception as e:
-                print(f"DEBUG - Ошибка десериализации social_links: {e}")
-        
-        print("DEBUG - Обработанные данные перед передачей сериализатору:", processed_data)
-        
-        # Создаем контекст для передачи аватара в сериализатор
-        context = self.get_serializer_context()
-        
-        # Если аватар есть в processed_data, добавляем его в контекст
-        if 'avatar' in processed_data:
-            context['avatar_file'] = processed_data['avatar']
-            logger.info(f"[CreatorProfileViewSet.partial_update] Добавлен аватар в контекст: {processed_data['avatar']}")
-        
-        serializer = self.get_serializer(instance, data=processed_data, partial=True, context=context)
-        valid = serializer.is_valid(raise_exception=False)
-        
-        if not valid:
-            logger.error(f"[CreatorProfileViewSet.partial_update] Ошибки валидации: {serializer.errors}")
-            raise ValidationError(serializer.errors)
-        
-        # Проверяем, что аватар попал в validated_data
-        logger.info(f"[CreatorProfileViewSet.partial_update] Ключи в validated_data: {serializer.validated_data.keys()}")
-        if 'avatar' in serializer.validated_data:
-            logger.info(f"[CreatorProfileViewSet.partial_update] Аватар в validated_data: {serializer.validated_data['avatar']}")
-        else:
-            logger.warning(f"[CreatorProfileViewSet.partial_update] Аватар НЕ попал в validated_data, но есть в контексте: {'avatar_file' in context}")
-            
-        # Добавляем аватар в validated_data, если его там нет, но он есть в контексте
-        if 'avatar' not in serializer.validated_data and 'avatar_file' in context:
-            logger.info(f"[CreatorProfileViewSet.partial_update] Добавляем аватар из контекста в validated_data")
-            serializer.validated_data['avatar'] = context['avatar_file']
-            print(f"DEBUG - Тип аватара в validated_data: {type(serializer.validated_data['avatar'])}")
-            print(f"DEBUG - Размер аватара в validated_data: {serializer.validated_data['avatar'].size} байт")
-        else:
-            print("DEBUG - Аватар отсутствует в validated_data")
-        
-        # Выполняем обновление
-        try:
-            self.perform_update(serializer)
-            print("DEBUG - Обновление успешно выполнено")
-        except Exception as e:
-            print(f"DEBUG - Ошибка при выполнении обновления: {e}")
-            raise
-        
-        # Проверим, что social_links сохранились
-        instance.refresh_from_db()
-        print("DEBUG - После сохранения, social_links:", list(instance.social_links.all().values()))
-        
-        # Проверяем, сохранился ли аватар
-        user = instance.user
-        user.refresh_from_db()
-        print(f"DEBUG - Аватар после сохранения: {user.avatar}")
-        
-        # Проверяем наличие файла на диске
-        import os
-        from django.conf import settings
+                processed_data['social_links_data'] = json.loads(processed_data.pop('social_links'))
+            except ValueError as e:
+                raise ValidationError({'social_links': f'Некорректный JSON: {e}'})
         
-        if user.avatar:
-            try:
-                avatar_path = user.avatar.path
-                print(f"DEBUG - Путь к файлу аватара: {avatar_path}")
-                print(f"DEBUG - Файл существует: {os.path.exists(avatar_path)}")
-                
-                if os.path.exists(avatar_path):
-                    print(f"DEBUG - Размер файла: {os.path.getsize(avatar_path)} байт")
-                    print(f"DEBUG - Права доступа к файлу: {oct(os.stat(avatar_path).st_mode)[-3:]}")
-                    
-                    # Проверяем URL аватара
-                    print(f"DEBUG - URL аватара: {user.avatar.url}")
-                    
-                    # Проверяем доступность файла через URL
-                    media_url = settings.MEDIA_URL.lstrip('/')
-                    media_root = settings.MEDIA_ROOT
-                    relative_path = os.path.relpath(avatar_path, media_root)
-                    url_path = os.path.join(media_url, relative_path)
-                    print(f"DEBUG - Относительный путь к файлу: {url_path}")
-                else:
-                    print("DEBUG - Файл не существует на диске!")
-            except Exception as e:
-                print(f"DEBUG - Ошибка при проверке файла аватара: {e}")
-        else:
-            print("DEBUG - Аватар не был сохранен в модели пользователя!")
+        serializer = self.get_serializer(instance, data=processed_data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
         
         if getattr(instance, "_prefetched_objects_cache", None):
             # Если объект имеет предзагруженные отношения, мы должны их очистить
             # поскольку они не будут автоматически обновлены
             instance._prefetched_objects_cache = {}
         
-        print("DEBUG - CreatorProfileViewSet.partial_update - ЗАВЕРШЕНО")
         return Response(serializer.data)
 
     queryset = CreatorProfile.objects.all()
@@ -543,27 +356,45 @@ class CreatorProfileViewSet(viewsets.ModelViewSet):
             return CreatorProfileDetailSerializer
         return self.serializer_class
 
+    @property
+    def cursor_ordering(self):
+        # Ключ курсорной пагинации (?cursor=...) — ключ выбранной сортировки каталога
+        return get_sort(self.request)
+
+    def get_tag_filter(self):
+        """
+        Условия по тегам из параметров запроса: (any_of, all_of, none_of).
+
+        tag_ids — id тегов через запятую, tag_match_type=any (любой из, по
+        умолчанию) или all (все); exclude_tag_ids — ни одного из тегов.
+        Некорректные значения игнорируются.
+        """
+        params = self.request.query_params
+        try:
+            tag_ids = [int(tag_id) for tag_id in params.get("tag_ids", "").split(",") if tag_id.strip()]
+            exclude_tag_ids = [
+                int(tag_id) for tag_id in params.get("exclude_tag_ids", "").split(",") if tag_id.strip()
+            ]
+        except ValueError:
+            logger.warning(
+                "Некорректные tag_ids/exclude_tag_ids: %r, %r",
+                params.get("tag_ids"), params.get("exclude_tag_ids"),
+            )
+            return [], [], []
+        if params.get("tag_match_type", "any").lower() == "all":
+            return [], tag_ids, exclude_tag_ids
+        return tag_ids, [], exclude_tag_ids
+
     def get_queryset(self):
-        # Добавляем прямой вывод всех query параметров для отладки
-        print("\n\n")
-        print("*" * 80)
-        print("ФИЛЬТРАЦИЯ КРЕАТОРОВ: ПОЛУЧЕНЫ ПАРАМЕТРЫ:")
-        for key, value in self.request.query_params.items():
-            print(f"   {key}: {value}")
-        print("*" * 80)
-        print("\n\n")
-        
+        # Карточкам списка нужны только теги; портфолио и соцсети — детальным
+        # ответам. Число запросов фиксировано и не зависит от размера страницы
+        # (проверяется заголовком X-Query-Diagnostics, см. logging_system.query_diagnostics)
+        prefetch = ("tags",) if self.action == "list" else ("tags", "portfolio_items", "social_links")
         qs = (
-            CreatorProfile.objects.select_related("user")
-            .prefetch_related("tags", "portfolio_items", "social_links")
-            .annotate(
-                services_count=Count("services", distinct=True),
-                base_price=Coalesce(
-                    Min("services__price"),
-                    Value(0),
-                    output_field=DecimalField(),
-                ),
-            )
+            # client_profile — для has_client_profile в сериализаторе пользователя
+            CreatorProfile.objects.select_related("user", "user__client_profile")
+            .prefetch_related(*prefetch)
+            # services_count, base_price, rating, reviews_count — колонки профиля (users.stats)
             .order_by("id")
         )
 
@@ -571,130 +402,10 @@ class CreatorProfileViewSet(viewsets.ModelViewSet):
         if user_id:
             qs = qs.filter(user__id=user_id)
             
-        # Добавляем поиск по имени, email или полному имени
-        search_query = self.request.query_params.get("search")
-        if search_query:
-            # Логируем поисковый запрос для отладки
-            logger.debug(f"Поисковый запрос: {search_query}")
-            
-            # Разделяем поисковый запрос на слова для поиска по отдельным частям имени и фамилии
-            search_words = search_query.split()
-            
-            # Создаем начальный пустой Q-объект
-            query_filter = Q()
-            
-            # Добавляем фильтр для полного поискового запроса
-            query_filter |= Q(user__username__icontains=search_query)
-            query_filter |= Q(user__email__icontains=search_query)
-            query_filter |= Q(nickname__icontains=search_query)
-            query_filter |= Q(specialization__icontains=search_query)
-            
-            # Если запрос состоит из нескольких слов, проверяем каждое слово отдельно
-            # для полей first_name и last_name
-            for word in search_words:
-                query_filter |= Q(user__first_name__icontains=word)
-                query_filter |= Q(user__last_name__icontains=word)
-            
-            # Применяем фильтры к запросу
-            qs = qs.filter(query_filter)
-            
-            # Логируем количество найденных результатов
-            logger.debug(f"Найдено креаторов по запросу '{search_query}': {qs.count()}")
-            
-        # Получаем параметры запроса для фильтрации по тегам
-        tag_ids_param = self.request.query_params.get('tag_ids')
-        tag_match_type = self.request.query_params.get('tag_match_type', 'any').lower()
-        
-        # Добавляем прямой вывод информации в консоль
-        
-        # Проверяем исходный набор данных
-        pre_filter_count = qs.count()
-        print(f"\nКоличество креаторов до фильтрации: {pre_filter_count}")
-        
-        # Получаем список креаторов для анализа
-        creators_with_tags_info = []
-        for creator in CreatorProfile.objects.all():
-            tags = [{'id': t.id, 'name': t.name} for t in creator.tags.all()]
-            creators_with_tags_info.append({
-                'id': creator.id, 
-                'name': getattr(creator.user, 'first_name', '') or getattr(creator.user, 'username', ''),
-                'tag_count': len(tags),
-                'tags': tags
-            })
-        
-        print("\nИнформация о креаторах и их тегах:")
-        for creator_info in creators_with_tags_info:
-            print(f"\nКреатор #{creator_info['id']} {creator_info['name']}:")
-            print(f"  - Кол-во тегов: {creator_info['tag_count']}")
-            if creator_info['tag_count'] > 0:
-                print("  - Теги: ")
-                for tag in creator_info['tags']:
-                    print(f"    * ID: {tag['id']}, Название: {tag['name']}")
-        print("\n")
-        
-        # Если есть параметр tag_ids, проверяем наличие креаторов с этими тегами
-        if tag_ids_param:
-            try:
-                tag_ids = [int(tag_id.strip()) for tag_id in tag_ids_param.split(',') if tag_id.strip()]
-                print(f"\nПроверка креаторов с тегами {tag_ids}:")
-                
-                # Получаем информацию о тегах
-                from django.apps import apps
-                Tag = apps.get_model('core', 'Tag')
-                existing_tags = Tag.objects.filter(id__in=tag_ids)
-                print(f"  Найденные теги: {list(existing_tags.values('id', 'name'))}")
-                
-                # Проверяем, есть ли креаторы с этими тегами
-                creators_with_tags = CreatorProfile.objects.filter(tags__id__in=tag_ids).values_list('id', flat=True).distinct()
-                print(f"  ID креаторов с этими тегами: {list(creators_with_tags)}")
-                print(f"  Количество креаторов с этими тегами: {len(creators_with_tags)}")
-            except Exception as e:
-                print(f"\nОшибка при проверке тегов: {str(e)}")
-        
-        # Конец дополнительного вывода
+        # Фильтрация по тегам через индекс тегов в памяти (core.tag_index)
+        any_of, all_of, none_of = self.get_tag_filter()
+        qs = tag_index.filter_queryset(qs, "creators", any_of, all_of, none_of)
 
-        # Если указаны ID тегов, применяем фильтрацию
-        if tag_ids_param:
-            try:
-                tag_ids = [int(tag_id.strip()) for tag_id in tag_ids_param.split(',') if tag_id.strip()]
-                logger.debug(f"[FILTER DEBUG] Преобразованные ID тегов для фильтрации: {tag_ids}")
-                
-                if tag_ids:
-                    # Предварительная проверка: есть ли в базе теги с такими ID?
-                    from django.apps import apps
-                    Tag = apps.get_model('core', 'Tag')
-                    existing_tags = Tag.objects.filter(id__in=tag_ids)
-                    logger.debug(f"[FILTER DEBUG] Найдены следующие теги в базе: {list(existing_tags.values('id', 'name'))}")
-                    
-                    # Предварительная проверка: есть ли креаторы с этими тегами?
-                    creators_with_tags = CreatorProfile.objects.filter(tags__id__in=tag_ids).values('id').distinct()
-                    logger.debug(f"[FILTER DEBUG] Количество креаторов с этими тегами: {creators_with_tags.count()}")
-                    logger.debug(f"[FILTER DEBUG] ID креаторов с этими тегами: {[c['id'] for c in creators_with_tags]}")
-                    
-                    if tag_match_type == 'all':
-                        # Фильтрация по всем указанным тегам (AND)
-                        # Аннотируем количество совпадающих тегов и фильтруем по этому количеству
-                        qs = qs.annotate(
-                            matching_tags_count=Count('tags', filter=Q(tags__id__in=tag_ids), distinct=True)
-                        ).filter(matching_tags_count=len(tag_ids))
-                        logger.debug(f"[FILTER DEBUG] Применена фильтрация по ВСЕМ тегам (AND). SQL: {qs.query}")
-                    else:  # 'any' или любое другое значение
-                        # Фильтрация по любому из указанных тегов (OR)
-                        qs = qs.filter(tags__id__in=tag_ids).distinct()
-                        logger.debug(f"[FILTER DEBUG] Применена фильтрация по ЛЮБОМУ из тегов (OR). SQL: {qs.query}")
-                    
-                    # Логируем результат после фильтрации
-                    post_filter_count = qs.count()
-                    logger.debug(f"[FILTER DEBUG] Количество креаторов после фильтрации по тегам: {post_filter_count} (было {pre_filter_count})")
-                else:
-                    logger.debug("[FILTER DEBUG] После обработки список tag_ids пуст, фильтрация не применена")
-            except ValueError as e:
-                # Если в параметре tag_ids передано некорректное значение, игнорируем фильтрацию
-                logger.error(f"[FILTER DEBUG] Ошибка при обработке tag_ids: {str(e)}. Значение параметра: '{tag_ids_param}'")
-                pass
-        else:
-            logger.debug("[FILTER DEBUG] Параметр tag_ids отсутствует, фильтрация по тегам не применяется")
-                
         # Фильтрация по полу пользователя
         gender = self.request.query_params.get('gender')
         if gender:
@@ -702,40 +413,8 @@ class CreatorProfileViewSet(viewsets.ModelViewSet):
             logger.debug(f"Фильтрация по полу: {gender}")
             # Фильтруем креаторов по полу связанного пользователя
             qs = qs.filter(user__gender=gender)
-            # Логируем количество найденных креаторов
-            logger.debug(f"Найдено креаторов с полом '{gender}': {qs.count()}")
-        
-        # Фильтрация по среднему времени выполнения работы
-        average_work_time = self.request.query_params.get('average_work_time')
-        if average_work_time:
-            # Логируем запрос для отладки
-            logger.debug(f"Фильтрация по среднему времени выполнения: {average_work_time}")
-            
-            # Определяем приоритеты времени ответа
-            time_priority = {
-                'up_to_24_hours': 1,
-                'up_to_3_days': 2,
-                'up_to_10_days': 3,
-                'up_to_14_days': 4,
-                'up_to_30_days': 5,
-                'up_to_60_days': 6,
-                'more_than_60_days': 7,
-            }
-            
-            # Получаем приоритет выбранного времени
-            filter_priority = time_priority.get(average_work_time, 999)
-            
-            # Получаем все допустимые значения времени (с приоритетом меньше или равным выбранному)
-            valid_times = [time for time, priority in time_priority.items() if priority <= filter_priority]
-            
-            logger.debug(f"Допустимые значения времени для фильтра '{average_work_time}': {valid_times}")
-            
-            # Фильтруем креаторов по всем допустимым значениям времени
-            qs = qs.filter(average_work_time__in=valid_times)
-            
-            # Логируем количество найденных креаторов
-            logger.debug(f"Найдено креаторов со средним временем выполнения до '{average_work_time}': {qs.count()}")
-                
+
+        # Сортировка и фильтры по цене, рейтингу и времени работы — CreatorCatalogFilter
         return qs
 
     # ------ actions -------------------------------------------------
@@ -774,6 +453,27 @@ class CreatorProfileViewSet(viewsets.ModelViewSet):
 
         return Response({"error": "Профиль креатора не найден"}, status=status.HTTP_404_NOT_FOUND)
 
+    @action(detail=False, methods=["get"], url_path="tag-facets")
+    def tag_facets(self, request):
+        """
+        Фасеты тегов каталога: сколько креаторов текущей выборки (те же
+        параметры фильтрации, что у списка) имеет каждый тег.
+        """
+        any_of, all_of, none_of = self.get_tag_filter()
+        if set(request.query_params) <= self.TAG_FILTER_PARAMS:
+            # Выборка задана только тегами: считаем по индексу без запросов к базе
+            return Response(tag_index.facets_data("creators", None, any_of, all_of, none_of))
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(tag_index.facets_data("creators", queryset))
+
+    @action(detail=False, methods=["get"], url_path="sort-options")
+    def sort_options(self, request):
+        """
+        Поддерживаемые сортировки (значения ordering) и диапазонные фильтры
+        каталога; другие сортировки список отклоняет с ошибкой 400.
+        """
+        return Response(sort_options_data())
+
     @action(detail=True, methods=["get"])
     def retrieve_detail(self, request, pk=None):
         instance = self.get_object()
@@ -2,6 +2,7 @@
  * API для работы с чатами и заказами в чатах
  */
 
+import axios from 'axios';
 import api from '@/services/api';
 
 // Типы данных
@@ -83,6 +84,85 @@ export const getChats = async () => {
   return response.data;
 };
 
+/**
+ * Участник чата из списка чатов (/api/chats/, поле chat_participants)
+ */
+export interface ChatParticipant {
+  id: number;
+  username: string;
+  avatar?: string | null;
+  role: 'creator' | 'client';
+  chat_id: string; // формат: "{id_креатора}-{id_клиента}"
+  chat_pk?: number;
+  unread_count?: number;
+  last_activity_at?: string;
+}
+
+/**
+ * Страница списка чатов и курсор следующей страницы (null — страница последняя)
+ */
+export interface ChatParticipantsPage {
+  participants: ChatParticipant[];
+  nextCursor: string | null;
+}
+
+const authHeaders = (token: string | null) => (token ? { 'Authorization': `Bearer ${token}` } : {});
+
+/**
+ * Загружает одну страницу списка чатов текущего пользователя.
+ *
+ * Используется курсорная пагинация (?pagination=cursor): следующая страница
+ * запрашивается по nextCursor, когда пользователь до нее долистал. Из ссылки
+ * next берется только курсор: абсолютный URL бэкенда может не совпадать с
+ * адресом фронтенда за прокси.
+ *
+ * @param token - JWT текущего пользователя
+ * @param cursor - курсор страницы (null — первая страница)
+ */
+export const fetchChatParticipantsPage = async (
+  token: string | null,
+  cursor: string | null = null
+): Promise<ChatParticipantsPage> => {
+  const params: Record<string, string> = { pagination: 'cursor' };
+  if (cursor) {
+    params.cursor = cursor;
+  }
+  const response = await axios.get('/api/chats/', { params, headers: authHeaders(token) });
+
+  const next: string | null = response.data?.next ?? null;
+  return {
+    participants: response.data?.chat_participants ?? [],
+    nextCursor: next ? new URL(next, window.location.origin).searchParams.get('cursor') : null,
+  };
+};
+
+/**
+ * Проверяет, есть ли у пользователя чат с собеседником.
+ *
+ * Один запрос по паре участников (GET /api/chats/{id_креатора}-{id_клиента}/,
+ * роли в паре не важны) вместо просмотра всего списка чатов.
+ *
+ * @param creatorId - ID креатора
+ * @param clientId - ID клиента
+ * @param token - JWT текущего пользователя
+ * @returns true, если чат существует
+ */
+export const chatExists = async (
+  creatorId: string | number,
+  clientId: string | number,
+  token: string | null
+): Promise<boolean> => {
+  try {
+    await axios.get(`/api/chats/${creatorId}-${clientId}/`, { headers: authHeaders(token) });
+    return true;
+  } catch (error) {
+    if (axios.isAxiosError(error) && error.response?.status === 404) {
+      return false;
+    }
+    throw error;
+  }
+};
+
 /**
  * Получает сообщения чата
  * @param chatId - ID чата
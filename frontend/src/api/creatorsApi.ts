@@ -33,16 +33,16 @@ export const fetchCreators = async (page = 1, pageSize = 10): Promise<CreatorsRe
 };
 
 /**
- * Получить топ-креаторов по рейтингу и количеству заказов
+ * Получить топ-креаторов по рейтингу
  * @param limit - Ограничение на количество возвращаемых креаторов
  * @returns Массив популярных креаторов
  */
 export const fetchTopCreators = async (limit = 4): Promise<Creator[]> => {
   try {
-    // Получаем креаторов, отсортированных по рейтингу и активности
+    // Получаем креаторов, отсортированных по рейтингу (сортировки каталога — creator-profiles/sort-options/)
     const response = await apiClient.get<CreatorsResponse>('creator-profiles/', {
       params: {
-        ordering: '-rating,-completed_orders_count',
+        ordering: '-rating',
         page_size: limit,
       },
     });
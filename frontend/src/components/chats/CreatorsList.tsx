@@ -1,6 +1,5 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef, useCallback } from 'react';
 import { useNavigate } from 'react-router-dom';
-import axios from 'axios';
 import { useAuth } from '@/contexts/AuthContext';
 import { 
   Card, 
@@ -10,17 +9,7 @@ import { Button } from '@/components/ui/button';
 import { Skeleton } from '@/components/ui/skeleton';
 import { Avatar, AvatarFallback, AvatarImage } from '@/components/ui/avatar';
 import { MessageSquare } from 'lucide-react';
-
-/**
- * Интерфейс для участника чата в списке (креатор или клиент)
- */
-interface ChatParticipant {
-  id: number;
-  username: string;
-  avatar?: string | null;
-  role: 'creator' | 'client';
-  chat_id: string; // формат: "{id_креатора}-{id_клиента}"
-}
+import { fetchChatParticipantsPage, ChatParticipant } from '@/api/chatsApi';
 
 /**
  * Компонент для отображения списка доступных участников чата
@@ -29,11 +18,15 @@ const CreatorsList: React.FC = () => {
   const [participants, setParticipants] = useState<ChatParticipant[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  // Курсор следующей страницы списка (null — все страницы загружены)
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const sentinelRef = useRef<HTMLDivElement | null>(null);
   const navigate = useNavigate();
   const { isAuthenticated, user, token } = useAuth();
 
   /**
-   * Загружает список доступных участников чата при монтировании компонента
+   * Загружает первую страницу списка участников чата при монтировании компонента
    */
   useEffect(() => {
     const fetchChatParticipants = async () => {
@@ -49,32 +42,10 @@ const CreatorsList: React.FC = () => {
         }
         
 
-        // Запрашиваем список участников чата
-        const response = await axios.get('/api/chats/', {
-          headers: {
-            'Authorization': `Bearer ${token}`
-          }
-        });
-        
-
-        
-        if (response.data && response.data.chat_participants) {
-
-          setParticipants(response.data.chat_participants);
-        } else {
-          // Обратная совместимость со старым форматом API
-          if (response.data && response.data.creators) {
-
-            const creatorsAsParticipants = response.data.creators.map((creator: any) => ({
-              ...creator,
-              role: 'creator'
-            }));
-            setParticipants(creatorsAsParticipants);
-          } else {
-
-            setParticipants([]);
-          }
-        }
+        // Запрашиваем первую страницу; следующие подгружаются при прокрутке
+        const page = await fetchChatParticipantsPage(token);
+        setParticipants(page.participants);
+        setNextCursor(page.nextCursor);
         
         setLoading(false);
       } catch (err: any) {
@@ -94,6 +65,43 @@ const CreatorsList: React.FC = () => {
     fetchChatParticipants();
   }, [isAuthenticated, token]);
 
+  /**
+   * Загружает следующую страницу списка
+   */
+  const loadMore = useCallback(async () => {
+    if (!nextCursor || loadingMore) {
+      return;
+    }
+    setLoadingMore(true);
+    try {
+      const page = await fetchChatParticipantsPage(token, nextCursor);
+      setParticipants(prev => [...prev, ...page.participants]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error('Ошибка при загрузке списка чатов:', err);
+      setError('Ошибка при загрузке данных');
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [nextCursor, loadingMore, token]);
+
+  /**
+   * Подгружает следующую страницу, когда конец списка появляется на экране
+   */
+  useEffect(() => {
+    const sentinel = sentinelRef.current;
+    if (!sentinel || !nextCursor) {
+      return;
+    }
+    const observer = new IntersectionObserver((entries) => {
+      if (entries.some(entry => entry.isIntersecting)) {
+        loadMore();
+      }
+    }, { rootMargin: '200px' });
+    observer.observe(sentinel);
+    return () => observer.disconnect();
+  }, [nextCursor, loadMore]);
+
   /**
    * Открывает чат с участником по его chat_id
    * @param chatId - ID чата в формате "{id_креатора}-{id_клиента}"
@@ -162,6 +170,11 @@ const CreatorsList: React.FC = () => {
               </CardContent>
             </Card>
           ))}
+          {nextCursor && (
+            <div ref={sentinelRef} className="flex justify-center py-2">
+              {loadingMore && <Skeleton className="h-8 w-24" />}
+            </div>
+          )}
         </div>
       )}
 
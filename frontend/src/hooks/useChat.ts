@@ -3,6 +3,7 @@ import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { toast } from 'react-toastify';
 import { useAuth } from '@/contexts/AuthContext';
+import { chatExists } from '@/api/chatsApi';
 
 /**
  * Хук для работы с чатами
@@ -33,23 +34,12 @@ export const useChat = () => {
 
     try {
       // Сначала проверяем, существует ли уже чат с этим креатором
-      const existingChatsResponse = await axios.get('/api/chats/', {
-        headers: {
-          'Authorization': `Bearer ${token}`
-        }
-      });
-      
-      // В новом формате API возвращает список участников чатов (креаторы и клиенты)
-      const { chat_participants = [] } = existingChatsResponse.data;
-      
-      // Проверяем, есть ли уже этот креатор в списке участников
-      const existingParticipant = chat_participants.find(
-        (participant: any) => participant.id === Number(creatorId) && participant.role === 'creator'
-      );
+      // (один запрос по паре участников)
+      const chatId = `${creatorId}-${user.id}`;
 
-      if (existingParticipant && existingParticipant.chat_id) {
-        // Если креатор найден, переходим на чат с ним
-        navigate(`/chats/${existingParticipant.chat_id}`);
+      if (await chatExists(creatorId, user.id, token)) {
+        // Если чат найден, переходим на него
+        navigate(`/chats/${chatId}`);
       } else {
         // Если чата нет, создаем новый
         const response = await axios.post('/api/chats/', {
@@ -61,9 +51,6 @@ export const useChat = () => {
           }
         });
 
-        // Формируем chat_id в формате {creator_id}-{client_id}
-        const chatId = `${creatorId}-${user.id}`;
-        
         // Перенаправляем на новый чат
         navigate(`/chats/${chatId}`);
         toast.success('Чат успешно создан');